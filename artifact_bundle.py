@@ -0,0 +1,117 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import concurrent.futures
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+from typing import Dict, List
+
+import boto3
+from botocore.config import Config
+
+from constants import *
+from run_catalog import get_run_key_prefix
+
+
+def get_bundle_manifest_key(run_id: str) -> str:
+    """
+    Get the key of a run bundle manifest in the export bucket
+    :param run_id: ID of the run
+    :return: Key of the bundle manifest
+    """
+    return f'{EXPORT_KEY_PREFIX}{get_run_key_prefix(run_id)}/{ARTIFACT_BUNDLE_FOLDER_NAME}/{ARTIFACT_BUNDLE_MANIFEST_NAME}'
+
+
+def read_bundle_member(member: bytes, name: str) -> bytes:
+    """
+    Read a file from its compressed bundle member
+    :param member: Bytes of the gzip member holding the tar entry of the file
+    :param name: Name of the file in the bundle
+    :return: Content of the file
+    """
+    with tarfile.open(fileobj=io.BytesIO(gzip.decompress(member))) as member_tar:
+        member_file = member_tar.extractfile(name)
+        if not member_file:
+            raise RuntimeError(f'{name} is not a file in the bundle member')
+        return member_file.read()
+
+
+class ArtifactBundle(object):
+    """
+    Read the files of a run artifact bundle uploaded by the artifact upload lambda.
+    Each file of the bundle is compressed separately, so it's fetched with a single range GET using the byte range
+    recorded in the bundle manifest instead of downloading the whole bundle
+    """
+
+    def __init__(self, bucket_name: str, manifest_key: str, region: str,
+                 max_workers: int = DEFAULT_ARTIFACT_FETCH_WORKERS):
+        """
+        :param bucket_name: Name of the bucket where the bundle is uploaded
+        :param manifest_key: Key of the bundle manifest
+        :param region: AWS region of the bucket
+        :param max_workers: Maximum number of files fetched concurrently
+        """
+        super().__init__()
+        self._bucket_name = bucket_name
+        self._manifest_key = manifest_key
+        self._max_workers = max_workers
+        self._s3_client = boto3.client('s3', config=Config(region_name=region, max_pool_connections=max_workers))
+        self._manifest = {}
+
+    @property
+    def manifest(self) -> Dict:
+        if not self._manifest:
+            response = self._s3_client.get_object(Bucket=self._bucket_name, Key=self._manifest_key)
+            self._manifest = json.loads(response['Body'].read())
+            if self._manifest.get('format') != ARTIFACT_BUNDLE_FORMAT:
+                raise RuntimeError(f'Unsupported bundle format {self._manifest.get("format")} in {self._manifest_key}')
+        return self._manifest
+
+    @property
+    def files(self) -> List[Dict]:
+        return self.manifest['files']
+
+    def read(self, name: str) -> bytes:
+        """
+        Fetch a file of the bundle with a range GET and verify its hash
+        :param name: Name of the file in the bundle
+        :return: Content of the file
+        """
+        entry = next((entry for entry in self.files if entry['name'] == name), None)
+        if not entry:
+            raise RuntimeError(f'{name} is not found in bundle {self.manifest["bundle_key"]}')
+
+        response = self._s3_client.get_object(
+            Bucket=self._bucket_name, Key=self.manifest['bundle_key'],
+            Range=f'bytes={entry["offset"]}-{entry["offset"] + entry["length"] - 1}')
+        content = read_bundle_member(response['Body'].read(), name)
+        if hashlib.sha256(content).hexdigest() != entry['sha256']:
+            raise RuntimeError(f'Hash of {name} does not match the bundle manifest')
+        return content
+
+    def extract(self, output_path: str, names: List[str] = None) -> List[str]:
+        """
+        Fetch files of the bundle concurrently and save them under the output path
+        :param output_path: Folder to save the files to. Files keep their path in the bundle
+        :param names: Names of the files to fetch. All files are fetched if not specified
+        :return: Paths of the saved files
+        """
+        names = names if names else [entry['name'] for entry in self.files]
+        output_path = os.path.abspath(output_path)
+
+        def extract_file(name: str) -> str:
+            file_path = os.path.abspath(os.path.join(output_path, *name.replace('\\', '/').split('/')))
+            if not file_path.startswith(output_path + os.sep):
+                raise RuntimeError(f'{name} is outside of the output path')
+            content = self.read(name)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'wb') as output_file:
+                output_file.write(content)
+            return file_path
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            return list(executor.map(extract_file, names))
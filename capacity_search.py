@@ -0,0 +1,358 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import gzip
+import operator
+import re
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple
+
+import boto3
+from botocore.config import Config
+
+from client_readiness import ClientReadinessMonitor
+from constants import *
+from log_analyzer import LogRecord, SeriesStatistics, parse_log
+
+SLO_OPERATORS = {'<=': operator.le, '>=': operator.ge, '<': operator.lt, '>': operator.gt}
+
+
+class SloObjective(NamedTuple):
+    """
+    Service level objective on a statistic of a server series, e.g. tick_time_ms:p95<=33.3
+    """
+    series: str
+    statistic: str
+    operator: str
+    threshold: float
+
+    def __str__(self) -> str:
+        return f'{self.series}:{self.statistic}{self.operator}{self.threshold:g}'
+
+
+def parse_slo(text: str) -> SloObjective:
+    """
+    Parse a service level objective
+    :param text: Objective in the <series>:<statistic><operator><threshold> format, e.g. tick_time_ms:p95<=33.3
+    :return: Service level objective
+    """
+    match = re.match(SLO_PATTERN, text.strip())
+    if not match:
+        raise RuntimeError(f'Invalid service level objective {text}. '
+                           f'Expected <series>:<statistic><operator><threshold>, e.g. tick_time_ms:p95<=33.3')
+    series, statistic, objective_operator, threshold = match.groups()
+    return SloObjective(series, statistic, objective_operator, float(threshold))
+
+
+def evaluate_slos(objectives: List[SloObjective], summaries: Dict[str, Dict]) -> Tuple[bool, List[Dict]]:
+    """
+    Evaluate service level objectives against the summaries of the server series measured at a step.
+    Objectives on series without samples fail, so a pattern which doesn't match the logs isn't mistaken for a pass.
+    Objectives on series marked unknown, i.e. which couldn't be read, neither pass nor fail
+    :param objectives: Service level objectives
+    :param summaries: Summaries keyed by series, see SeriesStatistics.get_summary. Events only have a count
+    :return: Whether no objective failed, and the result of every objective. Unknown results don't pass
+    """
+    results = []
+    for objective in objectives:
+        summary = summaries.get(objective.series, {})
+        if summary.get('unknown'):
+            results.append({'objective': str(objective), 'value': None, 'passed': None})
+            continue
+        value = summary.get(objective.statistic)
+        if value is None and objective.statistic == 'count':
+            value = 0
+        passed = value is not None and SLO_OPERATORS[objective.operator](value, objective.threshold)
+        results.append({'objective': str(objective), 'value': value, 'passed': passed})
+    return all(result['passed'] is not False for result in results), results
+
+
+def get_slo_percentiles(objectives: List[SloObjective]) -> List[float]:
+    """
+    Get the percentiles to compute to evaluate the objectives
+    :param objectives: Service level objectives
+    :return: Percentiles, including the default analysis percentiles
+    """
+    percentiles = set(ANALYSIS_PERCENTILES)
+    for objective in objectives:
+        if objective.statistic.startswith('p'):
+            percentiles.add(float(objective.statistic[1:]))
+    return sorted(percentiles)
+
+
+class CapacitySearch(object):
+    """
+    Search the maximum number of clients which pass the service level objectives. The client count grows
+    exponentially until a step fails, then the last passing and the first failing counts are bisected
+    """
+
+    def __init__(self, run_step: Callable[[int], Dict], min_count: int = DEFAULT_CAPACITY_MIN_CLIENTS,
+                 max_count: int = DEFAULT_CAPACITY_MAX_CLIENTS, resolution: int = DEFAULT_CAPACITY_RESOLUTION):
+        """
+        :param run_step: Deploy and measure a client count. Returns the step result, with a passed key
+        :param min_count: Client count of the first step
+        :param max_count: Maximum client count to try
+        :param resolution: Stop bisecting when the last passing and first failing counts are this close
+        """
+        super().__init__()
+        if not 0 < min_count <= max_count:
+            raise RuntimeError(f'Client counts must satisfy 0 < min <= max. Got min {min_count} and max {max_count}')
+        self._run_step = run_step
+        self._min_count = min_count
+        self._max_count = max_count
+        self._resolution = max(resolution, 1)
+        self._steps = []
+
+    @property
+    def steps(self) -> List[Dict]:
+        return self._steps
+
+    def search(self) -> Dict:
+        """
+        Run the search
+        :return: Maximum passing client count (0 if none passed), first failing count (None if none failed) and the
+        capacity curve, i.e. the steps ordered by client count
+        """
+        passing_count = 0
+        failing_count = None
+        count = self._min_count
+        while True:
+            if self._step(count):
+                passing_count = count
+                if count == self._max_count:
+                    break
+                count = min(count * 2, self._max_count)
+            else:
+                failing_count = count
+                break
+
+        if failing_count is not None:
+            low = max(passing_count, self._min_count - 1)
+            while failing_count - low > self._resolution:
+                count = (low + failing_count) // 2
+                if self._step(count):
+                    passing_count = low = count
+                else:
+                    failing_count = count
+
+        return {
+            'max_passing_count': passing_count,
+            'first_failing_count': failing_count,
+            'curve': sorted(self._steps, key=lambda step: step['client_count'])
+        }
+
+    def _step(self, count: int) -> bool:
+        print(f'Capacity step {len(self._steps) + 1}: {count} clients')
+        step = {'client_count': count, **self._run_step(count)}
+        self._steps.append(step)
+        details = ', '.join(_format_result(result) for result in step.get('results', [])) or step.get('reason', '')
+        print(f'{count} clients {"passed" if step["passed"] else "failed"}: {details}')
+        return step['passed']
+
+
+class ClientScaler(object):
+    """
+    Change the number of client tasks and wait for them to connect
+    """
+
+    def __init__(self, cluster_name: str, service_name: str, log_group_name: str, region: str):
+        """
+        :param cluster_name: Name of the client cluster
+        :param service_name: Name of the client service
+        :param log_group_name: Name of the client log group the readiness events are reported to
+        :param region: AWS region of the clients
+        """
+        super().__init__()
+        self._cluster_name = cluster_name
+        self._service_name = service_name
+        self._ecs_client = boto3.client('ecs', config=Config(region_name=region))
+        self._monitor = ClientReadinessMonitor(log_group_name, region)
+
+    def get_desired_count(self) -> int:
+        response = self._ecs_client.describe_services(cluster=self._cluster_name, services=[self._service_name])
+        return response['services'][0]['desiredCount']
+
+    def set_desired_count(self, count: int) -> None:
+        self._ecs_client.update_service(cluster=self._cluster_name, service=self._service_name, desiredCount=count)
+
+    def scale(self, count: int, timeout_seconds: float = DEFAULT_CAPACITY_SCALE_TIMEOUT_SECONDS,
+              poll_seconds: float = DEFAULT_READINESS_POLL_SECONDS) -> bool:
+        """
+        Change the desired count of the client service and wait until exactly that many client tasks are running
+        and connected
+        :param count: Number of clients
+        :param timeout_seconds: Maximum time to wait
+        :param poll_seconds: Time between two polls
+        :return: Whether the clients are connected before the timeout
+        """
+        self.set_desired_count(count)
+        deadline = time.time() + timeout_seconds
+        while True:
+            self._monitor.poll()
+            # Stopped tasks don't always report an event, so only running tasks are counted
+            running_task_ids = self._get_running_task_ids()
+            connected_count = sum(1 for client in self._monitor.clients.values()
+                                  if client['status'] == CLIENT_STATUS_CONNECTED
+                                  and client['task_id'] in running_task_ids)
+            print(f'{connected_count} of {count} clients connected ({len(running_task_ids)} tasks running)')
+            if connected_count == count and len(running_task_ids) == count:
+                return True
+            if time.time() + poll_seconds > deadline:
+                return False
+            time.sleep(poll_seconds)
+
+    def _get_running_task_ids(self) -> set:
+        task_ids = set()
+        paginator = self._ecs_client.get_paginator('list_tasks')
+        for page in paginator.paginate(cluster=self._cluster_name, serviceName=self._service_name,
+                                       desiredStatus='RUNNING'):
+            task_ids.update(task_arn.split('/')[-1] for task_arn in page.get('taskArns', []))
+        return task_ids
+
+
+class ServerLogTail(object):
+    """
+    Read the server log lines synced to the artifacts bucket since the previous read
+    """
+
+    def __init__(self, bucket_name: str, key_prefix: str, region: str):
+        """
+        :param bucket_name: Name of the artifacts bucket
+        :param key_prefix: Key prefix of the server logs, runs/<run ID>/server/<instance ID>/log/
+        :param region: AWS region of the bucket
+        """
+        super().__init__()
+        self._bucket_name = bucket_name
+        self._key_prefix = key_prefix
+        self._s3_client = boto3.client('s3', config=Config(region_name=region))
+        self._read_keys = set()
+        # Bytes of the last line of every file generation which is not complete yet
+        self._partial_lines = {}
+
+    def read_lines(self) -> Iterator[str]:
+        """
+        Read the lines of the chunks synced since the previous read
+        :return: Log lines in chunk order
+        """
+        keys = []
+        paginator = self._s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self._bucket_name, Prefix=self._key_prefix):
+            keys.extend(item['Key'] for item in page.get('Contents', [])
+                        if item['Key'] not in self._read_keys
+                        and re.match(ARTIFACT_CHUNK_NAME_PATTERN, item['Key'].rsplit('/', 1)[-1]))
+
+        for key in sorted(keys):
+            self._read_keys.add(key)
+            folder, chunk_name = key.rsplit('/', 1)
+            file_id = f'{folder}/{re.match(ARTIFACT_CHUNK_NAME_PATTERN, chunk_name).group(1)}'
+            response = self._s3_client.get_object(Bucket=self._bucket_name, Key=key)
+            content = self._partial_lines.pop(file_id, b'') + gzip.decompress(response['Body'].read())
+            lines = content.split(b'\n')
+            if lines[-1]:
+                self._partial_lines[file_id] = lines[-1]
+            for line in lines[:-1]:
+                yield line.decode('utf-8', errors='replace').rstrip('\r')
+
+
+class ServerMetricsCollector(object):
+    """
+    Measure the server series evaluated by the service level objectives: the samples and events of the server logs
+    and the CPU utilization of the server instance
+    """
+
+    def __init__(self, log_tail: ServerLogTail, instance_id: str, region: str,
+                 cpu_delay_seconds: float = CAPACITY_CPU_DELAY_SECONDS):
+        """
+        :param log_tail: Tail of the synced server logs
+        :param instance_id: ID of the server instance
+        :param region: AWS region of the server
+        :param cpu_delay_seconds: How long to wait for the CPU utilization of the measurement to be published
+        """
+        super().__init__()
+        self._log_tail = log_tail
+        self._instance_id = instance_id
+        self._cpu_delay_seconds = cpu_delay_seconds
+        self._cloudwatch_client = boto3.client('cloudwatch', config=Config(region_name=region))
+        self._start_time = time.time()
+
+    def start(self) -> None:
+        """
+        Start a measurement. Logs synced before the start are skipped
+        """
+        for _ in self._log_tail.read_lines():
+            pass
+        self._start_time = time.time()
+
+    def collect(self, percentiles: List[float]) -> Dict[str, Dict]:
+        """
+        Summarize the server series measured since the start
+        :param percentiles: Percentiles to compute
+        :return: Summaries keyed by series, see SeriesStatistics.get_summary. Events only have a count. The CPU
+        utilization is marked unknown if none is published for the measurement
+        """
+        series = {}
+        for record in parse_log(self._log_tail.read_lines()):
+            self._add_record(series, record)
+        cpu_utilization = self._get_cpu_utilization()
+        for value in cpu_utilization:
+            self._add_record(series, LogRecord(0, CAPACITY_CPU_SERIES, value))
+
+        summaries = {kind: {'count': value} for kind, value in series.items() if isinstance(value, int)}
+        summaries.update({kind: value.get_summary(percentiles) for kind, value in series.items()
+                          if isinstance(value, SeriesStatistics)})
+        if not cpu_utilization:
+            print(f'[Warn] No CPU utilization of {self._instance_id} is published for the measurement. '
+                  f'Its objectives are unknown')
+            summaries[CAPACITY_CPU_SERIES] = {'count': 0, 'unknown': True}
+        return summaries
+
+    def _get_cpu_utilization(self) -> List[float]:
+        # The window is padded to whole periods, and the datapoints are polled until the last full period is published
+        start_time = self._start_time - self._start_time % CAPACITY_CPU_PERIOD_SECONDS
+        end_time = time.time()
+        deadline = end_time + self._cpu_delay_seconds
+        while True:
+            response = self._cloudwatch_client.get_metric_statistics(
+                Namespace='AWS/EC2', MetricName='CPUUtilization',
+                Dimensions=[{'Name': 'InstanceId', 'Value': self._instance_id}],
+                StartTime=datetime.fromtimestamp(start_time, timezone.utc),
+                EndTime=datetime.fromtimestamp(end_time - end_time % CAPACITY_CPU_PERIOD_SECONDS +
+                                               CAPACITY_CPU_PERIOD_SECONDS, timezone.utc),
+                Period=CAPACITY_CPU_PERIOD_SECONDS, Statistics=['Maximum'])
+            datapoints = response.get('Datapoints', [])
+            last_start = max((datapoint['Timestamp'].timestamp() for datapoint in datapoints), default=0)
+            if last_start >= end_time - 2 * CAPACITY_CPU_PERIOD_SECONDS or time.time() >= deadline:
+                return [datapoint['Maximum'] for datapoint in datapoints]
+            time.sleep(CAPACITY_CPU_POLL_SECONDS)
+
+    @staticmethod
+    def _add_record(series: Dict, record: LogRecord) -> None:
+        if record.kind in LOG_EVENT_KINDS:
+            series[record.kind] = series.get(record.kind, 0) + 1
+            return
+        if record.kind not in series:
+            series[record.kind] = SeriesStatistics()
+        series[record.kind].add(record.value)
+
+
+def format_capacity_curve(result: Dict) -> str:
+    """
+    Format the capacity curve of a search as a text table
+    :param result: Search result
+    :return: Text table
+    """
+    lines = [f'{"clients":>8} {"result":<8} objectives']
+    for step in result['curve']:
+        lines.append(f'{step["client_count"]:>8} {"pass" if step["passed"] else "fail":<8} ' +
+                     (', '.join(_format_result(result) for result in step.get('results', [])) or
+                      step.get('reason', '')))
+    lines.append(f'Maximum passing client count: {result["max_passing_count"]}')
+    return '\n'.join(lines)
+
+
+def _format_result(result: Dict) -> str:
+    if result['passed'] is None:
+        return f'{result["objective"]} (unknown)'
+    value = '-' if result['value'] is None else f'{result["value"]:.2f}'
+    return f'{result["objective"]} ({value})'
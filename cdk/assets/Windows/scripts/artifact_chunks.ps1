@@ -0,0 +1,95 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Writes the chunks of the incremental server and client artifact syncs (see sync_server_artifacts.ps1 and
+# client_artifacts.ps1). A chunk holds the bytes appended to a file since the previous chunk, as one gzip member keyed
+# by the file path, file generation and byte offset:
+#     <key prefix>/<path relative to the source root>/<generation>-<offset>.gz
+# The generation is the creation time of the file. A new generation starts when the file is recreated, i.e. its file
+# index changes, or truncated. NTFS keeps the creation time of a file recreated shortly after it is deleted (file
+# tunneling), so a new generation which would reuse the keys of the previous one is named from the current time.
+# Embedded in the server automation SSM document, and dot-sourced by client_artifacts.ps1.
+
+if (-not ('ArtifactFile' -as [type])) {
+    Add-Type -TypeDefinition @'
+using System;
+using System.ComponentModel;
+using System.IO;
+using System.Runtime.InteropServices;
+using Microsoft.Win32.SafeHandles;
+
+public static class ArtifactFile {
+    [StructLayout(LayoutKind.Sequential)]
+    private struct FileInformation {
+        public uint FileAttributes;
+        public System.Runtime.InteropServices.ComTypes.FILETIME CreationTime;
+        public System.Runtime.InteropServices.ComTypes.FILETIME LastAccessTime;
+        public System.Runtime.InteropServices.ComTypes.FILETIME LastWriteTime;
+        public uint VolumeSerialNumber;
+        public uint FileSizeHigh;
+        public uint FileSizeLow;
+        public uint NumberOfLinks;
+        public uint FileIndexHigh;
+        public uint FileIndexLow;
+    }
+
+    [DllImport("kernel32.dll", SetLastError = true)]
+    private static extern bool GetFileInformationByHandle(SafeFileHandle file, out FileInformation information);
+
+    // Index of the file on its volume, which changes when the file is recreated
+    public static string GetFileId(FileStream stream) {
+        FileInformation information;
+        if (!GetFileInformationByHandle(stream.SafeFileHandle, out information)) {
+            throw new Win32Exception(Marshal.GetLastWin32Error());
+        }
+        return (((ulong)information.FileIndexHigh << 32) | information.FileIndexLow).ToString("x16");
+    }
+}
+'@
+}
+
+# Write the next chunk of a file to $ChunkFile
+# $Entry is the file ID, generation and offset synced last, $null if the file was never synced
+# Returns the file ID, generation, offset and length of the chunk, $null if the file has no new bytes
+function Write-ArtifactChunk([System.IO.FileInfo]$File, $Entry, [string]$ChunkFile, [byte[]]$Buffer,
+                             [long]$MaxChunkBytes) {
+    # Files stay open in the writing process, so share read, write and delete access instead of copying them
+    $source = [System.IO.File]::Open($File.FullName, 'Open', 'Read', 'ReadWrite, Delete')
+    try {
+        $fileId = [ArtifactFile]::GetFileId($source)
+        $generation = $File.CreationTimeUtc.ToString('yyyyMMddTHHmmssfffZ')
+        $offset = [long]0
+        if ($Entry -and $Entry.file_id -eq $fileId -and $Entry.offset -le $source.Length) {
+            $generation = $Entry.generation
+            $offset = [long]$Entry.offset
+        } elseif ($Entry -and $Entry.generation -ge $generation) {
+            $generation = [DateTime]::UtcNow.ToString('yyyyMMddTHHmmssfffZ')
+        }
+        $remaining = [math]::Min($source.Length - $offset, $MaxChunkBytes)
+        if ($remaining -le 0) {
+            return $null
+        }
+
+        $source.Seek($offset, 'Begin') | Out-Null
+        $target = [System.IO.File]::Create($ChunkFile)
+        $gzip = New-Object System.IO.Compression.GZipStream($target, [System.IO.Compression.CompressionLevel]::Optimal)
+        $length = [long]0
+        try {
+            while ($remaining -gt 0) {
+                $read = $source.Read($Buffer, 0, [int][math]::Min($Buffer.Length, $remaining))
+                if ($read -le 0) {
+                    break
+                }
+                $gzip.Write($Buffer, 0, $read)
+                $remaining -= $read
+                $length += $read
+            }
+        } finally {
+            $gzip.Dispose()
+            $target.Dispose()
+        }
+        return @{ file_id = $fileId; generation = $generation; offset = $offset; length = $length }
+    } finally {
+        $source.Dispose()
+    }
+}
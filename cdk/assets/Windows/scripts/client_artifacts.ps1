@@ -0,0 +1,127 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Incrementally syncs the client logs and metrics to the artifacts bucket, so the client frame timings are kept after
+# the task stops and are analysed alongside the server artifacts.
+# Chunks are written like the server sync chunks (see artifact_chunks.ps1): each sync only uploads the bytes appended
+# to every file since the previous sync, keyed by the file path, file generation and byte offset:
+#     <key prefix>/<path relative to the source root>/<generation>-<offset>.gz
+# The key prefix is runs/<run ID>/client/<task ID>, or <ddMMyyyy>/client/<task ID> if no run ID is set.
+# Dot-source this script from the client launcher.
+
+. "$PSScriptRoot\artifact_chunks.ps1"
+
+# Requested when the container is stopped. The handler waits for the final sync before the container exits
+Add-Type -TypeDefinition @'
+using System;
+using System.Runtime.InteropServices;
+using System.Threading;
+
+public static class ClientShutdown {
+    public static readonly ManualResetEvent Requested = new ManualResetEvent(false);
+    public static readonly ManualResetEvent Completed = new ManualResetEvent(false);
+
+    private delegate bool HandlerRoutine(int ctrlType);
+    // Keep a reference to the handler so it isn't garbage collected
+    private static HandlerRoutine handler = OnControlEvent;
+    private static int waitMilliseconds;
+
+    [DllImport("kernel32.dll")]
+    private static extern bool SetConsoleCtrlHandler(HandlerRoutine handler, bool add);
+
+    public static void Register(int waitForCompletionMilliseconds) {
+        waitMilliseconds = waitForCompletionMilliseconds;
+        SetConsoleCtrlHandler(handler, true);
+    }
+
+    private static bool OnControlEvent(int ctrlType) {
+        // Docker stops Windows containers with CTRL_SHUTDOWN_EVENT (6). The process exits when the handler returns
+        Requested.Set();
+        if (!Completed.WaitOne(waitMilliseconds)) {
+            Console.Out.WriteLine("[Warn] The final sync of the client artifacts did not complete within " +
+                                  waitMilliseconds + " ms");
+        }
+        return true;
+    }
+}
+'@
+
+function New-ArtifactSync([string]$Bucket, [string]$RunId, [string]$RunKeyPrefix, [string]$TaskId,
+                          [string]$SourceRoot, [string[]]$SourceFolders, [int]$IntervalSeconds,
+                          [long]$MaxChunkBytes) {
+    if ($RunId) {
+        $keyPrefix = "$RunKeyPrefix/$RunId/client/$TaskId"
+    } else {
+        $keyPrefix = "$(Get-Date -Format 'ddMMyyyy')/client/$TaskId"
+    }
+    return @{
+        Bucket = $Bucket
+        KeyPrefix = $keyPrefix
+        SourceRoot = $SourceRoot
+        SourceFolders = $SourceFolders
+        IntervalSeconds = $IntervalSeconds
+        MaxChunkBytes = $MaxChunkBytes
+        LastSync = [DateTimeOffset]::UtcNow
+        # File ID, generation and synced byte offset of every file, keyed by the path relative to the source root
+        Files = @{}
+        Buffer = New-Object byte[] 1048576
+        ChunkFile = Join-Path $env:TEMP 'mpscaler_client_chunk.gz'
+        Bytes = [long]0
+        CompressedBytes = [long]0
+    }
+}
+
+function Sync-ClientArtifacts($Sync, [switch]$Force) {
+    $now = [DateTimeOffset]::UtcNow
+    if (-not $Sync.Bucket -or (-not $Force -and ($now - $Sync.LastSync).TotalSeconds -lt $Sync.IntervalSeconds)) {
+        return
+    }
+    $Sync.LastSync = $now
+    if (-not (Test-Path $Sync.SourceRoot)) {
+        return
+    }
+
+    $sourceRootPath = (Resolve-Path $Sync.SourceRoot).Path.TrimEnd('\')
+    $chunkCount = 0
+    try {
+        foreach ($sourceFolder in $Sync.SourceFolders) {
+            $sourcePath = Join-Path $sourceRootPath $sourceFolder
+            if (-not (Test-Path $sourcePath)) {
+                continue
+            }
+            foreach ($file in Get-ChildItem -Path $sourcePath -File -Recurse) {
+                $relativePath = $file.FullName.Substring($sourceRootPath.Length + 1).Replace('\', '/')
+                # A forced sync uploads everything left, otherwise large files are spread across syncs
+                while ($true) {
+                    $chunk = Write-ArtifactChunk $file $Sync.Files[$relativePath] $Sync.ChunkFile $Sync.Buffer `
+                        $Sync.MaxChunkBytes
+                    if (-not $chunk) {
+                        break
+                    }
+                    $key = '{0}/{1}/{2}-{3:D16}.gz' -f $Sync.KeyPrefix, $relativePath, $chunk.generation, $chunk.offset
+                    Write-S3Object -BucketName $Sync.Bucket -Key $key -File $Sync.ChunkFile
+                    $Sync.Bytes += $chunk.length
+                    $Sync.CompressedBytes += (Get-Item $Sync.ChunkFile).Length
+                    $chunkCount++
+                    $Sync.Files[$relativePath] = @{
+                        file_id = $chunk.file_id; generation = $chunk.generation; offset = $chunk.offset + $chunk.length
+                    }
+                    if (-not $Force -or $chunk.length -le 0) {
+                        break
+                    }
+                }
+            }
+        }
+    } catch {
+        # Keep the client running, the next sync uploads the remaining chunks
+        Write-Output "[Warn] Failed to sync the client artifacts: $_"
+    } finally {
+        if (Test-Path $Sync.ChunkFile) {
+            Remove-Item $Sync.ChunkFile -Force
+        }
+    }
+    if ($chunkCount -gt 0) {
+        Write-Output ("Synced {0} client artifact chunks to s3://{1}/{2}, {3} bytes ({4} bytes compressed) in total" -f `
+            $chunkCount, $Sync.Bucket, $Sync.KeyPrefix, $Sync.Bytes, $Sync.CompressedBytes)
+    }
+}
@@ -0,0 +1,154 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Launches the multiplayer client and follows its log file.
+# Unless -SkipLogEcho is set, every log line is echoed to the console so it is shipped to the client log stream. Connection,
+# connection failure and disconnection are detected from the log and reported as structured readiness events,
+# one compressed JSON object per line, e.g.
+# {"event":"client_readiness","status":"connected","task_id":"...","timestamp":1660000000.0,"seconds_since_launch":12.3,"detail":"..."}
+# Performance samples parsed from the log are aggregated and reported in CloudWatch embedded metric format,
+# see client_metrics.ps1.
+# The client logs and metrics files are periodically synced to the artifacts bucket, and once more when the client
+# exits or the container is stopped, see client_artifacts.ps1. The bucket and run ID are set in the container
+# environment.
+
+param(
+    [Parameter(Mandatory = $true)][string]$ProjectName,
+    [string]$ProjectPath = 'c:\project',
+    [string]$LogFile = 'user\log\Game.log',
+    [int]$ConnectTimeoutSeconds = 300,
+    [int]$PollMilliseconds = 250,
+    [string]$MetricsNamespace = 'O3DE/MultiplayerTestScaler',
+    [int]$MetricsIntervalSeconds = 60,
+    [string]$ArtifactBucket = $env:MPSCALER_ARTIFACT_BUCKET,
+    [string]$RunId = $env:MPSCALER_RUN_ID,
+    [string]$RunKeyPrefix = 'runs',
+    [string[]]$ArtifactFolders = @('log', 'Metrics'),
+    [int]$ArtifactSyncIntervalSeconds = $(if ($env:MPSCALER_ARTIFACT_SYNC_INTERVAL_SECONDS) { $env:MPSCALER_ARTIFACT_SYNC_INTERVAL_SECONDS } else { 120 }),
+    [long]$ArtifactMaxChunkBytes = 64MB,
+    # Must be shorter than the stop timeout and the shutdown grace period (WaitToKillServiceTimeout) of the container
+    [int]$ShutdownSyncSeconds = 100,
+    [switch]$SkipLogEcho
+)
+
+. "$PSScriptRoot\client_metrics.ps1"
+. "$PSScriptRoot\client_artifacts.ps1"
+
+$ConnectedPattern = 'New outgoing connection to remote address'
+$FailedPattern = 'Failed to connect|Connection (attempt )?(failed|timed out)|Unable to connect'
+$DisconnectedPattern = 'Disconnecting|Remote host disconnected|Disconnected from'
+
+function Get-TaskId {
+    # See https://docs.aws.amazon.com/AmazonECS/latest/userguide/task-metadata-endpoint-v4-fargate.html
+    if ($env:ECS_CONTAINER_METADATA_URI_V4) {
+        try {
+            $task = Invoke-RestMethod -Uri "$env:ECS_CONTAINER_METADATA_URI_V4/task"
+            return $task.TaskARN.Split('/')[-1]
+        } catch {
+            Write-Output "[Warn] Failed to read the task metadata: $_"
+        }
+    }
+    return $env:COMPUTERNAME
+}
+
+function Write-ReadinessEvent([string]$Status, [string]$Detail) {
+    $now = [DateTimeOffset]::UtcNow
+    $readinessEvent = [ordered]@{
+        event = 'client_readiness'
+        status = $Status
+        task_id = $script:TaskId
+        timestamp = $now.ToUnixTimeMilliseconds() / 1000
+        seconds_since_launch = [math]::Round(($now - $script:LaunchTime).TotalSeconds, 3)
+        detail = $Detail
+    }
+    [Console]::Out.WriteLine(($readinessEvent | ConvertTo-Json -Compress))
+}
+
+Set-Location $ProjectPath
+$script:TaskId = Get-TaskId
+$script:LaunchTime = [DateTimeOffset]::UtcNow
+
+$process = Start-Process -FilePath ".\$ProjectName.GameLauncher.exe" -PassThru `
+    -ArgumentList '--console-command-file=launch_client.cfg', '-bg_ConnectToAssetProcessor=0'
+Write-ReadinessEvent 'launched' "$ProjectName.GameLauncher.exe started with process ID $($process.Id)"
+$metrics = New-ClientMetrics $MetricsNamespace $ProjectName $script:TaskId $MetricsIntervalSeconds
+$artifactSync = New-ArtifactSync $ArtifactBucket $RunId $RunKeyPrefix $script:TaskId (Join-Path $ProjectPath 'user') `
+    $ArtifactFolders $ArtifactSyncIntervalSeconds $ArtifactMaxChunkBytes
+[ClientShutdown]::Register($ShutdownSyncSeconds * 1000)
+$shutdownGrace = (Get-ItemProperty 'HKLM:\SYSTEM\CurrentControlSet\Control' -ErrorAction SilentlyContinue).WaitToKillServiceTimeout
+if ([long]$shutdownGrace -lt $ShutdownSyncSeconds * 1000) {
+    Write-Output ("[Warn] The container is killed $([long]$shutdownGrace) ms after it is stopped " +
+        "(WaitToKillServiceTimeout), before the final sync of the client artifacts can take $ShutdownSyncSeconds seconds")
+}
+
+$reader = $null
+try {
+    # The log file is created by the launcher shortly after start up
+    while (-not (Test-Path $LogFile)) {
+        if ($process.HasExited) {
+            Write-ReadinessEvent 'failed' "Client exited with code $($process.ExitCode) before creating $LogFile"
+            exit 1
+        }
+        Start-Sleep -Milliseconds $PollMilliseconds
+    }
+
+    # Share read and write access since the log file stays open in the client process
+    $stream = [System.IO.File]::Open($LogFile, 'Open', 'Read', 'ReadWrite')
+    $reader = New-Object System.IO.StreamReader($stream)
+    $connected = $false
+    $everConnected = $false
+    $timedOut = $false
+    while ($true) {
+        if ([ClientShutdown]::Requested.WaitOne(0)) {
+            Write-ClientMetrics $metrics -Force
+            exit 0
+        }
+        $line = $reader.ReadLine()
+        if ($null -eq $line) {
+            if ($process.HasExited) {
+                Write-ClientMetrics $metrics -Force
+                Write-ReadinessEvent 'exited' "Client exited with code $($process.ExitCode)"
+                exit $process.ExitCode
+            }
+            Write-ClientMetrics $metrics
+            Sync-ClientArtifacts $artifactSync
+            if (-not $connected -and -not $timedOut -and
+                ([DateTimeOffset]::UtcNow - $script:LaunchTime).TotalSeconds -gt $ConnectTimeoutSeconds) {
+                $timedOut = $true
+                Write-ReadinessEvent 'failed' "Not connected within $ConnectTimeoutSeconds seconds"
+            }
+            Start-Sleep -Milliseconds $PollMilliseconds
+            continue
+        }
+
+        if (-not $SkipLogEcho) {
+            [Console]::Out.WriteLine($line)
+        }
+        Add-ClientMetricsLine $metrics $line
+        if ($line -match $ConnectedPattern) {
+            if ($everConnected) {
+                $metrics.Reconnects++
+            }
+            $connected = $true
+            $everConnected = $true
+            $metrics.Connected = 1
+            Write-ReadinessEvent 'connected' $line
+        } elseif ($line -match $FailedPattern) {
+            Write-ReadinessEvent 'failed' $line
+        } elseif ($connected -and $line -match $DisconnectedPattern) {
+            $connected = $false
+            $metrics.Disconnects++
+            $metrics.Connected = 0
+            Write-ReadinessEvent 'disconnected' $line
+        }
+        Write-ClientMetrics $metrics
+        Sync-ClientArtifacts $artifactSync
+    }
+} finally {
+    if ($reader) {
+        $reader.Dispose()
+    }
+    # Final sync of everything left, then let the container stop
+    Sync-ClientArtifacts $artifactSync -Force
+    [ClientShutdown]::Completed.Set() | Out-Null
+}
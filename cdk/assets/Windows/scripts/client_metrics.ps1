@@ -0,0 +1,117 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Aggregates client performance samples parsed from the client log and periodically writes them to the console
+# in CloudWatch embedded metric format (EMF), so fleet-wide metrics and percentiles are extracted by CloudWatch
+# from the client log stream without shipping or parsing the full logs.
+# See https://docs.aws.amazon.com/AmazonCloudWatch/latest/monitoring/CloudWatch_Embedded_Metric_Format_Specification.html
+# Dot-source this script from the client launcher.
+
+# Patterns of the log lines reporting performance samples. The first capture group is the sample value.
+# Update them to match the performance output of your project.
+$FpsPattern = '(?i)\bfps\s*[:=]\s*([0-9]+(?:\.[0-9]+)?)'
+$FrameTimePattern = '(?i)\bframe\s*time\s*[:=]\s*([0-9]+(?:\.[0-9]+)?)\s*ms'
+$RttPattern = '(?i)\brtt\s*[:=]\s*([0-9]+(?:\.[0-9]+)?)\s*ms'
+$PacketLossPattern = '(?i)\bpacket\s*loss\s*[:=]\s*([0-9]+(?:\.[0-9]+)?)\s*%'
+
+# EMF allows up to 100 values per metric in one event
+$MaxMetricValues = 100
+
+function New-ClientMetrics([string]$Namespace, [string]$ProjectName, [string]$TaskId, [int]$IntervalSeconds) {
+    return @{
+        Namespace = $Namespace
+        ProjectName = $ProjectName
+        TaskId = $TaskId
+        IntervalSeconds = $IntervalSeconds
+        LastFlush = [DateTimeOffset]::UtcNow
+        Fps = New-Object System.Collections.Generic.List[double]
+        Rtt = New-Object System.Collections.Generic.List[double]
+        PacketLoss = New-Object System.Collections.Generic.List[double]
+        Reconnects = 0
+        Disconnects = 0
+        Connected = 0
+    }
+}
+
+function Add-ClientMetricsLine($Metrics, [string]$Line) {
+    if ($Line -match $FpsPattern) {
+        $Metrics.Fps.Add([double]$Matches[1])
+    } elseif ($Line -match $FrameTimePattern -and [double]$Matches[1] -gt 0) {
+        $Metrics.Fps.Add(1000.0 / [double]$Matches[1])
+    }
+    if ($Line -match $RttPattern) {
+        $Metrics.Rtt.Add([double]$Matches[1])
+    }
+    if ($Line -match $PacketLossPattern) {
+        $Metrics.PacketLoss.Add([double]$Matches[1])
+    }
+}
+
+function Get-Percentile($Sorted, [double]$Percentile) {
+    # Nearest-rank percentile of sorted values
+    $rank = [math]::Max([math]::Ceiling($Percentile / 100 * $Sorted.Count) - 1, 0)
+    return $Sorted[$rank]
+}
+
+function Get-SampledValues($Sorted) {
+    # Evenly sample sorted values so their distribution is kept within the EMF value limit
+    if ($Sorted.Count -le $MaxMetricValues) {
+        return @($Sorted)
+    }
+    $step = $Sorted.Count / $MaxMetricValues
+    return @(0..($MaxMetricValues - 1) | ForEach-Object { $Sorted[[math]::Floor($_ * $step)] })
+}
+
+function Write-ClientMetrics($Metrics, [switch]$Force) {
+    $now = [DateTimeOffset]::UtcNow
+    if (-not $Force -and ($now - $Metrics.LastFlush).TotalSeconds -lt $Metrics.IntervalSeconds) {
+        return
+    }
+
+    $definitions = New-Object System.Collections.Generic.List[object]
+    $emf = [ordered]@{
+        _aws = [ordered]@{
+            Timestamp = $now.ToUnixTimeMilliseconds()
+            CloudWatchMetrics = @([ordered]@{
+                Namespace = $Metrics.Namespace
+                Dimensions = @(, @('Project'))
+                Metrics = $definitions
+            })
+        }
+        Project = $Metrics.ProjectName
+        TaskId = $Metrics.TaskId
+    }
+
+    foreach ($series in @(@('Fps', 'None', $Metrics.Fps), @('RttMs', 'Milliseconds', $Metrics.Rtt))) {
+        $name, $unit, $values = $series
+        if ($values.Count -eq 0) {
+            continue
+        }
+        $sorted = @($values | Sort-Object)
+        $emf[$name] = Get-SampledValues $sorted
+        $emf["${name}P50"] = Get-Percentile $sorted 50
+        $emf["${name}P99"] = Get-Percentile $sorted 99
+        foreach ($metricName in @($name, "${name}P50", "${name}P99")) {
+            $definitions.Add([ordered]@{ Name = $metricName; Unit = $unit })
+        }
+    }
+    if ($Metrics.PacketLoss.Count -gt 0) {
+        $emf['PacketLossPercent'] = ($Metrics.PacketLoss | Measure-Object -Average).Average
+        $definitions.Add([ordered]@{ Name = 'PacketLossPercent'; Unit = 'Percent' })
+    }
+    $emf['Reconnects'] = $Metrics.Reconnects
+    $emf['Disconnects'] = $Metrics.Disconnects
+    $emf['Connected'] = $Metrics.Connected
+    foreach ($metricName in @('Reconnects', 'Disconnects', 'Connected')) {
+        $definitions.Add([ordered]@{ Name = $metricName; Unit = 'Count' })
+    }
+
+    [Console]::Out.WriteLine(($emf | ConvertTo-Json -Compress -Depth 6))
+
+    $Metrics.LastFlush = $now
+    $Metrics.Fps.Clear()
+    $Metrics.Rtt.Clear()
+    $Metrics.PacketLoss.Clear()
+    $Metrics.Reconnects = 0
+    $Metrics.Disconnects = 0
+}
@@ -0,0 +1,63 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Samples the server process at a fixed interval for soak tests, so memory and handle leaks and CPU drift are
+# detected from the trend of the samples over a long run. Samples are appended as CSV lines to the output file, which
+# is synced to the artifacts bucket with the other server artifacts:
+#     timestamp,process_id,working_set_bytes,private_bytes,handle_count,thread_count,cpu_percent
+# The timestamp is in Unix seconds and the CPU percentage is relative to all the processor cores.
+# No sample is written while the server process isn't running.
+# Run by a scheduled task registered by start_server_process_sampler.ps1.
+
+param(
+    [Parameter(Mandatory=$true)][string]$ProcessName,
+    [Parameter(Mandatory=$true)][int]$SampleSeconds,
+    [Parameter(Mandatory=$true)][string]$OutputFile
+)
+
+$ErrorActionPreference = 'Stop'
+$header = 'timestamp,process_id,working_set_bytes,private_bytes,handle_count,thread_count,cpu_percent'
+New-Item -ItemType Directory -Force -Path (Split-Path $OutputFile) | Out-Null
+if (-not (Test-Path $OutputFile)) {
+    Set-Content -Path $OutputFile -Value $header -Encoding ascii
+}
+
+$processorCount = [Environment]::ProcessorCount
+$previousProcessId = 0
+$previousCpuTime = [TimeSpan]::Zero
+$previousTime = [DateTimeOffset]::UtcNow
+while ($true) {
+    $now = [DateTimeOffset]::UtcNow
+    $process = Get-Process -Name $ProcessName -ErrorAction SilentlyContinue | Select-Object -First 1
+    if ($process) {
+        try {
+            $cpuTime = $process.TotalProcessorTime
+            # The CPU usage of the first sample of a process is unknown
+            $cpuPercent = ''
+            if ($process.Id -eq $previousProcessId) {
+                $elapsedSeconds = ($now - $previousTime).TotalSeconds
+                if ($elapsedSeconds -gt 0) {
+                    $cpuPercent = '{0:F2}' -f (($cpuTime - $previousCpuTime).TotalSeconds / ($elapsedSeconds * $processorCount) * 100)
+                }
+            }
+            $line = '{0:F3},{1},{2},{3},{4},{5},{6}' -f ($now.ToUnixTimeMilliseconds() / 1000), $process.Id,
+                $process.WorkingSet64, $process.PrivateMemorySize64, $process.HandleCount, $process.Threads.Count,
+                $cpuPercent
+            # The sync opens the file with shared access, append without locking it for long
+            Add-Content -Path $OutputFile -Value $line -Encoding ascii
+            $previousProcessId = $process.Id
+            $previousCpuTime = $cpuTime
+            $previousTime = $now
+        } catch {
+            # The process exited between the lookup and the sample
+            $previousProcessId = 0
+        }
+    } else {
+        $previousProcessId = 0
+    }
+
+    $sleepMilliseconds = $SampleSeconds * 1000 - ([DateTimeOffset]::UtcNow - $now).TotalMilliseconds
+    if ($sleepMilliseconds -gt 0) {
+        Start-Sleep -Milliseconds $sleepMilliseconds
+    }
+}
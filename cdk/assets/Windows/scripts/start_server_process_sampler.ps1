@@ -0,0 +1,42 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Starts the server process sampler for soak tests if it isn't running. Run by the server automation SSM document
+# before every artifact sync cycle, which sets $SampleSeconds, $ProcessName, $OutputFile, $StateFolder and
+# $SamplerScript (the content of sample_server_process.ps1) before this script.
+# The sampler runs as a scheduled task, so it outlives the SSM command and is restarted by the next cycle if it stops.
+# Sampling is disabled when $SampleSeconds is 0, and a running sampler is stopped.
+
+$ErrorActionPreference = 'Stop'
+$taskName = 'MpScalerServerProcessSampler'
+$task = Get-ScheduledTask -TaskName $taskName -ErrorAction SilentlyContinue
+
+if ($SampleSeconds -le 0) {
+    if ($task) {
+        Stop-ScheduledTask -TaskName $taskName
+        Unregister-ScheduledTask -TaskName $taskName -Confirm:$false
+        Write-Output 'Stopped the server process sampler'
+    }
+    exit 0
+}
+
+New-Item -ItemType Directory -Force -Path $StateFolder | Out-Null
+$samplerPath = Join-Path $StateFolder 'sample_server_process.ps1'
+$arguments = "-NoProfile -ExecutionPolicy Bypass -File `"$samplerPath`" -ProcessName `"$ProcessName`" " +
+             "-SampleSeconds $SampleSeconds -OutputFile `"$OutputFile`""
+# Register the task again when the sampler or its arguments change, e.g. after a new deployment
+if (-not $task -or $task.Actions[0].Arguments -ne $arguments -or
+        -not (Test-Path $samplerPath) -or (Get-Content $samplerPath -Raw).Trim() -ne $SamplerScript.Trim()) {
+    if ($task) {
+        Stop-ScheduledTask -TaskName $taskName
+        Unregister-ScheduledTask -TaskName $taskName -Confirm:$false
+    }
+    Set-Content -Path $samplerPath -Value $SamplerScript -Encoding utf8
+    $action = New-ScheduledTaskAction -Execute 'powershell.exe' -Argument $arguments
+    $settings = New-ScheduledTaskSettingsSet -ExecutionTimeLimit ([TimeSpan]::Zero) -MultipleInstances IgnoreNew
+    $task = Register-ScheduledTask -TaskName $taskName -Action $action -Settings $settings -User 'SYSTEM' -RunLevel Highest
+}
+if ((Get-ScheduledTask -TaskName $taskName).State -ne 'Running') {
+    Start-ScheduledTask -TaskName $taskName
+    Write-Output "Started the server process sampler, sampling $ProcessName every $SampleSeconds seconds to $OutputFile"
+}
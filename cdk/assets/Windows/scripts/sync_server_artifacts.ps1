@@ -0,0 +1,120 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# Incrementally syncs the server logs and metrics to the artifacts bucket. Run by the server automation SSM document,
+# which sets $Bucket, $SourceRoot, $SourceFolders, $StateFolder, $MaxChunkBytes, $RunId and $RunKeyPrefix
+# and embeds artifact_chunks.ps1 before this script. Files are keyed under <run key prefix>/<run ID>/server/<instance ID>
+# when a run ID is set, otherwise under <ddMMyyyy>/server/<instance ID>.
+# Each cycle only uploads the bytes appended to every file since the previous cycle, as chunks keyed by the file path,
+# file generation and byte offset (see artifact_chunks.ps1).
+# Concatenating the chunks of a file generation in key order gives the gzip-compressed file.
+# A manifest of the uploaded chunks and the upload volume is written per cycle to
+# <key prefix>/manifests/<cycle start>.json
+
+$ErrorActionPreference = 'Stop'
+$cycleStart = [DateTimeOffset]::UtcNow
+New-Item -ItemType Directory -Force -Path $StateFolder | Out-Null
+
+# Cycles are scheduled at a fixed rate and must not overlap
+try {
+    $lock = [System.IO.File]::Open((Join-Path $StateFolder 'sync.lock'), 'OpenOrCreate', 'ReadWrite', 'None')
+} catch {
+    Write-Output 'The previous sync cycle is still running. Skipping this cycle'
+    exit 0
+}
+
+# Set before the try block, so the finally block can tell whether the chunk file was ever named
+$chunkFile = $null
+try {
+    $stateFile = Join-Path $StateFolder 'sync_state.json'
+    $state = @{ run_id = $RunId; key_prefix = ''; files = @{} }
+    $savedState = $null
+    if (Test-Path $stateFile) {
+        $savedState = Get-Content $stateFile -Raw | ConvertFrom-Json
+    }
+    # A new run syncs the files again from the start under its own prefix
+    if ($savedState -and "$($savedState.run_id)" -eq $RunId) {
+        $state.key_prefix = $savedState.key_prefix
+        $savedState.files.PSObject.Properties | ForEach-Object {
+            $state.files[$_.Name] = @{
+                file_id = $_.Value.file_id; generation = $_.Value.generation; offset = [long]$_.Value.offset
+            }
+        }
+    }
+    if (-not $state.key_prefix) {
+        # Retrieve token and instance ID from EC2 Instance Metadata Service v2
+        # see: https://docs.aws.amazon.com/AWSEC2/latest/WindowsGuide/configuring-instance-metadata-service.html#instance-metadata-v2-how-it-works
+        [string]$token = Invoke-RestMethod -Headers @{'X-aws-ec2-metadata-token-ttl-seconds' = '30'} -Method PUT -Uri http://169.254.169.254/latest/api/token
+        $instanceId = Invoke-RestMethod -Headers @{'X-aws-ec2-metadata-token' = $token} -Method GET -Uri http://169.254.169.254/latest/meta-data/instance-id
+        if ($RunId) {
+            $state.key_prefix = "$RunKeyPrefix/$RunId/server/$instanceId"
+        } else {
+            # Keep the prefix of the first cycle, so the chunks of a file are never split across dates
+            $state.key_prefix = "$(Get-Date -Format 'ddMMyyyy')/server/$instanceId"
+        }
+    }
+
+    $chunks = New-Object System.Collections.Generic.List[object]
+    $totalBytes = 0
+    $totalCompressedBytes = 0
+    $buffer = New-Object byte[] 1048576
+    $chunkFile = Join-Path $env:TEMP 'mpscaler_sync_chunk.gz'
+    $sourceRootPath = (Resolve-Path $SourceRoot).Path.TrimEnd('\')
+
+    foreach ($sourceFolder in $SourceFolders) {
+        $sourcePath = Join-Path $sourceRootPath $sourceFolder
+        if (-not (Test-Path $sourcePath)) {
+            continue
+        }
+        foreach ($file in Get-ChildItem -Path $sourcePath -File -Recurse) {
+            $relativePath = $file.FullName.Substring($sourceRootPath.Length + 1).Replace('\', '/')
+            $chunk = Write-ArtifactChunk $file $state.files[$relativePath] $chunkFile $buffer $MaxChunkBytes
+            if (-not $chunk) {
+                continue
+            }
+            $generation = $chunk.generation
+            $offset = $chunk.offset
+            $length = $chunk.length
+
+            $key = '{0}/{1}/{2}-{3:D16}.gz' -f $state.key_prefix, $relativePath, $generation, $offset
+            Write-S3Object -BucketName $Bucket -Key $key -File $chunkFile
+            $compressedBytes = (Get-Item $chunkFile).Length
+            $chunks.Add([ordered]@{
+                file = $relativePath
+                generation = $generation
+                offset = $offset
+                bytes = $length
+                compressed_bytes = $compressedBytes
+                key = $key
+            })
+            $totalBytes += $length
+            $totalCompressedBytes += $compressedBytes
+
+            # Save the offset right after each upload, so a failed cycle only uploads the remaining chunks again
+            $state.files[$relativePath] = @{ file_id = $chunk.file_id; generation = $generation; offset = $offset + $length }
+            $state | ConvertTo-Json -Depth 4 | Set-Content $stateFile
+        }
+    }
+
+    $duration = ([DateTimeOffset]::UtcNow - $cycleStart).TotalSeconds
+    $manifest = [ordered]@{
+        key_prefix = $state.key_prefix
+        cycle_start = $cycleStart.ToString('o')
+        duration_seconds = [math]::Round($duration, 3)
+        chunk_count = $chunks.Count
+        bytes = $totalBytes
+        compressed_bytes = $totalCompressedBytes
+        chunks = $chunks
+    }
+    $manifestKey = '{0}/manifests/{1}.json' -f $state.key_prefix, $cycleStart.ToString('yyyyMMddTHHmmssZ')
+    Write-S3Object -BucketName $Bucket -Key $manifestKey -Content ($manifest | ConvertTo-Json -Depth 4) -ContentType 'application/json'
+    $state | ConvertTo-Json -Depth 4 | Set-Content $stateFile
+
+    Write-Output ("Synced {0} chunks, {1} bytes ({2} bytes compressed) in {3:N1} seconds. Manifest: s3://{4}/{5}" -f `
+        $chunks.Count, $totalBytes, $totalCompressedBytes, $duration, $Bucket, $manifestKey)
+} finally {
+    if ($chunkFile -and (Test-Path $chunkFile)) {
+        Remove-Item $chunkFile -Force
+    }
+    $lock.Dispose()
+}
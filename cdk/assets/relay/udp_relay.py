@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+UDP impairment relay between the clients and the server. Every client flow, i.e. client address and port, is assigned
+to a client group in proportion to the shares of the impairment profiles, and gets its own socket to the server, so the
+server still sees one address per client. The latency, jitter, loss, reordering and bandwidth cap of the profile of
+the group are applied to both directions of the flow. Per-flow stats are written as JSON lines at an interval and
+when a flow closes. Only uses the Python standard library
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+DEFAULT_STATS_INTERVAL_SECONDS = 60
+# Flows without packets in either direction for this long are closed
+DEFAULT_IDLE_TIMEOUT_SECONDS = 120
+SOCKET_BUFFER_BYTES = 4 * 1024 * 1024
+UPSTREAM = 'upstream'
+DOWNSTREAM = 'downstream'
+
+
+class ImpairmentProfile(NamedTuple):
+    """
+    Impairments of a client group. Delays are one way and apply to both directions, so the round trip time grows by
+    twice the latency
+    """
+    name: str
+    # Relative share of the client flows assigned to the group
+    share: float = 1
+    latency_ms: float = 0
+    # Standard deviation of the latency. Jitter alone doesn't reorder packets
+    jitter_ms: float = 0
+    loss_percent: float = 0
+    # Share of the packets held back by reorder_delay_ms, so the next packets overtake them
+    reorder_percent: float = 0
+    reorder_delay_ms: float = 10
+    # Bandwidth cap of each direction of a flow, uncapped if 0. Packets which would wait longer than queue_ms behind the
+    # cap are dropped
+    bandwidth_kbps: float = 0
+    queue_ms: float = 200
+
+
+def load_profiles(profiles: List[Dict]) -> List[ImpairmentProfile]:
+    """
+    Validate the impairment profiles
+    :param profiles: Profiles, each with a name and any of the impairments of ImpairmentProfile
+    :return: Impairment profiles
+    """
+    if not profiles:
+        raise RuntimeError('At least one impairment profile is required')
+    loaded = []
+    for profile in profiles:
+        unknown_keys = set(profile) - set(ImpairmentProfile._fields)
+        if 'name' not in profile or unknown_keys:
+            raise RuntimeError(f'Invalid impairment profile {profile}. A name is required and the other keys are '
+                               f'{", ".join(ImpairmentProfile._fields[1:])}')
+        loaded_profile = ImpairmentProfile(str(profile['name']), **{
+            key: float(value) for key, value in profile.items() if key != 'name'})
+        if any(getattr(loaded_profile, key) < 0 for key in ImpairmentProfile._fields[1:]) or \
+                loaded_profile.share == 0 or loaded_profile.loss_percent > 100 or \
+                loaded_profile.reorder_percent > 100:
+            raise RuntimeError(f'Invalid impairment profile {profile}. Values can\'t be negative, percentages are '
+                               f'at most 100 and the share is above 0')
+        loaded.append(loaded_profile)
+    return loaded
+
+
+class GroupAssigner(object):
+    """
+    Assign flows to the client groups in proportion to their shares, with smooth weighted round-robin, so any
+    number of flows is spread as evenly as possible
+    """
+
+    def __init__(self, profiles: List[ImpairmentProfile]):
+        super().__init__()
+        self._profiles = profiles
+        self._current = [0.0] * len(profiles)
+        self._total = sum(profile.share for profile in profiles)
+
+    def next(self) -> ImpairmentProfile:
+        for index, profile in enumerate(self._profiles):
+            self._current[index] += profile.share
+        selected = max(range(len(self._profiles)), key=lambda index: self._current[index])
+        self._current[selected] -= self._total
+        return self._profiles[selected]
+
+
+class ImpairedLink(object):
+    """
+    One direction of a flow. Packets are dropped or scheduled for delivery after the delays of the profile
+    """
+
+    def __init__(self, profile: ImpairmentProfile, rng: random.Random, send: Callable[[bytes], None]):
+        """
+        :param profile: Impairment profile of the client group
+        :param rng: Random number generator of the relay
+        :param send: Callable which sends a packet to the next hop
+        """
+        super().__init__()
+        self._profile = profile
+        self._rng = rng
+        self._send = send
+        self._loop = asyncio.get_running_loop()
+        self._link_free_at = 0.0
+        self._last_delivery_at = 0.0
+        self.stats = {'packets_in': 0, 'bytes_in': 0, 'packets_out': 0, 'bytes_out': 0, 'dropped_loss': 0,
+                      'dropped_queue': 0, 'reordered': 0, 'delay_ms_total': 0.0}
+
+    def submit(self, data: bytes) -> None:
+        self.stats['packets_in'] += 1
+        self.stats['bytes_in'] += len(data)
+        if self._profile.loss_percent and self._rng.random() * 100 < self._profile.loss_percent:
+            self.stats['dropped_loss'] += 1
+            return
+
+        now = self._loop.time()
+        ready_at = now
+        if self._profile.bandwidth_kbps:
+            # Packets are serialized one after the other at the capped bandwidth
+            start_at = max(now, self._link_free_at)
+            if start_at - now > self._profile.queue_ms / 1000:
+                self.stats['dropped_queue'] += 1
+                return
+            self._link_free_at = start_at + len(data) * 8 / (self._profile.bandwidth_kbps * 1000)
+            ready_at = self._link_free_at
+
+        deliver_at = ready_at + max(self._rng.gauss(self._profile.latency_ms, self._profile.jitter_ms), 0) / 1000
+        if self._profile.reorder_percent and self._rng.random() * 100 < self._profile.reorder_percent:
+            deliver_at += self._profile.reorder_delay_ms / 1000
+            self.stats['reordered'] += 1
+        else:
+            # Keep the order of the packets which aren't reordered on purpose
+            deliver_at = max(deliver_at, self._last_delivery_at)
+            self._last_delivery_at = deliver_at
+        self._loop.call_at(deliver_at, self._deliver, data, now)
+
+    def _deliver(self, data: bytes, received_at: float) -> None:
+        self._send(data)
+        self.stats['packets_out'] += 1
+        self.stats['bytes_out'] += len(data)
+        self.stats['delay_ms_total'] += (self._loop.time() - received_at) * 1000
+
+
+class RelayFlow(asyncio.DatagramProtocol):
+    """
+    Flow of a client, with its own socket to the server
+    """
+
+    def __init__(self, relay: 'UdpRelay', client_address: Tuple, profile: ImpairmentProfile, rng: random.Random):
+        super().__init__()
+        self.client_address = client_address
+        self.profile = profile
+        self.started_at = time.time()
+        self.last_packet_at = time.monotonic()
+        self._relay = relay
+        self._transport = None
+        self._pending = []
+        self.upstream = ImpairedLink(profile, rng, self._send_upstream)
+        self.downstream = ImpairedLink(profile, rng, lambda data: relay.send_to_client(data, client_address))
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self._transport = transport
+        for data in self._pending:
+            transport.sendto(data)
+        self._pending = []
+
+    def datagram_received(self, data: bytes, address: Tuple) -> None:
+        self.last_packet_at = time.monotonic()
+        self.downstream.submit(data)
+
+    def error_received(self, exc: Exception) -> None:
+        # e.g. ICMP port unreachable while the server isn't listening yet
+        pass
+
+    def submit(self, data: bytes) -> None:
+        self.last_packet_at = time.monotonic()
+        self.upstream.submit(data)
+
+    def close(self) -> None:
+        if self._transport:
+            self._transport.close()
+
+    def get_stats(self, event: str) -> Dict:
+        return {
+            'event': event,
+            'timestamp': time.time(),
+            'client': f'{self.client_address[0]}:{self.client_address[1]}',
+            'group': self.profile.name,
+            'seconds': time.time() - self.started_at,
+            UPSTREAM: dict(self.upstream.stats),
+            DOWNSTREAM: dict(self.downstream.stats)
+        }
+
+    def _send_upstream(self, data: bytes) -> None:
+        if self._transport:
+            self._transport.sendto(data)
+        else:
+            self._pending.append(data)
+
+
+class UdpRelay(asyncio.DatagramProtocol):
+    """
+    Relay the datagrams of every client to the server and back through the impaired links of its group
+    """
+
+    def __init__(self, server_address: Tuple[str, int], profiles: List[ImpairmentProfile],
+                 write_stats: Callable[[Dict], None], idle_timeout_seconds: float = DEFAULT_IDLE_TIMEOUT_SECONDS,
+                 seed: Optional[int] = None):
+        """
+        :param server_address: Address and port of the server
+        :param profiles: Impairment profiles of the client groups
+        :param write_stats: Callable which writes a stats record
+        :param idle_timeout_seconds: Time without packets after which a flow is closed
+        :param seed: Seed of the random impairments, for repeatable runs
+        """
+        super().__init__()
+        self._server_address = server_address
+        self._assigner = GroupAssigner(profiles)
+        self._write_stats = write_stats
+        self._idle_timeout_seconds = idle_timeout_seconds
+        self._rng = random.Random(seed)
+        self._transport = None
+        self.flows = {}
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self._transport = transport
+
+    def datagram_received(self, data: bytes, address: Tuple) -> None:
+        flow = self.flows.get(address)
+        if flow is None:
+            flow = RelayFlow(self, address, self._assigner.next(), self._rng)
+            self.flows[address] = flow
+            asyncio.get_running_loop().create_task(self._connect(flow))
+        flow.submit(data)
+
+    def send_to_client(self, data: bytes, client_address: Tuple) -> None:
+        if self._transport:
+            self._transport.sendto(data, client_address)
+
+    def report(self) -> None:
+        """
+        Write the stats of every flow and close the idle flows
+        """
+        now = time.monotonic()
+        for address, flow in list(self.flows.items()):
+            if now - flow.last_packet_at >= self._idle_timeout_seconds:
+                self._close_flow(address)
+            else:
+                self._write_stats(flow.get_stats('flow_stats'))
+
+    def close(self) -> None:
+        for address in list(self.flows):
+            self._close_flow(address)
+        if self._transport:
+            self._transport.close()
+
+    async def _connect(self, flow: RelayFlow) -> None:
+        await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: flow, sock=_create_socket(lambda sock: sock.connect(self._server_address)))
+
+    def _close_flow(self, address: Tuple) -> None:
+        flow = self.flows.pop(address)
+        flow.close()
+        self._write_stats(flow.get_stats('flow_closed'))
+
+
+def _create_socket(set_up: Callable[[socket.socket], None]) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for option in [socket.SO_RCVBUF, socket.SO_SNDBUF]:
+        sock.setsockopt(socket.SOL_SOCKET, option, SOCKET_BUFFER_BYTES)
+    set_up(sock)
+    sock.setblocking(False)
+    return sock
+
+
+async def run_relay(relay: UdpRelay, listen_port: int, stats_interval_seconds: float,
+                    stop: asyncio.Event, listen_host: str = '0.0.0.0') -> None:
+    """
+    Relay until stopped, writing the flow stats at every interval
+    :param relay: Relay
+    :param listen_port: UDP port the clients connect to
+    :param stats_interval_seconds: Time between two stats records of a flow
+    :param stop: Event which stops the relay
+    :param listen_host: Address to listen on
+    """
+    await asyncio.get_running_loop().create_datagram_endpoint(
+        lambda: relay, sock=_create_socket(lambda sock: sock.bind((listen_host, listen_port))))
+    try:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), stats_interval_seconds)
+            except asyncio.TimeoutError:
+                relay.report()
+    finally:
+        relay.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--listen-port', type=int, required=True, help='UDP port the clients connect to')
+    parser.add_argument('--server-host', required=True)
+    parser.add_argument('--server-port', type=int, required=True)
+    parser.add_argument('--profiles', required=True, help='JSON file of the impairment profiles')
+    parser.add_argument('--stats-file', default='', help='File to append the flow stats to. Defaults to stdout')
+    parser.add_argument('--stats-interval', type=float, default=DEFAULT_STATS_INTERVAL_SECONDS)
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT_SECONDS)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.profiles) as profiles_file:
+        profiles = load_profiles(json.load(profiles_file))
+
+    def write_stats(record: Dict) -> None:
+        line = json.dumps(record)
+        if args.stats_file:
+            with open(args.stats_file, 'a') as stats_file:
+                stats_file.write(line + '\n')
+        else:
+            print(line, flush=True)
+
+    async def relay_until_stopped() -> None:
+        stop = asyncio.Event()
+        for signal_number in [signal.SIGINT, signal.SIGTERM]:
+            asyncio.get_running_loop().add_signal_handler(signal_number, stop.set)
+        relay = UdpRelay((args.server_host, args.server_port), profiles, write_stats, args.idle_timeout, args.seed)
+        print(f'Relaying port {args.listen_port} to {args.server_host}:{args.server_port} with the profiles '
+              f'{", ".join(profile.name for profile in profiles)}', file=sys.stderr, flush=True)
+        await run_relay(relay, args.listen_port, args.stats_interval, stop)
+
+    asyncio.run(relay_until_stopped())
+
+
+if __name__ == '__main__':
+    main()
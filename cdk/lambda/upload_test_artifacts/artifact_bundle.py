@@ -0,0 +1,165 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import hashlib
+import io
+import tarfile
+import zlib
+
+# Minimum size of a multipart upload part, except the last one
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+BUNDLE_FORMAT = 'tar.gz-members'
+TAR_BLOCK_SIZE = tarfile.BLOCKSIZE
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class BundleWriter(object):
+    """
+    Streams files into a seekable compressed bundle uploaded to Amazon S3 with a multipart upload.
+
+    The bundle is a tar archive where every file entry (header, content and padding) is compressed as its own
+    gzip member. Concatenated gzip members are a valid gzip stream, so the whole bundle extracts with standard
+    tools, e.g. tar -xzf. The index records the byte range of each member, so a single file is fetched with one
+    range GET and decompressed on its own.
+
+    The writer state can be saved between Lambda invocations. Compressed bytes not uploaded yet are kept in the
+    state since only the last part of a multipart upload may be smaller than the minimum part size.
+    """
+
+    def __init__(self, s3_client: any, bucket: str, key: str, state: dict = None, part_size: int = 0):
+        """
+        :param s3_client: Amazon S3 client
+        :param bucket: Bucket of the bundle
+        :param key: Key of the bundle
+        :param state: State saved by a previous writer of the same bundle
+        :param part_size: Size of the uploaded parts. Defaults to DEFAULT_PART_SIZE
+        """
+        super().__init__()
+        self._s3_client = s3_client
+        self._bucket = bucket
+        self._key = key
+        self._part_size = max(part_size or DEFAULT_PART_SIZE, MIN_PART_SIZE)
+        state = state or {}
+        self._upload_id = state.get('upload_id', '')
+        self._parts = state.get('parts', [])
+        self._offset = state.get('offset', 0)
+        self._index = state.get('index', [])
+        self._pending = bytearray(state.get('pending', b''))
+
+    @property
+    def index(self) -> list:
+        return self._index
+
+    def get_state(self, include_pending: bool = True) -> dict:
+        """
+        Get the writer state to continue the bundle later
+        :param include_pending: Whether to include the compressed bytes not uploaded yet
+        :return: Writer state. The pending bytes are not JSON serializable and should be stored separately
+        """
+        state = {'upload_id': self._upload_id, 'parts': self._parts, 'offset': self._offset, 'index': self._index}
+        if include_pending:
+            state['pending'] = bytes(self._pending)
+        return state
+
+    def add_file(self, name: str, stream: any, size: int, mtime: float = 0) -> dict:
+        """
+        Add a file to the bundle as one compressed tar entry
+        :param name: Name of the file in the bundle
+        :param stream: Readable binary stream of the file content
+        :param size: Size of the file in bytes
+        :param mtime: Modification time of the file
+        :return: Index entry of the file
+        """
+        tar_info = tarfile.TarInfo(name)
+        tar_info.size = size
+        tar_info.mtime = int(mtime)
+        # wbits 31 writes a gzip header and trailer around the deflate stream
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 31)
+        member_offset = self._offset
+        self._write(compressor.compress(tar_info.tobuf(format=tarfile.PAX_FORMAT)))
+
+        content_hash = hashlib.sha256()
+        remaining = size
+        while remaining > 0:
+            chunk = stream.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise RuntimeError(f'{name} is shorter than its size of {size} bytes')
+            content_hash.update(chunk)
+            remaining -= len(chunk)
+            self._write(compressor.compress(chunk))
+
+        padding = (TAR_BLOCK_SIZE - size % TAR_BLOCK_SIZE) % TAR_BLOCK_SIZE
+        self._write(compressor.compress(b'\0' * padding) + compressor.flush())
+
+        entry = {
+            'name': name,
+            'size': size,
+            'sha256': content_hash.hexdigest(),
+            'offset': member_offset,
+            'length': self._offset - member_offset
+        }
+        self._index.append(entry)
+        return entry
+
+    def close(self) -> bool:
+        """
+        Write the end of the tar archive and complete the upload
+        :return: Whether the bundle was uploaded. Nothing is uploaded if no file was added
+        """
+        if not self._index:
+            self.abort()
+            return False
+
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 31)
+        self._write(compressor.compress(b'\0' * TAR_BLOCK_SIZE * 2) + compressor.flush())
+        if self._pending or not self._parts:
+            self._upload_part()
+        self._s3_client.complete_multipart_upload(
+            Bucket=self._bucket, Key=self._key, UploadId=self._upload_id, MultipartUpload={'Parts': self._parts})
+        return True
+
+    def abort(self) -> None:
+        if self._upload_id:
+            self._s3_client.abort_multipart_upload(Bucket=self._bucket, Key=self._key, UploadId=self._upload_id)
+            self._upload_id = ''
+
+    @property
+    def compressed_size(self) -> int:
+        return self._offset
+
+    def _write(self, data: bytes) -> None:
+        self._pending.extend(data)
+        self._offset += len(data)
+        while len(self._pending) >= self._part_size:
+            self._upload_part(self._part_size)
+
+    def _upload_part(self, size: int = 0) -> None:
+        if not self._upload_id:
+            self._upload_id = self._s3_client.create_multipart_upload(
+                Bucket=self._bucket, Key=self._key, ContentType='application/gzip')['UploadId']
+        size = size or len(self._pending)
+        part_number = len(self._parts) + 1
+        response = self._s3_client.upload_part(
+            Bucket=self._bucket, Key=self._key, UploadId=self._upload_id, PartNumber=part_number,
+            Body=io.BytesIO(bytes(self._pending[:size])))
+        self._parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+        del self._pending[:size]
+
+
+def get_manifest(bundle_key: str, index: list, compressed_size: int) -> dict:
+    """
+    Get the manifest of a bundle
+    :param bundle_key: Key of the bundle
+    :param index: Index entries of the bundled files
+    :param compressed_size: Size of the bundle in bytes
+    :return: Manifest with the bundle format, sizes and the byte range and SHA-256 hash of every file
+    """
+    return {
+        'bundle_key': bundle_key,
+        'format': BUNDLE_FORMAT,
+        'file_count': len(index),
+        'size': sum(entry['size'] for entry in index),
+        'compressed_size': compressed_size,
+        'files': index
+    }
@@ -1,56 +1,331 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import concurrent.futures
+import json
+import os
+import time
+
 import boto3
+import botocore.exceptions
+from botocore.config import Config
+
+from artifact_bundle import BundleWriter, get_manifest
 
 CFN_STACK_TAG_KEY = 'aws:cloudformation:stack-id'
+# Tag of the server stack holding the ID of the test run. Artifacts of a run are keyed under runs/<run_id>/
+RUN_ID_TAG_KEY = 'o3de-multiplayer-test-scaler-run-id'
+RUN_KEY_PREFIX = 'runs/'
 DELETE_STATUS = 'DELETE_IN_PROGRESS'
 SOURCE_BUCKET_EXPORT_NAME = 'MultiplayerTestScalerArtifactBucketName'
 DEFAULT_DESTINATION_BUCKET_EXPORT_NAME = 'O3deMetricsUploadBucket'
+DESTINATION_KEY_PREFIX = 'MpScalerArtifacts/'
+# Server package updates are not test artifacts
+SERVER_UPDATE_KEY_PREFIX = 'server-updates/'
+# Progress of an upload which continues in a new invocation, stored in the source bucket per stack
+CHECKPOINT_KEY_PREFIX = 'upload-checkpoints/'
+# Artifacts are copied first, then streamed into a single bundle per run with a manifest,
+# under MpScalerArtifacts/runs/<run_id>/bundle/
+COPY_PHASE = 'copy'
+BUNDLE_PHASE = 'bundle'
+BUNDLE_FOLDER_NAME = 'bundle'
+BUNDLE_NAME = 'artifacts.tar.gz'
+BUNDLE_MANIFEST_NAME = 'manifest.json'
+# Number of objects copied concurrently. Override with the MAX_COPY_WORKERS environment variable
+DEFAULT_MAX_COPY_WORKERS = 16
+# Number of source objects listed and copied before each checkpoint
+LIST_PAGE_SIZE = 200
+# Time left in the invocation below which the upload continues in a new invocation
+CONTINUATION_MARGIN_MILLIS = 60000
+# Progress metrics are logged in CloudWatch embedded metric format
+METRICS_NAMESPACE = 'O3DE/MultiplayerTestScaler'
+
+# Kept by warm invocations of the same execution environment
+_bucket_names = {}
+_s3_clients = {}
+
 
 def handler(event, context):
     if 'resources' not in event or type(event['resources']) is not list or len(event['resources']) < 1:
         raise RuntimeError('List of resources not provided! No action will be taken.')
-    
+
     stack_id = event['resources'][0]
     new_stack_status = event['detail']['status-details']['status']
-    
+
     print(f'Status for stack {stack_id} has changed to: {new_stack_status}')
     if new_stack_status != DELETE_STATUS:
         print(f'Status change for stack is not {DELETE_STATUS}, ignoring.')
         return {
             'statusCode': 200,
         }
- 
+
     # get artifact and metrics bucket names
-    cfn = boto3.client('cloudformation')
-    export_dict = find_exported_buckets(cfn)
+    export_dict = get_bucket_names()
     source_bucket = export_dict['source']
     destination_bucket = export_dict['destination']
-    
+
     if "".__eq__(destination_bucket):
         raise RuntimeError('Upload destination bucket missing! No action will be taken.')
-    
+
     if "".__eq__(source_bucket):
         raise RuntimeError('Artifact source bucket missing! No action will be taken.')
- 
+
     # upload bucket content with unique key
-    s3_client = boto3.client('s3')
+    max_workers = int(os.environ.get('MAX_COPY_WORKERS', DEFAULT_MAX_COPY_WORKERS))
+    s3_client = get_s3_client(max_workers)
+    checkpoint_key = get_checkpoint_key(stack_id)
+    checkpoint = load_checkpoint(s3_client, source_bucket, checkpoint_key)
+    if checkpoint['start_after']:
+        print(f'Continuing {checkpoint["phase"]} after {checkpoint["start_after"]}')
+    if checkpoint['run_id'] is None:
+        checkpoint['run_id'] = get_run_id(get_cloudformation_client(), stack_id)
+    # only the artifacts of the run are listed. Stacks deployed without a run ID upload the whole bucket
+    source_prefix = f'{RUN_KEY_PREFIX}{checkpoint["run_id"]}/' if checkpoint['run_id'] else ''
+    print(f'Uploading the artifacts of run {checkpoint["run_id"]}' if checkpoint['run_id'] else
+          'No run ID is tagged on the stack, uploading all the artifacts')
+
+    if checkpoint['phase'] == COPY_PHASE:
+        if not copy_artifacts(s3_client, source_bucket, destination_bucket, source_prefix, checkpoint, context,
+                              max_workers):
+            return continue_in_new_invocation(s3_client, source_bucket, checkpoint_key, checkpoint, context, event)
+        print(f'Copied {checkpoint["copied"]} artifacts ({checkpoint["copied_bytes"]} bytes), '
+              f'skipped {checkpoint["skipped"]} artifacts already uploaded')
+        checkpoint['phase'] = BUNDLE_PHASE
+        checkpoint['start_after'] = ''
+
+    bundle_prefix = get_bundle_prefix(checkpoint['run_id'] or stack_id.split('/')[-1])
+    if not bundle_artifacts(s3_client, source_bucket, destination_bucket, source_prefix, bundle_prefix, checkpoint,
+                            context):
+        return continue_in_new_invocation(s3_client, source_bucket, checkpoint_key, checkpoint, context, event)
+
+    s3_client.delete_object(Bucket=source_bucket, Key=checkpoint_key)
+    s3_client.delete_object(Bucket=source_bucket, Key=get_pending_bundle_key(checkpoint_key))
+    return {
+        'statusCode': 200,
+    }
 
+
+def copy_artifacts(s3_client: any, source_bucket: str, destination_bucket: str, source_prefix: str, checkpoint: dict,
+                   context: any, max_workers: int) -> bool:
+    """
+    Copy the artifacts under the source prefix listed after the checkpoint to the destination bucket
+    :return: Whether all the artifacts are copied. The checkpoint is updated if the invocation runs out of time
+    """
     # see: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/s3/paginator/ListObjectsV2.html
     list_objects_paginator = s3_client.get_paginator('list_objects_v2')
-    page_iterator = list_objects_paginator.paginate(Bucket=source_bucket)
+    page_iterator = list_objects_paginator.paginate(
+        Bucket=source_bucket, Prefix=source_prefix, StartAfter=checkpoint['start_after'],
+        PaginationConfig={'PageSize': LIST_PAGE_SIZE})
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for page in page_iterator:
+            objects = [obj for obj in page.get('Contents', []) if is_artifact(obj['Key'])]
+            print(f'list of source bucket contents contains {len(objects)} artifacts')
+            page_start = time.time()
+            results = list(executor.map(
+                lambda obj: copy_artifact(s3_client, source_bucket, obj, destination_bucket), objects))
+            page_progress = {
+                'copied': sum(1 for result in results if result == 'copied'),
+                'skipped': sum(1 for result in results if result == 'skipped'),
+                'copied_bytes': sum(obj['Size'] for obj, result in zip(objects, results) if result == 'copied')
+            }
+            for name, value in page_progress.items():
+                checkpoint[name] += value
+            log_progress_metrics(page_progress, time.time() - page_start)
+
+            if page.get('Contents'):
+                checkpoint['start_after'] = page['Contents'][-1]['Key']
+            if page.get('IsTruncated') and context.get_remaining_time_in_millis() < CONTINUATION_MARGIN_MILLIS:
+                return False
+    return True
+
+
+def bundle_artifacts(s3_client: any, source_bucket: str, destination_bucket: str, source_prefix: str,
+                     bundle_prefix: str, checkpoint: dict, context: any) -> bool:
+    """
+    Stream the artifacts under the source prefix listed after the checkpoint into the run bundle, then upload the bundle manifest.
+    See artifact_bundle.py for the bundle format
+    :return: Whether the bundle is complete. The checkpoint is updated if the invocation runs out of time
+    """
+    bundle_key = f'{bundle_prefix}{BUNDLE_NAME}'
+    writer = BundleWriter(s3_client, destination_bucket, bundle_key, checkpoint.get('bundle'))
+    list_objects_paginator = s3_client.get_paginator('list_objects_v2')
+    page_iterator = list_objects_paginator.paginate(
+        Bucket=source_bucket, Prefix=source_prefix, StartAfter=checkpoint['start_after'],
+        PaginationConfig={'PageSize': LIST_PAGE_SIZE})
     for page in page_iterator:
-        print(f'list of source bucket contents contains {len(page["Contents"])} objects')
-        for obj in page['Contents']:
-            key_name = obj['Key']
-            copy_source = {'Bucket': source_bucket, 'Key': key_name }
-            s3_client.copy(copy_source, destination_bucket, f'MpScalerArtifacts/{key_name}')
-    
+        for obj in page.get('Contents', []):
+            if not is_artifact(obj['Key']):
+                continue
+            body = s3_client.get_object(Bucket=source_bucket, Key=obj['Key'])['Body']
+            writer.add_file(obj['Key'], body, obj['Size'], obj['LastModified'].timestamp())
+            checkpoint['start_after'] = obj['Key']
+            if context.get_remaining_time_in_millis() < CONTINUATION_MARGIN_MILLIS:
+                checkpoint['bundle'] = writer.get_state()
+                return False
+
+    if writer.close():
+        manifest = get_manifest(bundle_key, writer.index, writer.compressed_size)
+        s3_client.put_object(Bucket=destination_bucket, Key=f'{bundle_prefix}{BUNDLE_MANIFEST_NAME}',
+                             Body=json.dumps(manifest, indent=1).encode('utf-8'), ContentType='application/json')
+        print(f'Bundled {manifest["file_count"]} artifacts ({manifest["size"]} bytes) into '
+              f'{bundle_key} ({manifest["compressed_size"]} bytes)')
+    return True
+
+
+def continue_in_new_invocation(s3_client: any, bucket: str, checkpoint_key: str, checkpoint: dict, context: any,
+                               event: dict) -> dict:
+    save_checkpoint(s3_client, bucket, checkpoint_key, checkpoint)
+    invoke_continuation(context, event)
+    print(f'Upload continues in a new invocation after {checkpoint["start_after"]}')
     return {
-        'statusCode': 200,
+        'statusCode': 202,
     }
-    
+
+
+def get_bucket_names() -> dict:
+    """
+    Get the source and destination bucket names. They are set at deploy time in the SOURCE_BUCKET_NAME and
+    DESTINATION_BUCKET_NAME environment variables. Names missing from the environment are looked up
+    from the AWS CloudFormation exports once per execution environment
+    """
+    if not _bucket_names:
+        bucket_names = {
+            'source': os.environ.get('SOURCE_BUCKET_NAME', ''),
+            'destination': os.environ.get('DESTINATION_BUCKET_NAME', '')
+        }
+        if not bucket_names['source'] or not bucket_names['destination']:
+            print('Bucket names are not set in the environment, looking up the exports')
+            exported_buckets = find_exported_buckets(get_cloudformation_client())
+            bucket_names = {name: bucket_names[name] or exported_buckets[name] for name in bucket_names}
+        if not bucket_names['source'] or not bucket_names['destination']:
+            # don't cache a partial result, the missing export may be created later
+            return bucket_names
+        _bucket_names.update(bucket_names)
+    return _bucket_names
+
+
+def get_cloudformation_client() -> any:
+    return boto3.client('cloudformation')
+
+
+def get_run_id(cfn_client: any, stack_id: str) -> str:
+    """
+    Get the ID of the test run from the stack tags. The stack is still described while it's being deleted
+    :return: Run ID, or an empty string if the stack was deployed without one
+    """
+    try:
+        stacks = cfn_client.describe_stacks(StackName=stack_id).get('Stacks', [])
+    except botocore.exceptions.ClientError as error:
+        print(f'[Warn] Failed to describe stack {stack_id}: {error}')
+        return ''
+    tags = stacks[0].get('Tags', []) if stacks else []
+    return next((tag['Value'] for tag in tags if tag['Key'] == RUN_ID_TAG_KEY), '')
+
+
+def get_bundle_prefix(run_id: str) -> str:
+    return f'{DESTINATION_KEY_PREFIX}{RUN_KEY_PREFIX}{run_id}/{BUNDLE_FOLDER_NAME}/'
+
+
+def get_s3_client(max_workers: int) -> any:
+    if max_workers not in _s3_clients:
+        _s3_clients[max_workers] = boto3.client('s3', config=Config(max_pool_connections=max_workers))
+    return _s3_clients[max_workers]
+
+
+def is_artifact(key_name: str) -> bool:
+    return not key_name.startswith(SERVER_UPDATE_KEY_PREFIX) and not key_name.startswith(CHECKPOINT_KEY_PREFIX)
+
+
+def copy_artifact(s3_client: any, source_bucket: str, obj: dict, destination_bucket: str) -> str:
+    """
+    Copy an artifact to the destination bucket unless an identical copy is already there
+    :return: 'copied' or 'skipped'
+    """
+    destination_key = f'{DESTINATION_KEY_PREFIX}{obj["Key"]}'
+    try:
+        existing = s3_client.head_object(Bucket=destination_bucket, Key=destination_key)
+        if existing['ContentLength'] == obj['Size'] and existing['ETag'] == obj['ETag']:
+            return 'skipped'
+    except botocore.exceptions.ClientError as error:
+        if error.response['Error']['Code'] not in ['404', 'NoSuchKey', 'NotFound']:
+            raise
+
+    copy_source = {'Bucket': source_bucket, 'Key': obj['Key']}
+    # a single CopyObject request keeps the source ETag, so the copy is skipped next time.
+    # The managed transfer is required above the 5 GB CopyObject limit
+    if obj['Size'] < 5 * 1024 ** 3:
+        s3_client.copy_object(CopySource=copy_source, Bucket=destination_bucket, Key=destination_key)
+    else:
+        s3_client.copy(copy_source, destination_bucket, destination_key)
+    return 'copied'
+
+
+def get_checkpoint_key(stack_id: str) -> str:
+    # the stack ID ARN ends with the unique ID of the stack
+    return f'{CHECKPOINT_KEY_PREFIX}{stack_id.split("/")[-1]}.json'
+
+
+def get_pending_bundle_key(checkpoint_key: str) -> str:
+    # compressed bundle bytes not uploaded yet are binary, so they are stored next to the checkpoint
+    return f'{os.path.splitext(checkpoint_key)[0]}.pending'
+
+
+def load_checkpoint(s3_client: any, bucket: str, checkpoint_key: str) -> dict:
+    # the run ID is looked up once per upload, None until then
+    checkpoint = {'phase': COPY_PHASE, 'start_after': '', 'copied': 0, 'skipped': 0, 'copied_bytes': 0,
+                  'run_id': None}
+    try:
+        response = s3_client.get_object(Bucket=bucket, Key=checkpoint_key)
+        checkpoint.update(json.loads(response['Body'].read()))
+        if 'bundle' in checkpoint:
+            response = s3_client.get_object(Bucket=bucket, Key=get_pending_bundle_key(checkpoint_key))
+            checkpoint['bundle']['pending'] = response['Body'].read()
+    except botocore.exceptions.ClientError as error:
+        if error.response['Error']['Code'] not in ['404', 'NoSuchKey']:
+            raise
+    return checkpoint
+
+
+def save_checkpoint(s3_client: any, bucket: str, checkpoint_key: str, checkpoint: dict) -> None:
+    checkpoint = dict(checkpoint)
+    if 'bundle' in checkpoint:
+        checkpoint['bundle'] = dict(checkpoint['bundle'])
+        s3_client.put_object(Bucket=bucket, Key=get_pending_bundle_key(checkpoint_key),
+                             Body=checkpoint['bundle'].pop('pending'))
+    s3_client.put_object(Bucket=bucket, Key=checkpoint_key, Body=json.dumps(checkpoint).encode('utf-8'),
+                         ContentType='application/json')
+
+
+def invoke_continuation(context: any, event: dict) -> None:
+    lambda_client = boto3.client('lambda')
+    lambda_client.invoke(FunctionName=context.invoked_function_arn, InvocationType='Event',
+                         Payload=json.dumps(event).encode('utf-8'))
+
+
+def log_progress_metrics(progress: dict, seconds: float) -> None:
+    # see: https://docs.aws.amazon.com/AmazonCloudWatch/latest/monitoring/CloudWatch_Embedded_Metric_Format_Specification.html
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['Function']],
+                'Metrics': [
+                    {'Name': 'ArtifactsCopied', 'Unit': 'Count'},
+                    {'Name': 'ArtifactsSkipped', 'Unit': 'Count'},
+                    {'Name': 'ArtifactBytesCopied', 'Unit': 'Bytes'},
+                    {'Name': 'ArtifactCopySeconds', 'Unit': 'Seconds'}
+                ]
+            }]
+        },
+        'Function': 'ArtifactUpload',
+        'ArtifactsCopied': progress['copied'],
+        'ArtifactsSkipped': progress['skipped'],
+        'ArtifactBytesCopied': progress['copied_bytes'],
+        'ArtifactCopySeconds': round(seconds, 3)
+    }))
+
+
 def find_exported_buckets(cfn_client: any) -> dict:
     found_buckets = {
         'source': '',
@@ -58,13 +333,13 @@ def find_exported_buckets(cfn_client: any) -> dict:
     }
 
     # see: https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/cloudformation/paginator/ListExports.html
+    # the export name is namespaced for deployments in a namespace
+    source_export_name = os.environ.get('SOURCE_BUCKET_EXPORT_NAME', SOURCE_BUCKET_EXPORT_NAME)
     exports_paginator = cfn_client.get_paginator('list_exports')
     page_iterator = exports_paginator.paginate()
     for page in page_iterator:
-        if found_buckets['source'] != "" and found_buckets['destination'] != "":
-            break  # if we already found both buckets, stop searching
         for export in page['Exports']:
-            if export['Name'] == SOURCE_BUCKET_EXPORT_NAME:
+            if export['Name'] == source_export_name:
                 value = export['Value']
                 found_buckets['source'] = value
                 print(f'source bucket is: {value}')
@@ -72,5 +347,7 @@ def find_exported_buckets(cfn_client: any) -> dict:
                 value = export['Value']
                 found_buckets['destination'] = value
                 print(f'destination bucket is: {value}')
+            if found_buckets['source'] != "" and found_buckets['destination'] != "":
+                return found_buckets  # if we already found both buckets, stop searching
 
     return found_buckets
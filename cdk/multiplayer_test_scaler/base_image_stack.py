@@ -0,0 +1,47 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from aws_cdk import (
+    Stack,
+    aws_iam as iam,
+)
+import aws_cdk as cdk
+from constructs import Construct
+
+from .constants import *
+from .custom_image_builder_construct import BaseImageBuilderConstruct
+
+
+class O3DEBaseImageStack(Stack):
+    """
+    Create stack for baking the base Amazon Machine Image (AMI) with the server runtime dependencies.
+    The base AMI is baked once and reused by the server AMI builds until the dependencies change
+    """
+    def __init__(self, scope: Construct, construct_id: str, platform: str, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        image_builder_instance_type = self.node.try_get_context('image_builder_instance_type')
+        if not image_builder_instance_type:
+            image_builder_instance_type = IMAGE_BUILDER_INSTANCE_TYPE
+
+        instance_role = iam.Role(
+            self, f'{RESOURCE_ID_COMMON_PREFIX}BaseImageInstanceRole',
+            description='Role to be used by EC2 Image Builder for baking the base image',
+            assumed_by=iam.ServicePrincipal('ec2.amazonaws.com'),
+            path='/executionServiceEC2Role/'
+        )
+
+        base_image_construct = BaseImageBuilderConstruct(
+            self, f'{RESOURCE_ID_COMMON_PREFIX}BaseImageBuilderConstruct',
+            instance_role, platform, image_builder_instance_type)
+
+        cdk.CfnOutput(
+            self,
+            f'{RESOURCE_ID_COMMON_PREFIX}BaseImageId',
+            description='ID of the base AMI with the server runtime dependencies',
+            value=base_image_construct.custom_image_id)
+        cdk.CfnOutput(
+            self,
+            f'{RESOURCE_ID_COMMON_PREFIX}ImageBuilderLogBucketName',
+            description='Bucket where the EC2 Image Builder logs are stored',
+            value=base_image_construct.log_bucket.bucket_name)
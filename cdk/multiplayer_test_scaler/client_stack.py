@@ -8,20 +8,23 @@ from aws_cdk import (
 import aws_cdk as cdk
 from constructs import Construct
 
+from .common_stack import O3DECommonStack
 from .constants import *
+from .naming import get_namespaced_name
 
 
 class O3DEClientScalerStack(Stack):
     """
     Create stack for deploying AWS resources required to run the multiplayer clients
     """
-    def __init__(self, scope: Construct, id_: str, vpc: ec2.Vpc, security_group: ec2.SecurityGroup,
-                 platform: str, project_name: str, **kwargs) -> None:
+    def __init__(self, scope: Construct, id_: str, platform: str, project_name: str, **kwargs) -> None:
         super().__init__(scope, id_, **kwargs)
-        self._vpc = vpc
-        self._security_group = security_group
+        # Shared resources are imported from the common stack, which must be deployed first
+        self._vpc = O3DECommonStack.import_vpc(self)
+        self._security_group = O3DECommonStack.import_security_group(self)
         self._platform = platform
         self._project_name = project_name
+        self._artifacts_bucket = O3DECommonStack.import_artifacts_bucket(self)
 
         # Create the cluster for the Amazon ECS service
         self._cluster = ecs.Cluster(
@@ -32,6 +35,9 @@ class O3DEClientScalerStack(Stack):
         client_task_definition = self._create_client_task_definition(f'{RESOURCE_ID_COMMON_PREFIX}ClientTaskDef')
         self._launch_client_tasks(client_task_definition)
 
+        if str(self.node.try_get_context('network_probe')).lower() == 'true':
+            self._create_probe_task_definition(f'{RESOURCE_ID_COMMON_PREFIX}ProbeTaskDef')
+
     def _create_client_task_definition(self, id_: str) -> ecs.FargateTaskDefinition:
         """
         Create the AWS Fargate task definition for clients
@@ -42,10 +48,18 @@ class O3DEClientScalerStack(Stack):
         if not operating_system_family:
             raise RuntimeError(f'Client for the {self._platform} platform is not supported yet')
 
+        cpu_units = self.node.try_get_context('client_task_cpu')
+        if not cpu_units:
+            cpu_units = ECS_TASK_CPU_UNITS
+
+        memory_limit_mib = self.node.try_get_context('client_task_memory')
+        if not memory_limit_mib:
+            memory_limit_mib = ECS_TASK_MEMORY_LIMIT_MIB
+
         client_task_definition = ecs.FargateTaskDefinition(
             self, id_,
-            memory_limit_mib=ECS_TASK_MEMORY_LIMIT_MIB,
-            cpu=ECS_TASK_CPU_UNITS,
+            memory_limit_mib=int(memory_limit_mib),
+            cpu=int(cpu_units),
             runtime_platform=ecs.RuntimePlatform(
                 operating_system_family=operating_system_family,
                 cpu_architecture=ECS_TASK_CPU_ARCHITECTURE
@@ -55,22 +69,88 @@ class O3DEClientScalerStack(Stack):
         # Create the container image and push it to the CDK default Amazon Elastic Container Registry (ECR) repository
         docker_image = ecr_asset.DockerImageAsset(
             self, 'MultiplayerTestScalerDockerImage',
-            directory=f'{ASSET_DIR_ROOT}/{self._platform}'
+            directory=f'{ASSET_DIR_ROOT}/{self._platform}',
+            # Windows containers are killed once the shutdown grace period ends, even before the stop timeout
+            build_args={'SHUTDOWN_GRACE_MILLISECONDS': str(ECS_TASK_STOP_TIMEOUT_SECONDS * 1000)}
         )
 
+        # Client readiness events are read from this log group by the CLI
+        self._log_group = logs.LogGroup(
+            self, f'{RESOURCE_ID_COMMON_PREFIX}ClientLogGroup',
+            retention=ECS_TASK_LOG_RETENTION,
+            removal_policy=cdk.RemovalPolicy.DESTROY
+        )
+        cdk.CfnOutput(
+            self,
+            f'{RESOURCE_ID_COMMON_PREFIX}ClientLogGroupName',
+            description='Name of the log group for client logs and readiness events',
+            value=self._log_group.log_group_name)
+
         ecs_launch_cmd = ECS_TASK_COMMAND.replace('{project_name}', self._project_name)
+        if str(self.node.try_get_context('client_log_echo')).lower() == 'false':
+            # Only readiness events and metrics are sent to the client log stream
+            ecs_launch_cmd += ECS_TASK_SKIP_LOG_ECHO_ARG
+        # Prefix the client log streams with the run ID, so the logs of a run are listed by prefix
+        run_id = self.node.try_get_context('run_id')
+        stream_prefix = f'{ECS_TASK_LOGGING_STREAM_PREFIX}-{run_id}' if run_id else ECS_TASK_LOGGING_STREAM_PREFIX
+        artifact_sync_interval = self.node.try_get_context('artifact_sync_interval')
+        if not artifact_sync_interval:
+            artifact_sync_interval = ARTIFACT_SYNC_INTERVAL_MINUTES
         client_task_definition.add_container(
             f'{RESOURCE_ID_COMMON_PREFIX}ClientContainer',
             image=ecs.ContainerImage.from_docker_image_asset(docker_image),  # image is tagged according to its asset hash by default
             entry_point=['powershell.exe'],
             command=[ecs_launch_cmd],
             logging=ecs.LogDriver.aws_logs(
-                stream_prefix=ECS_TASK_LOGGING_STREAM_PREFIX
-            )
+                stream_prefix=stream_prefix,
+                log_group=self._log_group
+            ),
+            # Read by the client launcher to sync the client logs and metrics under the run prefix
+            environment={
+                'MPSCALER_ARTIFACT_BUCKET': self._artifacts_bucket.bucket_name,
+                'MPSCALER_RUN_ID': run_id if run_id else '',
+                'MPSCALER_ARTIFACT_SYNC_INTERVAL_SECONDS': str(int(artifact_sync_interval) * 60)
+            },
+            stop_timeout=cdk.Duration.seconds(ECS_TASK_STOP_TIMEOUT_SECONDS)
         )
+        self._artifacts_bucket.grant_put(client_task_definition.task_role, ECS_TASK_ARTIFACT_KEY_PATTERN)
 
         return client_task_definition
 
+    def _create_probe_task_definition(self, id_: str) -> ecs.FargateTaskDefinition:
+        """
+        Create the AWS Fargate task definition for the UDP network probe senders. The probe-network command of the CLI
+        runs them in the client subnets with the client security group, so they take the network path of the clients
+        :param id_: Task definition construct ID
+        :return: AWS Fargate Task definition
+        """
+        probe_task_definition = ecs.FargateTaskDefinition(
+            self, id_,
+            memory_limit_mib=NETWORK_PROBE_TASK_MEMORY_LIMIT_MIB,
+            cpu=NETWORK_PROBE_TASK_CPU_UNITS,
+            runtime_platform=ecs.RuntimePlatform(
+                operating_system_family=ecs.OperatingSystemFamily.LINUX,
+                cpu_architecture=ECS_TASK_CPU_ARCHITECTURE
+            )
+        )
+        probe_task_definition.add_container(
+            NETWORK_PROBE_CONTAINER_NAME,
+            container_name=NETWORK_PROBE_CONTAINER_NAME,
+            image=ecs.ContainerImage.from_registry(NETWORK_PROBE_IMAGE),
+            entry_point=NETWORK_PROBE_ENTRY_POINT,
+            logging=ecs.LogDriver.aws_logs(
+                stream_prefix=NETWORK_PROBE_LOGGING_STREAM_PREFIX,
+                log_group=self._log_group
+            )
+        )
+
+        cdk.CfnOutput(
+            self,
+            f'{RESOURCE_ID_COMMON_PREFIX}ProbeTaskDefinitionArn',
+            description='ARN of the task definition of the UDP network probe senders',
+            value=probe_task_definition.task_definition_arn)
+        return probe_task_definition
+
     def _launch_client_tasks(self, client_task_definition: ecs.FargateTaskDefinition) -> None:
         """
         Launch the Amazon ECS service for running the client tasks
@@ -81,8 +161,9 @@ class O3DEClientScalerStack(Stack):
             raise RuntimeError('Client count is required for deploying the Multiplayer Test Scaler. '
                             'Pass the client count using \'-c client_count={client_count}\'')
 
-        client_subnet_ids = cdk.Fn.import_value(f'{RESOURCE_ID_COMMON_PREFIX}ClientSubnetIds')
-        ecs.FargateService(
+        client_subnet_ids = cdk.Fn.import_value(
+            get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}ClientSubnetIds'))
+        client_service = ecs.FargateService(
             self, f'{RESOURCE_ID_COMMON_PREFIX}ClientService',
             cluster=self._cluster,
             task_definition=client_task_definition,
@@ -98,3 +179,14 @@ class O3DEClientScalerStack(Stack):
                 ]
             )
         )
+
+        cdk.CfnOutput(
+            self,
+            f'{RESOURCE_ID_COMMON_PREFIX}ClientClusterName',
+            description='Name of the Amazon ECS cluster running the clients',
+            value=self._cluster.cluster_name)
+        cdk.CfnOutput(
+            self,
+            f'{RESOURCE_ID_COMMON_PREFIX}ClientServiceName',
+            description='Name of the Amazon ECS service running the clients',
+            value=client_service.service_name)
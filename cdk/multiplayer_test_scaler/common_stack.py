@@ -14,6 +14,7 @@ import aws_cdk as cdk
 from constructs import Construct
 
 from .constants import *
+from .naming import get_namespaced_name
 
 
 class O3DECommonStack(Stack):
@@ -23,6 +24,10 @@ class O3DECommonStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, ** kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        # Resources shared with the server and client stacks are exported explicitly and imported by name, see the
+        # import_* methods. Passing them across stacks would add automatic exports which depend on the target
+        # context variable, so deploying the server and clients separately would update this stack each time
+
         # Create a shared VPC with 1 public subnet group and 1 private subnet group.
         # see https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/Vpc.html 
         self._vpc = ec2.Vpc(
@@ -42,6 +47,14 @@ class O3DECommonStack(Stack):
             ]
         )
 
+        cdk.CfnOutput(
+            self,
+            f'{RESOURCE_ID_COMMON_PREFIX}VpcId',
+            description='ID of the VPC shared by the server and clients',
+            value=self._vpc.vpc_id,
+            export_name=get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}VpcId')
+        )
+
         # Export the subnet that will be used to launch the server Amazon EC2 instance explicitly.
         # Avoid the automatic output from the CDK to make sure that the common stack outputs won't change
         # when users choose to deploy either the server or clients separately via the target context variable
@@ -55,21 +68,21 @@ class O3DECommonStack(Stack):
             f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetId',
             description='ID of the public subnet for deploying the server instance',
             value=server_subnet_selections.subnets[0].subnet_id,
-            export_name=f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetId'
+            export_name=get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetId')
         )
         cdk.CfnOutput(
             self,
             f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetAvailabilityZone',
             description='Availability zone of the public subnet for deploying the server instance',
             value=server_subnet_selections.subnets[0].availability_zone,
-            export_name=f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetAvailabilityZone'
+            export_name=get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetAvailabilityZone')
         )
         cdk.CfnOutput(
             self,
             f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetRouteTableId',
             description='Route table ID of the public subnet for deploying the server instance',
             value=server_subnet_selections.subnets[0].route_table.route_table_id,
-            export_name=f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetRouteTableId'
+            export_name=get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetRouteTableId')
         )
 
         # Export the subnets that will be used to launch the client Amazon ECS tasks explicitly.
@@ -83,7 +96,7 @@ class O3DECommonStack(Stack):
             description='Private subnets for running client ECS tasks',
             value=cdk.Fn.join(
                 ',', [subnet.subnet_id for subnet in client_subnets_selection.subnets]),
-            export_name=f'{RESOURCE_ID_COMMON_PREFIX}ClientSubnetIds'
+            export_name=get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}ClientSubnetIds')
         )
 
         # Create a security group shared by the server and clients
@@ -97,6 +110,13 @@ class O3DECommonStack(Stack):
             ec2.Port.all_udp(),
             'Allow cross instance communication on UDP',
         )
+        cdk.CfnOutput(
+            self,
+            f'{RESOURCE_ID_COMMON_PREFIX}SecurityGroupId',
+            description='ID of the security group shared by the server and clients',
+            value=self._security_group.security_group_id,
+            export_name=get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}SecurityGroupId')
+        )
 
         # Create bucket where test artifacts should be uploaded
         # to retain this on stack destroy, change properties:
@@ -109,11 +129,60 @@ class O3DECommonStack(Stack):
             f'{RESOURCE_ID_COMMON_PREFIX}ArtifactBucketName',
             description="Bucket where test artifacts will be uploaded",
             value=self._artifacts_bucket.bucket_name,
-            export_name=f'{RESOURCE_ID_COMMON_PREFIX}ArtifactBucketName')
+            export_name=get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}ArtifactBucketName'))
         
+        if str(self.node.try_get_context('vpc_flow_logs')).lower() == 'true':
+            self._create_flow_log()
+
         # Create lambda to upload artifacts to external bucket when test ends
         self._create_upload_lambda()
+        cdk.CfnOutput(
+            self,
+            f'{RESOURCE_ID_COMMON_PREFIX}UploadLambdaArn',
+            description='ARN of the lambda function which uploads the test artifacts when the server stack is deleted',
+            value=self._upload_lambda.function_arn,
+            export_name=get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}UploadLambdaArn')
+        )
         
+    def _create_flow_log(self) -> None:
+        """
+        Deliver the VPC Flow Logs to the artifacts bucket, so the bytes and packets every client exchanges with the
+        server can be accounted for (see bandwidth-report in the repository root). The flow log is created at the CFN
+        level since the L2 construct can't set the aggregation interval
+        """
+        key_prefix = f'{VPC_FLOW_LOG_KEY_PREFIX}/AWSLogs/{self.account}/*'
+        # Permissions of the log delivery service, see
+        # https://docs.aws.amazon.com/vpc/latest/userguide/flow-logs-s3.html#flow-logs-s3-permissions
+        self._artifacts_bucket.add_to_resource_policy(iam.PolicyStatement(
+            effect=iam.Effect.ALLOW,
+            principals=[iam.ServicePrincipal('delivery.logs.amazonaws.com')],
+            actions=['s3:PutObject'],
+            resources=[self._artifacts_bucket.arn_for_objects(key_prefix)],
+            conditions={'StringEquals': {'s3:x-amz-acl': 'bucket-owner-full-control'}}
+        ))
+        self._artifacts_bucket.add_to_resource_policy(iam.PolicyStatement(
+            effect=iam.Effect.ALLOW,
+            principals=[iam.ServicePrincipal('delivery.logs.amazonaws.com')],
+            actions=['s3:GetBucketAcl'],
+            resources=[self._artifacts_bucket.bucket_arn]
+        ))
+        flow_log = ec2.CfnFlowLog(
+            self, f'{RESOURCE_ID_COMMON_PREFIX}VpcFlowLog',
+            resource_id=self._vpc.vpc_id,
+            resource_type='VPC',
+            traffic_type='ALL',
+            log_destination_type='s3',
+            log_destination=f'{self._artifacts_bucket.bucket_arn}/{VPC_FLOW_LOG_KEY_PREFIX}/',
+            log_format=VPC_FLOW_LOG_FORMAT,
+            max_aggregation_interval=VPC_FLOW_LOG_MAX_AGGREGATION_SECONDS
+        )
+        flow_log.node.add_dependency(self._artifacts_bucket.policy)
+        cdk.CfnOutput(
+            self,
+            f'{RESOURCE_ID_COMMON_PREFIX}FlowLogId',
+            description='ID of the VPC flow log delivered to the artifacts bucket',
+            value=flow_log.ref)
+
     def _create_upload_lambda(self):
         destination_bucket_name = cdk.Fn.import_value(DEFAULT_DESTINATION_BUCKET_EXPORT_NAME)
         destination_pattern = cdk.Fn.sub('arn:${AWS::Partition}:s3:::') + destination_bucket_name + '/*'
@@ -122,13 +191,33 @@ class O3DECommonStack(Stack):
                 statements=[
                     iam.PolicyStatement(
                         effect=iam.Effect.ALLOW,
+                        # fallback lookup of the bucket names
                         actions=['cloudformation:ListExports'],
                         resources=['*'] # ListExports does not support resource or condition keys
                     ),
                     iam.PolicyStatement(
                         effect=iam.Effect.ALLOW,
-                        actions=['s3:PutObject'],
+                        # read the run ID tag of the deleted server stack
+                        actions=['cloudformation:DescribeStacks'],
+                        resources=[cdk.Fn.sub(
+                            'arn:${AWS::Partition}:cloudformation:${AWS::Region}:${AWS::AccountId}:stack/*')]
+                    ),
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        # read the existing copies to skip the artifacts uploaded already.
+                        # The run bundle is streamed with a multipart upload
+                        actions=['s3:PutObject', 's3:GetObject', 's3:AbortMultipartUpload'],
                         resources=[destination_pattern],
+                    ),
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        actions=['s3:ListBucket'],
+                        resources=[cdk.Fn.sub('arn:${AWS::Partition}:s3:::') + destination_bucket_name],
+                    ),
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        actions=['s3:PutObject', 's3:DeleteObject'],
+                        resources=[self._artifacts_bucket.arn_for_objects(f'{UPLOAD_CHECKPOINT_KEY_PREFIX}/*')],
                     )
                 ]
             )
@@ -139,8 +228,25 @@ class O3DECommonStack(Stack):
             code=_lambda.Code.from_asset('lambda/upload_test_artifacts'),
             handler='upload_test_artifacts.handler',
             timeout=Duration.seconds(240),
+            # the run bundle is compressed in memory one part at a time
+            memory_size=512,
             description='Uploads MP Scaler artifacts to external bucket when child stacks are torn down.',
+            environment={
+                # resolved at deploy time, so the function doesn't need to look up the exports
+                'SOURCE_BUCKET_NAME': self._artifacts_bucket.bucket_name,
+                'DESTINATION_BUCKET_NAME': destination_bucket_name,
+                # looked up by the export fallback
+                'SOURCE_BUCKET_EXPORT_NAME': get_namespaced_name(
+                    self, f'{RESOURCE_ID_COMMON_PREFIX}ArtifactBucketName'),
+                'MAX_COPY_WORKERS': str(UPLOAD_MAX_COPY_WORKERS)
+            }
         )
+        # large uploads continue in a new invocation before the timeout
+        upload_policy.add_statements(iam.PolicyStatement(
+            effect=iam.Effect.ALLOW,
+            actions=['lambda:InvokeFunction'],
+            resources=[self._upload_lambda.function_arn]
+        ))
         self._upload_lambda.role.attach_inline_policy(upload_policy)
         self._artifacts_bucket.grant_read(self._upload_lambda.role)
 
@@ -173,4 +279,53 @@ class O3DECommonStack(Stack):
         Get the lambda function used to upload test artifacts.
         Intended to be used as a target to trigger on child stack destruction.
         """
-        return self._upload_lambda
\ No newline at end of file
+        return self._upload_lambda
+
+    @staticmethod
+    def import_vpc(scope: Construct) -> ec2.IVpc:
+        """
+        Import the VPC shared by the server and clients. Subnets are imported separately, so only the ID is known
+        :param scope: Construct of the stack importing the VPC
+        :return: Shared VPC
+        """
+        return ec2.Vpc.from_vpc_attributes(
+            scope, f'{RESOURCE_ID_COMMON_PREFIX}ImportedVpc',
+            vpc_id=cdk.Fn.import_value(get_namespaced_name(scope, f'{RESOURCE_ID_COMMON_PREFIX}VpcId')),
+            availability_zones=[cdk.Fn.import_value(
+                get_namespaced_name(scope, f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetAvailabilityZone'))]
+        )
+
+    @staticmethod
+    def import_security_group(scope: Construct) -> ec2.ISecurityGroup:
+        """
+        Import the security group shared by the server and clients
+        :param scope: Construct of the stack importing the security group
+        :return: Shared security group
+        """
+        return ec2.SecurityGroup.from_security_group_id(
+            scope, f'{RESOURCE_ID_COMMON_PREFIX}ImportedSecurityGroup',
+            cdk.Fn.import_value(get_namespaced_name(scope, f'{RESOURCE_ID_COMMON_PREFIX}SecurityGroupId')))
+
+    @staticmethod
+    def import_artifacts_bucket(scope: Construct) -> s3.IBucket:
+        """
+        Import the S3 bucket where test artifacts should be stored
+        :param scope: Construct of the stack importing the bucket
+        :return: Artifacts bucket
+        """
+        return s3.Bucket.from_bucket_name(
+            scope, f'{RESOURCE_ID_COMMON_PREFIX}ImportedArtifactsBucket',
+            cdk.Fn.import_value(get_namespaced_name(scope, f'{RESOURCE_ID_COMMON_PREFIX}ArtifactBucketName')))
+
+    @staticmethod
+    def import_upload_lambda(scope: Construct) -> _lambda.IFunction:
+        """
+        Import the lambda function used to upload test artifacts
+        :param scope: Construct of the stack importing the function
+        :return: Upload lambda function, which the importing stack can grant invoke permissions on
+        """
+        return _lambda.Function.from_function_attributes(
+            scope, f'{RESOURCE_ID_COMMON_PREFIX}ImportedUploadLambda',
+            function_arn=cdk.Fn.import_value(
+                get_namespaced_name(scope, f'{RESOURCE_ID_COMMON_PREFIX}UploadLambdaArn')),
+            same_environment=True)
@@ -3,7 +3,8 @@
 
 from aws_cdk import (
     aws_ecs as ecs,
-    aws_ec2 as ec2
+    aws_ec2 as ec2,
+    aws_logs as logs
 )
 
 PLATFORM_WINDOWS = 'Windows'
@@ -11,7 +12,20 @@ ASSET_DIR_ROOT = 'assets'
 ZIPPED_PACKAGE_NAME = 'project.zip'
 
 RESOURCE_ID_COMMON_PREFIX = 'MultiplayerTestScaler'
+# Namespaces prefix the stack, resource and export names which are unique per account and region, see naming.py.
+# The length keeps the prefixed names within the EventBridge rule name limit of 64 characters
+NAMESPACE_PATTERN = r'^[A-Za-z][A-Za-z0-9-]{0,19}$'
 DEFAULT_DESTINATION_BUCKET_EXPORT_NAME = 'O3deMetricsUploadBucket'
+# Artifact upload lambda settings (see lambda/upload_test_artifacts/upload_test_artifacts.py)
+UPLOAD_MAX_COPY_WORKERS = 16
+UPLOAD_CHECKPOINT_KEY_PREFIX = 'upload-checkpoints'
+# VPC Flow Logs delivered to the artifacts bucket, enabled with the vpc_flow_logs context variable. Records are
+# aggregated per minute and delivered under <prefix>/AWSLogs/<account>/vpcflowlogs/<region>/<yyyy>/<mm>/<dd>/.
+# The format is the default one, listed explicitly since the bandwidth report of the CLI reads these fields
+VPC_FLOW_LOG_KEY_PREFIX = 'vpc-flow-logs'
+VPC_FLOW_LOG_MAX_AGGREGATION_SECONDS = 60
+VPC_FLOW_LOG_FORMAT = '${version} ${account-id} ${interface-id} ${srcaddr} ${dstaddr} ${srcport} ${dstport} ' \
+                      '${protocol} ${packets} ${bytes} ${start} ${end} ${action} ${log-status}'
 
 DEFAULT_SERVER_PORT = 33450
 RDP_CONNECTION_PORT = 3389
@@ -27,23 +41,115 @@ SERVER_LAUNCH_SCRIPT = '<script>\n' \
                        '--regset="/Amazon/AWSCore/AllowAWSMetadataCredentials=true" --regset="/O3DE/Metrics/Multiplayer/Active=true" ' \
                        '--console-command-file=C:/o3de/Cache/pc/launch_server.cfg --rhi=null -NullRenderer -bg_ConnectToAssetProcessor=0 \n' \
                        '</script>'
-SERVER_INSTANCE_CLASS = ec2.InstanceClass.COMPUTE5
-SERVER_INSTANCE_SIZE = ec2.InstanceSize.XLARGE2
+# Default server sizing. Override with the server_instance_type and server_volume_size context variables
+SERVER_INSTANCE_TYPE = 'c5.2xlarge'
 SERVER_INSTANCE_VOLUME_SIZE = 50
+# Default instance type used by EC2 Image Builder. Override with the image_builder_instance_type context variable
+IMAGE_BUILDER_INSTANCE_TYPE = 'c5.large'
+# Server runtime dependencies baked into the base image
+VC_REDISTRIBUTABLE_INSTALLER_URL = 'https://aka.ms/vs/17/release/vc_redist.x86.exe'
+VC_REDISTRIBUTABLE_REGISTRY_KEY = 'HKLM:\\SOFTWARE\\WOW6432Node\\Microsoft\\VisualStudio\\14.0\\VC\\Runtimes\\X86'
+SEVEN_ZIP_INSTALLER_URL = 'https://www.7-zip.org/a/7z2201-x64.msi'
+SEVEN_ZIP_PATH = 'C:\\Program Files\\7-Zip\\7z.exe'
+# Values of the AmiTagKey tag of the server and base AMIs
+SERVER_IMAGE_TAG_VALUE = 'o3de-multiplayer-test-scaler-ami'
+BASE_IMAGE_TAG_VALUE = 'o3de-multiplayer-test-scaler-base-ami'
+# Artifacts bucket prefix of the server package updates pulled by the server instance
+SERVER_UPDATE_KEY_PREFIX = 'server-updates'
+# Tag of the server AMI holding the hash of the project package it was built from
+SERVER_IMAGE_PACKAGE_HASH_TAG_KEY = 'o3de-multiplayer-test-scaler-package-hash'
+# Tag of the server AMI holding the ID of the base AMI it was built from
+SERVER_IMAGE_BASE_IMAGE_TAG_KEY = 'o3de-multiplayer-test-scaler-base-image-id'
+NO_BASE_IMAGE_TAG_VALUE = 'none'
+# Tag of the base AMI holding the version of its recipe
+BASE_IMAGE_VERSION_TAG_KEY = 'o3de-multiplayer-test-scaler-base-image-version'
 
-# Defines the command to run on start up of the client Amazon ECS task:
-# 1. Launch the client
-# 2. Wait for it to be ready
-# 3. Log the generated client log output
-ECS_TASK_COMMAND = 'cd \'c:\\project\'; ' \
-                   'pwd; ' \
-                   './{project_name}.GameLauncher.exe --console-command-file=launch_client.cfg -bg_ConnectToAssetProcessor=0; ' \
-                   'start-sleep -seconds 15; ' \
-                   'get-content -path user/log/Game.log -Wait'
+# Incremental sync of the server logs and metrics to the artifacts bucket
+# (see assets/{platform}/scripts/sync_server_artifacts.ps1). Override the interval with the artifact_sync_interval
+# context variable
+ARTIFACT_SYNC_SCRIPT_NAME = 'sync_server_artifacts.ps1'
+# Chunk writer shared with the client artifact sync, embedded before the sync script
+ARTIFACT_CHUNK_SCRIPT_NAME = 'artifact_chunks.ps1'
+ARTIFACT_SYNC_INTERVAL_MINUTES = 2
+ARTIFACT_SYNC_SOURCE_ROOT = 'C:/o3de/user'
+ARTIFACT_SYNC_SOURCE_FOLDERS = ['log', 'Metrics', 'soak']
+ARTIFACT_SYNC_STATE_FOLDER = 'C:/o3de/user/mpscaler'
+# Maximum number of bytes of a file uploaded per sync cycle. The rest is uploaded by the next cycles
+ARTIFACT_SYNC_MAX_CHUNK_MB = 64
+
+# Soak test sampling of the server process (see assets/{platform}/scripts/sample_server_process.ps1), started before
+# every artifact sync cycle. Samples are written to the soak folder, which is synced with the other server artifacts.
+# Enable it with the soak_sample_seconds context variable
+SOAK_SAMPLER_SCRIPT_NAME = 'sample_server_process.ps1'
+SOAK_SAMPLER_START_SCRIPT_NAME = 'start_server_process_sampler.ps1'
+SOAK_SAMPLES_FILE = 'C:/o3de/user/soak/server_process.csv'
+SOAK_SAMPLE_SECONDS_DISABLED = 0
+
+# Tag of the server and client stacks holding the ID of the test run, set with the run_id context variable.
+# Server artifacts are keyed under runs/<run_id>/ in the artifacts bucket and client log streams are prefixed with
+# the run ID. Must match RUN_ID_TAG_KEY of the artifact upload lambda
+RUN_ID_TAG_KEY = 'o3de-multiplayer-test-scaler-run-id'
+RUN_KEY_PREFIX = 'runs'
+
+# CloudWatch namespace and reporting interval of the client performance metrics
+CLIENT_METRICS_NAMESPACE = 'O3DE/MultiplayerTestScaler'
+CLIENT_METRICS_INTERVAL_SECONDS = 60
+
+# Defines the command to run on start up of the client Amazon ECS task.
+# The client launcher script (see assets/{platform}/scripts/client_launcher.ps1):
+# 1. Launches the client
+# 2. Logs the generated client log output
+# 3. Reports client readiness events (launched, connected, failed, disconnected, exited) detected from the log
+# 4. Reports client performance metrics parsed from the log in CloudWatch embedded metric format
+# The client logs and metrics are synced to the artifacts bucket at the artifact_sync_interval, and once more when
+# the task is stopped (see assets/{platform}/scripts/client_artifacts.ps1). The final sync is given the shutdown sync
+# time, which the stop timeout and the shutdown grace period of the container (WaitToKillServiceTimeout of Windows
+# containers, see assets/{platform}/Dockerfile) leave before the container is killed
+ECS_TASK_ARTIFACT_KEY_PATTERN = '*/client/*'
+ECS_TASK_SHUTDOWN_SYNC_SECONDS = 100
+ECS_TASK_STOP_TIMEOUT_SECONDS = 120
+ECS_TASK_COMMAND = '& \'c:\\scaler\\client_launcher.ps1\' -ProjectName {project_name} ' \
+                   f'-MetricsNamespace {CLIENT_METRICS_NAMESPACE} -MetricsIntervalSeconds {CLIENT_METRICS_INTERVAL_SECONDS} ' \
+                   f'-ShutdownSyncSeconds {ECS_TASK_SHUTDOWN_SYNC_SECONDS}'
+ECS_TASK_SKIP_LOG_ECHO_ARG = ' -SkipLogEcho'
 ECS_TASK_CPU_ARCHITECTURE = ecs.CpuArchitecture.X86_64
+# Default client task sizing. Override with the client_task_cpu and client_task_memory context variables
 ECS_TASK_CPU_UNITS = 1024
 ECS_TASK_LOGGING_STREAM_PREFIX = 'auto-scaler-client'
+ECS_TASK_LOG_RETENTION = logs.RetentionDays.ONE_MONTH
 ECS_TASK_MEMORY_LIMIT_MIB = 8192
 ECS_TASK_OPERATING_SYSTEM_FAMILY_MAP = {
     PLATFORM_WINDOWS: ecs.OperatingSystemFamily.WINDOWS_SERVER_2019_CORE
-}
\ No newline at end of file
+}
+# UDP network probe senders, deployed with the network_probe context variable. The tasks download the probe script
+# (udp_probe.py of the CLI) from the presigned URL in MPSCALER_PROBE_SCRIPT_URL and run it with the command the
+# probe-network command of the CLI passes. Only the Python standard library is needed
+NETWORK_PROBE_IMAGE = 'public.ecr.aws/docker/library/python:3.11-slim'
+NETWORK_PROBE_CONTAINER_NAME = 'MultiplayerTestScalerProbeContainer'
+NETWORK_PROBE_ENTRY_POINT = [
+    'python', '-c',
+    'import os, sys, urllib.request; '
+    'urllib.request.urlretrieve(os.environ["MPSCALER_PROBE_SCRIPT_URL"], "/tmp/udp_probe.py"); '
+    'os.execv(sys.executable, [sys.executable, "/tmp/udp_probe.py"] + sys.argv[1:])'
+]
+NETWORK_PROBE_TASK_CPU_UNITS = 1024
+NETWORK_PROBE_TASK_MEMORY_LIMIT_MIB = 2048
+NETWORK_PROBE_LOGGING_STREAM_PREFIX = 'network-probe'
+# UDP impairment relay between the clients and the server (see assets/relay/udp_relay.py), deployed with the
+# relay_profiles_file context variable. It listens on the server port at a fixed private IP address in the server
+# subnet, which the project launch_client.cfg file connects to instead of the server
+RELAY_SCRIPT_PATH = f'{ASSET_DIR_ROOT}/relay/udp_relay.py'
+DEFAULT_RELAY_PRIVATE_IP = '10.0.0.6'
+RELAY_INSTANCE_TYPE = 'c5.large'
+RELAY_INSTALL_FOLDER = '/opt/mpscaler-relay'
+RELAY_STATS_FILE = '/var/log/mpscaler-relay/relay_stats.jsonl'
+RELAY_STATS_INTERVAL_SECONDS = 60
+# Artifacts bucket folder of the relay flow stats, under runs/<run_id>/ if a run ID is specified
+RELAY_ARTIFACT_FOLDER = 'relay'
+# AWS CloudFormation quotas the synthesized templates are checked against by synth_benchmark.py
+CLOUDFORMATION_MAX_RESOURCES = 500
+CLOUDFORMATION_MAX_TEMPLATE_BYTES = 1024 * 1024
+CLOUDFORMATION_MAX_OUTPUTS = 200
+CLOUDFORMATION_MAX_PARAMETERS = 200
+# Templates above this share of a quota are reported as near the limit
+CLOUDFORMATION_QUOTA_WARNING_RATIO = 0.8
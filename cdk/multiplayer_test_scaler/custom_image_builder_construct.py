@@ -14,18 +14,31 @@ from constructs import Construct
 
 from .constants import *
 from .image_components_builder import ImageComponentsBuilder
+from .naming import get_namespaced_name
+from .versioning import get_content_version, get_file_hash
 
 class CustomImageBuilderConstruct(Construct):
     """
     Custom Image builder construct for building the server Amazon Machine Image (AMI)
     """
+    # Prefix of the EC2 Image Builder resource names, which are unique per account and region
+    _name_prefix = RESOURCE_ID_COMMON_PREFIX
+    _ami_tag_value = SERVER_IMAGE_TAG_VALUE
 
     def __init__(self, scope: Construct, construct_id: str, key_pair: str,
-                 instance_role: iam.Role, platform: str) -> None:
+                 instance_role: iam.Role, platform: str, instance_type: str = IMAGE_BUILDER_INSTANCE_TYPE,
+                 package_hash: str = None, base_image_id: str = None) -> None:
         super().__init__(scope, construct_id)
+        self._name_prefix = get_namespaced_name(self, self._name_prefix)
         self._instance_role = instance_role
         self._key_pair = key_pair
         self._platform = platform
+        self._instance_type = instance_type
+        # Base AMI with the server runtime dependencies pre-installed, see BaseImageBuilderConstruct
+        self._base_image_id = base_image_id
+        # Hash of the project package content. It keys the recipe and component versions and is tagged on the AMI,
+        # so an AMI built from the same package can be found and reused by later deployments
+        self._package_hash = package_hash
 
         self._add_image_builder_permissions()
         self._enable_image_builder_logging()
@@ -84,7 +97,7 @@ class CustomImageBuilderConstruct(Construct):
         """
         return image_builder.CfnInfrastructureConfiguration(
             self, 'InfrastructureConfiguration',
-            name=f'{RESOURCE_ID_COMMON_PREFIX}InfrastructureConfiguration',
+            name=f'{self._name_prefix}InfrastructureConfiguration',
             instance_profile_name=instance_profile_name,
             logging=image_builder.CfnInfrastructureConfiguration.LoggingProperty(
                 s3_logs=image_builder.CfnInfrastructureConfiguration.S3LogsProperty(
@@ -92,7 +105,7 @@ class CustomImageBuilderConstruct(Construct):
                 )
             ),
             terminate_instance_on_failure=True,
-            instance_types=['c5.large'],
+            instance_types=[self._instance_type],
             key_pair=self._key_pair
         )
 
@@ -103,38 +116,47 @@ class CustomImageBuilderConstruct(Construct):
         Check https://docs.aws.amazon.com/imagebuilder/latest/userguide/manage-recipes.html for more details
         :return: Recipe for Image Builder
         """
-        if self._platform == PLATFORM_WINDOWS:
+        if self._platform != PLATFORM_WINDOWS:
+            raise RuntimeError(f'Server for the {self._platform} platform is not supported yet')
+        elif self._base_image_id:
+            parent_image = self._base_image_id
+        else:
             parent_image = cdk.Fn.sub(
                 'arn:${AWS::Partition}:imagebuilder:${AWS::Region}:aws:image/windows-server-2019-english-full-base-x86/x.x.x')
-        else:
-            raise RuntimeError(f'Server for the {self._platform} platform is not supported yet')
 
+        components_builder = self._create_image_builder_components()
+        # In-place server stack updates create a new recipe version only when its content changes
+        self._recipe_version = get_content_version(self, parent_image, *components_builder.component_versions)
         return image_builder.CfnImageRecipe(
             self, 'Recipe',
-            name=f'{RESOURCE_ID_COMMON_PREFIX}Recipe',
-            version='1.0.0', # in-place server stack updates must increment this
+            name=f'{self._name_prefix}Recipe',
+            version=self._recipe_version,
             parent_image=parent_image,
             components=[
                 image_builder.CfnImageRecipe.ComponentConfigurationProperty(
-                    component_arn=component_arn) for component_arn in self._create_image_builder_components()
+                    component_arn=component_arn) for component_arn in components_builder.build()
             ]
         )
 
-    def _create_image_builder_components(self) -> typing.List[str]:
+    def _create_image_builder_components(self) -> ImageComponentsBuilder:
         """
         Create the YAML documents based EC2 Image Builder components that define the scripts to customize or test the image.
         Check https://docs.aws.amazon.com/imagebuilder/latest/userguide/manage-components.html for more details
-        :return: List of components for building image
+        :return: Builder of the components for building image
         """
         project_package_asset = self._upload_project_package()
         project_package_asset.grant_read(self._instance_role)
 
-        return ImageComponentsBuilder(self, self._platform) \
+        components_builder = ImageComponentsBuilder(self, self._platform, self.package_hash, self._name_prefix)
+        if self._base_image_id:
+            # Runtime dependencies are pre-installed in the base image
+            return components_builder.add_launcher_download_component(project_package_asset.s3_object_url)
+
+        return components_builder \
             .add_vc_redistributable_component() \
             .add_launcher_download_component(project_package_asset.s3_object_url) \
             .add_component_by_arn(cdk.Fn.sub(
-            'arn:${AWS::Partition}:imagebuilder:${AWS::Region}:aws:component/powershell-windows/x.x.x')) \
-            .build()
+            'arn:${AWS::Partition}:imagebuilder:${AWS::Region}:aws:component/powershell-windows/x.x.x'))
 
     def _upload_project_package(self) -> s3_assets.Asset:
         """
@@ -143,9 +165,16 @@ class CustomImageBuilderConstruct(Construct):
         """
         return s3_assets.Asset(
             self, 'ProjectPackage',
-            path=f'{ASSET_DIR_ROOT}/{self._platform}/{ZIPPED_PACKAGE_NAME}'
+            path=self._get_project_package_path()
         )
 
+    def _get_project_package_path(self) -> str:
+        """
+        Get the local path of the project package
+        :return: Path to the project package
+        """
+        return f'{ASSET_DIR_ROOT}/{self._platform}/{ZIPPED_PACKAGE_NAME}'
+
     def _create_image_builder_distribution(self) -> image_builder.CfnDistributionConfiguration:
         """
         Create the EC2 Image Builder distribution used to distribute the AMI.
@@ -154,22 +183,32 @@ class CustomImageBuilderConstruct(Construct):
         """
         return image_builder.CfnDistributionConfiguration(
             self, f'Distribution',
-            name=f'{RESOURCE_ID_COMMON_PREFIX}Distribution',
+            name=f'{self._name_prefix}Distribution',
             distributions=[
                 image_builder.CfnDistributionConfiguration.DistributionProperty(
                     region=cdk.Fn.ref('AWS::Region'),
                     ami_distribution_configuration={
-                        'Name': 'o3de-multiplayer-test-scaler-ami-{{ imagebuilder:buildDate }}',
+                        'Name': f'{self._ami_tag_value}-{{{{ imagebuilder:buildDate }}}}',
                         'Description': 'O3DE Multiplayer Test Scaler AMI',
-                        'AmiTags': {
-                            'AmiTagKey': 'o3de-multiplayer-test-scaler-ami',
-                            'Name': 'o3de-multiplayer-test-scaler-ami-{{ imagebuilder:buildDate }}'
-                        }
+                        'AmiTags': dict({
+                            'AmiTagKey': self._ami_tag_value,
+                            'Name': f'{self._ami_tag_value}-{{{{ imagebuilder:buildDate }}}}'
+                        }, **self._get_ami_tags())
                     }
                 )
             ]
         )
 
+    def _get_ami_tags(self) -> typing.Dict[str, str]:
+        """
+        Get the tags which identify the content of the AMI
+        :return: AMI tags
+        """
+        return {
+            SERVER_IMAGE_PACKAGE_HASH_TAG_KEY: self.package_hash,
+            SERVER_IMAGE_BASE_IMAGE_TAG_KEY: self._base_image_id if self._base_image_id else NO_BASE_IMAGE_TAG_VALUE
+        }
+
     def _create_custom_ami(self) -> None:
         """
         Build a custom Amazon Machine Image (AMI) which includes the multiplayer server
@@ -189,4 +228,53 @@ class CustomImageBuilderConstruct(Construct):
         Retrieve the custom image ID
         :return: Image ID
         """
-        return self._o3de_launcher_image.attr_image_id
\ No newline at end of file
+        return self._o3de_launcher_image.attr_image_id
+
+    @property
+    def log_bucket(self) -> s3.Bucket:
+        """
+        Retrieve the bucket which stores the EC2 Image Builder logs
+        :return: Log bucket
+        """
+        return self._log_bucket
+
+    @property
+    def package_hash(self) -> str:
+        """
+        Retrieve the hash of the project package baked into the custom image.
+        Defaults to the hash of the local project package
+        :return: Package hash
+        """
+        if not self._package_hash:
+            self._package_hash = get_file_hash(self._get_project_package_path())
+        return self._package_hash
+
+class BaseImageBuilderConstruct(CustomImageBuilderConstruct):
+    """
+    Custom Image builder construct for baking the stable server runtime dependencies into a reusable base AMI,
+    so server AMI builds only need to download and extract the project package
+    """
+    _name_prefix = f'{RESOURCE_ID_COMMON_PREFIX}Base'
+    _ami_tag_value = BASE_IMAGE_TAG_VALUE
+
+    def __init__(self, scope: Construct, construct_id: str, instance_role: iam.Role, platform: str,
+                 instance_type: str = IMAGE_BUILDER_INSTANCE_TYPE) -> None:
+        super().__init__(scope, construct_id, None, instance_role, platform, instance_type)
+
+    def _create_image_builder_components(self) -> ImageComponentsBuilder:
+        """
+        Create the components which install the server runtime dependencies
+        :return: Builder of the components for building image
+        """
+        return ImageComponentsBuilder(self, self._platform, name_prefix=self._name_prefix) \
+            .add_vc_redistributable_component() \
+            .add_archiver_component() \
+            .add_component_by_arn(cdk.Fn.sub(
+            'arn:${AWS::Partition}:imagebuilder:${AWS::Region}:aws:component/powershell-windows/x.x.x'))
+
+    def _get_ami_tags(self) -> typing.Dict[str, str]:
+        """
+        Get the tags which identify the content of the AMI
+        :return: AMI tags
+        """
+        return {BASE_IMAGE_VERSION_TAG_KEY: self._recipe_version}
@@ -10,16 +10,21 @@ from aws_cdk import (
 from constructs import Construct
 
 from .constants import *
+from .versioning import get_content_version
 
 
 class ImageComponentsBuilder:
     """
     Build the EC2 Image Builder component list
     """
-    def __init__(self, scope: Construct, platform: str):
+    def __init__(self, scope: Construct, platform: str, package_hash: str = '',
+                 name_prefix: str = RESOURCE_ID_COMMON_PREFIX):
         self._components = []
+        self._component_versions = []
         self._scope = scope
         self._platform = platform
+        self._package_hash = package_hash
+        self._name_prefix = name_prefix
 
     def add_vc_redistributable_component(self) -> ImageComponentsBuilder:
         """
@@ -33,7 +38,7 @@ class ImageComponentsBuilder:
 
         self._add_component(
             id_='VCRedistributableComponent',
-            name=f'{RESOURCE_ID_COMMON_PREFIX}VCRedistributableComponent',
+            name=f'{self._name_prefix}VCRedistributableComponent',
             description='Install VC Redistributable',
             platform=platform,
             data='name: InstallVCRedistributable\n'
@@ -46,7 +51,7 @@ class ImageComponentsBuilder:
                  '        action: ExecutePowerShell\n'
                  '        inputs:\n'
                  '          commands:\n'
-                 '            - $Path = $env:TEMP; $Installer = "vc_redist.x86.exe"; Invoke-WebRequest "https://aka.ms/vs/17/release/vc_redist.x86.exe" -OutFile $Path\$Installer; Start-Process -FilePath $Path\$Installer -Args "/install /quiet /norestart" -Verb RunAs -Wait; Remove-Item $Path\$Installer\n'
+                 f'            - $Path = $env:TEMP; $Installer = "vc_redist.x86.exe"; Invoke-WebRequest "{VC_REDISTRIBUTABLE_INSTALLER_URL}" -OutFile $Path\\$Installer; Start-Process -FilePath $Path\\$Installer -Args "/install /quiet /norestart" -Verb RunAs -Wait; Remove-Item $Path\\$Installer\n'
                  '  - name: validate\n'
                  '    steps:\n'
                  '      - name: CheckInstall\n'
@@ -54,10 +59,58 @@ class ImageComponentsBuilder:
                  '        inputs:\n'
                  '          commands:\n'
                  '            - |\n'
-                 '              $count = Get-WmiObject -Class Win32_Product -Filter "Name LIKE \'%Visual C++ 2022%\'"\n'
-                 '              if ($count.count -eq 0) {\n'
+                 # Read the runtime registration instead of querying Win32_Product, which enumerates and
+                 # verifies every installed MSI package and takes minutes
+                 f'              $runtime = Get-ItemProperty -Path \'{VC_REDISTRIBUTABLE_REGISTRY_KEY}\' -ErrorAction SilentlyContinue\n'
+                 '              if (-not $runtime -or $runtime.Installed -ne 1) {\n'
                  '                  echo "Visual Studio ReDistributables not installed"\n'
                  '                  exit 1\n'
+                 '              }\n'
+                 '              echo "Visual Studio ReDistributables $($runtime.Version) installed"'
+        )
+
+        return self
+
+    def add_archiver_component(self) -> ImageComponentsBuilder:
+        """
+        Add component to install 7-Zip, which extracts the project package with multiple threads
+        :return: The builder itself
+        """
+        if self._platform == PLATFORM_WINDOWS:
+            platform = self._platform
+        else:
+            raise RuntimeError(f'Archiver component for {self._platform} is not supported yet')
+
+        self._add_component(
+            id_='ArchiverComponent',
+            name=f'{self._name_prefix}ArchiverComponent',
+            description='Install 7-Zip',
+            platform=platform,
+            data='name: InstallArchiver\n'
+                 'description: Install 7-Zip\n'
+                 'schemaVersion: 1.0\n'
+                 'phases:\n'
+                 '  - name: build\n'
+                 '    steps:\n'
+                 '      - name: InstallArchiverStep\n'
+                 '        action: ExecutePowerShell\n'
+                 '        inputs:\n'
+                 '          commands:\n'
+                 '            - |\n'
+                 '              $Installer = Join-Path $env:TEMP "7z.msi"\n'
+                 f'              Invoke-WebRequest "{SEVEN_ZIP_INSTALLER_URL}" -OutFile $Installer\n'
+                 '              Start-Process -FilePath msiexec.exe -Args "/i $Installer /qn /norestart" -Wait\n'
+                 '              Remove-Item $Installer\n'
+                 '  - name: validate\n'
+                 '    steps:\n'
+                 '      - name: CheckInstall\n'
+                 '        action: ExecutePowerShell\n'
+                 '        inputs:\n'
+                 '          commands:\n'
+                 '            - |\n'
+                 f'              if (-not (Test-Path \'{SEVEN_ZIP_PATH}\')) {{\n'
+                 '                  echo "7-Zip not installed"\n'
+                 '                  exit 1\n'
                  '              }'
         )
 
@@ -75,7 +128,7 @@ class ImageComponentsBuilder:
 
         self._add_component(
             id_='DownloadComponent',
-            name=f'{RESOURCE_ID_COMMON_PREFIX}DownloadComponent',
+            name=f'{self._name_prefix}DownloadComponent',
             description='Download O3DE Launcher Components for Install',
             platform=platform,
             # Component data contains inline YAML document content for the component. Check
@@ -103,7 +156,20 @@ class ImageComponentsBuilder:
                  f'        action: ExecutePowerShell\n'
                  f'        inputs:\n'
                  f'          commands:\n'
-                 f'            - Expand-Archive C:\\temp\\Default.zip -DestinationPath c:\\o3de\n'
+                 f'            - |\n'
+                 # Expand-Archive extracts on a single thread and is slow for large packages. Prefer 7-Zip from
+                 # the base image and fall back to the tar.exe shipped with Windows Server 2019 and later
+                 f'              New-Item -ItemType Directory -Force -Path C:\\o3de | Out-Null\n'
+                 f'              if (Test-Path \'{SEVEN_ZIP_PATH}\') {{\n'
+                 f'                  & \'{SEVEN_ZIP_PATH}\' x C:\\temp\\Default.zip -oC:\\o3de -mmt=on -y | Out-Null\n'
+                 f'              }} else {{\n'
+                 f'                  tar.exe -xf C:\\temp\\Default.zip -C C:\\o3de\n'
+                 f'              }}\n'
+                 f'              if ($LASTEXITCODE -ne 0) {{\n'
+                 f'                  echo "Failed to extract the project package"\n'
+                 f'                  exit 1\n'
+                 f'              }}\n'
+                 f'              Remove-Item C:\\temp\\Default.zip\n'
         )
 
         return self
@@ -115,24 +181,37 @@ class ImageComponentsBuilder:
         :return: The builder itself
         """
         self._components.append(arn)
+        self._component_versions.append(arn)
         return self
 
     def _add_component(self, id_: str, name: str, description: str, platform: str, data: str) -> None:
         """
-        Add a new component to the EC2 Image Builder component list
+        Add a new component to the EC2 Image Builder component list.
+        The component version is derived from the component content and the project package hash,
+        so in-place server stack updates only create a new version when either of them changes
         """
+        version = get_content_version(self._scope, self._package_hash, name, platform, data)
         component = image_builder.CfnComponent(
             self._scope, id_,
             name=name,
             description=description,
-            version='1.0.3', # in-place server stack updates must increment this
-            change_description='First version',
+            version=version,
+            change_description=f'Project package {self._package_hash}' if self._package_hash else 'Project package',
             platform=platform,
             # Component data contains inline YAML document content for the component. Check
             # https://docs.aws.amazon.com/imagebuilder/latest/userguide/toe-use-documents.html
             data=data
         )
         self._components.append(component.ref)
+        self._component_versions.append(f'{name}/{version}')
+
+    @property
+    def component_versions(self) -> typing.List[str]:
+        """
+        Retrieve the versions of the components added so far, which identify the content of the component list
+        :return: Component names with versions, or ARNs of the existing components
+        """
+        return self._component_versions
 
     def build(self) -> typing.List:
         """
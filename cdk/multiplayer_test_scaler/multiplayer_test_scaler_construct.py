@@ -4,9 +4,11 @@
 import aws_cdk as cdk
 from constructs import Construct
 
+from .base_image_stack import O3DEBaseImageStack
 from .client_stack import O3DEClientScalerStack
 from .common_stack import O3DECommonStack
-from .constants import PLATFORM_WINDOWS
+from .constants import PLATFORM_WINDOWS, RUN_ID_TAG_KEY
+from .naming import get_namespaced_name
 from .server_stack import O3DEServerStack
 
 
@@ -22,11 +24,15 @@ class MultiplayerTestScalerConstruct(Construct):
             env: cdk.Environment) -> None:
         super().__init__(scope, id_)
 
+        # Stacks are named after the namespace, so deployments in different namespaces don't replace each other.
+        # The project name is kept as is, since it's also the name of the game executables
+        deployment_name = get_namespaced_name(self, id_)
+
         # Create the common stack for deploying shared resources like VPC and security group
         common_stack = O3DECommonStack(
             scope,
-            f'{id_}-CommonStack',
-            stack_name=f'{id_}-CommonStack',
+            f'{deployment_name}-CommonStack',
+            stack_name=f'{deployment_name}-CommonStack',
             env=env
         )
 
@@ -36,33 +42,49 @@ class MultiplayerTestScalerConstruct(Construct):
             print(f'No deployment platform is specified. Use default platform {PLATFORM_WINDOWS}')
 
         target = self.node.try_get_context('target')
+        if target == 'base-image':
+            # The base image stack is only deployed on request, since the base AMI is reused across deployments
+            O3DEBaseImageStack(
+                scope,
+                f'{deployment_name}-BaseImageStack',
+                stack_name=f'{deployment_name}-BaseImageStack',
+                platform=platform,
+                env=env
+            )
+
+        # Stacks of the test run, tagged with the run ID
+        run_stacks = []
         if not target or target == 'server':
             # No target or the server target is specified. Deploy the server stack
             server_stack = O3DEServerStack(
                 scope,
-                f'{id_}-ServerStack',
-                stack_name=f'{id_}-ServerStack',
-                vpc=common_stack.vpc,
-                security_group=common_stack.security_group,
+                f'{deployment_name}-ServerStack',
+                stack_name=f'{deployment_name}-ServerStack',
                 platform=platform,
                 project_name=id_,
-                artifacts_bucket=common_stack.artifacts_bucket,
-                upload_lambda=common_stack.upload_lambda,
                 env=env
             )
+            server_stack.add_dependency(common_stack)
+            run_stacks.append(server_stack)
 
         if not target or target == 'client':
             # No target or the client target is specified. Deploy the client stack
             client_stack = O3DEClientScalerStack(
                 scope,
-                f'{id_}-ClientStack',
-                stack_name=f'{id_}-ClientStack',
-                vpc=common_stack.vpc,
-                security_group=common_stack.security_group,
+                f'{deployment_name}-ClientStack',
+                stack_name=f'{deployment_name}-ClientStack',
                 platform=platform,
                 project_name=id_,
                 env=env
             )
+            client_stack.add_dependency(common_stack)
+            run_stacks.append(client_stack)
+
+        run_id = self.node.try_get_context('run_id')
+        if run_id:
+            # The artifact upload lambda reads the run ID from the server stack tags
+            for stack in run_stacks:
+                cdk.Tags.of(stack).add(RUN_ID_TAG_KEY, run_id)
 
         if not target:
             # No target is specified. Both client and server stacks will be deployed, so
@@ -0,0 +1,36 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import re
+
+from constructs import Construct
+
+from .constants import NAMESPACE_PATTERN
+
+
+def get_namespace(scope: Construct) -> str:
+    """
+    Get the namespace of the deployment from the namespace context variable. Deployments in different namespaces have
+    their own stacks and resources, so they can run side by side in one account and region
+    :param scope: Construct of the deployment
+    :return: Namespace, or an empty string for the default namespace
+    """
+    namespace = scope.node.try_get_context('namespace')
+    if not namespace:
+        return ''
+    if not re.match(NAMESPACE_PATTERN, namespace):
+        raise ValueError(f'Invalid namespace {namespace}. It must start with a letter and have at most 20 letters, '
+                         f'digits or hyphens')
+    return namespace
+
+
+def get_namespaced_name(scope: Construct, name: str) -> str:
+    """
+    Get the name of a stack, resource or export which must be unique per account and region
+    :param scope: Construct of the deployment
+    :param name: Name in the default namespace. Names of the default namespace are unchanged, so deployments made
+    before namespaces existed are kept
+    :return: Name prefixed with the namespace of the deployment
+    """
+    namespace = get_namespace(scope)
+    return f'{namespace}-{name}' if namespace else name
@@ -1,10 +1,11 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import os
+
 from aws_cdk import (
     Stack,
     aws_events as events,
-    aws_events_targets as events_targets,
     aws_iam as iam,
     aws_lambda as _lambda,
     aws_ssm as ssm,
@@ -13,6 +14,7 @@ import aws_cdk as cdk
 from constructs import Construct
 
 from .constants import *
+from .naming import get_namespaced_name
 
 class ServerAutomationConstruct(Construct):
     """
@@ -22,8 +24,20 @@ class ServerAutomationConstruct(Construct):
     def __init__(self, scope: Construct, construct_id: str) -> None:
         super().__init__(scope, construct_id)
         
-    def create_file_sync_rule(self, artifact_bucket_name: str) -> events.CfnRule:
-        self._create_command_document(artifact_bucket_name)
+    def create_file_sync_rule(self, artifact_bucket_name: str, platform: str,
+                              sync_interval_minutes: int = ARTIFACT_SYNC_INTERVAL_MINUTES,
+                              run_id: str = '', project_name: str = '',
+                              soak_sample_seconds: int = SOAK_SAMPLE_SECONDS_DISABLED) -> events.CfnRule:
+        """
+        Periodically syncs the server logs and metrics to the artifact bucket
+        :param artifact_bucket_name: Name of the bucket where files will be synced
+        :param platform: Platform of the server. The sync script is read from the platform assets
+        :param sync_interval_minutes: Interval between two sync cycles in minutes
+        :param run_id: ID of the test run. Files are synced under runs/<run_id>/ if specified
+        :param project_name: Name of the project. The server process sampled for soak tests is named after it
+        :param soak_sample_seconds: Interval between two samples of the server process. Sampling is disabled if 0
+        """
+        self._create_command_document(artifact_bucket_name, platform, run_id, project_name, soak_sample_seconds)
 
         doc_arn = Stack.of(self).format_arn(
             service="ssm",
@@ -52,8 +66,8 @@ class ServerAutomationConstruct(Construct):
         # can't use L2 events.Rule b/c it doesn't yet support
         # SSM RunCommand targets. See: https://github.com/aws/aws-cdk/issues/7710
         self._file_sync_rule = events.CfnRule(self, 'IntermitentUploadRule',
-            name=f'{RESOURCE_ID_COMMON_PREFIX}SyncArtifactsRule',
-            schedule_expression='rate(2 minutes)',
+            name=get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}SyncArtifactsRule'),
+            schedule_expression=self._get_rate_expression(sync_interval_minutes),
             targets=[events.CfnRule.TargetProperty(
                 arn=doc_arn,
                 id='MpScalerFileSyncRule',
@@ -67,25 +81,56 @@ class ServerAutomationConstruct(Construct):
             )]
         )
 
-    def create_upload_trigger(self, upload_lambda: _lambda.Function):
+    def create_upload_trigger(self, upload_lambda: _lambda.IFunction):
         """
         On server stack deletion, triggers upload of server artifacts 
         to external bucket
         """
-        self._final_upload_trigger = events.Rule(self, 'FinalUploadTrigger', 
-            event_pattern=events.EventPattern(
-                source=["aws.cloudformation"],
-                detail_type=["CloudFormation Stack Status Change"],
-                resources=[Stack.of(self).stack_id]
-            )
+        # can't use the L2 LambdaFunction target b/c the upload lambda is imported from the common stack
+        # and its region is unresolved, which the L2 target treats as a cross-region event
+        self._final_upload_trigger = events.CfnRule(self, 'FinalUploadTrigger',
+            event_pattern={
+                'source': ['aws.cloudformation'],
+                'detail-type': ['CloudFormation Stack Status Change'],
+                'resources': [Stack.of(self).stack_id]
+            },
+            targets=[events.CfnRule.TargetProperty(
+                arn=upload_lambda.function_arn,
+                id='MpScalerFinalUploadTarget',
+                retry_policy=events.CfnRule.RetryPolicyProperty(maximum_retry_attempts=2)
+            )]
         )
-        self._final_upload_trigger.add_target(
-            events_targets.LambdaFunction(upload_lambda, retry_attempts=2))
+        _lambda.CfnPermission(self, 'FinalUploadTriggerPermission',
+            action='lambda:InvokeFunction',
+            function_name=upload_lambda.function_arn,
+            principal='events.amazonaws.com',
+            source_arn=self._final_upload_trigger.attr_arn
+        )
+
+    @staticmethod
+    def _read_script(platform: str, script_name: str) -> list:
+        with open(os.path.join(ASSET_DIR_ROOT, platform, 'scripts', script_name)) as script_file:
+            return script_file.read().splitlines()
+
+    @staticmethod
+    def _get_rate_expression(interval_minutes: int) -> str:
+        interval_minutes = int(interval_minutes)
+        if interval_minutes < 1:
+            raise ValueError(f'Invalid artifact sync interval {interval_minutes}. It must be at least 1 minute')
+        return 'rate(1 minute)' if interval_minutes == 1 else f'rate({interval_minutes} minutes)'
+
+    def _create_command_document(self, artifact_bucket_name: str, platform: str, run_id: str, project_name: str,
+                                 soak_sample_seconds: int):
+        # Only appended bytes are uploaded each cycle, see the sync script for the key and manifest layout
+        chunk_script = self._read_script(platform, ARTIFACT_CHUNK_SCRIPT_NAME)
+        sync_script = self._read_script(platform, ARTIFACT_SYNC_SCRIPT_NAME)
+        sampler_script = self._read_script(platform, SOAK_SAMPLER_SCRIPT_NAME)
+        sampler_start_script = self._read_script(platform, SOAK_SAMPLER_START_SCRIPT_NAME)
+        source_folders = ', '.join(f"'{folder}'" for folder in ARTIFACT_SYNC_SOURCE_FOLDERS)
 
-    def _create_command_document(self, artifact_bucket_name: str):
         doc_content = {
             "schemaVersion": "2.2",
-            "description": "Syncs game server files to artifact bucket",
+            "description": "Incrementally syncs game server files to artifact bucket",
             "parameters": {
                 "bucket": {
                     "type": "String",
@@ -94,41 +139,59 @@ class ServerAutomationConstruct(Construct):
                 },
                 "MPSFolder": {
                     "type": "String",
-                    "description": "The folder where files are copied prior to sync to S3",
-                    "default": "C:/o3de/user/mpscaler"
+                    "description": "The folder where the sync state is kept between runs",
+                    "default": ARTIFACT_SYNC_STATE_FOLDER
+                },
+                "RunId": {
+                    "type": "String",
+                    "description": "ID of the test run. Files are synced under runs/<RunId>/ if specified",
+                    "default": run_id,
+                    "allowedPattern": "^[A-Za-z0-9-]*$"
+                },
+                "MaxChunkMB": {
+                    "type": "String",
+                    "description": "Maximum size (MB) of a file uploaded per run. The rest is uploaded by the next runs",
+                    "default": str(ARTIFACT_SYNC_MAX_CHUNK_MB),
+                    "allowedPattern": "^[1-9][0-9]*$"
+                },
+                "SoakSampleSeconds": {
+                    "type": "String",
+                    "description": "Interval (seconds) between two samples of the server process. Disabled if 0",
+                    "default": str(soak_sample_seconds),
+                    "allowedPattern": "^[0-9]+$"
                 }
             },
             "mainSteps": [
                 {
                     "action": "aws:runPowerShellScript",
-                    "name": "CreateMpsDir",
-                    "inputs": {
-                        "runCommand": [
-                            "if (!(test-path -path 'C:/o3de/user/{{MPSFolder}}')) { mkdir {{MPSFolder}} }"
-                        ]
-                    }
-                },
-                {
-                    "action": "aws:runPowerShellScript",
-                    "name": "CopyFolders", # need to copy files first b/c originals will be locked by game process
+                    "name": "StartProcessSampler",
                     "inputs": {
                         "runCommand": [
-                            "copy-item -path 'C:/o3de/user/log' -destination {{MPSFolder}} -recurse -force",
-                            "copy-item -path 'C:/o3de/user/Metrics' -destination {{MPSFolder}} -recurse -force"
+                            "$SampleSeconds = [int]'{{SoakSampleSeconds}}'",
+                            f"$ProcessName = '{project_name}.ServerLauncher'",
+                            f"$OutputFile = '{SOAK_SAMPLES_FILE}'",
+                            "$StateFolder = '{{MPSFolder}}'",
+                            "$SamplerScript = @'",
+                            *sampler_script,
+                            "'@",
+                            *sampler_start_script
                         ]
                     }
                 },
                 {
                     "action": "aws:runPowerShellScript",
-                    "name": "UploadToS3",
+                    "name": "SyncArtifacts",
                     "inputs": {
                         "runCommand": [
-                            # retreive token and instance ID from EC2 Instance Metadata Service v2
-                            # see: https://docs.aws.amazon.com/AWSEC2/latest/WindowsGuide/configuring-instance-metadata-service.html#instance-metadata-v2-how-it-works
-                            '[string]$token = Invoke-RestMethod -Headers @{"X-aws-ec2-metadata-token-ttl-seconds" = "30"} -Method PUT -Uri http://169.254.169.254/latest/api/token',
-                            '$id = (Invoke-RestMethod -Headers @{"X-aws-ec2-metadata-token" = $token} -Method GET -Uri http://169.254.169.254/latest/meta-data/instance-id)',
-                            "$date = get-date -format 'ddMMyyyy'",
-                            "write-s3object -bucketname {{bucket}} -folder {{MPSFolder}} -keyprefix $date\\server\\$id -recurse"
+                            "$Bucket = '{{bucket}}'",
+                            "$StateFolder = '{{MPSFolder}}'",
+                            "$MaxChunkBytes = [long]{{MaxChunkMB}} * 1MB",
+                            "$RunId = '{{RunId}}'",
+                            f"$RunKeyPrefix = '{RUN_KEY_PREFIX}'",
+                            f"$SourceRoot = '{ARTIFACT_SYNC_SOURCE_ROOT}'",
+                            f"$SourceFolders = @({source_folders})",
+                            *chunk_script,
+                            *sync_script
                         ]
                     }
                 }
@@ -140,5 +203,7 @@ class ServerAutomationConstruct(Construct):
         self._file_sync_document = ssm.CfnDocument(self, "ServerAutomationDoc",
             content=doc_content,
             document_type="Command",
-            name=f'{RESOURCE_ID_COMMON_PREFIX}-server-upload-command'                            
+            # keep the static name when the document content changes
+            update_method='NewVersion',
+            name=get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}-server-upload-command')
         )
@@ -5,15 +5,16 @@ from aws_cdk import (
     Stack,
     aws_iam as iam,
     aws_ec2 as ec2,
-    aws_s3 as s3,
-    aws_lambda as _lambda,
+    aws_s3_assets as s3_assets,
 )
 import aws_cdk as cdk
 from constructs import Construct
 
 import os
 
+from .common_stack import O3DECommonStack
 from .constants import *
+from .naming import get_namespaced_name
 from .custom_image_builder_construct import CustomImageBuilderConstruct
 from .server_artifacts_automation import ServerAutomationConstruct
 
@@ -22,16 +23,15 @@ class O3DEServerStack(Stack):
     """
     Create stack for deploying AWS resources required to run the multiplayer server
     """
-    def __init__(self, scope: Construct, construct_id: str, vpc: ec2.Vpc, security_group: ec2.SecurityGroup,
-                 platform: str, project_name: str, artifacts_bucket: s3.Bucket, upload_lambda: _lambda.Function, **kwargs) \
-            -> None:
+    def __init__(self, scope: Construct, construct_id: str, platform: str, project_name: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
-        self._vpc = vpc
-        self._security_group = security_group
+        # Shared resources are imported from the common stack, which must be deployed first
+        self._vpc = O3DECommonStack.import_vpc(self)
+        self._security_group = O3DECommonStack.import_security_group(self)
         self._platform = platform
         self._project_name = project_name
-        self._artifacts_bucket = artifacts_bucket
-        self._upload_lambda = upload_lambda
+        self._artifacts_bucket = O3DECommonStack.import_artifacts_bucket(self)
+        self._upload_lambda = O3DECommonStack.import_upload_lambda(self)
 
         self._server_port = self.node.try_get_context('server_port')
         if not self._server_port:
@@ -63,6 +63,21 @@ class O3DEServerStack(Stack):
                         actions=['s3:PutObject'],
                         resources=[f'{self._artifacts_bucket.bucket_arn}/*']
                     )
+                ]),
+                # Allow the server to pull project package updates, see update-server in the repository root
+                'ServerUpdatePolicy': iam.PolicyDocument(
+                statements=[
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        actions=['s3:GetObject'],
+                        resources=[f'{self._artifacts_bucket.bucket_arn}/{SERVER_UPDATE_KEY_PREFIX}/*']
+                    ),
+                    iam.PolicyStatement(
+                        effect=iam.Effect.ALLOW,
+                        actions=['s3:ListBucket'],
+                        resources=[self._artifacts_bucket.bucket_arn],
+                        conditions={'StringLike': {'s3:prefix': [f'{SERVER_UPDATE_KEY_PREFIX}/*']}}
+                    )
                 ])
             }
         )
@@ -81,15 +96,43 @@ class O3DEServerStack(Stack):
                             'Pass the key pair using \'-c key_pair={key_pair_value}\'')
 
         
-        # Create server image via EC2 Image Builder (https://aws.amazon.com/image-builder/)
-        ami_construct = CustomImageBuilderConstruct(
-            self, f'{RESOURCE_ID_COMMON_PREFIX}CustomImageBuilderConstruct',
-            self._key_pair, self._instance_role, self._platform)
-        image_id = ami_construct.custom_image_id
+        self._instance_type = self.node.try_get_context('server_instance_type')
+        if not self._instance_type:
+            self._instance_type = SERVER_INSTANCE_TYPE
+
+        self._volume_size = self.node.try_get_context('server_volume_size')
+        if not self._volume_size:
+            self._volume_size = SERVER_INSTANCE_VOLUME_SIZE
+
+        image_builder_instance_type = self.node.try_get_context('image_builder_instance_type')
+        if not image_builder_instance_type:
+            image_builder_instance_type = IMAGE_BUILDER_INSTANCE_TYPE
+
+        # Reuse the server image built from the same project package, if provided
+        image_id = self.node.try_get_context('server_image_id')
+        if image_id:
+            self._instance_role.add_managed_policy(
+                iam.ManagedPolicy.from_aws_managed_policy_name('AmazonSSMManagedInstanceCore'))
+        else:
+            # Create server image via EC2 Image Builder (https://aws.amazon.com/image-builder/)
+            ami_construct = CustomImageBuilderConstruct(
+                self, f'{RESOURCE_ID_COMMON_PREFIX}CustomImageBuilderConstruct',
+                self._key_pair, self._instance_role, self._platform, image_builder_instance_type,
+                self.node.try_get_context('package_hash'), self.node.try_get_context('base_image_id'))
+            image_id = ami_construct.custom_image_id
+            cdk.CfnOutput(
+                self,
+                f'{RESOURCE_ID_COMMON_PREFIX}ImageBuilderLogBucketName',
+                description='Bucket where the EC2 Image Builder logs are stored',
+                value=ami_construct.log_bucket.bucket_name)
 
         self._launch_server_instance(image_id)
         self._create_server_upload_automation()
 
+        relay_profiles_file = self.node.try_get_context('relay_profiles_file')
+        if relay_profiles_file:
+            self._launch_relay_instance(relay_profiles_file)
+
     def _add_remote_client_ingress(self, local_cidr: str) -> None:
         """
         Add platform specific remote connection ingress
@@ -113,9 +156,9 @@ class O3DEServerStack(Stack):
         server_commands_user_data = ec2.UserData.custom(
             SERVER_LAUNCH_SCRIPT.replace('{server_port}', str(self._server_port)).replace('{project_name}', self._project_name))
 
-        server_private_ip = self.node.try_get_context('server_private_ip')
-        if not server_private_ip:
-            server_private_ip = DEFAULT_SERVER_PRIVATE_IP
+        self._server_private_ip = self.node.try_get_context('server_private_ip')
+        if not self._server_private_ip:
+            self._server_private_ip = DEFAULT_SERVER_PRIVATE_IP
 
         if self._platform == PLATFORM_WINDOWS:
             machine_image = ec2.GenericWindowsImage({self.region: image_id})
@@ -129,28 +172,20 @@ class O3DEServerStack(Stack):
             machine_image=machine_image,
             user_data=server_commands_user_data,
             key_name=self._key_pair,
-            instance_type=ec2.InstanceType.of(SERVER_INSTANCE_CLASS, SERVER_INSTANCE_SIZE),
+            instance_type=ec2.InstanceType(self._instance_type),
             security_group=self._security_group,
             block_devices=[
                 ec2.BlockDevice(
                     device_name='/dev/sda1',
-                    volume=ec2.BlockDeviceVolume.ebs(SERVER_INSTANCE_VOLUME_SIZE)
+                    volume=ec2.BlockDeviceVolume.ebs(int(self._volume_size))
                 )
             ],
-            private_ip_address=server_private_ip,
+            private_ip_address=self._server_private_ip,
             role=self._instance_role,
-            vpc_subnets=ec2.SubnetSelection(
-                subnets=[
-                    ec2.Subnet.from_subnet_attributes(
-                        self,
-                        id=f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnet',
-                        subnet_id=cdk.Fn.import_value(f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetId'),
-                        availability_zone=cdk.Fn.import_value(f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetAvailabilityZone'),
-                        route_table_id=cdk.Fn.import_value(f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetRouteTableId')
-                    )
-                ]
-            ),
+            vpc_subnets=self._get_server_subnet_selection(),
             require_imdsv2=True,
+            # Publish the CPU utilization every minute, as read by find-capacity
+            detailed_monitoring=True,
         )
 
         cdk.CfnOutput(
@@ -158,9 +193,138 @@ class O3DEServerStack(Stack):
             f'{RESOURCE_ID_COMMON_PREFIX}ServerIp',
             description='Public IP address of the server instance',
             value=server_instance.instance_public_ip)
+        cdk.CfnOutput(
+            self,
+            f'{RESOURCE_ID_COMMON_PREFIX}ServerInstanceId',
+            description='ID of the server instance',
+            value=server_instance.instance_id)
+
+    def _get_server_subnet_selection(self) -> ec2.SubnetSelection:
+        """
+        Get the public subnet of the server imported from the common stack
+        :return: Subnet selection of the server subnet
+        """
+        if not hasattr(self, '_server_subnet'):
+            self._server_subnet = ec2.Subnet.from_subnet_attributes(
+                self,
+                id=f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnet',
+                subnet_id=cdk.Fn.import_value(
+                    get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetId')),
+                availability_zone=cdk.Fn.import_value(
+                    get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetAvailabilityZone')),
+                route_table_id=cdk.Fn.import_value(
+                    get_namespaced_name(self, f'{RESOURCE_ID_COMMON_PREFIX}ServerSubnetRouteTableId'))
+            )
+        return ec2.SubnetSelection(subnets=[self._server_subnet])
+
+    def _launch_relay_instance(self, relay_profiles_file: str) -> None:
+        """
+        Launch an Amazon EC2 instance running the UDP impairment relay between the clients and the server. It shares the
+        security group of the server and the clients and listens on the server port, so the clients only need the
+        relay IP address as their connect target
+        :param relay_profiles_file: Path of the JSON file of the impairment profiles
+        """
+        relay_private_ip = self.node.try_get_context('relay_private_ip')
+        if not relay_private_ip:
+            relay_private_ip = DEFAULT_RELAY_PRIVATE_IP
+        relay_instance_type = self.node.try_get_context('relay_instance_type')
+        if not relay_instance_type:
+            relay_instance_type = RELAY_INSTANCE_TYPE
+        artifact_sync_interval = self.node.try_get_context('artifact_sync_interval')
+        if not artifact_sync_interval:
+            artifact_sync_interval = ARTIFACT_SYNC_INTERVAL_MINUTES
+        run_id = self.node.try_get_context('run_id')
+        stats_key = f'{RUN_KEY_PREFIX}/{run_id}/{RELAY_ARTIFACT_FOLDER}' if run_id else RELAY_ARTIFACT_FOLDER
+        stats_key = f'{stats_key}/{os.path.basename(RELAY_STATS_FILE)}'
+
+        relay_role = iam.Role(
+            self, f'{RESOURCE_ID_COMMON_PREFIX}RelayInstanceRole',
+            description='Role of the UDP impairment relay instance',
+            assumed_by=iam.ServicePrincipal('ec2.amazonaws.com'),
+            managed_policies=[iam.ManagedPolicy.from_aws_managed_policy_name('AmazonSSMManagedInstanceCore')]
+        )
+        self._artifacts_bucket.grant_put(relay_role, f'*{RELAY_ARTIFACT_FOLDER}/*')
+
+        user_data = ec2.UserData.for_linux()
+        script_file = f'{RELAY_INSTALL_FOLDER}/udp_relay.py'
+        profiles_file = f'{RELAY_INSTALL_FOLDER}/relay_profiles.json'
+        for asset_id, path, local_file in [('RelayScript', RELAY_SCRIPT_PATH, script_file),
+                                           ('RelayProfiles', relay_profiles_file, profiles_file)]:
+            asset = s3_assets.Asset(self, f'{RESOURCE_ID_COMMON_PREFIX}{asset_id}Asset', path=path)
+            asset.grant_read(relay_role)
+            user_data.add_s3_download_command(
+                bucket=asset.bucket, bucket_key=asset.s3_object_key, local_file=local_file)
+
+        relay_command = f'/usr/bin/python3 {script_file} ' \
+                        f'--listen-port {self._server_port} --server-host {self._server_private_ip} ' \
+                        f'--server-port {self._server_port} --profiles {profiles_file} ' \
+                        f'--stats-file {RELAY_STATS_FILE} --stats-interval {RELAY_STATS_INTERVAL_SECONDS}'
+        upload_command = f'/bin/sh -c \'test ! -f {RELAY_STATS_FILE} || aws s3 cp {RELAY_STATS_FILE} ' \
+                         f's3://{self._artifacts_bucket.bucket_name}/{stats_key} --only-show-errors\''
+        user_data.add_commands(
+            'yum install -y python3',
+            f'mkdir -p {os.path.dirname(RELAY_STATS_FILE)}',
+            'cat > /etc/systemd/system/mpscaler-relay.service << EOF',
+            '[Unit]',
+            'Description=Multiplayer Test Scaler UDP impairment relay',
+            'After=network-online.target',
+            '[Service]',
+            f'ExecStart={relay_command}',
+            f'ExecStopPost={upload_command}',
+            'Restart=always',
+            '[Install]',
+            'WantedBy=multi-user.target',
+            'EOF',
+            # Upload the flow stats with the other run artifacts at every artifact sync interval
+            'cat > /etc/systemd/system/mpscaler-relay-stats.service << EOF',
+            '[Service]',
+            'Type=oneshot',
+            f'ExecStart={upload_command}',
+            'EOF',
+            'cat > /etc/systemd/system/mpscaler-relay-stats.timer << EOF',
+            '[Timer]',
+            f'OnUnitActiveSec={int(artifact_sync_interval)}min',
+            'OnBootSec=1min',
+            '[Install]',
+            'WantedBy=timers.target',
+            'EOF',
+            'systemctl daemon-reload',
+            'systemctl enable --now mpscaler-relay.service mpscaler-relay-stats.timer'
+        )
+
+        relay_instance = ec2.Instance(
+            self,
+            f'{RESOURCE_ID_COMMON_PREFIX}RelayInstance',
+            vpc=self._vpc,
+            machine_image=ec2.MachineImage.latest_amazon_linux(generation=ec2.AmazonLinuxGeneration.AMAZON_LINUX_2),
+            user_data=user_data,
+            instance_type=ec2.InstanceType(relay_instance_type),
+            security_group=self._security_group,
+            private_ip_address=relay_private_ip,
+            role=relay_role,
+            vpc_subnets=self._get_server_subnet_selection(),
+            require_imdsv2=True,
+        )
+
+        cdk.CfnOutput(
+            self,
+            f'{RESOURCE_ID_COMMON_PREFIX}RelayInstanceId',
+            description='ID of the UDP impairment relay instance',
+            value=relay_instance.instance_id)
 
     def _create_server_upload_automation(self):
         self._upload_automation = ServerAutomationConstruct(
             self, f'{RESOURCE_ID_COMMON_PREFIX}ServerAutomationConstruct')
-        self._upload_automation.create_file_sync_rule(self._artifacts_bucket.bucket_name)
+        artifact_sync_interval = self.node.try_get_context('artifact_sync_interval')
+        if not artifact_sync_interval:
+            artifact_sync_interval = ARTIFACT_SYNC_INTERVAL_MINUTES
+        run_id = self.node.try_get_context('run_id')
+        if not run_id:
+            run_id = ''
+        soak_sample_seconds = self.node.try_get_context('soak_sample_seconds')
+        if not soak_sample_seconds:
+            soak_sample_seconds = SOAK_SAMPLE_SECONDS_DISABLED
+        self._upload_automation.create_file_sync_rule(
+            self._artifacts_bucket.bucket_name, self._platform, int(artifact_sync_interval), run_id,
+            self._project_name, int(soak_sample_seconds))
         self._upload_automation.create_upload_trigger(self._upload_lambda)
@@ -0,0 +1,42 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import hashlib
+import json
+import os
+
+import aws_cdk as cdk
+from constructs import Construct
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_file_hash(path: str) -> str:
+    """
+    Get the SHA-256 hash of a file's content
+    :param path: Path to the file
+    :return: Hex digest of the file content, or an empty string if the file doesn't exist
+    """
+    if not os.path.exists(path):
+        return ''
+
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def get_content_version(scope: Construct, *contents: str) -> str:
+    """
+    Derive an EC2 Image Builder semantic version (major.minor.patch) from content,
+    so that a new version is only created when the content changes
+    :param scope: Construct the content belongs to, used to resolve tokens in the content
+    :param contents: Content the version depends on
+    :return: Semantic version
+    """
+    # Unresolved token strings differ between synthesis runs, while their resolved form is stable
+    resolved_contents = json.dumps(cdk.Stack.of(scope).resolve(list(contents)), sort_keys=True)
+    content_hash = hashlib.sha256(resolved_contents.encode('utf-8')).hexdigest()
+    # Each version node is kept below 2^24
+    return f'1.{int(content_hash[0:6], 16)}.{int(content_hash[6:12], 16)}'
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Synthesize the application across a matrix of context variables, e.g. client counts, targets and platforms, and
+report the synth time, peak memory and template size of every stack against the AWS CloudFormation quotas.
+Every synth runs in its own process, so its peak memory includes the jsii Node.js runtime doing the work
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import aws_cdk as cdk
+
+from multiplayer_test_scaler.constants import *
+from multiplayer_test_scaler.multiplayer_test_scaler_construct import MultiplayerTestScalerConstruct
+
+BENCHMARK_PROJECT_NAME = 'MULTIPLAYER-TEST-SCALER'
+BENCHMARK_ENV = cdk.Environment(account='123456789012', region='us-east-1')
+# Context variables every synth needs. The matrix variables are added to them
+BENCHMARK_CONTEXT = {
+    'key_pair': 'synth-benchmark',
+    'server_private_ip': '10.0.0.4',
+    'local_reference_machine_cidr': '10.0.0.1/32',
+}
+# Target of the synth when no target context variable is set, i.e. the server and client stacks
+ALL_TARGETS = 'all'
+DEFAULT_CLIENT_COUNTS = [1, 100, 1000]
+DEFAULT_TARGETS = [ALL_TARGETS, 'base-image']
+DEFAULT_SERVER_COUNTS = [1]
+CDK_JSON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cdk.json')
+
+
+def get_matrix(client_counts: List[int], targets: List[str], platforms: List[str],
+               server_counts: List[int]) -> List[Dict]:
+    """
+    Get the context variables of every combination of the matrix. server_count is passed as is, so the matrix
+    covers it once the stacks read it
+    :param client_counts: Client counts
+    :param targets: Targets, or ALL_TARGETS for no target
+    :param platforms: Platforms
+    :param server_counts: Server counts
+    :return: Matrix context variables of every combination
+    """
+    matrix = []
+    for client_count, target, platform, server_count in itertools.product(
+            client_counts, targets, platforms, server_counts):
+        context = {'client_count': client_count, 'platform': platform, 'server_count': server_count}
+        if target != ALL_TARGETS:
+            context['target'] = target
+        matrix.append(context)
+    return matrix
+
+
+def synthesize(matrix_context: Dict, output_path: str) -> List[Dict]:
+    """
+    Synthesize the application with the feature flags of cdk.json and the matrix context variables
+    :param matrix_context: Matrix context variables
+    :param output_path: Folder of the cloud assembly
+    :return: Synth time, and the size and counts of every stack template
+    """
+    with open(CDK_JSON_PATH) as cdk_json_file:
+        context = json.load(cdk_json_file).get('context', {})
+    context.update(BENCHMARK_CONTEXT)
+    context.update(matrix_context)
+
+    start = time.perf_counter()
+    app = cdk.App(context=context, outdir=output_path)
+    MultiplayerTestScalerConstruct(app, BENCHMARK_PROJECT_NAME, env=BENCHMARK_ENV)
+    assembly = app.synth()
+    synth_seconds = time.perf_counter() - start
+
+    stacks = []
+    for stack in assembly.stacks:
+        template = stack.template
+        stacks.append({
+            'stack': stack.stack_name,
+            'synth_seconds': synth_seconds,
+            'template_bytes': os.path.getsize(stack.template_full_path),
+            'resources': len(template.get('Resources', {})),
+            'outputs': len(template.get('Outputs', {})),
+            'parameters': len(template.get('Parameters', {}))
+        })
+    return stacks
+
+
+def check_quotas(stack: Dict) -> Dict:
+    """
+    Check a stack template against the AWS CloudFormation quotas
+    :param stack: Stack template size and counts, see synthesize
+    :return: Status of the stack, ok, near-limit or over-limit, and the quotas it is near or over
+    """
+    quotas = {
+        'resources': CLOUDFORMATION_MAX_RESOURCES,
+        'template_bytes': CLOUDFORMATION_MAX_TEMPLATE_BYTES,
+        'outputs': CLOUDFORMATION_MAX_OUTPUTS,
+        'parameters': CLOUDFORMATION_MAX_PARAMETERS
+    }
+    over_limit = [f'{key} {stack[key]}/{quota}' for key, quota in quotas.items() if stack[key] > quota]
+    near_limit = [f'{key} {stack[key]}/{quota}' for key, quota in quotas.items()
+                  if CLOUDFORMATION_QUOTA_WARNING_RATIO * quota < stack[key] <= quota]
+    status = 'over-limit' if over_limit else 'near-limit' if near_limit else 'ok'
+    return {'status': status, 'quotas': over_limit + near_limit}
+
+
+def run_synth_process(matrix_context: Dict, output_path: str) -> List[Dict]:
+    """
+    Synthesize the application in a new process and measure its peak memory
+    :param matrix_context: Matrix context variables
+    :param output_path: Folder of the cloud assembly
+    :return: Stacks of the synth, see synthesize, with the process time and peak memory
+    """
+    result_path = os.path.join(output_path, 'synth_result.json')
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--synth-context', json.dumps(matrix_context),
+         '--output-path', output_path, '--result-file', result_path],
+        cwd=os.path.dirname(CDK_JSON_PATH), stdout=subprocess.DEVNULL)
+    peak_memory_bytes = None
+    if hasattr(os, 'wait4'):
+        # The usage of the waited process includes the jsii runtime it started and waited for
+        _, return_code, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(return_code)
+        peak_memory_bytes = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    else:
+        process.wait()
+    process_seconds = time.perf_counter() - start
+    if process.returncode:
+        raise RuntimeError(f'Synth failed with exit code {process.returncode} for {matrix_context}')
+
+    with open(result_path) as result_file:
+        stacks = json.load(result_file)
+    for stack in stacks:
+        stack.update({'process_seconds': process_seconds, 'peak_memory_bytes': peak_memory_bytes})
+    return stacks
+
+
+def format_results(results: List[Dict]) -> str:
+    """
+    Format the benchmark results as a text table
+    :param results: Results of every stack of every synth
+    :return: Text table
+    """
+    lines = [f'{"context":<64} {"stack":<36} {"synth s":>8} {"peak MiB":>9} {"bytes":>9} {"resources":>9} status']
+    for result in results:
+        context = ' '.join(f'{key}={value}' for key, value in result['context'].items())
+        peak_memory = f'{result["peak_memory_bytes"] / 1024 / 1024:>9.0f}' \
+            if result['peak_memory_bytes'] is not None else f'{"-":>9}'
+        lines.append(f'{context:<64} {result["stack"]:<36} {result["synth_seconds"]:>8.2f} {peak_memory} '
+                     f'{result["template_bytes"]:>9} {result["resources"]:>9} {result["status"]}'
+                     f'{" (" + ", ".join(result["quotas"]) + ")" if result["quotas"] else ""}')
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--client-count', action='append', type=int, default=[],
+                        help=f'Client count to synthesize. Can be repeated. Defaults to {DEFAULT_CLIENT_COUNTS}')
+    parser.add_argument('--target', action='append', default=[],
+                        help=f'Target to synthesize, {ALL_TARGETS}, server, client or base-image. Can be repeated. '
+                             f'Defaults to {DEFAULT_TARGETS}')
+    parser.add_argument('--platform', action='append', default=[],
+                        help=f'Platform to synthesize. Can be repeated. Defaults to {PLATFORM_WINDOWS}')
+    parser.add_argument('--server-count', action='append', type=int, default=[],
+                        help=f'Server count to synthesize. Can be repeated. Defaults to {DEFAULT_SERVER_COUNTS}')
+    parser.add_argument('--report-file', default='', help='Path to save the results in JSON')
+    parser.add_argument('--synth-context', default='', help=argparse.SUPPRESS)
+    parser.add_argument('--output-path', default='', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', default='', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.synth_context:
+        # Synth process started by run_synth_process
+        stacks = synthesize(json.loads(args.synth_context), args.output_path)
+        with open(args.result_file, 'w') as result_file:
+            json.dump(stacks, result_file)
+        return
+
+    matrix = get_matrix(args.client_count or DEFAULT_CLIENT_COUNTS, args.target or DEFAULT_TARGETS,
+                        args.platform or [PLATFORM_WINDOWS], args.server_count or DEFAULT_SERVER_COUNTS)
+    results = []
+    for matrix_context in matrix:
+        with tempfile.TemporaryDirectory() as output_path:
+            for stack in run_synth_process(matrix_context, output_path):
+                results.append({'context': matrix_context, **stack, **check_quotas(stack)})
+        print(f'Synthesized {matrix_context}')
+
+    print(format_results(results))
+    if args.report_file:
+        with open(args.report_file, 'w') as report_file:
+            json.dump(results, report_file, indent=1)
+        print(f'Results are saved to {args.report_file}')
+
+    over_limit = [result for result in results if result['status'] == 'over-limit']
+    if over_limit:
+        print(f'[Error] {len(over_limit)} stack template(s) exceed the AWS CloudFormation quotas')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import aws_cdk as cdk
+import aws_cdk.assertions as assertions
+
+from multiplayer_test_scaler.base_image_stack import O3DEBaseImageStack
+from multiplayer_test_scaler.constants import *
+
+TEST_CONTEXT = {
+    'platform': 'Windows',
+  }
+CDK_ENV = cdk.Environment(region='us-east-1')
+
+
+def test_base_image_stack_creation_runtime_dependencies_baked():
+    """
+    Setup: Platform context variable is specified
+    Tests: Create the base image stack
+    Verification: The base image recipe installs the runtime dependencies without the project package
+    """
+    app = cdk.App(context=TEST_CONTEXT)
+    stack = O3DEBaseImageStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-BaseImageStack',
+                               platform=TEST_CONTEXT['platform'], env=CDK_ENV)
+    template = assertions.Template.from_stack(stack)
+
+    template.resource_count_is('AWS::ImageBuilder::Component', 2)
+    template.has_resource_properties('AWS::ImageBuilder::Component', {
+        'Name': f'{RESOURCE_ID_COMMON_PREFIX}BaseVCRedistributableComponent',
+        'Data': assertions.Match.string_like_regexp(r'Runtimes\\X86')
+    })
+    template.has_resource_properties('AWS::ImageBuilder::Component', {
+        'Name': f'{RESOURCE_ID_COMMON_PREFIX}BaseArchiverComponent',
+        'Platform': 'Windows'
+    })
+    for component in template.find_resources('AWS::ImageBuilder::Component').values():
+        assert 'Win32_Product' not in component['Properties']['Data'], 'Win32_Product query is used for validation'
+
+    template.has_resource_properties('AWS::ImageBuilder::ImageRecipe', {
+        'Name': f'{RESOURCE_ID_COMMON_PREFIX}BaseRecipe',
+        'ParentImage': {
+            'Fn::Sub': 'arn:${AWS::Partition}:imagebuilder:${AWS::Region}:aws:image/windows-server-2019-english-full-base-x86/x.x.x'
+        }
+    })
+    template.has_resource_properties('AWS::ImageBuilder::InfrastructureConfiguration', {
+        'Name': f'{RESOURCE_ID_COMMON_PREFIX}BaseInfrastructureConfiguration',
+        'InstanceTypes': [IMAGE_BUILDER_INSTANCE_TYPE]
+    })
+    template.has_resource_properties('AWS::ImageBuilder::DistributionConfiguration', {
+        'Distributions': [{
+            'AmiDistributionConfiguration': {
+                'AmiTags': assertions.Match.object_like({'AmiTagKey': BASE_IMAGE_TAG_VALUE})
+            }
+        }]
+    })
+    template.resource_count_is('AWS::S3::Bucket', 1)
+    template.has_output(f'{RESOURCE_ID_COMMON_PREFIX}BaseImageId', {
+        'Value': {
+            'Fn::GetAtt': [list(template.find_resources('AWS::ImageBuilder::Image').keys())[0], 'ImageId']
+        }
+    })
+    template.has_output(f'{RESOURCE_ID_COMMON_PREFIX}ImageBuilderLogBucketName', {})
@@ -3,6 +3,8 @@
 
 import pytest
 import copy
+import json
+import os
 
 import aws_cdk as cdk
 import aws_cdk.assertions as assertions
@@ -28,11 +30,10 @@ def test_client_stack_creation_context_variable_specified_client_resources_creat
     Verification: All required resources are included in the stack with proper dependencies
     """
     app = cdk.App(context=TEST_CONTEXT)
-    common_stack = O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
 
     stack = O3DEClientScalerStack(
         app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ClientStack',
-        vpc=common_stack.vpc, security_group=common_stack.security_group,
         platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'])
     template = assertions.Template.from_stack(stack)
 
@@ -48,7 +49,10 @@ def test_client_stack_creation_context_variable_specified_client_resources_creat
                     'LogConfiguration': assertions.Match.object_like({
                         'LogDriver': 'awslogs',
                         'Options': assertions.Match.object_like({
-                            'awslogs-stream-prefix': ECS_TASK_LOGGING_STREAM_PREFIX
+                            'awslogs-stream-prefix': ECS_TASK_LOGGING_STREAM_PREFIX,
+                            'awslogs-group': {
+                                'Ref': assertions.Match.string_like_regexp('ClientLogGroup')
+                            }
                         })
                     }),
                 }
@@ -75,6 +79,201 @@ def test_client_stack_creation_context_variable_specified_client_resources_creat
         }
     }))
 
+    template.resource_count_is('AWS::Logs::LogGroup', 1)
+    template.has_output(f'{RESOURCE_ID_COMMON_PREFIX}ClientLogGroupName', {
+        'Value': {
+            'Ref': list(template.find_resources('AWS::Logs::LogGroup').keys())[0]
+        }
+    })
+
+    template.has_output(f'{RESOURCE_ID_COMMON_PREFIX}ClientClusterName', {
+        'Value': {
+            'Ref': list(template.find_resources('AWS::ECS::Cluster').keys())[0]
+        }
+    })
+    template.has_output(f'{RESOURCE_ID_COMMON_PREFIX}ClientServiceName', {
+        'Value': {
+            'Fn::GetAtt': [list(template.find_resources('AWS::ECS::Service').keys())[0], 'Name']
+        }
+    })
+
+
+def test_client_stack_creation_sizing_context_specified_task_size_applied():
+    """
+    Setup: Context variables client_task_cpu and client_task_memory are specified and common stack is created
+    Tests: Create the client stack
+    Verification: The client task definition uses the specified CPU units and memory
+    """
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['client_task_cpu'] = '2048'
+    local_test_context['client_task_memory'] = '4096'
+
+    app = cdk.App(context=local_test_context)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
+
+    stack = O3DEClientScalerStack(
+        app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ClientStack',
+        platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'])
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties('AWS::ECS::TaskDefinition', {
+        'Cpu': '2048',
+        'Memory': '4096'
+    })
+
+
+def test_client_stack_creation_client_log_echo_disabled_skip_log_echo():
+    """
+    Setup: Context variable client_log_echo is false and common stack is created
+    Tests: Create the client stack
+    Verification: The client launcher is asked not to echo the full client log
+    """
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['client_log_echo'] = 'false'
+
+    app = cdk.App(context=local_test_context)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
+
+    stack = O3DEClientScalerStack(
+        app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ClientStack',
+        platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'])
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties('AWS::ECS::TaskDefinition', {
+        'ContainerDefinitions': [assertions.Match.object_like({
+            'Command': [ECS_TASK_COMMAND.replace('{project_name}', TEST_CONTEXT['project_name']) +
+                        ECS_TASK_SKIP_LOG_ECHO_ARG]
+        })]
+    })
+
+
+def test_client_stack_creation_network_probe_enabled_probe_task_definition_created():
+    """
+    Setup: Context variable network_probe is true and common stack is created
+    Tests: Create the client stack
+    Verification: A Linux task definition of the probe senders is created and its ARN is output
+    """
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['network_probe'] = 'true'
+
+    app = cdk.App(context=local_test_context)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
+
+    stack = O3DEClientScalerStack(
+        app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ClientStack',
+        platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'])
+    template = assertions.Template.from_stack(stack)
+
+    template.resource_count_is('AWS::ECS::TaskDefinition', 2)
+    template.has_resource_properties('AWS::ECS::TaskDefinition', {
+        'ContainerDefinitions': [assertions.Match.object_like({
+            'Name': NETWORK_PROBE_CONTAINER_NAME,
+            'Image': NETWORK_PROBE_IMAGE,
+            'EntryPoint': NETWORK_PROBE_ENTRY_POINT
+        })],
+        'RuntimePlatform': assertions.Match.object_like({'OperatingSystemFamily': 'LINUX'})
+    })
+    probe_task_definition_ids = [
+        resource_id for resource_id in template.find_resources('AWS::ECS::TaskDefinition') if 'Probe' in resource_id]
+    template.has_output(f'{RESOURCE_ID_COMMON_PREFIX}ProbeTaskDefinitionArn', {
+        'Value': {'Ref': probe_task_definition_ids[0]}
+    })
+
+
+def test_client_stack_creation_run_id_specified_log_streams_prefixed_with_run_id():
+    """
+    Setup: Context variable for the run ID is specified and common stack is created
+    Tests: Create the client stack
+    Verification: The client log streams are prefixed with the run ID
+    """
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['run_id'] = '20230101T120000Z-1a2b3c4d'
+
+    app = cdk.App(context=local_test_context)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
+
+    stack = O3DEClientScalerStack(
+        app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ClientStack',
+        platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'])
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties('AWS::ECS::TaskDefinition', {
+        'ContainerDefinitions': [assertions.Match.object_like({
+            'LogConfiguration': assertions.Match.object_like({
+                'Options': assertions.Match.object_like({
+                    'awslogs-stream-prefix': f'{ECS_TASK_LOGGING_STREAM_PREFIX}-{local_test_context["run_id"]}'
+                })
+            })
+        })]
+    })
+
+
+def test_client_stack_creation_run_id_specified_client_artifacts_synced_under_run_prefix():
+    """
+    Setup: Context variables for the run ID and artifact sync interval are specified and common stack is created
+    Tests: Create the client stack
+    Verification: The client container gets the artifacts bucket, run ID and sync interval, can only put client
+    artifacts and is given time for the final sync when stopped
+    """
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['run_id'] = '20230101T120000Z-1a2b3c4d'
+    local_test_context['artifact_sync_interval'] = '5'
+
+    app = cdk.App(context=local_test_context)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
+
+    stack = O3DEClientScalerStack(
+        app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ClientStack',
+        platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'])
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties('AWS::ECS::TaskDefinition', {
+        'ContainerDefinitions': [assertions.Match.object_like({
+            'Environment': assertions.Match.array_with([
+                {'Name': 'MPSCALER_RUN_ID', 'Value': local_test_context['run_id']},
+                {'Name': 'MPSCALER_ARTIFACT_SYNC_INTERVAL_SECONDS', 'Value': '300'}
+            ]),
+            'StopTimeout': ECS_TASK_STOP_TIMEOUT_SECONDS
+        })]
+    })
+    policies = template.find_resources('AWS::IAM::Policy')
+    statements = [statement for policy in policies.values()
+                  for statement in policy['Properties']['PolicyDocument']['Statement']]
+    put_statement = next(statement for statement in statements if 's3:PutObject' in statement['Action'])
+    assert f'/{ECS_TASK_ARTIFACT_KEY_PATTERN}' in json.dumps(put_statement['Resource'])
+
+
+def test_client_stack_creation_container_stopped_final_sync_within_shutdown_grace_period():
+    """
+    Setup: All context variables are specified and common stack is created
+    Tests: Create the client stack and synthesize the client image asset
+    Verification: The final sync time of the client launcher fits in the shutdown grace period of the image and the
+    stop timeout of the container, so the container isn't killed before the final sync completes
+    """
+    app = cdk.App(context=TEST_CONTEXT)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
+
+    stack = O3DEClientScalerStack(
+        app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ClientStack',
+        platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'])
+    template = assertions.Template.from_stack(stack)
+    assembly = app.synth()
+
+    with open(os.path.join(assembly.directory, f'{stack.artifact_id}.assets.json')) as assets_file:
+        docker_images = json.load(assets_file)['dockerImages']
+    build_args = next(iter(docker_images.values()))['source']['dockerBuildArgs']
+    assert ECS_TASK_SHUTDOWN_SYNC_SECONDS * 1000 < int(build_args['SHUTDOWN_GRACE_MILLISECONDS']) <= \
+        ECS_TASK_STOP_TIMEOUT_SECONDS * 1000
+    with open(os.path.join(ASSET_DIR_ROOT, TEST_CONTEXT['platform'], 'Dockerfile')) as dockerfile:
+        assert 'WaitToKillServiceTimeout /t REG_SZ /d %SHUTDOWN_GRACE_MILLISECONDS%' in dockerfile.read()
+    template.has_resource_properties('AWS::ECS::TaskDefinition', {
+        'ContainerDefinitions': [assertions.Match.object_like({
+            'Command': [assertions.Match.string_like_regexp(
+                f'-ShutdownSyncSeconds {ECS_TASK_SHUTDOWN_SYNC_SECONDS}')],
+            'StopTimeout': ECS_TASK_STOP_TIMEOUT_SECONDS
+        })]
+    })
+
 
 def test_client_stack_creation_client_count_not_specified_raise_runtime_error():
     """
@@ -86,12 +285,11 @@ def test_client_stack_creation_client_count_not_specified_raise_runtime_error():
     local_test_context.pop('client_count')
 
     app = cdk.App(context=local_test_context)
-    common_stack = O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
 
     with pytest.raises(RuntimeError) as exc_info:
         stack = O3DEClientScalerStack(
             app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ClientStack',
-            vpc=common_stack.vpc, security_group=common_stack.security_group,
             platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'])
 
     assert str(exc_info.value) == 'Client count is required for deploying the Multiplayer Test Scaler. ' \
@@ -105,12 +303,11 @@ def test_client_stack_creation_unsupported_platform_specified_raise_runtime_erro
     Verification: Runtime error is thrown for unsupported platform
     """
     app = cdk.App(context=TEST_CONTEXT)
-    common_stack = O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
 
     with pytest.raises(RuntimeError) as exc_info:
         stack = O3DEClientScalerStack(
             app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ClientStack',
-            vpc=common_stack.vpc, security_group=common_stack.security_group,
             platform='Test', project_name=TEST_CONTEXT['project_name'])
 
     assert str(exc_info.value) == 'Client for the Test platform is not supported yet'
@@ -5,6 +5,7 @@ import aws_cdk as cdk
 import aws_cdk.assertions as assertions
 
 from multiplayer_test_scaler.common_stack import O3DECommonStack
+from multiplayer_test_scaler.multiplayer_test_scaler_construct import MultiplayerTestScalerConstruct
 from multiplayer_test_scaler.server_stack import O3DEServerStack
 from multiplayer_test_scaler.constants import *
 
@@ -80,3 +81,93 @@ def test_common_stack_creation_context_variable_specified_common_resources_creat
             'Name': f'{RESOURCE_ID_COMMON_PREFIX}ArtifactBucketName'
         }
     })
+
+
+def test_common_stack_creation_upload_lambda_bucket_names_injected():
+    """
+    Setup: All context variables are specified
+    Tests: Create the common stack
+    Verification: The upload lambda gets the source and destination bucket names in its environment
+    """
+    app = cdk.App(context=TEST_CONTEXT)
+    stack = O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties('AWS::Lambda::Function', {
+        'Handler': 'upload_test_artifacts.handler',
+        'Environment': {
+            'Variables': {
+                'SOURCE_BUCKET_NAME': {'Ref': list(template.find_resources('AWS::S3::Bucket').keys())[0]},
+                'DESTINATION_BUCKET_NAME': {'Fn::ImportValue': DEFAULT_DESTINATION_BUCKET_EXPORT_NAME},
+                'SOURCE_BUCKET_EXPORT_NAME': f'{RESOURCE_ID_COMMON_PREFIX}ArtifactBucketName',
+                'MAX_COPY_WORKERS': str(UPLOAD_MAX_COPY_WORKERS)
+            }
+        }
+    })
+
+
+def test_common_stack_creation_vpc_flow_logs_enabled_flow_log_delivered_to_artifacts_bucket():
+    """
+    Setup: Context variable vpc_flow_logs is true
+    Tests: Create the common stack
+    Verification: A VPC flow log with one minute aggregation is delivered to the artifacts bucket
+    """
+    app = cdk.App(context=dict(TEST_CONTEXT, vpc_flow_logs='true'))
+    stack = O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
+    template = assertions.Template.from_stack(stack)
+
+    bucket_id = list(template.find_resources('AWS::S3::Bucket').keys())[0]
+    template.resource_count_is('AWS::EC2::FlowLog', 1)
+    template.has_resource_properties('AWS::EC2::FlowLog', {
+        'ResourceId': {'Ref': list(template.find_resources('AWS::EC2::VPC').keys())[0]},
+        'ResourceType': 'VPC',
+        'TrafficType': 'ALL',
+        'LogDestinationType': 's3',
+        'LogDestination': {'Fn::Join': ['', [{'Fn::GetAtt': [bucket_id, 'Arn']}, f'/{VPC_FLOW_LOG_KEY_PREFIX}/']]},
+        'LogFormat': VPC_FLOW_LOG_FORMAT,
+        'MaxAggregationInterval': VPC_FLOW_LOG_MAX_AGGREGATION_SECONDS
+    })
+    template.has_resource_properties('AWS::S3::BucketPolicy', {
+        'PolicyDocument': {
+            'Statement': assertions.Match.array_with([assertions.Match.object_like({
+                'Action': 's3:PutObject',
+                'Principal': {'Service': 'delivery.logs.amazonaws.com'}
+            })])
+        }
+    })
+
+
+def test_common_stack_creation_vpc_flow_logs_not_specified_no_flow_log():
+    """
+    Setup: Context variable vpc_flow_logs is not specified
+    Tests: Create the common stack
+    Verification: No VPC flow log is created
+    """
+    app = cdk.App(context=TEST_CONTEXT)
+    stack = O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack')
+    template = assertions.Template.from_stack(stack)
+
+    template.resource_count_is('AWS::EC2::FlowLog', 0)
+
+
+def test_common_stack_creation_any_target_specified_same_template_without_automatic_exports():
+    """
+    Setup: Context variables of the deployment are specified with each target
+    Tests: Create the stacks of the deployment
+    Verification: The common stack is the same for every target and only has named exports, so deployments of
+    different targets running alongside each other don't update or remove its exports
+    """
+    templates = []
+    for target in [None, 'server', 'client', 'common']:
+        context = dict(TEST_CONTEXT, client_count='1', project_name='MultiplayerSample')
+        if target:
+            context['target'] = target
+        app = cdk.App(context=context)
+        MultiplayerTestScalerConstruct(app, 'MultiplayerSample', env=CDK_ENV)
+        templates.append(assertions.Template.from_stack(
+            app.node.find_child('MultiplayerSample-CommonStack')).to_json())
+
+    assert all(template == templates[0] for template in templates)
+    export_names = [output['Export']['Name'] for output in templates[0]['Outputs'].values()]
+    assert f'{RESOURCE_ID_COMMON_PREFIX}UploadLambdaArn' in export_names
+    assert not [name for name in export_names if not name.startswith(RESOURCE_ID_COMMON_PREFIX)]
@@ -2,12 +2,14 @@
 # SPDX-License-Identifier: MIT-0
 
 import copy
+import json
 import pytest
 
 import aws_cdk as cdk
 import aws_cdk.assertions as assertions
 
 from multiplayer_test_scaler.common_stack import O3DECommonStack
+from multiplayer_test_scaler.multiplayer_test_scaler_construct import MultiplayerTestScalerConstruct
 from multiplayer_test_scaler.server_stack import O3DEServerStack
 from multiplayer_test_scaler.constants import *
 
@@ -31,12 +33,10 @@ def test_server_stack_creation_context_variable_specified_server_resources_creat
     Verification: All required resources are included in the stack with proper dependencies
     """
     app = cdk.App(context=TEST_CONTEXT)
-    common_stack = O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
     server_stack = O3DEServerStack(
         app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
-        vpc=common_stack.vpc, security_group=common_stack.security_group,
         platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'],
-        artifacts_bucket=common_stack.artifacts_bucket,
         env=CDK_ENV)
     template = assertions.Template.from_stack(server_stack)
 
@@ -160,7 +160,8 @@ def test_server_stack_creation_context_variable_specified_server_resources_creat
                }
             }
         },
-        'TerminateInstanceOnFailure': True
+        'TerminateInstanceOnFailure': True,
+        'InstanceTypes': [IMAGE_BUILDER_INSTANCE_TYPE]
     })
 
     template.resource_count_is('AWS::ImageBuilder::DistributionConfiguration', 1)
@@ -185,11 +186,19 @@ def test_server_stack_creation_context_variable_specified_server_resources_creat
             'Fn::GetAtt': [list(template.find_resources('AWS::ImageBuilder::Image').keys())[0], 'ImageId']
         },
         'KeyName': TEST_CONTEXT['key_pair'],
+        'InstanceType': SERVER_INSTANCE_TYPE,
         'PrivateIpAddress': TEST_CONTEXT['server_private_ip'],
+        'Monitoring': True,
         'UserData': user_data_capture
     })
     assert len(user_data_capture.as_object().get('Fn::Base64')) > 0, 'Instance user data does not exist'
 
+    template.has_output(f'{RESOURCE_ID_COMMON_PREFIX}ServerInstanceId', {
+        'Value': {
+            'Ref': list(template.find_resources('AWS::EC2::Instance').keys())[0]
+        }
+    })
+
     template.has_output(f'{RESOURCE_ID_COMMON_PREFIX}ServerIp', {
         'Value': {
             'Fn::GetAtt': [list(template.find_resources('AWS::EC2::Instance').keys())[0], 'PublicIp']
@@ -206,7 +215,8 @@ def test_server_stack_creation_context_variable_specified_server_resources_creat
     })
 
     template.resource_count_is('AWS::SSM::Document', 1)
-    template.resource_count_is('AWS::Events::Rule', 1)
+    # The periodic file sync rule and the final upload trigger on stack deletion
+    template.resource_count_is('AWS::Events::Rule', 2)
 
 def test_server_stack_creation_no_key_pair_specified_raise_runtime_error():
     """
@@ -218,13 +228,11 @@ def test_server_stack_creation_no_key_pair_specified_raise_runtime_error():
     local_test_context.pop('key_pair')
 
     app = cdk.App(context=local_test_context)
-    common_stack = O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
     with pytest.raises(RuntimeError) as exc_info:
         server_stack = O3DEServerStack(
             app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
-            vpc=common_stack.vpc, security_group=common_stack.security_group,
             platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'],
-            artifacts_bucket=common_stack.artifacts_bucket,
             env=CDK_ENV)
 
     assert str(exc_info.value) == 'EC2 key pair is required for deploying the Multiplayer Test Scaler. ' \
@@ -241,12 +249,10 @@ def test_server_stack_creation_no_server_private_ip_specified_use_default_server
     local_test_context.pop('server_private_ip')
 
     app = cdk.App(context=local_test_context)
-    common_stack = O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
     server_stack = O3DEServerStack(
         app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
-        vpc=common_stack.vpc, security_group=common_stack.security_group,
         platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'],
-        artifacts_bucket=common_stack.artifacts_bucket,
         env=CDK_ENV)
     template = assertions.Template.from_stack(server_stack)
     user_data_capture = assertions.Capture()
@@ -271,12 +277,10 @@ def test_server_stack_creation_no_local_reference_machine_cidr_specified_no_secu
     local_test_context.pop('local_reference_machine_cidr')
 
     app = cdk.App(context=local_test_context)
-    common_stack = O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-O3DECommonStack', env=CDK_ENV)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-O3DECommonStack', env=CDK_ENV)
     server_stack = O3DEServerStack(
         app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
-        vpc=common_stack.vpc, security_group=common_stack.security_group,
         platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'],
-        artifacts_bucket=common_stack.artifacts_bucket,
         env=CDK_ENV)
     template = assertions.Template.from_stack(server_stack)
 
@@ -293,12 +297,10 @@ def test_server_stack_creation_no_server_port_specified_use_default_server_port(
     local_test_context.pop('server_port')
 
     app = cdk.App(context=local_test_context)
-    common_stack = O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-O3DECommonStack', env=CDK_ENV)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-O3DECommonStack', env=CDK_ENV)
     server_stack = O3DEServerStack(
         app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
-        vpc=common_stack.vpc, security_group=common_stack.security_group,
         platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'],
-        artifacts_bucket=common_stack.artifacts_bucket,
         env=CDK_ENV)
     template = assertions.Template.from_stack(server_stack)
 
@@ -309,6 +311,283 @@ def test_server_stack_creation_no_server_port_specified_use_default_server_port(
     })
 
 
+def test_server_stack_creation_sizing_context_specified_sizing_applied():
+    """
+    Setup: Context variables for the server and EC2 Image Builder sizing are specified and common stack is created
+    Tests: Create the server stack
+    Verification: The server instance and EC2 Image Builder use the specified sizes
+    """
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['server_instance_type'] = 'm5.xlarge'
+    local_test_context['server_volume_size'] = '80'
+    local_test_context['image_builder_instance_type'] = 'c5.xlarge'
+
+    app = cdk.App(context=local_test_context)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
+    server_stack = O3DEServerStack(
+        app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
+        platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'],
+        env=CDK_ENV)
+    template = assertions.Template.from_stack(server_stack)
+
+    template.has_resource_properties('AWS::EC2::Instance', {
+        'InstanceType': 'm5.xlarge',
+        'BlockDeviceMappings': [{
+            'DeviceName': '/dev/sda1',
+            'Ebs': {
+                'VolumeSize': 80
+            }
+        }]
+    })
+    template.has_resource_properties('AWS::ImageBuilder::InfrastructureConfiguration', {
+        'InstanceTypes': ['c5.xlarge']
+    })
+
+
+def test_server_stack_creation_package_hash_specified_image_versioned_and_tagged():
+    """
+    Setup: The project package hash is specified and common stack is created
+    Tests: Create the server stack twice with the same package hash and once with a different one
+    Verification: The recipe and component versions only change with the package hash and the AMI is tagged with it
+    """
+    def get_template(package_hash: str) -> assertions.Template:
+        local_test_context = copy.deepcopy(TEST_CONTEXT)
+        local_test_context['package_hash'] = package_hash
+        app = cdk.App(context=local_test_context)
+        O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
+        server_stack = O3DEServerStack(
+            app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
+            platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'],
+            env=CDK_ENV)
+        return assertions.Template.from_stack(server_stack)
+
+    def get_versions(template: assertions.Template) -> list:
+        resources = list(template.find_resources('AWS::ImageBuilder::ImageRecipe').values()) + \
+            list(template.find_resources('AWS::ImageBuilder::Component').values())
+        return [resource['Properties']['Version'] for resource in resources]
+
+    template = get_template('a' * 64)
+
+    template.has_resource_properties('AWS::ImageBuilder::DistributionConfiguration', {
+        'Distributions': [{
+            'AmiDistributionConfiguration': {
+                'AmiTags': assertions.Match.object_like({SERVER_IMAGE_PACKAGE_HASH_TAG_KEY: 'a' * 64})
+            }
+        }]
+    })
+    assert get_versions(template) == get_versions(get_template('a' * 64))
+    assert all(old != new for old, new in zip(get_versions(template), get_versions(get_template('b' * 64))))
+
+
+def test_server_stack_creation_server_image_id_specified_image_builder_skipped():
+    """
+    Setup: The ID of an existing server AMI is specified and common stack is created
+    Tests: Create the server stack
+    Verification: No EC2 Image Builder resources are created and the server instance uses the existing AMI
+    """
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['server_image_id'] = 'ami-0123456789abcdef0'
+
+    app = cdk.App(context=local_test_context)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
+    server_stack = O3DEServerStack(
+        app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
+        platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'],
+        env=CDK_ENV)
+    template = assertions.Template.from_stack(server_stack)
+
+    template.resource_count_is('AWS::ImageBuilder::Image', 0)
+    template.resource_count_is('AWS::ImageBuilder::Component', 0)
+    template.has_resource_properties('AWS::EC2::Instance', {
+        'ImageId': 'ami-0123456789abcdef0'
+    })
+    template.has_resource_properties('AWS::IAM::Role', {
+        'ManagedPolicyArns': assertions.Match.array_with([
+            {
+                'Fn::Join': ['', ['arn:', {'Ref': 'AWS::Partition'}, ':iam::aws:policy/AmazonSSMManagedInstanceCore']]
+            }
+        ])
+    })
+
+
+def test_server_stack_creation_base_image_id_specified_only_project_package_installed():
+    """
+    Setup: The ID of the base AMI is specified and common stack is created
+    Tests: Create the server stack
+    Verification: The server image is built from the base AMI and only installs the project package
+    """
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['base_image_id'] = 'ami-0123456789abcdef0'
+
+    app = cdk.App(context=local_test_context)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
+    server_stack = O3DEServerStack(
+        app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
+        platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'],
+        env=CDK_ENV)
+    template = assertions.Template.from_stack(server_stack)
+
+    template.resource_count_is('AWS::ImageBuilder::Component', 1)
+    template.has_resource_properties('AWS::ImageBuilder::Component', {
+        'Name': f'{RESOURCE_ID_COMMON_PREFIX}DownloadComponent'
+    })
+    download_component = list(template.find_resources('AWS::ImageBuilder::Component').values())[0]
+    assert '7z.exe' in json.dumps(download_component), 'Project package is not extracted with 7-Zip'
+    template.has_resource_properties('AWS::ImageBuilder::ImageRecipe', {
+        'ParentImage': 'ami-0123456789abcdef0',
+        'Components': [{
+            'ComponentArn': {
+                'Ref': list(template.find_resources('AWS::ImageBuilder::Component').keys())[0]
+            }
+        }]
+    })
+    template.has_resource_properties('AWS::ImageBuilder::DistributionConfiguration', {
+        'Distributions': [{
+            'AmiDistributionConfiguration': {
+                'AmiTags': assertions.Match.object_like({SERVER_IMAGE_BASE_IMAGE_TAG_KEY: 'ami-0123456789abcdef0'})
+            }
+        }]
+    })
+    template.has_output(f'{RESOURCE_ID_COMMON_PREFIX}ImageBuilderLogBucketName', {})
+
+
+def test_server_stack_creation_artifact_sync_interval_specified_incremental_sync_scheduled():
+    """
+    Setup: Context variable for the artifact sync interval is specified and common stack is created
+    Tests: Create the server stack
+    Verification: The incremental sync document runs at the specified interval
+    """
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['artifact_sync_interval'] = '5'
+
+    app = cdk.App(context=local_test_context)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
+    server_stack = O3DEServerStack(
+        app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
+        platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'],
+        env=CDK_ENV)
+    template = assertions.Template.from_stack(server_stack)
+
+    template.has_resource_properties('AWS::Events::Rule', {
+        'ScheduleExpression': 'rate(5 minutes)'
+    })
+    documents = template.find_resources('AWS::SSM::Document')
+    assert len(documents) == 1
+    content = list(documents.values())[0]['Properties']['Content']
+    assert [step['name'] for step in content['mainSteps']] == ['StartProcessSampler', 'SyncArtifacts']
+    run_command = content['mainSteps'][1]['inputs']['runCommand']
+    assert "$MaxChunkBytes = [long]{{MaxChunkMB}} * 1MB" in run_command
+    assert not any('copy-item' in line.lower() for line in run_command)
+    # The chunk writer shared with the client sync is defined before the sync script uses it
+    chunk_writer_line = run_command.index('function Write-ArtifactChunk([System.IO.FileInfo]$File, $Entry, '
+                                          '[string]$ChunkFile, [byte[]]$Buffer,')
+    assert chunk_writer_line < next(index for index, line in enumerate(run_command) if 'Write-ArtifactChunk $file' in line)
+
+
+def test_server_stack_creation_run_id_specified_artifacts_synced_under_run_prefix():
+    """
+    Setup: Context variable for the run ID is specified and common stack is created
+    Tests: Create the server stack
+    Verification: The run ID is the default of the sync document RunId parameter
+    """
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['run_id'] = '20230101T120000Z-1a2b3c4d'
+
+    app = cdk.App(context=local_test_context)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
+    server_stack = O3DEServerStack(
+        app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
+        platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'],
+        env=CDK_ENV)
+    template = assertions.Template.from_stack(server_stack)
+
+    content = list(template.find_resources('AWS::SSM::Document').values())[0]['Properties']['Content']
+    assert content['parameters']['RunId']['default'] == local_test_context['run_id']
+    run_command = content['mainSteps'][1]['inputs']['runCommand']
+    assert "$RunId = '{{RunId}}'" in run_command
+    assert f"$RunKeyPrefix = '{RUN_KEY_PREFIX}'" in run_command
+
+
+def test_server_stack_creation_namespace_specified_names_and_exports_namespaced():
+    """
+    Setup: Context variable for the namespace is specified
+    Tests: Create the common and server stacks of a deployment
+    Verification: The stacks and the names and exports unique per account and region are prefixed with the namespace
+    """
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['namespace'] = 'exp1'
+    local_test_context['target'] = 'server'
+
+    app = cdk.App(context=local_test_context)
+    MultiplayerTestScalerConstruct(app, TEST_CONTEXT['project_name'], env=CDK_ENV)
+    common_stack = app.node.find_child(f'exp1-{TEST_CONTEXT["project_name"]}-CommonStack')
+    server_stack = app.node.find_child(f'exp1-{TEST_CONTEXT["project_name"]}-ServerStack')
+    common_template = assertions.Template.from_stack(common_stack)
+    server_template = assertions.Template.from_stack(server_stack)
+
+    assert server_stack.stack_name == f'exp1-{TEST_CONTEXT["project_name"]}-ServerStack'
+    common_template.has_output('*', {'Export': {'Name': f'exp1-{RESOURCE_ID_COMMON_PREFIX}ServerSubnetId'}})
+    common_template.has_resource_properties('AWS::Lambda::Function', {
+        'Environment': {
+            'Variables': {'SOURCE_BUCKET_EXPORT_NAME': f'exp1-{RESOURCE_ID_COMMON_PREFIX}ArtifactBucketName'}
+        }
+    })
+    server_template.has_resource_properties('AWS::EC2::Instance', {
+        'SubnetId': {'Fn::ImportValue': f'exp1-{RESOURCE_ID_COMMON_PREFIX}ServerSubnetId'}
+    })
+    server_template.has_resource_properties('AWS::SSM::Document', {
+        'Name': f'exp1-{RESOURCE_ID_COMMON_PREFIX}-server-upload-command'
+    })
+    server_template.has_resource_properties('AWS::Events::Rule', {
+        'Name': f'exp1-{RESOURCE_ID_COMMON_PREFIX}SyncArtifactsRule'
+    })
+    server_template.has_resource_properties('AWS::ImageBuilder::ImageRecipe', {
+        'Name': f'exp1-{RESOURCE_ID_COMMON_PREFIX}Recipe'
+    })
+
+
+def test_server_stack_creation_invalid_namespace_specified_raise_value_error():
+    """
+    Setup: Context variable for the namespace is not a valid name prefix
+    Tests: Create the stacks of a deployment
+    Verification: Value error is raised before any stack is created
+    """
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['namespace'] = 'exp_1'
+
+    app = cdk.App(context=local_test_context)
+    with pytest.raises(ValueError):
+        MultiplayerTestScalerConstruct(app, TEST_CONTEXT['project_name'], env=CDK_ENV)
+
+    assert not [child for child in app.node.children if isinstance(child, cdk.Stack)]
+
+
+def test_server_stack_creation_soak_sample_seconds_specified_process_sampler_started():
+    """
+    Setup: Context variable for the soak sample interval is specified and common stack is created
+    Tests: Create the server stack
+    Verification: The sync document starts the server process sampler with the interval and syncs its samples
+    """
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['soak_sample_seconds'] = '15'
+
+    app = cdk.App(context=local_test_context)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
+    server_stack = O3DEServerStack(
+        app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
+        platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'],
+        env=CDK_ENV)
+    template = assertions.Template.from_stack(server_stack)
+
+    content = list(template.find_resources('AWS::SSM::Document').values())[0]['Properties']['Content']
+    assert content['parameters']['SoakSampleSeconds']['default'] == '15'
+    sampler_command = content['mainSteps'][0]['inputs']['runCommand']
+    assert f"$ProcessName = '{TEST_CONTEXT['project_name']}.ServerLauncher'" in sampler_command
+    assert f"$OutputFile = '{SOAK_SAMPLES_FILE}'" in sampler_command
+    assert any(line.startswith('$SourceFolders') and "'soak'" in line
+               for line in content['mainSteps'][1]['inputs']['runCommand'])
+
+
 def test_server_stack_creation_unsupported_platform_specified_raise_runtime_error():
     """
     Setup: Unsupported platform is specified and common stack is created
@@ -316,14 +595,47 @@ def test_server_stack_creation_unsupported_platform_specified_raise_runtime_erro
     Verification: Runtime error is thrown for unsupported platform
     """
     app = cdk.App(context=TEST_CONTEXT)
-    common_stack = O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
 
     with pytest.raises(RuntimeError) as exc_info:
         server_stack = O3DEServerStack(
             app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
-            vpc=common_stack.vpc, security_group=common_stack.security_group,
             platform='Test', project_name=TEST_CONTEXT['project_name'],
-            artifacts_bucket=common_stack.artifacts_bucket,
             env=CDK_ENV)
 
     assert str(exc_info.value) == 'Server for the Test platform is not supported yet'
+
+
+def test_server_stack_creation_relay_profiles_file_specified_relay_instance_created(tmp_path):
+    """
+    Setup: Context variable relay_profiles_file is specified and common stack is created
+    Tests: Create the server stack
+    Verification: A relay instance is launched at the default relay IP next to the server instance and its ID is output
+    """
+    profiles_file = tmp_path / 'relay_profiles.json'
+    profiles_file.write_text(json.dumps([{'name': 'broadband', 'latency_ms': 20}]))
+    local_test_context = copy.deepcopy(TEST_CONTEXT)
+    local_test_context['relay_profiles_file'] = str(profiles_file)
+    local_test_context['run_id'] = 'run-1'
+
+    app = cdk.App(context=local_test_context)
+    O3DECommonStack(app, f'{RESOURCE_ID_COMMON_PREFIX}Test-CommonStack', env=CDK_ENV)
+    server_stack = O3DEServerStack(
+        app, f'{RESOURCE_ID_COMMON_PREFIX}Test-ServerStack',
+        platform=TEST_CONTEXT['platform'], project_name=TEST_CONTEXT['project_name'],
+        env=CDK_ENV)
+    template = assertions.Template.from_stack(server_stack)
+
+    template.resource_count_is('AWS::EC2::Instance', 2)
+    template.has_resource_properties('AWS::EC2::Instance', {
+        'InstanceType': RELAY_INSTANCE_TYPE,
+        'PrivateIpAddress': DEFAULT_RELAY_PRIVATE_IP
+    })
+    relay_instance = [logical_id for logical_id in template.find_resources('AWS::EC2::Instance')
+                      if 'Relay' in logical_id][0]
+    template.has_output(f'{RESOURCE_ID_COMMON_PREFIX}RelayInstanceId', {
+        'Value': {'Ref': relay_instance}
+    })
+    user_data = json.dumps(template.find_resources('AWS::EC2::Instance')[relay_instance]['Properties']['UserData'])
+    assert f'--server-host {TEST_CONTEXT["server_private_ip"]}' in user_data
+    assert f'runs/run-1/{RELAY_ARTIFACT_FOLDER}/relay_stats.jsonl' in user_data
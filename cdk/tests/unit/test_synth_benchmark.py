@@ -0,0 +1,51 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import synth_benchmark
+from multiplayer_test_scaler.constants import *
+
+
+def test_get_matrix_all_targets_no_target_context():
+    """
+    Setup: Two client counts and the all and client targets
+    Tests: Get the matrix context variables
+    Verification: Every combination is included and the all target doesn't set the target context variable
+    """
+    matrix = synth_benchmark.get_matrix([1, 10], [synth_benchmark.ALL_TARGETS, 'client'], [PLATFORM_WINDOWS], [1])
+
+    assert len(matrix) == 4
+    assert matrix[0] == {'client_count': 1, 'platform': PLATFORM_WINDOWS, 'server_count': 1}
+    assert matrix[1]['target'] == 'client'
+
+
+def test_check_quotas_template_sizes_status_reported():
+    """
+    Setup: Stack templates below, near and over the AWS CloudFormation quotas
+    Tests: Check the templates against the quotas
+    Verification: The status and the exceeded quotas are reported
+    """
+    stack = {'resources': 10, 'template_bytes': 1000, 'outputs': 0, 'parameters': 0}
+
+    assert synth_benchmark.check_quotas(stack) == {'status': 'ok', 'quotas': []}
+    assert synth_benchmark.check_quotas({**stack, 'resources': 450})['status'] == 'near-limit'
+    result = synth_benchmark.check_quotas({**stack, 'resources': 450,
+                                           'template_bytes': CLOUDFORMATION_MAX_TEMPLATE_BYTES + 1})
+    assert result['status'] == 'over-limit'
+    assert result['quotas'] == [f'template_bytes {CLOUDFORMATION_MAX_TEMPLATE_BYTES + 1}/'
+                                f'{CLOUDFORMATION_MAX_TEMPLATE_BYTES}', 'resources 450/500']
+
+
+def test_synthesize_client_target_client_and_common_stacks_measured(tmp_path):
+    """
+    Setup: Client target context variables
+    Tests: Synthesize the application
+    Verification: The template size and resource count of the common and client stacks are reported
+    """
+    stacks = synth_benchmark.synthesize({'client_count': 5, 'platform': PLATFORM_WINDOWS, 'target': 'client'},
+                                        str(tmp_path))
+
+    assert sorted(stack['stack'] for stack in stacks) == [
+        f'{synth_benchmark.BENCHMARK_PROJECT_NAME}-ClientStack', f'{synth_benchmark.BENCHMARK_PROJECT_NAME}-CommonStack']
+    for stack in stacks:
+        assert stack['template_bytes'] > 0
+        assert 0 < stack['resources'] <= CLOUDFORMATION_MAX_RESOURCES
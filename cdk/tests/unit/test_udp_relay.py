@@ -0,0 +1,192 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import asyncio
+import os
+import socket
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'assets', 'relay'))
+import udp_relay
+
+LOOPBACK = '127.0.0.1'
+
+
+class EchoProtocol(asyncio.DatagramProtocol):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, address):
+        self.transport.sendto(data, address)
+
+
+class ClientProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.received = []
+
+    def datagram_received(self, data, address):
+        self.received.append((data, time.monotonic()))
+
+
+def _get_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind((LOOPBACK, 0))
+        return sock.getsockname()[1]
+
+
+async def _relay_packets(profiles: list, packets_per_client: int, client_count: int = 1,
+                         interval_seconds: float = 0.001, drain_seconds: float = 0.3) -> tuple:
+    """
+    Send numbered packets from clients through the relay to a loopback echo server
+    :return: Received packets with their round trip times in seconds of every client, the stats records and the relay
+    """
+    loop = asyncio.get_running_loop()
+    echo_transport, _ = await loop.create_datagram_endpoint(EchoProtocol, local_addr=(LOOPBACK, 0))
+    server_address = echo_transport.get_extra_info('sockname')
+    stats = []
+    relay = udp_relay.UdpRelay(server_address, udp_relay.load_profiles(profiles), stats.append, seed=1)
+    stop = asyncio.Event()
+    listen_port = _get_free_port()
+    relay_task = loop.create_task(udp_relay.run_relay(relay, listen_port, 60, stop, LOOPBACK))
+    await asyncio.sleep(0.05)
+
+    clients = []
+    for _ in range(client_count):
+        clients.append(await loop.create_datagram_endpoint(ClientProtocol, remote_addr=(LOOPBACK, listen_port)))
+    sent_at = {}
+    for sequence in range(packets_per_client):
+        for transport, _ in clients:
+            transport.sendto(sequence.to_bytes(4, 'big'))
+        sent_at[sequence] = time.monotonic()
+        await asyncio.sleep(interval_seconds)
+    await asyncio.sleep(drain_seconds)
+
+    stop.set()
+    await relay_task
+    echo_transport.close()
+    results = []
+    for transport, protocol in clients:
+        transport.close()
+        results.append([(int.from_bytes(data, 'big'), received_at - sent_at[int.from_bytes(data, 'big')])
+                        for data, received_at in protocol.received])
+    return results, stats, relay
+
+
+def test_relay_no_impairment_packets_relayed_in_order():
+    """
+    Setup: Relay with a profile without impairments
+    Tests: Send packets from a client through the relay to an echo server
+    Verification: Every packet comes back in order and the flow stats count them in both directions
+    """
+    results, stats, _ = asyncio.run(_relay_packets([{'name': 'pristine'}], 50))
+
+    assert [sequence for sequence, _ in results[0]] == list(range(50))
+    assert len(stats) == 1
+    assert stats[0]['event'] == 'flow_closed'
+    assert stats[0]['group'] == 'pristine'
+    assert stats[0][udp_relay.UPSTREAM]['packets_out'] == 50
+    assert stats[0][udp_relay.DOWNSTREAM]['packets_out'] == 50
+
+
+def test_relay_latency_round_trip_time_increased():
+    """
+    Setup: Relay with 50 ms of one way latency
+    Tests: Send packets through the relay
+    Verification: The round trip times are at least twice the latency
+    """
+    results, _, _ = asyncio.run(_relay_packets([{'name': 'far', 'latency_ms': 50}], 10, drain_seconds=0.5))
+
+    assert len(results[0]) == 10
+    assert min(rtt for _, rtt in results[0]) >= 0.095
+
+
+def test_relay_loss_packets_dropped():
+    """
+    Setup: Relay with 20% loss
+    Tests: Send 500 packets through the relay
+    Verification: About a third of the round trips lose their packet and the drops are counted
+    """
+    results, stats, _ = asyncio.run(_relay_packets([{'name': 'lossy', 'loss_percent': 20}], 500,
+                                                   interval_seconds=0.0002))
+
+    # 1 - 0.8 * 0.8 = 36% of the round trips expected
+    assert 0.25 < 1 - len(results[0]) / 500 < 0.47
+    upstream = stats[0][udp_relay.UPSTREAM]
+    assert upstream['dropped_loss'] + upstream['packets_out'] == 500
+
+
+def test_relay_reorder_packets_reordered():
+    """
+    Setup: Relay holding back 20% of the packets
+    Tests: Send packets through the relay
+    Verification: Every packet comes back, some of them out of order
+    """
+    results, stats, _ = asyncio.run(_relay_packets(
+        [{'name': 'reordering', 'reorder_percent': 20, 'reorder_delay_ms': 20}], 100))
+
+    sequences = [sequence for sequence, _ in results[0]]
+    assert sorted(sequences) == list(range(100))
+    assert sequences != list(range(100))
+    assert stats[0][udp_relay.UPSTREAM]['reordered'] > 0
+
+
+def test_relay_bandwidth_cap_queue_overflow_dropped():
+    """
+    Setup: Relay with a bandwidth cap of 32 packets of 4 bytes per second and a queue of 100 ms
+    Tests: Send a burst of packets through the relay
+    Verification: Packets beyond the queue are dropped
+    """
+    results, stats, _ = asyncio.run(_relay_packets(
+        [{'name': 'capped', 'bandwidth_kbps': 1, 'queue_ms': 100}], 20, interval_seconds=0, drain_seconds=0.5))
+
+    upstream = stats[0][udp_relay.UPSTREAM]
+    assert upstream['dropped_queue'] > 0
+    assert upstream['packets_out'] + upstream['dropped_queue'] == 20
+    assert len(results[0]) <= upstream['packets_out']
+
+
+def test_relay_several_groups_flows_assigned_by_share():
+    """
+    Setup: Relay with two profiles sharing 3 to 1
+    Tests: Send packets from 8 clients through the relay
+    Verification: 6 flows are assigned to the first group and 2 to the second one
+    """
+    _, stats, _ = asyncio.run(_relay_packets(
+        [{'name': 'home', 'share': 3}, {'name': 'mobile', 'share': 1, 'latency_ms': 5}], 5, client_count=8))
+
+    groups = [record['group'] for record in stats]
+    assert groups.count('home') == 6
+    assert groups.count('mobile') == 2
+
+
+def test_group_assigner_shares_interleaved():
+    """
+    Setup: Profiles sharing 2 to 1
+    Tests: Assign 6 flows
+    Verification: The groups are interleaved rather than assigned in blocks
+    """
+    profiles = udp_relay.load_profiles([{'name': 'a', 'share': 2}, {'name': 'b'}])
+    assigner = udp_relay.GroupAssigner(profiles)
+
+    assert [assigner.next().name for _ in range(6)] == ['a', 'b', 'a', 'a', 'b', 'a']
+
+
+@pytest.mark.parametrize('profiles', [
+    [],
+    [{'latency_ms': 10}],
+    [{'name': 'a', 'latency': 10}],
+    [{'name': 'a', 'loss_percent': 101}],
+    [{'name': 'a', 'jitter_ms': -1}],
+    [{'name': 'a', 'share': 0}]
+])
+def test_load_profiles_invalid_profiles_raises_error(profiles):
+    """
+    Setup: Invalid impairment profiles
+    Tests: Load the profiles
+    Verification: A RuntimeError is raised
+    """
+    with pytest.raises(RuntimeError):
+        udp_relay.load_profiles(profiles)
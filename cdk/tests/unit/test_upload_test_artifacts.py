@@ -0,0 +1,361 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+from unittest.mock import MagicMock
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'lambda', 'upload_test_artifacts'))
+import artifact_bundle
+import upload_test_artifacts
+
+TEST_REGION = 'us-east-1'
+TEST_SOURCE_BUCKET = 'test-artifacts-bucket'
+TEST_DESTINATION_BUCKET = 'test-upload-bucket'
+TEST_STACK_ID = 'arn:aws:cloudformation:us-east-1:123456789012:stack/Test-ServerStack/0123-4567'
+# Upper bound of an invocation against the mocked services, generous enough for slow test machines
+TEST_HANDLER_LATENCY_LIMIT_SECONDS = 2
+TEST_EVENT = {
+    'resources': [TEST_STACK_ID],
+    'detail': {'status-details': {'status': upload_test_artifacts.DELETE_STATUS}}
+}
+
+
+class FakeContext(object):
+    def __init__(self, remaining_millis: int = 240000):
+        self.invoked_function_arn = 'arn:aws:lambda:us-east-1:123456789012:function:upload'
+        self._remaining_millis = remaining_millis
+
+    def get_remaining_time_in_millis(self) -> int:
+        return self._remaining_millis
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', TEST_REGION)
+    monkeypatch.setenv('SOURCE_BUCKET_NAME', TEST_SOURCE_BUCKET)
+    monkeypatch.setenv('DESTINATION_BUCKET_NAME', TEST_DESTINATION_BUCKET)
+    # start every test from a cold execution environment
+    monkeypatch.setattr(upload_test_artifacts, '_bucket_names', {})
+    monkeypatch.setattr(upload_test_artifacts, '_s3_clients', {})
+    # the server stack is deployed without a run ID unless a test tags it
+    monkeypatch.setattr(upload_test_artifacts, 'get_cloudformation_client', lambda: _get_cloudformation_client(0))
+    with mock_aws():
+        client = boto3.client('s3', region_name=TEST_REGION)
+        client.create_bucket(Bucket=TEST_SOURCE_BUCKET)
+        client.create_bucket(Bucket=TEST_DESTINATION_BUCKET)
+        yield client
+
+
+def _get_cloudformation_client(other_export_count: int, run_id: str = '') -> MagicMock:
+    # exports listed by pages of 100 like ListExports, with the bucket exports on the last page
+    exports = [{'Name': f'Export{index}', 'Value': f'value{index}'} for index in range(other_export_count)]
+    exports.append({'Name': upload_test_artifacts.SOURCE_BUCKET_EXPORT_NAME, 'Value': TEST_SOURCE_BUCKET})
+    exports.append({'Name': upload_test_artifacts.DEFAULT_DESTINATION_BUCKET_EXPORT_NAME,
+                    'Value': TEST_DESTINATION_BUCKET})
+    cfn_client = MagicMock()
+    cfn_client.get_paginator.return_value.paginate.side_effect = \
+        lambda: iter({'Exports': exports[index:index + 100]} for index in range(0, len(exports), 100))
+    tags = [{'Key': upload_test_artifacts.RUN_ID_TAG_KEY, 'Value': run_id}] if run_id else []
+    cfn_client.describe_stacks.return_value = {'Stacks': [{'StackId': TEST_STACK_ID, 'Tags': tags}]}
+    return cfn_client
+
+
+def _list_keys(s3_client, bucket: str) -> list:
+    response = s3_client.list_objects_v2(Bucket=bucket)
+    return sorted(obj['Key'] for obj in response.get('Contents', []))
+
+
+def _list_copied_keys(s3_client) -> list:
+    return [key for key in _list_keys(s3_client, TEST_DESTINATION_BUCKET)
+            if f'/{upload_test_artifacts.BUNDLE_FOLDER_NAME}/' not in key]
+
+
+def test_handler_empty_source_bucket_nothing_copied(s3_client):
+    """
+    Setup: Source bucket has no objects
+    Tests: Handle the server stack deletion event
+    Verification: The handler completes without copying anything
+    """
+    response = upload_test_artifacts.handler(TEST_EVENT, FakeContext())
+
+    assert response['statusCode'] == 200
+    assert _list_copied_keys(s3_client) == []
+
+
+def test_handler_artifacts_in_source_bucket_artifacts_copied(s3_client):
+    """
+    Setup: Source bucket has artifacts and a server package update
+    Tests: Handle the server stack deletion event
+    Verification: Only the artifacts are copied under the destination prefix
+    """
+    s3_client.put_object(Bucket=TEST_SOURCE_BUCKET, Key='01012023/server/i-1/log/Game.log', Body=b'log')
+    s3_client.put_object(Bucket=TEST_SOURCE_BUCKET, Key='server-updates/1/update.json', Body=b'{}')
+
+    upload_test_artifacts.handler(TEST_EVENT, FakeContext())
+
+    assert _list_copied_keys(s3_client) == ['MpScalerArtifacts/01012023/server/i-1/log/Game.log']
+
+
+def test_handler_artifact_already_copied_copy_skipped(s3_client, capsys):
+    """
+    Setup: One artifact was copied by a previous invocation and another one is new
+    Tests: Handle the server stack deletion event again
+    Verification: Only the new artifact is copied
+    """
+    s3_client.put_object(Bucket=TEST_SOURCE_BUCKET, Key='a.log', Body=b'a')
+    upload_test_artifacts.handler(TEST_EVENT, FakeContext())
+    s3_client.put_object(Bucket=TEST_SOURCE_BUCKET, Key='b.log', Body=b'bb')
+    capsys.readouterr()
+
+    upload_test_artifacts.handler(TEST_EVENT, FakeContext())
+
+    assert 'Copied 1 artifacts (2 bytes), skipped 1 artifacts already uploaded' in capsys.readouterr().out
+    assert _list_copied_keys(s3_client) == ['MpScalerArtifacts/a.log', 'MpScalerArtifacts/b.log']
+
+
+def test_handler_invocation_time_running_out_upload_continued_from_checkpoint(s3_client, monkeypatch):
+    """
+    Setup: More artifacts than a listing page and the invocation is about to time out
+    Tests: Handle the server stack deletion event, then the continuation event
+    Verification: The first invocation checkpoints after one page and continues in a new invocation,
+    which copies the remaining artifacts and removes the checkpoint
+    """
+    monkeypatch.setattr(upload_test_artifacts, 'LIST_PAGE_SIZE', 2)
+    for index in range(3):
+        s3_client.put_object(Bucket=TEST_SOURCE_BUCKET, Key=f'{index}.log', Body=b'log')
+    continuations = []
+    monkeypatch.setattr(upload_test_artifacts, 'invoke_continuation',
+                        lambda context, event: continuations.append(event))
+
+    response = upload_test_artifacts.handler(TEST_EVENT, FakeContext(remaining_millis=1000))
+
+    assert response['statusCode'] == 202
+    assert continuations == [TEST_EVENT]
+    assert _list_copied_keys(s3_client) == ['MpScalerArtifacts/0.log', 'MpScalerArtifacts/1.log']
+    checkpoint_key = upload_test_artifacts.get_checkpoint_key(TEST_STACK_ID)
+    checkpoint = json.loads(s3_client.get_object(Bucket=TEST_SOURCE_BUCKET, Key=checkpoint_key)['Body'].read())
+    assert (checkpoint['start_after'], checkpoint['copied']) == ('1.log', 2)
+
+    response = upload_test_artifacts.handler(continuations[0], FakeContext())
+
+    assert response['statusCode'] == 200
+    assert len(_list_copied_keys(s3_client)) == 3
+    assert checkpoint_key not in _list_keys(s3_client, TEST_SOURCE_BUCKET)
+
+
+def test_handler_stack_not_deleted_nothing_copied(s3_client):
+    """
+    Setup: Source bucket has artifacts
+    Tests: Handle a stack status change other than deletion
+    Verification: Nothing is copied
+    """
+    s3_client.put_object(Bucket=TEST_SOURCE_BUCKET, Key='a.log', Body=b'a')
+    event = {'resources': [TEST_STACK_ID], 'detail': {'status-details': {'status': 'CREATE_COMPLETE'}}}
+
+    upload_test_artifacts.handler(event, FakeContext())
+
+    assert _list_copied_keys(s3_client) == []
+
+
+def test_handler_bucket_names_not_in_environment_exports_looked_up_once(s3_client, monkeypatch):
+    """
+    Setup: Bucket names are not set in the environment and are exported by AWS CloudFormation
+    Tests: Handle the server stack deletion event twice in the same execution environment
+    Verification: The exports are only looked up by the first invocation
+    """
+    monkeypatch.delenv('SOURCE_BUCKET_NAME')
+    monkeypatch.delenv('DESTINATION_BUCKET_NAME')
+    monkeypatch.setattr(upload_test_artifacts, 'get_cloudformation_client', lambda: _get_cloudformation_client(0))
+    s3_client.put_object(Bucket=TEST_SOURCE_BUCKET, Key='a.log', Body=b'a')
+    lookups = []
+    find_exported_buckets = upload_test_artifacts.find_exported_buckets
+    monkeypatch.setattr(upload_test_artifacts, 'find_exported_buckets',
+                        lambda client: lookups.append(client) or find_exported_buckets(client))
+
+    upload_test_artifacts.handler(TEST_EVENT, FakeContext())
+    upload_test_artifacts.handler(TEST_EVENT, FakeContext())
+
+    assert len(lookups) == 1
+    assert _list_copied_keys(s3_client) == ['MpScalerArtifacts/a.log']
+
+
+def test_find_exported_buckets_both_buckets_found_remaining_exports_not_listed():
+    """
+    Setup: Both bucket exports are in the middle of the first page of exports
+    Tests: Look up the bucket exports
+    Verification: The lookup stops at the second bucket export without listing the following exports and pages
+    """
+    listed = []
+
+    def get_exports(count: int, *exports):
+        for export in exports:
+            yield export
+        for index in range(count):
+            listed.append(index)
+            yield {'Name': f'Export{index}', 'Value': ''}
+
+    pages = [
+        {'Exports': get_exports(
+            10, {'Name': upload_test_artifacts.SOURCE_BUCKET_EXPORT_NAME, 'Value': TEST_SOURCE_BUCKET},
+            {'Name': upload_test_artifacts.DEFAULT_DESTINATION_BUCKET_EXPORT_NAME, 'Value': TEST_DESTINATION_BUCKET})},
+        {'Exports': get_exports(10)}
+    ]
+    cfn_client = MagicMock()
+    cfn_client.get_paginator.return_value.paginate.return_value = iter(pages)
+
+    found_buckets = upload_test_artifacts.find_exported_buckets(cfn_client)
+
+    assert found_buckets == {'source': TEST_SOURCE_BUCKET, 'destination': TEST_DESTINATION_BUCKET}
+    assert listed == []
+
+
+def test_find_exported_buckets_export_name_in_environment_namespaced_export_found(monkeypatch):
+    """
+    Setup: The source bucket export name of a namespaced deployment is set in the environment
+    Tests: Look up the bucket exports
+    Verification: The bucket of the namespaced export is found rather than the one of the default namespace
+    """
+    monkeypatch.setenv('SOURCE_BUCKET_EXPORT_NAME', f'exp1-{upload_test_artifacts.SOURCE_BUCKET_EXPORT_NAME}')
+    exports = [
+        {'Name': upload_test_artifacts.SOURCE_BUCKET_EXPORT_NAME, 'Value': 'default-artifacts-bucket'},
+        {'Name': f'exp1-{upload_test_artifacts.SOURCE_BUCKET_EXPORT_NAME}', 'Value': TEST_SOURCE_BUCKET},
+        {'Name': upload_test_artifacts.DEFAULT_DESTINATION_BUCKET_EXPORT_NAME, 'Value': TEST_DESTINATION_BUCKET}
+    ]
+    cfn_client = MagicMock()
+    cfn_client.get_paginator.return_value.paginate.return_value = iter([{'Exports': exports}])
+
+    found_buckets = upload_test_artifacts.find_exported_buckets(cfn_client)
+
+    assert found_buckets == {'source': TEST_SOURCE_BUCKET, 'destination': TEST_DESTINATION_BUCKET}
+
+
+@pytest.mark.parametrize('bucket_names_in_environment', [True, False])
+def test_handler_latency_cold_and_warm_invocations(s3_client, monkeypatch, capsys, bucket_names_in_environment):
+    """
+    Setup: Bucket names are set in the environment or only exported, among many other exports
+    Tests: Time a cold invocation and the warm invocations that follow it
+    Verification: Warm invocations reuse the bucket names, so they are faster than the cold invocation which looks up
+    the exports. Every invocation is within the latency limit
+    """
+    cfn_client = _get_cloudformation_client(5000)
+    monkeypatch.setattr(upload_test_artifacts, 'get_cloudformation_client', lambda: cfn_client)
+    if not bucket_names_in_environment:
+        monkeypatch.delenv('SOURCE_BUCKET_NAME')
+        monkeypatch.delenv('DESTINATION_BUCKET_NAME')
+    s3_client.put_object(Bucket=TEST_SOURCE_BUCKET, Key='a.log', Body=b'a')
+
+    latencies = []
+    for _ in range(5):
+        start = time.perf_counter()
+        upload_test_artifacts.handler(TEST_EVENT, FakeContext())
+        latencies.append(time.perf_counter() - start)
+
+    output = capsys.readouterr().out
+    assert output.count('looking up the exports') == (0 if bucket_names_in_environment else 1)
+    assert cfn_client.get_paginator.return_value.paginate.call_count == (0 if bucket_names_in_environment else 1)
+    warm_latency = sorted(latencies[1:])[len(latencies[1:]) // 2]
+    if not bucket_names_in_environment:
+        assert warm_latency < latencies[0], f'Warm median {warm_latency:.3f} s, cold {latencies[0]:.3f} s'
+    assert max(latencies) < TEST_HANDLER_LATENCY_LIMIT_SECONDS, f'Latencies {latencies}'
+
+
+def _get_bundle_prefix() -> str:
+    # stacks deployed without a run ID are bundled under the unique ID of the stack
+    return upload_test_artifacts.get_bundle_prefix(TEST_STACK_ID.split('/')[-1])
+
+
+def test_handler_artifacts_in_source_bucket_bundle_and_manifest_uploaded(s3_client):
+    """
+    Setup: Source bucket has artifacts
+    Tests: Handle the server stack deletion event
+    Verification: A bundle which extracts as a tar.gz is uploaded with a manifest. Each file is fetched
+    from the bundle with a single range GET and matches the size and hash in the manifest
+    """
+    artifacts = {'01012023/server/i-1/log/Game.log': b'log line\n' * 1000, '01012023/server/i-1/Metrics/a.json': b'{}'}
+    for key, content in artifacts.items():
+        s3_client.put_object(Bucket=TEST_SOURCE_BUCKET, Key=key, Body=content)
+
+    upload_test_artifacts.handler(TEST_EVENT, FakeContext())
+
+    manifest = json.loads(s3_client.get_object(
+        Bucket=TEST_DESTINATION_BUCKET,
+        Key=f'{_get_bundle_prefix()}{upload_test_artifacts.BUNDLE_MANIFEST_NAME}')['Body'].read())
+    assert manifest['file_count'] == 2
+    assert manifest['size'] == sum(len(content) for content in artifacts.values())
+    bundle = s3_client.get_object(Bucket=TEST_DESTINATION_BUCKET, Key=manifest['bundle_key'])['Body'].read()
+    assert len(bundle) == manifest['compressed_size']
+    with tarfile.open(fileobj=io.BytesIO(bundle), mode='r:gz') as bundle_tar:
+        assert sorted(bundle_tar.getnames()) == sorted(artifacts)
+
+    for entry in manifest['files']:
+        member = s3_client.get_object(
+            Bucket=TEST_DESTINATION_BUCKET, Key=manifest['bundle_key'],
+            Range=f'bytes={entry["offset"]}-{entry["offset"] + entry["length"] - 1}')['Body'].read()
+        with tarfile.open(fileobj=io.BytesIO(gzip.decompress(member))) as member_tar:
+            content = member_tar.extractfile(entry['name']).read()
+        assert content == artifacts[entry['name']]
+        assert (entry['size'], entry['sha256']) == (len(content), hashlib.sha256(content).hexdigest())
+
+
+def test_handler_invocation_time_running_out_bundle_continued_across_invocations(s3_client, monkeypatch):
+    """
+    Setup: Artifacts are larger than a bundle part and every invocation is about to time out
+    Tests: Handle the server stack deletion event until the upload completes
+    Verification: Each invocation bundles one artifact and the final bundle contains all of them
+    """
+    monkeypatch.setattr('moto.s3.models.S3_UPLOAD_PART_MIN_SIZE', 1024)
+    monkeypatch.setattr(artifact_bundle, 'MIN_PART_SIZE', 1024)
+    monkeypatch.setattr(artifact_bundle, 'DEFAULT_PART_SIZE', 1024)
+    monkeypatch.setattr(upload_test_artifacts, 'invoke_continuation', lambda context, event: None)
+    artifacts = {f'{index}.bin': os.urandom(3000 + index) for index in range(3)}
+    for key, content in artifacts.items():
+        s3_client.put_object(Bucket=TEST_SOURCE_BUCKET, Key=key, Body=content)
+
+    status_codes = [upload_test_artifacts.handler(TEST_EVENT, FakeContext(remaining_millis=1000))['statusCode']
+                    for _ in range(4)]
+
+    assert status_codes == [202, 202, 202, 200]
+    assert not any(key.startswith(upload_test_artifacts.CHECKPOINT_KEY_PREFIX)
+                   for key in _list_keys(s3_client, TEST_SOURCE_BUCKET))
+    bundle = s3_client.get_object(
+        Bucket=TEST_DESTINATION_BUCKET, Key=f'{_get_bundle_prefix()}{upload_test_artifacts.BUNDLE_NAME}')['Body']
+    with tarfile.open(fileobj=io.BytesIO(bundle.read()), mode='r:gz') as bundle_tar:
+        assert {name: bundle_tar.extractfile(name).read() for name in bundle_tar.getnames()} == artifacts
+
+
+def test_handler_stack_tagged_with_run_id_only_run_artifacts_uploaded(s3_client, monkeypatch):
+    """
+    Setup: Server stack is tagged with a run ID and the source bucket has artifacts of several runs
+    Tests: Handle the server stack deletion event
+    Verification: Only the artifacts of the run are copied and bundled under the run prefix
+    """
+    run_id = '20230101T120000Z-1a2b3c4d'
+    cfn_client = _get_cloudformation_client(0, run_id)
+    monkeypatch.setattr(upload_test_artifacts, 'get_cloudformation_client', lambda: cfn_client)
+    for key in [f'runs/{run_id}/server/i-1/log/Game.log', f'runs/{run_id}/catalog.json',
+                'runs/20230101T090000Z-00000000/server/i-0/log/Game.log']:
+        s3_client.put_object(Bucket=TEST_SOURCE_BUCKET, Key=key, Body=b'a')
+
+    upload_test_artifacts.handler(TEST_EVENT, FakeContext())
+
+    cfn_client.describe_stacks.assert_called_once_with(StackName=TEST_STACK_ID)
+    assert _list_copied_keys(s3_client) == [f'MpScalerArtifacts/runs/{run_id}/catalog.json',
+                                            f'MpScalerArtifacts/runs/{run_id}/server/i-1/log/Game.log']
+    manifest = json.loads(s3_client.get_object(
+        Bucket=TEST_DESTINATION_BUCKET,
+        Key=f'MpScalerArtifacts/runs/{run_id}/bundle/{upload_test_artifacts.BUNDLE_MANIFEST_NAME}')['Body'].read())
+    assert [entry['name'] for entry in manifest['files']] == [f'runs/{run_id}/catalog.json',
+                                                              f'runs/{run_id}/server/i-1/log/Game.log']
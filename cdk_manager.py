@@ -1,12 +1,20 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import hashlib
+import json
 import os
-from typing import List
+from typing import Dict, List
+
+import boto3
+from botocore.config import Config
 
 from config import AutoScalerConfig, ResourceMappingsConfig
 from constants import *
+from flow_log_analyzer import BandwidthAccounting
 from process_runner import ProcessRunner
+from run_catalog import RunCatalog, RunCatalogStore, new_run_id
+from stack_outputs import StackOutputs
 
 DEPLOY_CMD = 'deploy'
 DESTROY_CMD = 'destroy'
@@ -29,9 +37,43 @@ class CdkManager(object):
                           f'Please build and package your O3DE project before deployment'
 
         self._client_count = self._config.get_str(SCALER_CONFIG_CLIENT_COUNT_KEY, SCALER_CONFIG_DEFAULT_CLIENT_COUNT)
+        self._client_log_echo = str(self._config.get(SCALER_CONFIG_CLIENT_LOG_ECHO_KEY,
+                                                     SCALER_CONFIG_DEFAULT_CLIENT_LOG_ECHO)).lower()
+        self._network_probe = str(self._config.get(SCALER_CONFIG_NETWORK_PROBE_KEY,
+                                                   SCALER_CONFIG_DEFAULT_NETWORK_PROBE)).lower()
+        # The common stack is deployed with every target, so the flow log setting is passed to all of them
+        self._vpc_flow_logs = str(self._config.get(SCALER_CONFIG_VPC_FLOW_LOGS_KEY,
+                                                   SCALER_CONFIG_DEFAULT_VPC_FLOW_LOGS)).lower()
         self._server_private_ip = self._config.get_str(SCALER_CONFIG_SERVER_PRIVATE_IP_KEY,
                                                        SCALER_CONFIG_DEFAULT_SERVER_PRIVATE_IP)
         self._server_port = self._config.get_str(SCALER_CONFIG_SERVER_PORT_KEY, SCALER_CONFIG_DEFAULT_SERVER_PORT)
+        self._relay_profiles = self._config.get(SCALER_CONFIG_RELAY_PROFILES_KEY, SCALER_CONFIG_DEFAULT_RELAY_PROFILES)
+        if not isinstance(self._relay_profiles, list) or \
+                not all(isinstance(profile, dict) and profile.get('name') for profile in self._relay_profiles):
+            raise RuntimeError(f'\'{SCALER_CONFIG_RELAY_PROFILES_KEY}\' must be a list of impairment profiles, '
+                               f'each with a name')
+        self._relay_private_ip = self._config.get_str(SCALER_CONFIG_RELAY_PRIVATE_IP_KEY,
+                                                      SCALER_CONFIG_DEFAULT_RELAY_PRIVATE_IP)
+        self._relay_instance_type = self._config.get_str(SCALER_CONFIG_RELAY_INSTANCE_TYPE_KEY,
+                                                         SCALER_CONFIG_DEFAULT_RELAY_INSTANCE_TYPE)
+
+        self._client_task_cpu_units = self._config.get_str(SCALER_CONFIG_CLIENT_TASK_CPU_UNITS_KEY,
+                                                           SCALER_CONFIG_DEFAULT_CLIENT_TASK_CPU_UNITS)
+        self._client_task_memory_mib = self._config.get_str(SCALER_CONFIG_CLIENT_TASK_MEMORY_MIB_KEY,
+                                                            SCALER_CONFIG_DEFAULT_CLIENT_TASK_MEMORY_MIB)
+        self._server_instance_type = self._config.get_str(SCALER_CONFIG_SERVER_INSTANCE_TYPE_KEY,
+                                                          SCALER_CONFIG_DEFAULT_SERVER_INSTANCE_TYPE)
+        self._server_volume_size = self._config.get_str(SCALER_CONFIG_SERVER_VOLUME_SIZE_KEY,
+                                                        SCALER_CONFIG_DEFAULT_SERVER_VOLUME_SIZE)
+        self._server_artifact_sync_interval = self._config.get_str(
+            SCALER_CONFIG_SERVER_ARTIFACT_SYNC_INTERVAL_KEY, SCALER_CONFIG_DEFAULT_SERVER_ARTIFACT_SYNC_INTERVAL)
+        self._server_soak_sample_seconds = self._config.get_str(
+            SCALER_CONFIG_SERVER_SOAK_SAMPLE_SECONDS_KEY, SCALER_CONFIG_DEFAULT_SERVER_SOAK_SAMPLE_SECONDS)
+        self._image_builder_instance_type = self._config.get_str(SCALER_CONFIG_IMAGE_BUILDER_INSTANCE_TYPE_KEY,
+                                                                 SCALER_CONFIG_DEFAULT_IMAGE_BUILDER_INSTANCE_TYPE)
+        # Config values may be strings like "false", which are truthy
+        self._reuse_server_image = self._config.get_str(
+            SCALER_CONFIG_REUSE_SERVER_IMAGE_KEY, SCALER_CONFIG_DEFAULT_REUSE_SERVER_IMAGE).lower() == 'true'
 
         self._ec2_key_pair = self._config.get_str(SCALER_CONFIG_EC2_KEY_PAIR_KEY, '')
         self._aws_account = self._config.get_str(SCALER_CONFIG_AWS_ACCOUNT_ID_KEY, os.environ.get('CDK_DEFAULT_ACCOUNT'))
@@ -45,6 +87,9 @@ class CdkManager(object):
         if not self._local_reference_machine_cidr:
             print("[Warn] No local machine CIDR group is specified. No server port or RDP ingress rules will be created")
         self._project_name = self._config.get_str(SCALER_CONFIG_PROJECT_NAME_KEY, SCALER_CONFIG_DEFAULT_PROJECT_NAME)
+        # Stacks and runs of a namespace are kept apart from the ones of the other namespaces
+        self._namespace = self._config.get_namespace()
+        self._deployment_name = self._config.get_deployment_name()
         self._env = dict(os.environ, **{
             'O3DE_AWS_DEPLOY_REGION':  self._aws_region,
             'O3DE_AWS_DEPLOY_ACCOUNT': self._aws_account,
@@ -56,6 +101,11 @@ class CdkManager(object):
         )
         main_script_dir = os.path.abspath(os.path.dirname(__file__))
         self._scaler_cdk_dir = os.path.join(str(main_script_dir), 'cdk')
+        self._run_catalog = RunCatalog(self._config.get_path(SCALER_CONFIG_RUN_CATALOG_PATH_KEY,
+                                                             SCALER_CONFIG_DEFAULT_RUN_CATALOG_PATH))
+        self._run_id = ''
+        self._package_hashes = {}
+        self._installed_cdk_dirs = set()
 
         self._bootstrap()
 
@@ -88,49 +138,115 @@ class CdkManager(object):
         process = ProcessRunner('Bootstrap CDK', cmd_list)
         process.run(env=self._env)
 
-    def deploy_aws_resources(self, target: str, platform: str) -> None:
+    def deploy_aws_resources(self, target: str, platform: str, exclusively: bool = False) -> None:
         """
         Deploy the AWS CDK application
         :param target: Target to deploy
         :param platform: Platform of the project package
+        :param exclusively: Deploy the stack of the server or client target only, without the common stack it depends
+        on. The common stack must be deployed already
         """
         cdk_dir = self._metrics_cdk_dir if target == METRICS_PIPELINE_TARGET else self._scaler_cdk_dir
         self._install_dependencies(cdk_dir)
 
+        run = {}
+        if target in [SERVER_TARGET, ALL_TARGET, None]:
+            # Every server deployment starts a new run
+            run = self._run_catalog.start_run(new_run_id(), self._deployment_name, self._client_count,
+                                              self._get_package_hash(platform), self._config.to_dict())
+            print(f'Starting run {run["run_id"]}')
+        elif target == CLIENT_TARGET:
+            # Clients join the active run of the deployed server
+            run = self._run_catalog.get_active(self._deployment_name)
+            if run:
+                run = self._run_catalog.set_client_count(run['run_id'], self._client_count)
+            else:
+                print('[Warn] No active run is found. Deploy the server target first to start a run')
+        self._run_id = run.get('run_id', '')
+
         if target == METRICS_PIPELINE_TARGET:
             cdk_deploy_cmd_args = ['cdk', DEPLOY_CMD, '-c', 'batch_processing=true', '--require-approval=never']
         elif target == CLIENT_TARGET:
             cdk_deploy_cmd_args = self._get_client_cdk_cmd_args(DEPLOY_CMD, target, platform)
         elif target == SERVER_TARGET:
             cdk_deploy_cmd_args = self._get_server_cdk_cmd_args(DEPLOY_CMD, target, platform)
+        elif target == BASE_IMAGE_TARGET:
+            cdk_deploy_cmd_args = self._get_base_image_cdk_cmd_args(DEPLOY_CMD, target, platform)
+        elif target == COMMON_TARGET:
+            cdk_deploy_cmd_args = self._get_common_cdk_cmd_args(DEPLOY_CMD, target, platform)
         else:
             cdk_deploy_cmd_args = self._get_all_cdk_command_args(DEPLOY_CMD, platform)
+        if exclusively:
+            cdk_deploy_cmd_args = self._get_exclusive_cmd_args(cdk_deploy_cmd_args, target)
+        if target != METRICS_PIPELINE_TARGET:
+            cdk_deploy_cmd_args += self._get_namespace_output_cmd_args()
 
         process = ProcessRunner('Deploy CDK application', cdk_deploy_cmd_args)
         process.run(cdk_dir, env=self._env)
 
+        if run:
+            self._publish_run(run)
+        if target in [CLIENT_TARGET, ALL_TARGET, None]:
+            self._save_flow_log_endpoints()
+
         if target == METRICS_PIPELINE_TARGET:
             # Import the AWSMetrics stack outputs to the resource mappings file.
             # Server metrics will be sent to the AWS backend automatically via the AWSMetrics gem.
             self._update_resource_mapping_config(target)
 
-    def destroy_aws_resources(self, target: str, platform: str) -> None:
+    def deploy_client_image(self, platform: str, output_path: str) -> None:
+        """
+        Deploy the client stack without any client task, so the client image is built and pushed ahead of the client
+        deployment. Unlike the other deployments, it can run alongside the exclusive server deployment. The common
+        stack must be deployed already
+        :param platform: Platform of the project package
+        :param output_path: Cloud assembly folder of the AWS CDK application, which must differ from the folder of any
+        deployment running alongside
+        """
+        self._install_dependencies(self._scaler_cdk_dir)
+
+        # The client image deployment doesn't join the active run, which the server deployment may be starting
+        cdk_deploy_cmd_args = self._get_exclusive_cmd_args(
+            self._get_client_cdk_cmd_args(DEPLOY_CMD, CLIENT_TARGET, platform, '0', ''), CLIENT_TARGET) + \
+            ['--output', output_path]
+        process = ProcessRunner('Deploy client image', cdk_deploy_cmd_args)
+        process.run(self._scaler_cdk_dir, env=self._env)
+
+    def destroy_aws_resources(self, target: str, platform: str, exclusively: bool = False) -> None:
         """
         Destroy the AWS CDK application
         :param target: Target to destroy
         :param platform: Platform of the project package
+        :param exclusively: Destroy the stack of the server or client target only, and keep the common stack
         """
         cdk_dir = self._metrics_cdk_dir if target == METRICS_PIPELINE_TARGET else self._scaler_cdk_dir
         self._install_dependencies(cdk_dir)
 
+        run = self._run_catalog.get_active(self._deployment_name)
+        self._run_id = run.get('run_id', '')
+        if target in [CLIENT_TARGET, ALL_TARGET, None]:
+            # The client tasks are no longer described once they are destroyed
+            self._save_flow_log_endpoints()
+        if run and target in [SERVER_TARGET, ALL_TARGET, None]:
+            # The run ends with the server. The catalog object is published before the artifact upload lambda
+            # copies the run artifacts on the server stack deletion
+            self._publish_run(self._run_catalog.end_run(self._run_id))
+            print(f'Ending run {self._run_id}')
+
         if target == METRICS_PIPELINE_TARGET:
             cdk_destroy_cmd_args = ['cdk', DESTROY_CMD, '-c', 'batch_processing=true', '--require-approval=never', '-f']
         elif target == CLIENT_TARGET:
             cdk_destroy_cmd_args = self._get_client_cdk_cmd_args(DESTROY_CMD, target, platform)
         elif target == SERVER_TARGET:
             cdk_destroy_cmd_args = self._get_server_cdk_cmd_args(DESTROY_CMD, target, platform)
+        elif target == BASE_IMAGE_TARGET:
+            cdk_destroy_cmd_args = self._get_base_image_cdk_cmd_args(DESTROY_CMD, target, platform)
         else:
             cdk_destroy_cmd_args = self._get_all_cdk_command_args(DESTROY_CMD, platform)
+        if exclusively:
+            cdk_destroy_cmd_args = self._get_exclusive_cmd_args(cdk_destroy_cmd_args, target)
+        if target != METRICS_PIPELINE_TARGET:
+            cdk_destroy_cmd_args += self._get_namespace_output_cmd_args()
 
         process = ProcessRunner('Destroy CDK application', cdk_destroy_cmd_args)
         process.run(cdk_dir, env=self._env)
@@ -141,14 +257,51 @@ class CdkManager(object):
         """
         return self._metrics_cdk_dir != ""
 
+    def _publish_run(self, run: Dict) -> None:
+        """
+        Write the catalog object of a run next to its artifacts in the artifacts bucket
+        :param run: Run record
+        """
+        try:
+            artifact_bucket_name = StackOutputs(self._deployment_name, self._aws_region).get(
+                COMMON_STACK_SUFFIX, ARTIFACT_BUCKET_NAME_OUTPUT_KEY)
+            key = RunCatalogStore(artifact_bucket_name, self._aws_region).put(run)
+            print(f'Run catalog of {run["run_id"]} is saved to s3://{artifact_bucket_name}/{key}')
+        except Exception as error:
+            print(f'[Warn] Failed to save the run catalog of {run["run_id"]} to the artifacts bucket: {error}')
+
+    def _save_flow_log_endpoints(self) -> None:
+        """
+        Save the network interfaces of the deployed server and clients with the active run, so the bandwidth of the run
+        can be reported from the VPC Flow Logs once the clients are destroyed
+        """
+        if not self._run_id or self._vpc_flow_logs != 'true':
+            return
+        server_addresses = [self._server_private_ip]
+        if self._relay_profiles:
+            server_addresses.append(self._relay_private_ip)
+        try:
+            stack_outputs = StackOutputs(self._deployment_name, self._aws_region)
+            accounting = BandwidthAccounting(stack_outputs.get(COMMON_STACK_SUFFIX, ARTIFACT_BUCKET_NAME_OUTPUT_KEY),
+                                             self._run_id, self._aws_region)
+            endpoints = accounting.update_endpoints(stack_outputs, server_addresses, bool(self._relay_profiles))
+            print(f'Endpoints of {len(endpoints.clients)} clients are saved with run {self._run_id}')
+        except Exception as error:
+            # The deployment goes on, the endpoints are also saved when bandwidth-report runs
+            print(f'[Warn] Failed to save the endpoints of the server and clients for the bandwidth report: {error}')
+
     def _install_dependencies(self, cdk_dir: str) -> None:
         """
-        Install dependencies of the AWS CDK application
+        Install dependencies of the AWS CDK application once
         :param cdk_dir: The AWS CDK application directory
         """
+        if cdk_dir in self._installed_cdk_dirs:
+            return
+
         install_dependencies_cmd_list = ['pip', 'install', '-r', 'requirements.txt']
         process = ProcessRunner('Install required dependencies', install_dependencies_cmd_list)
         process.run(cdk_dir)
+        self._installed_cdk_dirs.add(cdk_dir)
 
     def _update_resource_mapping_config(self, aws_feature_gem: str = 'AWSMetrics') -> None:
         """
@@ -169,10 +322,21 @@ class CdkManager(object):
         resource_mappings_config.display()
         resource_mappings_config.save(resource_mappings_config_file)
 
-    def _get_client_cdk_cmd_args(self, cdk_cmd: str, target: str, platform: str) -> List[str]:
-        client_cmd_args = ['cdk', cdk_cmd, '-c', f'client_count={self._client_count}', 
+    def _get_client_cdk_cmd_args(self, cdk_cmd: str, target: str, platform: str, client_count: str = None,
+                                 run_id: str = None) -> List[str]:
+        client_count = self._client_count if client_count is None else client_count
+        run_id = self._run_id if run_id is None else run_id
+        client_cmd_args = ['cdk', cdk_cmd, '-c', f'client_count={client_count}', 
+                '-c', f'client_task_cpu={self._client_task_cpu_units}',
+                '-c', f'client_task_memory={self._client_task_memory_mib}',
+                '-c', f'client_log_echo={self._client_log_echo}',
+                '-c', f'network_probe={self._network_probe}',
+                '-c', f'vpc_flow_logs={self._vpc_flow_logs}',
+                '-c', f'artifact_sync_interval={self._server_artifact_sync_interval}',
+                '-c', f'namespace={self._namespace}',
                 '-c', f'target={target}',
-                '-c', f'platform={platform}', '--all']
+                '-c', f'platform={platform}',
+                '-c', f'run_id={run_id}', '--all']
         final_arg = '--require-approval=never' if (cdk_cmd == DEPLOY_CMD) else '-f'
         client_cmd_args.append(final_arg)
         return client_cmd_args
@@ -183,12 +347,43 @@ class CdkManager(object):
                 '-c', f'server_private_ip={self._server_private_ip}',
                 '-c', f'local_reference_machine_cidr={self._local_reference_machine_cidr}',
                 '-c', f'metrics_policy_export_name={self._metrics_policy_export_name}',
-                '-c', f'target={target}', '-c', f'platform={platform}', '--all']
+                '-c', f'server_instance_type={self._server_instance_type}',
+                '-c', f'server_volume_size={self._server_volume_size}',
+                '-c', f'artifact_sync_interval={self._server_artifact_sync_interval}',
+                '-c', f'soak_sample_seconds={self._server_soak_sample_seconds}',
+                '-c', f'image_builder_instance_type={self._image_builder_instance_type}',
+                '-c', f'vpc_flow_logs={self._vpc_flow_logs}',
+                *self._get_relay_cmd_args(),
+                *self._get_server_image_cmd_args(cdk_cmd, platform),
+                '-c', f'namespace={self._namespace}',
+                '-c', f'target={target}', '-c', f'platform={platform}',
+                '-c', f'run_id={self._run_id}', '--all']
 
         final_arg = '--require-approval=never' if (cdk_cmd == DEPLOY_CMD) else '-f'
         server_cmd_args.append(final_arg)
         return server_cmd_args
 
+    def _get_base_image_cdk_cmd_args(self, cdk_cmd: str, target: str, platform: str) -> List[str]:
+        base_image_cmd_args = ['cdk', cdk_cmd,
+                '-c', f'image_builder_instance_type={self._image_builder_instance_type}',
+                '-c', f'vpc_flow_logs={self._vpc_flow_logs}',
+                '-c', f'namespace={self._namespace}',
+                '-c', f'target={target}', '-c', f'platform={platform}', '--all']
+
+        final_arg = '--require-approval=never' if (cdk_cmd == DEPLOY_CMD) else '-f'
+        base_image_cmd_args.append(final_arg)
+        return base_image_cmd_args
+
+    def _get_common_cdk_cmd_args(self, cdk_cmd: str, target: str, platform: str) -> List[str]:
+        common_cmd_args = ['cdk', cdk_cmd,
+                '-c', f'vpc_flow_logs={self._vpc_flow_logs}',
+                '-c', f'namespace={self._namespace}',
+                '-c', f'target={target}', '-c', f'platform={platform}', '--all']
+
+        final_arg = '--require-approval=never' if (cdk_cmd == DEPLOY_CMD) else '-f'
+        common_cmd_args.append(final_arg)
+        return common_cmd_args
+
     def _get_all_cdk_command_args(self, cdk_cmd: str, platform: str) -> List[str]:
         cmd_args = ['cdk', cdk_cmd, '-c', f'key_pair={self._ec2_key_pair}',
                 '-c', f'server_port={self._server_port}',
@@ -196,8 +391,129 @@ class CdkManager(object):
                 '-c', f'client_count={self._client_count}',
                 '-c', f'local_reference_machine_cidr={self._local_reference_machine_cidr}',
                 '-c', f'metrics_policy_export_name={self._metrics_policy_export_name}',
-                '-c', f'platform={platform}', '--all']
+                '-c', f'client_task_cpu={self._client_task_cpu_units}',
+                '-c', f'client_task_memory={self._client_task_memory_mib}',
+                '-c', f'client_log_echo={self._client_log_echo}',
+                '-c', f'network_probe={self._network_probe}',
+                '-c', f'vpc_flow_logs={self._vpc_flow_logs}',
+                '-c', f'server_instance_type={self._server_instance_type}',
+                '-c', f'server_volume_size={self._server_volume_size}',
+                '-c', f'artifact_sync_interval={self._server_artifact_sync_interval}',
+                '-c', f'soak_sample_seconds={self._server_soak_sample_seconds}',
+                '-c', f'image_builder_instance_type={self._image_builder_instance_type}',
+                *self._get_relay_cmd_args(),
+                *self._get_server_image_cmd_args(cdk_cmd, platform),
+                '-c', f'namespace={self._namespace}',
+                '-c', f'platform={platform}',
+                '-c', f'run_id={self._run_id}', '--all']
 
         final_arg = '--require-approval=never' if (cdk_cmd == DEPLOY_CMD) else '-f'
         cmd_args.append(final_arg)
-        return cmd_args
\ No newline at end of file
+        return cmd_args
+
+    def _get_exclusive_cmd_args(self, cmd_args: List[str], target: str) -> List[str]:
+        """
+        Select the stack of the target instead of all the stacks of the AWS CDK application. Deployments running
+        alongside each other then never update the common stack at the same time
+        :param cmd_args: AWS CDK deploy or destroy command arguments which select all the stacks
+        :param target: Server or client target
+        :return: AWS CDK command arguments which select the stack of the target only
+        """
+        stack_suffixes = {SERVER_TARGET: SERVER_STACK_SUFFIX, CLIENT_TARGET: CLIENT_STACK_SUFFIX}
+        if target not in stack_suffixes:
+            raise RuntimeError(f'Target {target} can\'t be deployed exclusively')
+        return [arg for arg in cmd_args if arg != '--all'] + \
+            [f'{self._deployment_name}-{stack_suffixes[target]}', '--exclusively']
+
+    def _get_namespace_output_cmd_args(self) -> List[str]:
+        """
+        Get the arguments which write the cloud assembly of a namespace to its own folder, so deployments in different
+        namespaces can run alongside each other from the same project
+        :return: Output arguments, or none for the default namespace
+        """
+        return ['--output', f'{CDK_OUTPUT_FOLDER}.{self._namespace}'] if self._namespace else []
+
+    def _get_relay_cmd_args(self) -> List[str]:
+        """
+        Get the context arguments of the UDP impairment relay. The impairment profiles are written to a file next to
+        the project packages, which the server stack uploads to the relay instance
+        :return: Context arguments for the server stack
+        """
+        relay_profiles_file = ''
+        if self._relay_profiles:
+            relay_profiles_file = os.path.join(self._asset_path, RELAY_PROFILES_FILENAME)
+            with open(relay_profiles_file, 'w') as profiles_file:
+                json.dump(self._relay_profiles, profiles_file, indent=1)
+        return ['-c', f'relay_profiles_file={relay_profiles_file}',
+                '-c', f'relay_private_ip={self._relay_private_ip}',
+                '-c', f'relay_instance_type={self._relay_instance_type}']
+
+    def _get_server_image_cmd_args(self, cdk_cmd: str, platform: str) -> List[str]:
+        """
+        Get the context arguments which key the server AMI by the project package content and base AMI.
+        The AMI built from an identical project package is reused so EC2 Image Builder is skipped.
+        Otherwise the server AMI is built from the latest base AMI, if one is deployed
+        :param cdk_cmd: AWS CDK command to run
+        :param platform: Platform of the project package
+        :return: Context arguments for the server stack
+        """
+        if cdk_cmd != DEPLOY_CMD:
+            return []
+
+        base_image_id = self._find_image({'AmiTagKey': BASE_IMAGE_TAG_VALUE})
+        if base_image_id:
+            print(f'Building the server AMI from the base AMI {base_image_id}')
+        else:
+            print(f'[Warn] No base AMI found. Deploy the {BASE_IMAGE_TARGET} target to bake the server '
+                  f'runtime dependencies once instead of installing them in every server AMI build')
+        base_image_args = ['-c', f'base_image_id={base_image_id}']
+
+        package_hash = self._get_package_hash(platform)
+        if not package_hash:
+            print(f'[Warn] No project package found for the {platform} platform. The server AMI will not be reused')
+            return base_image_args
+
+        server_image_id = self._find_image({
+            SERVER_IMAGE_PACKAGE_HASH_TAG_KEY: package_hash,
+            SERVER_IMAGE_BASE_IMAGE_TAG_KEY: base_image_id if base_image_id else NO_BASE_IMAGE_TAG_VALUE
+        }) if self._reuse_server_image else ''
+        if server_image_id:
+            print(f'Reusing server AMI {server_image_id} built from the project package {package_hash}')
+        return base_image_args + ['-c', f'package_hash={package_hash}', '-c', f'server_image_id={server_image_id}']
+
+    def _get_package_hash(self, platform: str) -> str:
+        """
+        Get the SHA-256 hash of the zipped project package
+        :param platform: Platform of the project package
+        :return: Hex digest of the package content, or an empty string if the package doesn't exist
+        """
+        # The package is hashed once per deployment, for the run catalog and the server AMI lookup
+        if platform in self._package_hashes:
+            return self._package_hashes[platform]
+
+        package_path = os.path.join(self._asset_path, platform, f'{OUTPUT_PACKAGE_FOLDER_NAME}.zip')
+        if not os.path.exists(package_path):
+            return ''
+
+        package_hash = hashlib.sha256()
+        with open(package_path, 'rb') as package:
+            for chunk in iter(lambda: package.read(1024 * 1024), b''):
+                package_hash.update(chunk)
+        self._package_hashes[platform] = package_hash.hexdigest()
+        return self._package_hashes[platform]
+
+    def _find_image(self, tags: Dict[str, str]) -> str:
+        """
+        Find the latest available AMI owned by the account with the given tags
+        :param tags: Tag values of the AMI keyed by the tag keys
+        :return: ID of the AMI, or an empty string if no AMI is found
+        """
+        ec2_client = boto3.client('ec2', config=Config(region_name=self._aws_region))
+        images = ec2_client.describe_images(
+            Owners=['self'],
+            Filters=[{'Name': f'tag:{key}', 'Values': [value]} for key, value in tags.items()] +
+                    [{'Name': 'state', 'Values': ['available']}]
+        ).get('Images', [])
+        if not images:
+            return ''
+        return max(images, key=lambda image: image['CreationDate'])['ImageId']
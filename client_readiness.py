@@ -0,0 +1,175 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import math
+import time
+from typing import Dict, List
+
+import boto3
+from botocore.config import Config
+
+from constants import *
+
+
+class ClientReadinessMonitor(object):
+    """
+    Follow the readiness events reported by the client tasks to the client log group.
+    See cdk/assets/Windows/scripts/client_launcher.ps1 for the event format
+    """
+
+    def __init__(self, log_group_name: str, region: str, start_time: float = None):
+        """
+        :param log_group_name: Name of the client log group
+        :param region: AWS region of the client log group
+        :param start_time: Unix time to read readiness events from. Defaults to the default lookback period
+        """
+        super().__init__()
+        self._log_group_name = log_group_name
+        self._logs_client = boto3.client('logs', config=Config(region_name=region))
+        if start_time is None:
+            start_time = time.time() - DEFAULT_READINESS_LOOKBACK_MINUTES * 60
+        self._start_time_ms = int(start_time * 1000)
+        self._seen_event_ids = set()
+        # Latest status and first time-to-connected of each client, keyed by log stream
+        self._clients = {}
+
+    @property
+    def clients(self) -> Dict[str, Dict]:
+        """
+        Get the readiness state of every client that reported an event
+        :return: Readiness state keyed by the client log stream name
+        """
+        return self._clients
+
+    def poll(self) -> int:
+        """
+        Read the readiness events reported since the last poll
+        :return: Number of clients which are currently connected
+        """
+        paginator = self._logs_client.get_paginator('filter_log_events')
+        page_iterator = paginator.paginate(
+            logGroupName=self._log_group_name,
+            startTime=self._start_time_ms,
+            filterPattern=f'{{ $.event = "{CLIENT_READINESS_EVENT_NAME}" }}'
+        )
+        latest_timestamp_ms = self._start_time_ms
+        for page in page_iterator:
+            for log_event in page.get('events', []):
+                latest_timestamp_ms = max(latest_timestamp_ms, log_event['timestamp'])
+                if log_event['eventId'] in self._seen_event_ids:
+                    continue
+                self._seen_event_ids.add(log_event['eventId'])
+                self._add_event(log_event['logStreamName'], log_event['message'])
+
+        # Events of the latest millisecond are read again by the next poll and skipped by their IDs
+        self._start_time_ms = latest_timestamp_ms
+        return self.connected_count
+
+    def _add_event(self, log_stream_name: str, message: str) -> None:
+        """
+        Update the readiness state of a client with a readiness event
+        :param log_stream_name: Log stream the event was reported to
+        :param message: Readiness event in JSON
+        """
+        try:
+            readiness_event = json.loads(message)
+        except json.JSONDecodeError:
+            print(f'[Warn] Ignoring malformed readiness event from {log_stream_name}: {message}')
+            return
+
+        client = self._clients.setdefault(log_stream_name, {
+            'task_id': readiness_event.get('task_id', log_stream_name.split('/')[-1]),
+            'status': '',
+            'timestamp': 0,
+            'seconds_to_connected': None
+        })
+        # Events are not guaranteed to arrive in order across pages
+        if readiness_event.get('timestamp', 0) >= client['timestamp']:
+            client['status'] = readiness_event.get('status', '')
+            client['timestamp'] = readiness_event.get('timestamp', 0)
+        if readiness_event.get('status') == CLIENT_STATUS_CONNECTED and client['seconds_to_connected'] is None:
+            client['seconds_to_connected'] = readiness_event.get('seconds_since_launch')
+
+    @property
+    def connected_count(self) -> int:
+        """
+        Get the number of clients which are currently connected
+        """
+        return sum(1 for client in self._clients.values() if client['status'] == CLIENT_STATUS_CONNECTED)
+
+    def wait_for_clients(self, count: int, expected_count: int,
+                         timeout_seconds: float = DEFAULT_READINESS_TIMEOUT_SECONDS,
+                         poll_seconds: float = DEFAULT_READINESS_POLL_SECONDS) -> bool:
+        """
+        Wait until the given number of clients are connected
+        :param count: Number of connected clients to wait for
+        :param expected_count: Total number of clients expected to be launched
+        :param timeout_seconds: Maximum time to wait
+        :param poll_seconds: Time between two polls
+        :return: Whether the clients are connected before the timeout
+        """
+        deadline = time.time() + timeout_seconds
+        while True:
+            connected_count = self.poll()
+            print(f'{connected_count} of {expected_count} clients connected '
+                  f'({len(self._clients)} reported, waiting for {count})')
+            if connected_count >= count:
+                return True
+            if time.time() + poll_seconds > deadline:
+                return False
+            time.sleep(poll_seconds)
+
+    def get_times_to_connected(self) -> List[float]:
+        """
+        Get the time-to-connected of every client that has connected
+        :return: Seconds from client launch to its first connection, sorted
+        """
+        return sorted(client['seconds_to_connected'] for client in self._clients.values()
+                      if client['seconds_to_connected'] is not None)
+
+
+def format_histogram(values: List[float], bin_seconds: float = DEFAULT_READINESS_HISTOGRAM_BIN_SECONDS,
+                     width: int = 40) -> str:
+    """
+    Format values as a text histogram
+    :param values: Values to bucket
+    :param bin_seconds: Width of each histogram bin
+    :param width: Length of the longest bar
+    :return: Histogram text, one line per bin
+    """
+    if not values:
+        return 'No values'
+
+    bins = {}
+    for value in values:
+        bin_index = math.floor(value / bin_seconds)
+        bins[bin_index] = bins.get(bin_index, 0) + 1
+
+    largest_bin = max(bins.values())
+    lines = []
+    for bin_index in range(min(bins), max(bins) + 1):
+        bin_count = bins.get(bin_index, 0)
+        bar = '#' * math.ceil(bin_count / largest_bin * width) if bin_count else ''
+        lines.append(f'{bin_index * bin_seconds:>7.1f}s - {(bin_index + 1) * bin_seconds:>7.1f}s | '
+                     f'{bin_count:>5} {bar}')
+    return '\n'.join(lines)
+
+
+def get_readiness_report(monitor: ClientReadinessMonitor) -> Dict:
+    """
+    Summarize the readiness of the clients
+    :param monitor: Client readiness monitor
+    :return: Readiness report
+    """
+    times = monitor.get_times_to_connected()
+    return {
+        'connected_count': monitor.connected_count,
+        'reported_count': len(monitor.clients),
+        'seconds_to_connected': {
+            'min': times[0] if times else None,
+            'median': times[len(times) // 2] if times else None,
+            'max': times[-1] if times else None
+        },
+        'clients': monitor.clients
+    }
@@ -8,6 +8,7 @@ from botocore.config import Config
 
 import json
 import pprint
+import re
 from os.path import exists
 from pathlib import Path
 
@@ -49,6 +50,13 @@ class BaseConfig(object):
         """
         return self._config.get(key, default)
 
+    def to_dict(self) -> dict:
+        """
+        Get a copy of all the config values
+        :return: Config values keyed by the config keys
+        """
+        return dict(self._config)
+
     def get_str(self, key: str, default: str = '') -> str:
         """
         Returns the first token of the given key's value as a string. Do not use for config values which may contain spaces.
@@ -177,6 +185,26 @@ class AutoScalerConfig(JsonConfig):
     def __init__(self):
         super().__init__()
 
+    def get_namespace(self) -> str:
+        """
+        Get the namespace of the deployment. Deployments in different namespaces don't share any stack or resource
+        :return: Namespace, or an empty string for the default namespace
+        """
+        namespace = self.get_str(SCALER_CONFIG_NAMESPACE_KEY)
+        if namespace and not re.match(NAMESPACE_PATTERN, namespace):
+            raise RuntimeError(f'Invalid namespace {namespace}. It must start with a letter and have at most 20 '
+                               f'letters, digits or hyphens')
+        return namespace
+
+    def get_deployment_name(self) -> str:
+        """
+        Get the name the deployed stacks are prefixed with and the test runs are cataloged under
+        :return: Project name, prefixed with the namespace if any
+        """
+        project_name = self.get_str(SCALER_CONFIG_PROJECT_NAME_KEY, SCALER_CONFIG_DEFAULT_PROJECT_NAME)
+        namespace = self.get_namespace()
+        return f'{namespace}-{project_name}' if namespace else project_name
+
     def default_config(self) -> None:
         self._config = {
             # Build configurations
@@ -196,6 +224,8 @@ class AutoScalerConfig(JsonConfig):
             SCALER_CONFIG_PROJECT_CACHE_PATH_KEY: SCALER_CONFIG_DEFAULT_PROJECT_CACHE_PATH,
             # Name of the O3DE project
             SCALER_CONFIG_PROJECT_NAME_KEY: SCALER_CONFIG_DEFAULT_PROJECT_NAME,
+            # Prefix of the deployed stacks and resources, so several test environments can be deployed side by side
+            SCALER_CONFIG_NAMESPACE_KEY: '',
             # Path to the O3DE project
             SCALER_CONFIG_PROJECT_PATH_KEY: '',
             # Path to the 3rd party libraries
@@ -204,10 +234,46 @@ class AutoScalerConfig(JsonConfig):
             # Project configurations
             # Number of clients to launch
             SCALER_CONFIG_CLIENT_COUNT_KEY: SCALER_CONFIG_DEFAULT_CLIENT_COUNT,
+            # Whether to send the full client logs to CloudWatch. Readiness events and metrics are always sent
+            SCALER_CONFIG_CLIENT_LOG_ECHO_KEY: SCALER_CONFIG_DEFAULT_CLIENT_LOG_ECHO,
+            # Whether to deploy the task definition of the UDP network probe senders, see probe-network
+            SCALER_CONFIG_NETWORK_PROBE_KEY: SCALER_CONFIG_DEFAULT_NETWORK_PROBE,
+            # Whether to deliver the VPC Flow Logs to the artifacts bucket, see bandwidth-report
+            SCALER_CONFIG_VPC_FLOW_LOGS_KEY: SCALER_CONFIG_DEFAULT_VPC_FLOW_LOGS,
             # IP address that will be assigned to the server
             SCALER_CONFIG_SERVER_PRIVATE_IP_KEY: SCALER_CONFIG_DEFAULT_SERVER_PRIVATE_IP,
             # Port used by the server
             SCALER_CONFIG_SERVER_PORT_KEY: SCALER_CONFIG_DEFAULT_SERVER_PORT,
+            # Impairment profiles of the UDP relay between the clients and the server. No relay is deployed if empty
+            SCALER_CONFIG_RELAY_PROFILES_KEY: SCALER_CONFIG_DEFAULT_RELAY_PROFILES,
+            # IP address that will be assigned to the relay. The clients connect to it instead of the server
+            SCALER_CONFIG_RELAY_PRIVATE_IP_KEY: SCALER_CONFIG_DEFAULT_RELAY_PRIVATE_IP,
+            # Amazon EC2 instance type of the relay
+            SCALER_CONFIG_RELAY_INSTANCE_TYPE_KEY: SCALER_CONFIG_DEFAULT_RELAY_INSTANCE_TYPE,
+
+            # Sizing configurations
+            # Fargate CPU units reserved for each client task
+            SCALER_CONFIG_CLIENT_TASK_CPU_UNITS_KEY: SCALER_CONFIG_DEFAULT_CLIENT_TASK_CPU_UNITS,
+            # Fargate memory (MiB) reserved for each client task
+            SCALER_CONFIG_CLIENT_TASK_MEMORY_MIB_KEY: SCALER_CONFIG_DEFAULT_CLIENT_TASK_MEMORY_MIB,
+            # Amazon EC2 instance type of the server
+            SCALER_CONFIG_SERVER_INSTANCE_TYPE_KEY: SCALER_CONFIG_DEFAULT_SERVER_INSTANCE_TYPE,
+            # Size (GiB) of the server root volume
+            SCALER_CONFIG_SERVER_VOLUME_SIZE_KEY: SCALER_CONFIG_DEFAULT_SERVER_VOLUME_SIZE,
+            # Interval (minutes) between the incremental syncs of the server logs and metrics to the artifacts bucket
+            SCALER_CONFIG_SERVER_ARTIFACT_SYNC_INTERVAL_KEY: SCALER_CONFIG_DEFAULT_SERVER_ARTIFACT_SYNC_INTERVAL,
+            # Interval (seconds) between the soak test samples of the server process. Sampling is disabled if 0
+            SCALER_CONFIG_SERVER_SOAK_SAMPLE_SECONDS_KEY: SCALER_CONFIG_DEFAULT_SERVER_SOAK_SAMPLE_SECONDS,
+            # Amazon EC2 instance type EC2 Image Builder uses to bake the server AMI
+            SCALER_CONFIG_IMAGE_BUILDER_INSTANCE_TYPE_KEY: SCALER_CONFIG_DEFAULT_IMAGE_BUILDER_INSTANCE_TYPE,
+            # Whether to reuse the server AMI built from an identical project package instead of baking a new one
+            SCALER_CONFIG_REUSE_SERVER_IMAGE_KEY: SCALER_CONFIG_DEFAULT_REUSE_SERVER_IMAGE,
+            # Local SQLite mirror of the test run catalog
+            SCALER_CONFIG_RUN_CATALOG_PATH_KEY: SCALER_CONFIG_DEFAULT_RUN_CATALOG_PATH,
+            # Folder of the columnar store of the ingested O3DE metrics
+            SCALER_CONFIG_METRICS_STORE_PATH_KEY: SCALER_CONFIG_DEFAULT_METRICS_STORE_PATH,
+            # Definitions of the metrics compared by compare-runs, merged over REGRESSION_METRICS
+            SCALER_CONFIG_REGRESSION_METRICS_KEY: SCALER_CONFIG_DEFAULT_REGRESSION_METRICS,
 
             # AWS configurations
             SCALER_CONFIG_AWS_ACCOUNT_ID_KEY: '',
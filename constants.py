@@ -8,6 +8,8 @@ SCALER_CONFIG_FILENAME = 'multiplayer_test_scaler_config.json'
 CLIENT_CONFIG_FILENAME = 'launch_client.cfg'
 SERVER_CONFIG_FILENAME = 'launch_server.cfg'
 RESOURCE_MAPPINGS_CONFIG_FILENAME = 'default_aws_resource_mappings.json'
+# Impairment profiles of the UDP relay, written to the output path for the server stack
+RELAY_PROFILES_FILENAME = 'relay_profiles.json'
 
 # Scaler config file keys
 SCALER_CONFIG_BUILD_INSTALLER_PATH_KEY = 'build_installer_path'
@@ -19,12 +21,31 @@ SCALER_CONFIG_ENGINE_PATH_KEY = 'engine_path'
 SCALER_CONFIG_OUTPUT_PATH_KEY = 'output_path'
 SCALER_CONFIG_PROJECT_CACHE_PATH_KEY = 'project_cache_path'
 SCALER_CONFIG_PROJECT_NAME_KEY = 'project_name'
+SCALER_CONFIG_NAMESPACE_KEY = 'namespace'
 SCALER_CONFIG_PROJECT_PATH_KEY = 'project_path'
 SCALER_CONFIG_THIRD_PARTY_PATH_KEY = 'third_party_path'
 
 SCALER_CONFIG_CLIENT_COUNT_KEY = 'client_count'
+SCALER_CONFIG_CLIENT_LOG_ECHO_KEY = 'client_log_echo'
+SCALER_CONFIG_NETWORK_PROBE_KEY = 'network_probe'
+SCALER_CONFIG_VPC_FLOW_LOGS_KEY = 'vpc_flow_logs'
 SCALER_CONFIG_SERVER_PORT_KEY = 'server_port'
 SCALER_CONFIG_SERVER_PRIVATE_IP_KEY = 'server_private_ip'
+SCALER_CONFIG_RELAY_PROFILES_KEY = 'relay_profiles'
+SCALER_CONFIG_RELAY_PRIVATE_IP_KEY = 'relay_private_ip'
+SCALER_CONFIG_RELAY_INSTANCE_TYPE_KEY = 'relay_instance_type'
+
+SCALER_CONFIG_CLIENT_TASK_CPU_UNITS_KEY = 'client_task_cpu_units'
+SCALER_CONFIG_CLIENT_TASK_MEMORY_MIB_KEY = 'client_task_memory_mib'
+SCALER_CONFIG_SERVER_INSTANCE_TYPE_KEY = 'server_instance_type'
+SCALER_CONFIG_SERVER_VOLUME_SIZE_KEY = 'server_volume_size_gib'
+SCALER_CONFIG_SERVER_ARTIFACT_SYNC_INTERVAL_KEY = 'server_artifact_sync_interval_minutes'
+SCALER_CONFIG_SERVER_SOAK_SAMPLE_SECONDS_KEY = 'server_soak_sample_seconds'
+SCALER_CONFIG_IMAGE_BUILDER_INSTANCE_TYPE_KEY = 'image_builder_instance_type'
+SCALER_CONFIG_REUSE_SERVER_IMAGE_KEY = 'reuse_server_image'
+SCALER_CONFIG_RUN_CATALOG_PATH_KEY = 'run_catalog_path'
+SCALER_CONFIG_METRICS_STORE_PATH_KEY = 'metrics_store_path'
+SCALER_CONFIG_REGRESSION_METRICS_KEY = 'regression_metrics'
 
 SCALER_CONFIG_AWS_ACCOUNT_ID_KEY = 'aws_account_id'
 SCALER_CONFIG_AWS_REGION_KEY = 'aws_region'
@@ -46,8 +67,26 @@ SCALER_CONFIG_DEFAULT_PROJECT_NAME = 'MultiplayerSample'
 SCALER_CONFIG_DEFAULT_THIRD_PARTY_PATH = '%LY_3RDPARTY_PATH%'
 
 SCALER_CONFIG_DEFAULT_CLIENT_COUNT = 1
+SCALER_CONFIG_DEFAULT_CLIENT_LOG_ECHO = True
+SCALER_CONFIG_DEFAULT_NETWORK_PROBE = False
+SCALER_CONFIG_DEFAULT_VPC_FLOW_LOGS = False
 SCALER_CONFIG_DEFAULT_SERVER_PRIVATE_IP = '10.0.0.4'
 SCALER_CONFIG_DEFAULT_SERVER_PORT = '33450'
+SCALER_CONFIG_DEFAULT_RELAY_PROFILES = []
+SCALER_CONFIG_DEFAULT_RELAY_PRIVATE_IP = '10.0.0.6'
+SCALER_CONFIG_DEFAULT_RELAY_INSTANCE_TYPE = 'c5.large'
+
+SCALER_CONFIG_DEFAULT_CLIENT_TASK_CPU_UNITS = 1024
+SCALER_CONFIG_DEFAULT_CLIENT_TASK_MEMORY_MIB = 8192
+SCALER_CONFIG_DEFAULT_SERVER_INSTANCE_TYPE = 'c5.2xlarge'
+SCALER_CONFIG_DEFAULT_SERVER_VOLUME_SIZE = 50
+SCALER_CONFIG_DEFAULT_SERVER_ARTIFACT_SYNC_INTERVAL = 2
+SCALER_CONFIG_DEFAULT_SERVER_SOAK_SAMPLE_SECONDS = 0
+SCALER_CONFIG_DEFAULT_IMAGE_BUILDER_INSTANCE_TYPE = 'c5.large'
+SCALER_CONFIG_DEFAULT_REUSE_SERVER_IMAGE = True
+SCALER_CONFIG_DEFAULT_RUN_CATALOG_PATH = 'run_catalog.db'
+SCALER_CONFIG_DEFAULT_METRICS_STORE_PATH = 'metrics_store'
+SCALER_CONFIG_DEFAULT_REGRESSION_METRICS = {}
 
 # Platform constant, respecting the EC2 Image Builder requirement of sentence casing
 # https://docs.aws.amazon.com/AWSCloudFormation/latest/UserGuide/aws-resource-imagebuilder-component.html
@@ -60,10 +99,268 @@ DEFAULT_LEVEL = 'Levels/SampleBase/SampleBase.spawnable'
 
 # Scaler output configurations
 OUTPUT_PACKAGE_FOLDER_NAME = 'project'
+# Installer files left out of the project package. The launchers are copied separately
+PACKAGE_IGNORE_PATTERNS = ['*.Tests.*', '*.Editor.*', '*.Builders.*', '*.exe']
 
 # Deployment targets
 METRICS_PIPELINE_TARGET = 'AWSMetrics'
 CLIENT_TARGET = 'client'
 SERVER_TARGET = 'server'
+BASE_IMAGE_TARGET = 'base-image'
 ALL_TARGET = 'all'
+# Only the common stack is deployed for any other target, see the run pipeline
+COMMON_TARGET = 'common'
+
+# Deployed stack names are suffixed to the project name by the AWS CDK application, prefixed with the namespace if any
+COMMON_STACK_SUFFIX = 'CommonStack'
+CLIENT_STACK_SUFFIX = 'ClientStack'
+SERVER_STACK_SUFFIX = 'ServerStack'
+BASE_IMAGE_STACK_SUFFIX = 'BaseImageStack'
+# Must match NAMESPACE_PATTERN of the AWS CDK application
+NAMESPACE_PATTERN = r'^[A-Za-z][A-Za-z0-9-]{0,19}$'
+# Default cloud assembly folder of the AWS CDK CLI. Deployments in a namespace use their own folder
+CDK_OUTPUT_FOLDER = 'cdk.out'
+
+# Stack output keys exported by the AWS CDK application
+CLIENT_CLUSTER_NAME_OUTPUT_KEY = 'MultiplayerTestScalerClientClusterName'
+CLIENT_SERVICE_NAME_OUTPUT_KEY = 'MultiplayerTestScalerClientServiceName'
+CLIENT_LOG_GROUP_NAME_OUTPUT_KEY = 'MultiplayerTestScalerClientLogGroupName'
+NETWORK_PROBE_TASK_DEFINITION_OUTPUT_KEY = 'MultiplayerTestScalerProbeTaskDefinitionArn'
+SERVER_INSTANCE_ID_OUTPUT_KEY = 'MultiplayerTestScalerServerInstanceId'
+RELAY_INSTANCE_ID_OUTPUT_KEY = 'MultiplayerTestScalerRelayInstanceId'
+ARTIFACT_BUCKET_NAME_OUTPUT_KEY = 'MultiplayerTestScalerArtifactBucketName'
+IMAGE_BUILDER_LOG_BUCKET_NAME_OUTPUT_KEY = 'MultiplayerTestScalerImageBuilderLogBucketName'
+
+# Tag of the server AMI holding the hash of the project package it was built from.
+# Must match SERVER_IMAGE_PACKAGE_HASH_TAG_KEY of the AWS CDK application
+SERVER_IMAGE_PACKAGE_HASH_TAG_KEY = 'o3de-multiplayer-test-scaler-package-hash'
+SERVER_IMAGE_BASE_IMAGE_TAG_KEY = 'o3de-multiplayer-test-scaler-base-image-id'
+NO_BASE_IMAGE_TAG_VALUE = 'none'
+# Value of the AmiTagKey tag of the base AMIs with the server runtime dependencies
+BASE_IMAGE_TAG_VALUE = 'o3de-multiplayer-test-scaler-base-ami'
+# EC2 Image Builder writes the step results of each component run to this file in the log bucket
+IMAGE_BUILDER_DETAILED_OUTPUT_FILENAME = 'detailedoutput.json'
+
+# Right-sizing recommendations
+UTILIZATION_HISTORY_FILENAME = 'utilization_history.json'
+DEFAULT_RECOMMENDATION_HEADROOM_PERCENT = 30
+DEFAULT_RECOMMENDATION_PERCENTILE = 95
+DEFAULT_UTILIZATION_COLLECTION_HOURS = 3
+
+# Client readiness
+CLIENT_READINESS_EVENT_NAME = 'client_readiness'
+CLIENT_STATUS_CONNECTED = 'connected'
+DEFAULT_READINESS_TIMEOUT_SECONDS = 900
+DEFAULT_READINESS_POLL_SECONDS = 10
+DEFAULT_READINESS_LOOKBACK_MINUTES = 60
+DEFAULT_READINESS_HISTOGRAM_BIN_SECONDS = 5
+
+# Server updates
+# Must match the server launch command of the AWS CDK application
+SERVER_INSTALL_DIR = 'C:\\o3de'
+SERVER_DEFAULT_LAUNCH_ARGUMENTS = '--engine-path=C:\\o3de --project-path=C:\\o3de --project-cache-path=C:\\o3de\\Cache ' \
+                                  '--regset="/Amazon/AWSCore/AllowAWSMetadataCredentials=true" ' \
+                                  '--regset="/O3DE/Metrics/Multiplayer/Active=true" ' \
+                                  '--console-command-file=C:/o3de/Cache/pc/launch_server.cfg --rhi=null -NullRenderer ' \
+                                  '-bg_ConnectToAssetProcessor=0'
+# Must match SERVER_UPDATE_KEY_PREFIX of the AWS CDK application
+SERVER_UPDATE_KEY_PREFIX = 'server-updates'
+# The manifest of the installed package is kept per server instance, so a server redeployed from a new AMI starts over
+SERVER_UPDATE_MANIFEST_FOLDER = 'manifests'
+SERVER_UPDATE_COMMAND_FINAL_STATUSES = ['Success', 'Cancelled', 'TimedOut', 'Failed']
+DEFAULT_SERVER_UPDATE_UPLOAD_WORKERS = 16
+DEFAULT_SERVER_UPDATE_TIMEOUT_SECONDS = 600
+DEFAULT_SERVER_UPDATE_POLL_SECONDS = 5
+
+# Test runs
+# Artifacts of each run are keyed under runs/<run_id>/ in the artifacts bucket and copied under
+# MpScalerArtifacts/runs/<run_id>/ in the export bucket. Must match the AWS CDK application
+RUN_KEY_PREFIX = 'runs'
+RUN_CATALOG_OBJECT_NAME = 'catalog.json'
+EXPORT_KEY_PREFIX = 'MpScalerArtifacts/'
+RUN_ID_TAG_KEY = 'o3de-multiplayer-test-scaler-run-id'
+
+# Run artifact bundles
+# Must match the bundle layout of the artifact upload lambda of the AWS CDK application
+ARTIFACT_BUNDLE_FOLDER_NAME = 'bundle'
+ARTIFACT_BUNDLE_MANIFEST_NAME = 'manifest.json'
+ARTIFACT_BUNDLE_FORMAT = 'tar.gz-members'
+DEFAULT_ARTIFACT_FETCH_WORKERS = 8
+
+# Log analysis
+# Patterns of the O3DE log lines. Lines start with the timestamp in angle brackets, e.g.
+# <2023-01-01T12:00:00.123Z> or <12:00:00.123>. The first capture group of the sample patterns is the sample value.
+# Update them to match the output of your project
+LOG_TIMESTAMP_PATTERN = r'^<(?:(\d{4})-(\d{2})-(\d{2})[T ])?(\d{2}):(\d{2}):(\d{2}(?:\.\d+)?)\d*Z?>'
+LOG_CONNECT_PATTERN = r'New (?:outgoing|incoming) connection (?:to|from) remote address'
+LOG_DISCONNECT_PATTERN = r'Disconnecting|Remote host disconnected|Disconnected from'
+LOG_WARNING_PATTERN = r'(?i)\[warning\]|\bwarning\s*:'
+LOG_ERROR_PATTERN = r'(?i)\[error\]|\berror\s*:'
+LOG_SAMPLE_PATTERNS = {
+    'frame_time_ms': r'(?i)\bframe\s*time\s*[:=]\s*([0-9]+(?:\.[0-9]+)?)\s*ms',
+    'fps': r'(?i)\bfps\s*[:=]\s*([0-9]+(?:\.[0-9]+)?)',
+    'tick_time_ms': r'(?i)\btick\s*time\s*[:=]\s*([0-9]+(?:\.[0-9]+)?)\s*ms',
+    'tick_rate': r'(?i)\btick\s*rate\s*[:=]\s*([0-9]+(?:\.[0-9]+)?)',
+}
+LOG_EVENT_KINDS = ['connect', 'disconnect', 'warning', 'error']
+ANALYSIS_PERCENTILES = [50, 95, 99]
+DEFAULT_ANALYSIS_WINDOW_SECONDS = 60
+# Samples are buffered in NumPy arrays of this size, then folded into fixed log-spaced histograms,
+# so memory stays constant whatever the log size
+ANALYSIS_BUFFER_SIZE = 65536
+ANALYSIS_HISTOGRAM_RANGE = (1e-3, 1e6)
+ANALYSIS_HISTOGRAM_BINS = 4096
+
+# Metrics store
+# Name of the chunks uploaded by the server and client artifact syncs, <generation>-<offset>.gz
+ARTIFACT_CHUNK_NAME_PATTERN = r'^(\d{8}T\d{9}Z)-(\d{16})\.gz$'
+# Key prefix of the run artifacts synced from a host, runs/<run ID>/<server|client>/<instance or task ID>/
+ARTIFACT_HOST_PATH_PATTERN = r'(?:^|/)runs/([A-Za-z0-9-]+)/(server|client)/([^/]+)/'
+METRICS_FOLDER_NAME = 'Metrics'
+METRICS_SEGMENT_FILE_NAME = 'segment.json'
+# Maximum number of rows of a segment. Larger sources are split across segments
+METRICS_SEGMENT_ROWS = 262144
+# Maximum size of a single metrics event. Larger undecodable input is reported as invalid
+METRICS_MAX_EVENT_BYTES = 1048576
+METRICS_READ_BLOCK_BYTES = 1048576
+
+# Capacity search
+# Service level objectives, <series>:<statistic><operator><threshold>. Series are the log sample series (see
+# LOG_SAMPLE_PATTERNS), the log event kinds (see LOG_EVENT_KINDS) and cpu_utilization of the server instance.
+# Statistics are count, mean, min, max and p<percentile>
+DEFAULT_CAPACITY_SLOS = ['tick_time_ms:p95<=33.3', 'cpu_utilization:p95<=90']
+SLO_PATTERN = r'^([A-Za-z0-9_]+):(count|mean|min|max|p\d+(?:\.\d+)?)\s*(<=|>=|<|>)\s*(-?[0-9]+(?:\.[0-9]+)?)$'
+DEFAULT_CAPACITY_MIN_CLIENTS = 1
+DEFAULT_CAPACITY_MAX_CLIENTS = 64
+DEFAULT_CAPACITY_RESOLUTION = 1
+DEFAULT_CAPACITY_SETTLE_SECONDS = 120
+# Measurements need to span at least one server artifact sync, which is how the server logs are read
+DEFAULT_CAPACITY_MEASURE_SECONDS = 300
+DEFAULT_CAPACITY_SCALE_TIMEOUT_SECONDS = 900
+# CPU utilization of the server instance, published every minute by detailed monitoring, a few minutes late
+CAPACITY_CPU_SERIES = 'cpu_utilization'
+CAPACITY_CPU_PERIOD_SECONDS = 60
+CAPACITY_CPU_DELAY_SECONDS = 240
+CAPACITY_CPU_POLL_SECONDS = 30
+SERVER_LOG_FOLDER_NAME = 'log'
+
+# Soak test analysis
+# Columns of the server process samples written by the soak sampler (see sample_server_process.ps1)
+SOAK_SAMPLE_COLUMNS = ['timestamp', 'process_id', 'working_set_bytes', 'private_bytes', 'handle_count', 'thread_count',
+                       'cpu_percent']
+# Series whose upward trend is reported as a leak, and as a degradation. tick_time_ms is read from the server log
+SOAK_LEAK_SERIES = ['working_set_bytes', 'private_bytes', 'handle_count', 'thread_count']
+SOAK_DEGRADATION_SERIES = ['cpu_percent', 'tick_time_ms']
+# Samples are reduced to the median of each window before the trend is fitted, which discards short spikes
+DEFAULT_SOAK_WINDOW_SECONDS = 300
+# Minimum confidence that a series trends upward, and minimum drift over the run relative to its start, to flag it
+DEFAULT_SOAK_CONFIDENCE = 0.95
+DEFAULT_SOAK_MIN_DRIFT_PERCENT = 5
+SOAK_MIN_TREND_WINDOWS = 4
+
+# Run comparison
+# Metrics compared between runs, read from the metrics store (see ingest-metrics): the column, the name of the events
+# to read ('' for all the events with the column), the role of the shards which emit them and whether higher values
+# are worse. Client metrics are read from every client task, so they are per client. Override or extend them with the
+# regression_metrics config key or the --metric-source option to match the metrics of your project
+REGRESSION_METRICS = {
+    'tick_time_ms': {'column': 'args.TickTimeMs', 'name': '', 'role': 'server', 'higher_is_worse': True},
+    'rtt_ms': {'column': 'args.RttMs', 'name': '', 'role': 'client', 'higher_is_worse': True},
+    'bandwidth_per_client_bytes': {'column': 'args.BytesReceived', 'name': '', 'role': 'client',
+                                   'higher_is_worse': True},
+    'cpu_percent': {'column': 'args.CpuPercent', 'name': '', 'role': 'server', 'higher_is_worse': True},
+}
+REGRESSION_METRIC_ROLES = ['server', 'client']
+# Source of a metric, <metric>=[<role>:]<column>[@<event name>], e.g. tick_time_ms=server:args.TickTimeMs@Tick
+REGRESSION_METRIC_SOURCE_PATTERN = r'^([A-Za-z0-9_]+)=(?:(server|client):)?([^@:\s]+)(?:@(.+))?$'
+# Test phases, <name>:<start seconds>, in seconds since the first metrics event of each run
+DEFAULT_REGRESSION_PHASES = ['warmup:0', 'steady:120']
+REGRESSION_PHASE_PATTERN = r'^([A-Za-z0-9_-]+):([0-9]+(?:\.[0-9]+)?)$'
+DEFAULT_REGRESSION_PERCENTILES = [50, 95, 99]
+# A percentile regresses when its whole confidence interval is worse than the baseline by more than the threshold
+DEFAULT_REGRESSION_THRESHOLD_PERCENT = 5
+DEFAULT_REGRESSION_CONFIDENCE = 0.95
+DEFAULT_REGRESSION_RESAMPLES = 1000
+# Phases with more samples are subsampled uniformly before bootstrapping, which bounds the memory and time used
+REGRESSION_MAX_SAMPLES = 20000
+REGRESSION_MIN_SAMPLES = 30
+REGRESSION_RESAMPLE_BATCH = 50
+# Trace event timestamps are in microseconds
+METRICS_TIMESTAMP_SECONDS = 1e-6
+
+# Local simulation
+# The simulation runs the CLI against a local moto server, a stand-in for the AWS CDK CLI (see simulation/fake_cdk.py)
+# and stub server and client processes (see simulation/stub_host.py), so no AWS account or O3DE build is needed
+SIMULATION_ACCOUNT_ID = '123456789012'
+SIMULATION_REGION = 'us-east-1'
+SIMULATION_PROJECT_NAME = 'SimulatedMultiplayerSample'
+SIMULATION_BUILD_TYPE = 'profile'
+SIMULATION_EXPORT_BUCKET_NAME = 'simulated-metrics-upload-bucket'
+# Environment variables read by the simulation stand-ins
+SIMULATION_PATH_ENV = 'MPSCALER_SIMULATION_PATH'
+SIMULATION_EXPORT_BUCKET_ENV = 'MPSCALER_SIMULATION_EXPORT_BUCKET'
+# Tag of the simulated server instances, which the simulation starts stub servers for
+SIMULATION_ROLE_TAG_KEY = 'o3de-multiplayer-test-scaler-simulated-role'
+# Records of the running stub hosts, <simulation path>/hosts/<role>-<host ID>.json
+SIMULATION_HOST_FOLDER_NAME = 'hosts'
+SIMULATION_RECONCILE_SECONDS = 0.5
+SIMULATION_HOST_STOP_TIMEOUT_SECONDS = 30
+DEFAULT_SIMULATION_CLIENT_COUNTS = [2, 4]
+DEFAULT_SIMULATION_MEASURE_SECONDS = 10
+DEFAULT_SIMULATION_SYNC_SECONDS = 2
+DEFAULT_SIMULATION_SAMPLE_SECONDS = 0.1
+DEFAULT_SIMULATION_SCALE_TIMEOUT_SECONDS = 60
+# Server tick time of the stub server, which grows with every connected client
+SIMULATION_BASE_TICK_TIME_MS = 12.0
+SIMULATION_TICK_TIME_PER_CLIENT_MS = 1.5
+
+# Network probe
+# Packets per second of every step of each probe sender, and the step length (see udp_probe.py)
+DEFAULT_NETWORK_PROBE_RATES = [1000, 5000, 10000, 20000, 40000]
+DEFAULT_NETWORK_PROBE_STEP_SECONDS = 10
+DEFAULT_NETWORK_PROBE_PACKET_BYTES = 200
+DEFAULT_NETWORK_PROBE_SENDERS = 1
+# Time for the probe tasks to start before the first step. Steps which end before a task starts are skipped by it
+DEFAULT_NETWORK_PROBE_START_DELAY_SECONDS = 180
+# Highest loss of a step within the capacity of the network path
+DEFAULT_NETWORK_PROBE_LOSS_THRESHOLD_PERCENT = 1
+# Steps whose senders sent less than this share of the offered rate are limited by the senders, not the network
+NETWORK_PROBE_SENDER_LIMIT_RATIO = 0.95
+NETWORK_PROBE_DRAIN_SECONDS = 2
+# Extra time of the server echo and of the wait for the probe tasks to stop, after the last step
+NETWORK_PROBE_MARGIN_SECONDS = 60
+NETWORK_PROBE_POLL_SECONDS = 10
+NETWORK_PROBE_PRESIGNED_URL_SECONDS = 3600
+# Probe results are keyed under runs/<run_id>/network-probe/ in the artifacts bucket
+NETWORK_PROBE_FOLDER_NAME = 'network-probe'
+NETWORK_PROBE_SCRIPT_NAME = 'udp_probe.py'
+# Must match the probe task definition of the AWS CDK application
+NETWORK_PROBE_CONTAINER_NAME = 'MultiplayerTestScalerProbeContainer'
+NETWORK_PROBE_SCRIPT_URL_ENV = 'MPSCALER_PROBE_SCRIPT_URL'
+
+# VPC Flow Logs bandwidth accounting
+# Must match the flow log destination of the AWS CDK application
+VPC_FLOW_LOG_KEY_PREFIX = 'vpc-flow-logs'
+FLOW_LOG_REQUIRED_FIELDS = ['interface-id', 'srcaddr', 'dstaddr', 'packets', 'bytes', 'start', 'action', 'log-status']
+# Flow log files are delivered up to this long after the end of their records
+FLOW_LOG_DELIVERY_DELAY_SECONDS = 15 * 60
+# Client endpoints and the bandwidth report are keyed under runs/<run_id>/flow-logs/ in the artifacts bucket
+FLOW_LOG_FOLDER_NAME = 'flow-logs'
+FLOW_LOG_ENDPOINTS_FILENAME = 'endpoints.json'
+FLOW_LOG_REPORT_FILENAME = 'bandwidth_report.json'
 
+# Run pipeline
+# State of the run command, which a rerun resumes from, and the folder the run artifacts are collected in. Both are
+# suffixed with the namespace, like the cloud assembly folder, so runs of different namespaces don't share them
+DEFAULT_RUN_STATE_PATH = 'run_state.json'
+DEFAULT_RUN_ARTIFACTS_PATH = 'artifacts'
+RUN_STAGE_COMPLETED = 'completed'
+RUN_STAGE_FAILED = 'failed'
+RUN_STAGE_SKIPPED = 'skipped'
+# Minutes the connected clients are kept running before the deployment is cleared
+DEFAULT_RUN_HOLD_MINUTES = 10
+# The client image deployment runs alongside the server deployment, so it synthesizes to its own cloud assembly folder
+RUN_CLIENT_IMAGE_CDK_OUTPUT_FOLDER = f'{CDK_OUTPUT_FOLDER}.client-image'
+# The artifact bundle is uploaded to the export bucket by the upload Lambda function after the server stack deletion
+DEFAULT_RUN_COLLECT_TIMEOUT_SECONDS = 1800
+RUN_COLLECT_POLL_SECONDS = 30
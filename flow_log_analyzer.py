@@ -0,0 +1,377 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import datetime
+import glob
+import gzip
+import io
+import json
+import os
+from typing import Dict, IO, Iterable, Iterator, List, NamedTuple, Optional
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from constants import *
+from stack_outputs import StackOutputs
+
+# Bytes and packets of a client in both directions, from the point of view of the client
+BANDWIDTH_COUNTERS = ['bytes_to_server', 'packets_to_server', 'bytes_from_server', 'packets_from_server']
+
+
+class FlowRecord(NamedTuple):
+    """
+    Accepted traffic of a flow seen by a network interface in an aggregation interval
+    """
+    interface_id: str
+    srcaddr: str
+    dstaddr: str
+    packets: int
+    bytes: int
+    start: int
+
+
+def read_flow_log_lines(path: str) -> Iterator[str]:
+    """
+    Read the lines of flow log files lazily
+    :param path: Path of a flow log file, gzip-compressed (.gz) as delivered to Amazon S3 or not, or a folder searched
+    recursively for .log.gz files
+    :return: Lines of every file in turn, including the header line of every file
+    """
+    if os.path.isdir(path):
+        file_paths = sorted(glob.glob(os.path.join(path, '**', '*.log.gz'), recursive=True))
+    else:
+        file_paths = [path]
+    for file_path in file_paths:
+        opener = gzip.open if file_path.endswith('.gz') else open
+        with opener(file_path, 'rt') as flow_log_file:
+            yield from flow_log_file
+
+
+def open_flow_log_stream(stream: IO[bytes]) -> Iterator[str]:
+    """
+    Decompress a gzip-compressed flow log stream line by line, e.g. the body of an Amazon S3 object
+    :param stream: Readable binary stream
+    :return: Lines of the flow log
+    """
+    return io.TextIOWrapper(gzip.GzipFile(fileobj=stream), encoding='utf-8')
+
+
+def parse_flow_log(lines: Iterable[str]) -> Iterator[FlowRecord]:
+    """
+    Parse the accepted traffic of flow log lines. The fields are looked up from the header line every delivered file
+    starts with, so any log format with the fields of FlowRecord, action and log-status is supported
+    :param lines: Flow log lines, which can span several files
+    :return: Records of the accepted traffic. Records without data, rejected traffic and header lines are skipped
+    """
+    indexes = None
+    for line in lines:
+        fields = line.split()
+        if not fields:
+            continue
+        if not set(fields).isdisjoint(FLOW_LOG_REQUIRED_FIELDS):
+            # Header line of a new file. Values never match the field names
+            indexes = {name: index for index, name in enumerate(fields)}
+            missing_fields = set(FLOW_LOG_REQUIRED_FIELDS) - set(indexes)
+            if missing_fields:
+                raise RuntimeError(f'Flow log fields {", ".join(sorted(missing_fields))} are missing')
+            continue
+        if indexes is None:
+            raise RuntimeError('Flow log lines without a header line')
+        if len(fields) < len(indexes) or fields[indexes['log-status']] != 'OK' or \
+                fields[indexes['action']] != 'ACCEPT':
+            continue
+        yield FlowRecord(fields[indexes['interface-id']], fields[indexes['srcaddr']], fields[indexes['dstaddr']],
+                         int(fields[indexes['packets']]), int(fields[indexes['bytes']]), int(fields[indexes['start']]))
+
+
+class FlowLogEndpoints(object):
+    """
+    Network interfaces and addresses of the server and the client tasks of a run
+    """
+
+    def __init__(self, server_addresses: List[str], server_interface_ids: List[str] = None, clients: Dict = None):
+        """
+        :param server_addresses: Private IP addresses the clients connect to, i.e. the server and the relay if any
+        :param server_interface_ids: Network interfaces of the server and the relay
+        :param clients: Network interface and address of every client task, keyed by the task ID
+        """
+        super().__init__()
+        self.server_addresses = set(server_addresses)
+        self.server_interface_ids = set(server_interface_ids if server_interface_ids else [])
+        self.clients = dict(clients if clients else {})
+
+    def add_client(self, task_id: str, address: str, interface_id: str = '') -> None:
+        self.clients[task_id] = {'address': address, 'interface_id': interface_id}
+
+    def merge(self, endpoints: 'FlowLogEndpoints') -> None:
+        """
+        Add the server interfaces and clients of other endpoints, e.g. endpoints saved before the tasks stopped
+        """
+        self.server_addresses.update(endpoints.server_addresses)
+        self.server_interface_ids.update(endpoints.server_interface_ids)
+        for task_id, client in endpoints.clients.items():
+            self.clients.setdefault(task_id, client)
+
+    def to_dict(self) -> Dict:
+        return {
+            'server_addresses': sorted(self.server_addresses),
+            'server_interface_ids': sorted(self.server_interface_ids),
+            'clients': self.clients
+        }
+
+    @staticmethod
+    def from_dict(endpoints: Dict) -> 'FlowLogEndpoints':
+        return FlowLogEndpoints(endpoints.get('server_addresses', []), endpoints.get('server_interface_ids', []),
+                                endpoints.get('clients', {}))
+
+
+class FlowLogAnalyzer(object):
+    """
+    Account for the bytes and packets every client exchanges with the server, per client and per minute.
+    Every flow is seen by the network interfaces of both ends, so records are only counted on the interface of the
+    client. Clients without a known interface are counted on the interface of the server instead
+    """
+
+    def __init__(self, endpoints: FlowLogEndpoints, start_time: float = 0, end_time: float = 0):
+        """
+        :param endpoints: Network interfaces and addresses of the server and the clients
+        :param start_time: Epoch time before which records are skipped
+        :param end_time: Epoch time after which records are skipped, no limit if 0
+        """
+        super().__init__()
+        self._endpoints = endpoints
+        self._start_time = start_time
+        self._end_time = end_time
+        self._clients_by_interface = {client['interface_id']: task_id
+                                      for task_id, client in endpoints.clients.items() if client['interface_id']}
+        self._clients_by_address = {client['address']: task_id
+                                    for task_id, client in endpoints.clients.items() if not client['interface_id']}
+        self._clients = {}
+        self._minutes = {}
+        self._record_count = 0
+        self._counted_record_count = 0
+
+    def add_lines(self, lines: Iterable[str]) -> None:
+        """
+        Count the records of flow log lines
+        :param lines: Flow log lines, starting with a header line
+        """
+        for record in parse_flow_log(lines):
+            self.add_record(record)
+
+    def add_record(self, record: FlowRecord) -> None:
+        self._record_count += 1
+        if record.start < self._start_time or (self._end_time and record.start > self._end_time):
+            return
+
+        task_id = self._clients_by_interface.get(record.interface_id)
+        if task_id is None and record.interface_id in self._endpoints.server_interface_ids:
+            task_id = self._clients_by_address.get(record.srcaddr, self._clients_by_address.get(record.dstaddr))
+        if task_id is None:
+            return
+
+        if record.dstaddr in self._endpoints.server_addresses:
+            direction = 'to_server'
+        elif record.srcaddr in self._endpoints.server_addresses:
+            direction = 'from_server'
+        else:
+            return
+        self._counted_record_count += 1
+
+        client = self._clients.setdefault(task_id, dict.fromkeys(BANDWIDTH_COUNTERS, 0))
+        minute_start = record.start - record.start % 60
+        minute = self._minutes.setdefault(minute_start, {'counters': dict.fromkeys(BANDWIDTH_COUNTERS, 0),
+                                                         'clients': set()})
+        minute['clients'].add(task_id)
+        for counters in [client, minute['counters']]:
+            counters[f'bytes_{direction}'] += record.bytes
+            counters[f'packets_{direction}'] += record.packets
+
+    def get_report(self) -> Dict:
+        """
+        Get the per-client and per-minute bytes and packets. Records are counted in the minute they start in
+        :return: Bandwidth report
+        """
+        minutes = []
+        for minute_start in sorted(self._minutes):
+            minute = self._minutes[minute_start]
+            client_count = len(minute['clients'])
+            minutes.append(dict(
+                minute=datetime.datetime.fromtimestamp(minute_start, datetime.timezone.utc).isoformat(),
+                client_count=client_count,
+                **minute['counters'],
+                client_bytes_per_second_to_server=minute['counters']['bytes_to_server'] / client_count / 60,
+                client_bytes_per_second_from_server=minute['counters']['bytes_from_server'] / client_count / 60))
+        return {
+            'record_count': self._record_count,
+            'counted_record_count': self._counted_record_count,
+            'totals': {counter: sum(client[counter] for client in self._clients.values())
+                       for counter in BANDWIDTH_COUNTERS},
+            'clients': {task_id: self._clients[task_id] for task_id in sorted(self._clients)},
+            'minutes': minutes
+        }
+
+
+def format_bandwidth_report(report: Dict) -> str:
+    lines = [f'{len(report["clients"])} clients, {report["counted_record_count"]} of {report["record_count"]} '
+             f'flow log records counted',
+             f'Total: {report["totals"]["bytes_to_server"]} bytes ({report["totals"]["packets_to_server"]} packets) '
+             f'to the server, {report["totals"]["bytes_from_server"]} bytes '
+             f'({report["totals"]["packets_from_server"]} packets) from the server',
+             f'{"Minute":<26} {"Clients":>8} {"Up B/s/client":>14} {"Down B/s/client":>16} {"Up pkts":>10} '
+             f'{"Down pkts":>10}']
+    for minute in report['minutes']:
+        lines.append(f'{minute["minute"]:<26} {minute["client_count"]:>8} '
+                     f'{minute["client_bytes_per_second_to_server"]:>14.0f} '
+                     f'{minute["client_bytes_per_second_from_server"]:>16.0f} '
+                     f'{minute["packets_to_server"]:>10} {minute["packets_from_server"]:>10}')
+    return '\n'.join(lines)
+
+
+class BandwidthAccounting(object):
+    """
+    Account for the client bandwidth of a run from the VPC Flow Logs delivered to the artifacts bucket
+    """
+
+    def __init__(self, bucket_name: str, run_id: str, region: str):
+        """
+        :param bucket_name: Name of the artifacts bucket
+        :param run_id: ID of the test run
+        :param region: AWS region of the deployment
+        """
+        super().__init__()
+        self._bucket_name = bucket_name
+        self._run_id = run_id
+        self._region = region
+        self._prefix = f'{RUN_KEY_PREFIX}/{run_id}/{FLOW_LOG_FOLDER_NAME}'
+        self._s3_client = boto3.client('s3', config=Config(region_name=region))
+
+    def load_endpoints(self) -> Optional[FlowLogEndpoints]:
+        """
+        Load the endpoints saved with the artifacts of the run
+        :return: Saved endpoints, or None if none are saved
+        """
+        try:
+            response = self._s3_client.get_object(Bucket=self._bucket_name,
+                                                  Key=f'{self._prefix}/{FLOW_LOG_ENDPOINTS_FILENAME}')
+        except ClientError as error:
+            if error.response['Error']['Code'] in ['NoSuchKey', '404']:
+                return None
+            raise
+        return FlowLogEndpoints.from_dict(json.loads(response['Body'].read()))
+
+    def save_endpoints(self, endpoints: FlowLogEndpoints) -> None:
+        """
+        Save the endpoints with the artifacts of the run, so the clients can still be identified once their tasks
+        are no longer described by Amazon ECS
+        """
+        self._s3_client.put_object(Bucket=self._bucket_name, Key=f'{self._prefix}/{FLOW_LOG_ENDPOINTS_FILENAME}',
+                                   Body=json.dumps(endpoints.to_dict(), indent=1).encode('utf-8'))
+
+    def collect_endpoints(self, server_addresses: List[str], server_instance_ids: List[str],
+                          cluster_name: str = '', service_name: str = '') -> FlowLogEndpoints:
+        """
+        Collect the network interfaces of the server instances and of the running and recently stopped client tasks
+        :param server_addresses: Private IP addresses the clients connect to
+        :param server_instance_ids: IDs of the server and relay instances
+        :param cluster_name: Name of the client cluster, no client is collected if empty
+        :param service_name: Name of the client service
+        :return: Endpoints of the run
+        """
+        endpoints = FlowLogEndpoints(server_addresses)
+        if server_instance_ids:
+            ec2_client = boto3.client('ec2', config=Config(region_name=self._region))
+            for reservation in ec2_client.describe_instances(InstanceIds=server_instance_ids)['Reservations']:
+                for instance in reservation['Instances']:
+                    endpoints.server_interface_ids.update(
+                        interface['NetworkInterfaceId'] for interface in instance.get('NetworkInterfaces', []))
+        if not cluster_name:
+            return endpoints
+
+        ecs_client = boto3.client('ecs', config=Config(region_name=self._region))
+        paginator = ecs_client.get_paginator('list_tasks')
+        task_arns = []
+        # Stopped tasks are only described by Amazon ECS for a while after they stop
+        for desired_status in ['RUNNING', 'STOPPED']:
+            for page in paginator.paginate(cluster=cluster_name, serviceName=service_name,
+                                           desiredStatus=desired_status):
+                task_arns.extend(page.get('taskArns', []))
+        for index in range(0, len(task_arns), 100):
+            for task in ecs_client.describe_tasks(cluster=cluster_name, tasks=task_arns[index:index + 100])['tasks']:
+                for attachment in task.get('attachments', []):
+                    if attachment.get('type') != 'ElasticNetworkInterface':
+                        continue
+                    details = {detail['name']: detail['value'] for detail in attachment.get('details', [])}
+                    if details.get('privateIPv4Address'):
+                        endpoints.add_client(task['taskArn'].split('/')[-1], details['privateIPv4Address'],
+                                             details.get('networkInterfaceId', ''))
+        return endpoints
+
+    def update_endpoints(self, stack_outputs: StackOutputs, server_addresses: List[str],
+                         relay_deployed: bool) -> FlowLogEndpoints:
+        """
+        Collect the endpoints of the deployed server and clients and save them with the endpoints saved before, so the
+        bandwidth of the run can still be reported once the clients are destroyed
+        :param stack_outputs: Outputs of the deployed stacks
+        :param server_addresses: Private IP addresses the clients connect to
+        :param relay_deployed: Whether the UDP relay is deployed, whose instance counts as a server instance
+        :return: Saved endpoints
+        """
+        server_instance_ids = [stack_outputs.get(SERVER_STACK_SUFFIX, SERVER_INSTANCE_ID_OUTPUT_KEY)]
+        if relay_deployed:
+            server_instance_ids.append(stack_outputs.get(SERVER_STACK_SUFFIX, RELAY_INSTANCE_ID_OUTPUT_KEY))
+        endpoints = self.collect_endpoints(
+            server_addresses, server_instance_ids,
+            stack_outputs.get(CLIENT_STACK_SUFFIX, CLIENT_CLUSTER_NAME_OUTPUT_KEY),
+            stack_outputs.get(CLIENT_STACK_SUFFIX, CLIENT_SERVICE_NAME_OUTPUT_KEY))
+        saved_endpoints = self.load_endpoints()
+        if saved_endpoints:
+            endpoints.merge(saved_endpoints)
+        self.save_endpoints(endpoints)
+        return endpoints
+
+    def list_flow_log_keys(self, account_id: str, start_time: float, end_time: float) -> List[str]:
+        """
+        List the flow log files delivered on the days of a time range
+        :param account_id: ID of the AWS account of the VPC
+        :param start_time: Epoch start time of the range
+        :param end_time: Epoch end time of the range
+        :return: Keys of the flow log files
+        """
+        keys = []
+        paginator = self._s3_client.get_paginator('list_objects_v2')
+        day = datetime.datetime.fromtimestamp(start_time, datetime.timezone.utc).date()
+        # Records are delivered up to several minutes after they end
+        last_day = datetime.datetime.fromtimestamp(
+            end_time + FLOW_LOG_DELIVERY_DELAY_SECONDS, datetime.timezone.utc).date()
+        while day <= last_day:
+            prefix = f'{VPC_FLOW_LOG_KEY_PREFIX}/AWSLogs/{account_id}/vpcflowlogs/{self._region}/' \
+                     f'{day.strftime("%Y/%m/%d")}/'
+            for page in paginator.paginate(Bucket=self._bucket_name, Prefix=prefix):
+                keys.extend(obj['Key'] for obj in page.get('Contents', []))
+            day += datetime.timedelta(days=1)
+        return keys
+
+    def read_flow_log(self, key: str) -> Iterator[str]:
+        """
+        Stream the lines of a flow log file without downloading it first
+        :param key: Key of the flow log file
+        :return: Lines of the flow log
+        """
+        body = self._s3_client.get_object(Bucket=self._bucket_name, Key=key)['Body']
+        try:
+            yield from open_flow_log_stream(body)
+        finally:
+            body.close()
+
+    def save_report(self, report: Dict) -> str:
+        """
+        Save the bandwidth report with the artifacts of the run
+        :return: Key of the report
+        """
+        key = f'{self._prefix}/{FLOW_LOG_REPORT_FILENAME}'
+        self._s3_client.put_object(Bucket=self._bucket_name, Key=key,
+                                   Body=json.dumps(report, indent=1).encode('utf-8'))
+        return key
@@ -0,0 +1,123 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import datetime
+import json
+import re
+from typing import Dict, List
+
+import boto3
+from botocore.config import Config
+
+from constants import *
+
+
+def _parse_time(value: str) -> datetime.datetime:
+    """
+    Parse an ISO 8601 timestamp written by the EC2 Image Builder component manager
+    :param value: Timestamp, e.g. 2022-08-03T20:26:18.8621234Z
+    :return: Parsed timestamp, or None if the value is not a timestamp
+    """
+    match = re.match(r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(\.\d+)?(Z|[+-]\d{2}:?\d{2})?$', value or '')
+    if not match:
+        return None
+    # Python only parses up to microseconds
+    fraction = (match.group(2) or '.0')[:7]
+    zone = match.group(3) or 'Z'
+    zone = '+00:00' if zone == 'Z' else zone
+    return datetime.datetime.fromisoformat(f'{match.group(1)}{fraction}{zone}')
+
+
+def _get_duration(entry: Dict) -> float:
+    """
+    Get the duration of a document, phase or step of the detailed output
+    :param entry: Entry with start and end times
+    :return: Duration in seconds, or None if the entry didn't finish
+    """
+    start_time = _parse_time(entry.get('startTime'))
+    end_time = _parse_time(entry.get('endTime'))
+    if not start_time or not end_time:
+        return None
+    return (end_time - start_time).total_seconds()
+
+
+def parse_detailed_output(detailed_output: Dict) -> List[Dict]:
+    """
+    Get the timings of one run of the EC2 Image Builder component manager
+    :param detailed_output: Content of a detailedoutput.json log file
+    :return: Timing rows of every component, phase and step in execution order.
+    Component rows have no phase and phase rows have no step
+    """
+    timings = []
+    for document in detailed_output.get('documents', []):
+        component = document.get('name', '')
+        timings.append({'component': component, 'phase': '', 'step': '',
+                        'status': document.get('status', ''), 'seconds': _get_duration(document)})
+        for phase in document.get('phases', []):
+            timings.append({'component': component, 'phase': phase.get('name', ''), 'step': '',
+                            'status': phase.get('status', ''), 'seconds': _get_duration(phase)})
+            for step in phase.get('steps', []):
+                timings.append({'component': component, 'phase': phase.get('name', ''), 'step': step.get('name', ''),
+                                'status': step.get('status', ''), 'seconds': _get_duration(step)})
+    return timings
+
+
+def format_timings(timings: List[Dict]) -> str:
+    """
+    Format timing rows as an indented table
+    :param timings: Timing rows
+    :return: Table text, one line per row
+    """
+    lines = []
+    for timing in timings:
+        name = timing['step'] and f'        {timing["step"]}' or timing['phase'] and f'    {timing["phase"]}' \
+            or timing['component']
+        seconds = '-' if timing['seconds'] is None else f'{timing["seconds"]:.1f}s'
+        lines.append(f'{name:<60} {seconds:>10} {timing["status"]}')
+    return '\n'.join(lines)
+
+
+class ImageBuildTimings(object):
+    """
+    Collect per-component timings of EC2 Image Builder runs from the Image Builder logs stored in Amazon S3
+    """
+
+    def __init__(self, log_bucket_name: str, region: str):
+        """
+        :param log_bucket_name: Name of the EC2 Image Builder log bucket
+        :param region: AWS region of the log bucket
+        """
+        super().__init__()
+        self._log_bucket_name = log_bucket_name
+        self._s3_client = boto3.client('s3', config=Config(region_name=region))
+
+    def collect(self, prefix: str = '', latest: int = 0) -> List[Dict]:
+        """
+        Collect the timings of the component manager runs in the log bucket
+        :param prefix: Key prefix of the logs to include
+        :param latest: Only include the latest number of runs. All runs are included if it's 0
+        :return: Runs ordered by time, each with its log key, start time and timing rows
+        """
+        detailed_outputs = []
+        paginator = self._s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self._log_bucket_name, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                if obj['Key'].endswith(f'/{IMAGE_BUILDER_DETAILED_OUTPUT_FILENAME}'):
+                    detailed_outputs.append(obj)
+
+        detailed_outputs.sort(key=lambda obj: obj['LastModified'])
+        if latest:
+            detailed_outputs = detailed_outputs[-latest:]
+
+        runs = []
+        for obj in detailed_outputs:
+            response = self._s3_client.get_object(Bucket=self._log_bucket_name, Key=obj['Key'])
+            detailed_output = json.loads(response['Body'].read())
+            runs.append({
+                'key': obj['Key'],
+                'start_time': detailed_output.get('startTime', ''),
+                'status': detailed_output.get('status', ''),
+                'seconds': _get_duration(detailed_output),
+                'timings': parse_detailed_output(detailed_output)
+            })
+        return runs
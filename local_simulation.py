@@ -0,0 +1,409 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+import signal
+import stat
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List
+
+import boto3
+from botocore.config import Config
+
+from artifact_bundle import ArtifactBundle, get_bundle_manifest_key
+from capacity_search import ClientScaler
+from cdk_manager import CdkManager
+from config import AutoScalerConfig
+from constants import *
+from log_analyzer import LogAnalyzer
+from metrics_store import MetricsStore
+from package_builder import PackageBuilder
+from run_catalog import RunCatalog
+from stack_outputs import StackOutputs
+
+SIMULATION_SCRIPTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'simulation')
+
+
+def create_stub_project(root_path: str) -> AutoScalerConfig:
+    """
+    Create a stub O3DE project with processed assets and an installer build, laid out the way PackageBuilder expects
+    it, and the config of a simulated deployment of it
+    :param root_path: Folder to create the project, engine, output and state folders in
+    :return: Config of the simulated deployment
+    """
+    project_path = os.path.join(root_path, 'project')
+    engine_path = os.path.join(root_path, 'engine')
+    installer_path = os.path.join(project_path, SCALER_CONFIG_DEFAULT_BUILD_INSTALLER_PATH, PLATFORM_WINDOWS,
+                                  SIMULATION_BUILD_TYPE, 'Default')
+    cache_path = os.path.join(project_path, SCALER_CONFIG_DEFAULT_PROJECT_CACHE_PATH, WINDOWS_CACHE_SUBFOLDER_NAME)
+    files = {
+        os.path.join(cache_path, 'levels', 'newstarterbase', 'newstarterbase.spawnable'): b'level' * 1024,
+        os.path.join(installer_path, f'{SIMULATION_PROJECT_NAME}.GameLauncher.exe'): b'client' * 1024,
+        os.path.join(installer_path, f'{SIMULATION_PROJECT_NAME}.ServerLauncher.exe'): b'server' * 1024,
+        os.path.join(installer_path, 'Gem.Multiplayer.dll'): b'multiplayer' * 1024,
+        os.path.join(installer_path, 'Gem.Multiplayer.Editor.dll'): b'editor' * 1024,
+        os.path.join(project_path, 'Config', 'default_aws_resource_mappings.json'): b'{"AWSResourceMappings": {}}',
+        os.path.join(engine_path, 'engine.json'): b'{"engine_name": "o3de"}',
+    }
+    for path, content in files.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as stub_file:
+            stub_file.write(content)
+
+    config = AutoScalerConfig()
+    config.set(SCALER_CONFIG_PROJECT_PATH_KEY, project_path)
+    config.set(SCALER_CONFIG_ENGINE_PATH_KEY, engine_path)
+    config.set(SCALER_CONFIG_PROJECT_NAME_KEY, SIMULATION_PROJECT_NAME)
+    config.set(SCALER_CONFIG_BUILD_TYPE_KEY, SIMULATION_BUILD_TYPE)
+    config.set(SCALER_CONFIG_OUTPUT_PATH_KEY, os.path.join(root_path, 'output'))
+    config.set(SCALER_CONFIG_RUN_CATALOG_PATH_KEY, os.path.join(root_path, 'run_catalog.db'))
+    config.set(SCALER_CONFIG_METRICS_STORE_PATH_KEY, os.path.join(root_path, 'metrics_store'))
+    config.set(SCALER_CONFIG_AWS_ACCOUNT_ID_KEY, SIMULATION_ACCOUNT_ID)
+    config.set(SCALER_CONFIG_AWS_REGION_KEY, SIMULATION_REGION)
+    return config
+
+
+class LocalSimulation(object):
+    """
+    Local stand-in for the AWS account and the O3DE hosts of a deployment. It starts a moto server and points boto3 at
+    it, puts the fake AWS CDK CLI first on the PATH, and runs a stub server for every simulated server instance and a
+    stub client for every task of the simulated client services, the way Amazon ECS keeps the desired count of a
+    service running. Only runs on Linux and macOS, where ProcessRunner starts the commands directly
+    """
+
+    def __init__(self, work_path: str, sync_seconds: float = DEFAULT_SIMULATION_SYNC_SECONDS,
+                 sample_seconds: float = DEFAULT_SIMULATION_SAMPLE_SECONDS):
+        """
+        :param work_path: Folder of the simulation state and the stub host files
+        :param sync_seconds: Seconds between two artifact syncs of the stub hosts
+        :param sample_seconds: Seconds between two samples of the stub hosts
+        """
+        super().__init__()
+        self._work_path = os.path.abspath(work_path)
+        self._host_path = os.path.join(self._work_path, SIMULATION_HOST_FOLDER_NAME)
+        self._sync_seconds = sync_seconds
+        self._sample_seconds = sample_seconds
+        self._server = None
+        self._environment = None
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        # Running stub host processes keyed by host ID, with the run ID they were started for
+        self._hosts = {}
+        self.errors = []
+
+    def __enter__(self) -> 'LocalSimulation':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Start the moto server and the stub host reconciliation, and set up the environment of the CLI
+        """
+        # Imported here, so the moto server is only required by the simulation
+        from moto.server import ThreadedMotoServer
+
+        os.makedirs(self._host_path, exist_ok=True)
+        self._server = ThreadedMotoServer(port=0, verbose=False)
+        self._server.start()
+        host, port = self._server.get_host_and_port()
+        bin_path = self._create_bin_folder()
+        self._environment = dict(os.environ)
+        os.environ.update({
+            'AWS_ENDPOINT_URL': f'http://{host}:{port}',
+            'AWS_ACCESS_KEY_ID': 'simulation',
+            'AWS_SECRET_ACCESS_KEY': 'simulation',
+            'AWS_DEFAULT_REGION': SIMULATION_REGION,
+            'CDK_DEFAULT_ACCOUNT': SIMULATION_ACCOUNT_ID,
+            'CDK_DEFAULT_REGION': SIMULATION_REGION,
+            'PATH': os.pathsep.join([bin_path, os.environ.get('PATH', '')]),
+            SIMULATION_PATH_ENV: self._work_path,
+            SIMULATION_EXPORT_BUCKET_ENV: SIMULATION_EXPORT_BUCKET_NAME
+        })
+        os.environ.pop('AWS_PROFILE', None)
+        # The export bucket belongs to the AWSMetrics project or is created manually, so it outlives the stacks
+        boto3.client('s3', config=Config(region_name=SIMULATION_REGION)).create_bucket(
+            Bucket=SIMULATION_EXPORT_BUCKET_NAME)
+
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run_reconciliation, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the stub hosts and the moto server, and restore the environment
+        """
+        if self._thread:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            for host_id in list(self._hosts):
+                self._stop_host(host_id)
+        if self._server:
+            self._server.stop()
+            self._server = None
+        if self._environment is not None:
+            os.environ.clear()
+            os.environ.update(self._environment)
+            self._environment = None
+
+    def reconcile(self) -> None:
+        """
+        Start and stop the stub hosts to match the simulated server instances and client services
+        """
+        with self._lock:
+            wanted_hosts = {**self._get_server_hosts(), **self._get_client_hosts()}
+            for host_id, (run_id, _) in list(self._hosts.items()):
+                if host_id not in wanted_hosts or wanted_hosts[host_id]['run_id'] != run_id:
+                    self._stop_host(host_id)
+            for host_id, host in wanted_hosts.items():
+                if host_id not in self._hosts:
+                    self._start_host(host_id, host)
+
+    def _run_reconciliation(self) -> None:
+        while not self._stopping.wait(SIMULATION_RECONCILE_SECONDS):
+            try:
+                self.reconcile()
+            except Exception as error:
+                # Errors are reported by the pipeline, the reconciliation carries on
+                self.errors.append(str(error))
+
+    def _get_server_hosts(self) -> Dict[str, Dict]:
+        ec2_client = boto3.client('ec2', config=Config(region_name=SIMULATION_REGION))
+        hosts = {}
+        for reservation in ec2_client.describe_instances(Filters=[
+                {'Name': f'tag:{SIMULATION_ROLE_TAG_KEY}', 'Values': ['server']},
+                {'Name': 'instance-state-name', 'Values': ['running']}])['Reservations']:
+            for instance in reservation['Instances']:
+                tags = {tag['Key']: tag['Value'] for tag in instance.get('Tags', [])}
+                hosts[instance['InstanceId']] = {'role': 'server', 'run_id': tags.get(RUN_ID_TAG_KEY, ''),
+                                                 'bucket': self._get_artifact_bucket_name()}
+        return hosts
+
+    def _get_client_hosts(self) -> Dict[str, Dict]:
+        """
+        Run and stop client tasks to keep the desired count of every client service
+        :return: Stub clients of the running tasks, keyed by the task ID
+        """
+        ecs_client = boto3.client('ecs', config=Config(region_name=SIMULATION_REGION))
+        hosts = {}
+        for cluster_arn in ecs_client.list_clusters()['clusterArns']:
+            for service_arn in ecs_client.list_services(cluster=cluster_arn)['serviceArns']:
+                service = ecs_client.describe_services(cluster=cluster_arn, services=[service_arn])['services'][0]
+                container = ecs_client.describe_task_definition(taskDefinition=service['taskDefinition'])[
+                    'taskDefinition']['containerDefinitions'][0]
+                environment = {item['name']: item['value'] for item in container.get('environment', [])}
+                log_options = container.get('logConfiguration', {}).get('options', {})
+
+                task_arns = ecs_client.list_tasks(cluster=cluster_arn, startedBy=service['serviceName'],
+                                                  desiredStatus='RUNNING')['taskArns']
+                # Tasks whose client exited are stopped and replaced, like Amazon ECS does
+                for task_arn in task_arns[service['desiredCount']:] + [
+                        task_arn for task_arn in task_arns[:service['desiredCount']]
+                        if task_arn.split('/')[-1] in self._hosts and
+                        self._hosts[task_arn.split('/')[-1]][1].poll() is not None]:
+                    ecs_client.stop_task(cluster=cluster_arn, task=task_arn)
+                    task_arns.remove(task_arn)
+                if len(task_arns) < service['desiredCount']:
+                    task_arns += [task['taskArn'] for task in ecs_client.run_task(
+                        cluster=cluster_arn, taskDefinition=service['taskDefinition'], launchType='FARGATE',
+                        startedBy=service['serviceName'], count=service['desiredCount'] - len(task_arns))['tasks']]
+
+                for task_arn in task_arns:
+                    task_id = task_arn.split('/')[-1]
+                    hosts[task_id] = {
+                        'role': 'client', 'run_id': environment.get('MPSCALER_RUN_ID', ''),
+                        'bucket': environment.get('MPSCALER_ARTIFACT_BUCKET', ''),
+                        'log_group': log_options.get('awslogs-group', ''),
+                        'log_stream': f'{log_options.get("awslogs-stream-prefix", "")}/{container["name"]}/{task_id}'
+                    }
+        return hosts
+
+    def _get_artifact_bucket_name(self) -> str:
+        project_name = os.environ.get('O3DE_AWS_PROJECT_NAME', SIMULATION_PROJECT_NAME)
+        return StackOutputs(project_name, SIMULATION_REGION).get(COMMON_STACK_SUFFIX, ARTIFACT_BUCKET_NAME_OUTPUT_KEY)
+
+    def _start_host(self, host_id: str, host: Dict) -> None:
+        cmd_list = [sys.executable, os.path.join(SIMULATION_SCRIPTS_PATH, 'stub_host.py'),
+                    '--role', host['role'], '--host-id', host_id, '--run-id', host['run_id'] or 'no-run',
+                    '--bucket', host['bucket'], '--work-path', os.path.join(self._work_path, host['role'], host_id),
+                    '--simulation-path', self._work_path, '--sync-seconds', str(self._sync_seconds),
+                    '--sample-seconds', str(self._sample_seconds)]
+        if host.get('log_group'):
+            cmd_list += ['--log-group', host['log_group'], '--log-stream', host['log_stream']]
+        process = subprocess.Popen(cmd_list, stdout=subprocess.DEVNULL)
+        self._hosts[host_id] = (host['run_id'], process)
+        with open(self._get_record_path(host['role'], host_id), 'w') as record_file:
+            json.dump({'pid': process.pid, **host}, record_file)
+
+    def _stop_host(self, host_id: str) -> None:
+        """
+        Stop a stub host. It syncs its last artifacts before it exits
+        """
+        _, process = self._hosts.pop(host_id)
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(SIMULATION_HOST_STOP_TIMEOUT_SECONDS)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        for role in ['server', 'client']:
+            if os.path.exists(self._get_record_path(role, host_id)):
+                os.remove(self._get_record_path(role, host_id))
+
+    def _get_record_path(self, role: str, host_id: str) -> str:
+        return os.path.join(self._host_path, f'{role}-{host_id}.json')
+
+    def _create_bin_folder(self) -> str:
+        """
+        Create the commands CdkManager runs: the fake AWS CDK CLI, and pip, since the AWS CDK application
+        dependencies aren't needed
+        """
+        bin_path = os.path.join(self._work_path, 'bin')
+        os.makedirs(bin_path, exist_ok=True)
+        commands = {
+            'cdk': f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(SIMULATION_SCRIPTS_PATH, "fake_cdk.py")}" "$@"\n',
+            'pip': '#!/bin/sh\necho "Skipping pip $@ in the local simulation"\n'
+        }
+        for name, script in commands.items():
+            path = os.path.join(bin_path, name)
+            with open(path, 'w') as command_file:
+                command_file.write(script)
+            os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        return bin_path
+
+
+class SimulationPipeline(object):
+    """
+    Run and time the build, deploy, scale, clear, collect and analyze stages of a test run against a local simulation
+    """
+
+    def __init__(self, simulation: LocalSimulation, config: AutoScalerConfig, work_path: str,
+                 platform: str = PLATFORM_WINDOWS):
+        """
+        :param simulation: Started local simulation
+        :param config: Config of the simulated deployment, see create_stub_project
+        :param work_path: Folder to collect the artifacts in
+        :param platform: Platform of the project package
+        """
+        super().__init__()
+        self._simulation = simulation
+        self._config = config
+        self._work_path = work_path
+        self._platform = platform
+        self._stages = []
+        self._run_id = ''
+
+    def run(self, client_counts: List[int], measure_seconds: float = DEFAULT_SIMULATION_MEASURE_SECONDS,
+            scale_timeout: float = DEFAULT_SIMULATION_SCALE_TIMEOUT_SECONDS) -> Dict:
+        """
+        Run the stages. The deployment is cleared even if scaling fails
+        :param client_counts: Client counts to scale to in turn
+        :param measure_seconds: Seconds to keep every client count running
+        :param scale_timeout: Maximum seconds to wait for the clients of a count to connect
+        :return: Report of the stages and their timings
+        """
+        scale_steps = []
+        self._time_stage('build', lambda: PackageBuilder(self._config, self._platform).process_output())
+        self._time_stage('deploy', self._deploy)
+        try:
+            self._time_stage('scale', lambda: scale_steps.extend(self._scale(client_counts, measure_seconds,
+                                                                             scale_timeout)))
+        finally:
+            self._time_stage('clear', lambda: CdkManager(self._config).destroy_aws_resources(ALL_TARGET,
+                                                                                            self._platform))
+        artifact_paths = []
+        self._time_stage('collect', lambda: artifact_paths.extend(self._collect()))
+        analysis = {}
+        self._time_stage('analyze', lambda: analysis.update(self._analyze()))
+
+        return {
+            'run_id': self._run_id,
+            'stages': self._stages,
+            'total_seconds': sum(stage['seconds'] for stage in self._stages),
+            'scale_steps': scale_steps,
+            'artifact_count': len(artifact_paths),
+            'analysis': analysis,
+            'errors': self._simulation.errors
+        }
+
+    def _time_stage(self, name: str, stage: Callable) -> None:
+        print(f'Simulation stage {name}...')
+        start_time = time.perf_counter()
+        try:
+            stage()
+        finally:
+            self._stages.append({'name': name, 'seconds': time.perf_counter() - start_time})
+        print(f'...{name} took {self._stages[-1]["seconds"]:.1f} seconds')
+
+    def _deploy(self) -> None:
+        CdkManager(self._config).deploy_aws_resources(ALL_TARGET, self._platform)
+        self._run_id = self._get_run_catalog().get_active(self._config.get_deployment_name())['run_id']
+
+    def _scale(self, client_counts: List[int], measure_seconds: float, scale_timeout: float) -> List[Dict]:
+        stack_outputs = StackOutputs(self._config.get_deployment_name(), SIMULATION_REGION)
+        scaler = ClientScaler(stack_outputs.get(CLIENT_STACK_SUFFIX, CLIENT_CLUSTER_NAME_OUTPUT_KEY),
+                              stack_outputs.get(CLIENT_STACK_SUFFIX, CLIENT_SERVICE_NAME_OUTPUT_KEY),
+                              stack_outputs.get(CLIENT_STACK_SUFFIX, CLIENT_LOG_GROUP_NAME_OUTPUT_KEY),
+                              SIMULATION_REGION)
+        steps = []
+        for count in client_counts:
+            start_time = time.perf_counter()
+            connected = scaler.scale(count, scale_timeout, SIMULATION_RECONCILE_SECONDS)
+            steps.append({'client_count': count, 'connected': connected,
+                          'seconds_to_connected': time.perf_counter() - start_time})
+            if not connected:
+                raise RuntimeError(f'{count} simulated clients did not connect within {scale_timeout} seconds')
+            time.sleep(measure_seconds)
+        return steps
+
+    def _collect(self) -> List[str]:
+        bundle = ArtifactBundle(SIMULATION_EXPORT_BUCKET_NAME, get_bundle_manifest_key(self._run_id),
+                                SIMULATION_REGION)
+        return bundle.extract(os.path.join(self._work_path, 'artifacts'))
+
+    def _analyze(self) -> Dict:
+        artifacts_path = os.path.join(self._work_path, 'artifacts')
+        metrics_store = MetricsStore(self._config.get_path(SCALER_CONFIG_METRICS_STORE_PATH_KEY))
+        event_count = metrics_store.ingest_artifacts(artifacts_path)
+        tick_time = metrics_store.aggregate('args.TickTimeMs', [self._run_id]).get(self._run_id, {})
+
+        analyzer = LogAnalyzer()
+        server_path = os.path.join(artifacts_path, RUN_KEY_PREFIX, self._run_id, 'server')
+        for log_folder_path in sorted(_find_folders(server_path, SERVER_LOG_FOLDER_NAME)):
+            for log_path in sorted(os.listdir(log_folder_path)):
+                analyzer.add_log(os.path.join(log_folder_path, log_path))
+        report = analyzer.get_report()
+        return {'metrics_event_count': event_count, 'tick_time_ms': tick_time,
+                'server_log': {'series': report.get('series', {}), 'events': report.get('events', {})}}
+
+    def _get_run_catalog(self) -> RunCatalog:
+        return RunCatalog(self._config.get_path(SCALER_CONFIG_RUN_CATALOG_PATH_KEY))
+
+
+def format_simulation_report(report: Dict) -> str:
+    """
+    Format the stage timings of a simulation report as a text table
+    :param report: Simulation report
+    :return: Text table
+    """
+    lines = [f'Simulated run {report["run_id"]}', f'{"stage":<12} {"seconds":>10}']
+    lines += [f'{stage["name"]:<12} {stage["seconds"]:>10.2f}' for stage in report['stages']]
+    lines.append(f'{"total":<12} {report["total_seconds"]:>10.2f}')
+    for step in report['scale_steps']:
+        lines.append(f'{step["client_count"]} clients connected in {step["seconds_to_connected"]:.1f} seconds')
+    lines.append(f'{report["artifact_count"]} artifacts collected, '
+                 f'{report["analysis"].get("metrics_event_count", 0)} metrics events ingested')
+    return '\n'.join(lines)
+
+
+def _find_folders(root_path: str, folder_name: str) -> List[str]:
+    return [folder_path for folder_path, _, _ in os.walk(root_path) if os.path.basename(folder_path) == folder_name]
@@ -0,0 +1,299 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import calendar
+import glob
+import gzip
+import math
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from constants import *
+
+SECONDS_PER_DAY = 24 * 60 * 60
+HISTOGRAM_EDGES = np.geomspace(*ANALYSIS_HISTOGRAM_RANGE, ANALYSIS_HISTOGRAM_BINS + 1)
+
+
+class LogRecord(NamedTuple):
+    """
+    Sample or event parsed from an O3DE log line
+    """
+    timestamp: float
+    kind: str
+    value: float
+
+
+def read_log_lines(path: str) -> Iterator[str]:
+    """
+    Read the lines of a log lazily, so the whole log is never held in memory
+    :param path: Path of a log file, a gzip-compressed log file (.gz), or a folder of gzip chunks synced from a
+    server or client. Chunks are read in name order, which is the byte order of the synced file
+    :return: Log lines without the line endings
+    """
+    if os.path.isdir(path):
+        chunk_paths = sorted(glob.glob(os.path.join(path, '*.gz')))
+    else:
+        chunk_paths = [path]
+
+    # Chunks are byte ranges of the synced file, so a line can span two chunks
+    partial_line = b''
+    for chunk_path in chunk_paths:
+        opener = gzip.open if chunk_path.endswith('.gz') else open
+        with opener(chunk_path, 'rb') as log_file:
+            for line in log_file:
+                if not line.endswith(b'\n'):
+                    partial_line += line
+                    continue
+                yield (partial_line + line).decode('utf-8', errors='replace').rstrip('\r\n')
+                partial_line = b''
+    if partial_line:
+        yield partial_line.decode('utf-8', errors='replace').rstrip('\r')
+
+
+def parse_log(lines: Iterable[str]) -> Iterator[LogRecord]:
+    """
+    Parse the samples and events of O3DE log lines. See the LOG_*_PATTERN constants for the line formats
+    :param lines: Log lines
+    :return: Parsed records in log order. Lines without a timestamp get the timestamp of the previous line.
+    Times of the day without a date are counted from the first day of the log and roll over at midnight
+    """
+    timestamp_pattern = re.compile(LOG_TIMESTAMP_PATTERN)
+    event_patterns = [(kind, re.compile(pattern)) for kind, pattern in zip(LOG_EVENT_KINDS, [
+        LOG_CONNECT_PATTERN, LOG_DISCONNECT_PATTERN, LOG_WARNING_PATTERN, LOG_ERROR_PATTERN])]
+    sample_patterns = [(kind, re.compile(pattern)) for kind, pattern in LOG_SAMPLE_PATTERNS.items()]
+
+    timestamp = 0.0
+    day_offset = 0.0
+    previous_time_of_day = None
+    for line in lines:
+        match = timestamp_pattern.match(line)
+        if match:
+            year, month, day, hours, minutes, seconds = match.groups()
+            time_of_day = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+            if year:
+                timestamp = calendar.timegm((int(year), int(month), int(day), 0, 0, 0)) + time_of_day
+            else:
+                if previous_time_of_day is not None and time_of_day < previous_time_of_day - SECONDS_PER_DAY / 2:
+                    day_offset += SECONDS_PER_DAY
+                previous_time_of_day = time_of_day
+                timestamp = day_offset + time_of_day
+
+        for kind, pattern in event_patterns:
+            if pattern.search(line):
+                yield LogRecord(timestamp, kind, 1.0)
+        for kind, pattern in sample_patterns:
+            sample_match = pattern.search(line)
+            if sample_match:
+                yield LogRecord(timestamp, kind, float(sample_match.group(1)))
+
+
+class SeriesStatistics(object):
+    """
+    Percentiles of a series of samples in constant memory. Samples are buffered in a NumPy array and the percentiles
+    are exact as long as the series fits in the buffer. Longer series are folded into a histogram with fixed
+    log-spaced bins, which bounds the relative error of the percentiles by the bin width
+    """
+
+    def __init__(self, buffer_size: int = ANALYSIS_BUFFER_SIZE):
+        """
+        :param buffer_size: Number of samples buffered before they are folded into the histogram
+        """
+        super().__init__()
+        self._buffer = np.empty(buffer_size, dtype=np.float64)
+        self._buffered = 0
+        self._edges = HISTOGRAM_EDGES
+        # Samples below and above the histogram range are counted in the first and last bins
+        self._counts = None
+        self._count = 0
+        self._sum = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+
+    @property
+    def count(self) -> int:
+        return self._count + self._buffered
+
+    def add(self, value: float) -> None:
+        if self._buffered == len(self._buffer):
+            self._fold()
+        self._buffer[self._buffered] = value
+        self._buffered += 1
+
+    def extend(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        while len(values):
+            if self._buffered == len(self._buffer):
+                self._fold()
+            length = min(len(values), len(self._buffer) - self._buffered)
+            self._buffer[self._buffered:self._buffered + length] = values[:length]
+            self._buffered += length
+            values = values[length:]
+
+    def get_summary(self, percentiles: List[float] = None) -> Dict:
+        """
+        Get the summary statistics of the series
+        :param percentiles: Percentiles to compute. Defaults to ANALYSIS_PERCENTILES
+        :return: Count, mean, min, max and the percentiles keyed p<percentile>, e.g. p99
+        """
+        percentiles = percentiles if percentiles else ANALYSIS_PERCENTILES
+        values = self._buffer[:self._buffered]
+        count = self._count + len(values)
+        if count == 0:
+            return {'count': 0}
+
+        summary = {
+            'count': count,
+            'mean': (self._sum + float(values.sum())) / count,
+            'min': min(self._min, float(values.min())) if len(values) else self._min,
+            'max': max(self._max, float(values.max())) if len(values) else self._max,
+        }
+        if self._counts is None:
+            for percentile, value in zip(percentiles, np.percentile(values, percentiles)):
+                summary[f'p{percentile:g}'] = float(value)
+        else:
+            counts = self._counts + self._get_histogram(values)
+            for percentile in percentiles:
+                summary[f'p{percentile:g}'] = self._get_histogram_percentile(counts, percentile, summary)
+        return summary
+
+    def _fold(self) -> None:
+        values = self._buffer[:self._buffered]
+        histogram = self._get_histogram(values)
+        self._counts = histogram if self._counts is None else self._counts + histogram
+        self._count += len(values)
+        self._sum += float(values.sum())
+        self._min = min(self._min, float(values.min()))
+        self._max = max(self._max, float(values.max()))
+        self._buffered = 0
+
+    def _get_histogram(self, values: np.ndarray) -> np.ndarray:
+        clipped = np.clip(values, self._edges[0], self._edges[-1])
+        return np.histogram(clipped, bins=self._edges)[0]
+
+    def _get_histogram_percentile(self, counts: np.ndarray, percentile: float, summary: Dict) -> float:
+        cumulative = np.cumsum(counts)
+        rank = percentile / 100 * (cumulative[-1] - 1)
+        index = int(np.searchsorted(cumulative, rank, side='right'))
+        # Interpolate geometrically within the bin, then keep the estimate within the observed range
+        before = cumulative[index - 1] if index > 0 else 0
+        fraction = (rank - before + 0.5) / counts[index]
+        low, high = self._edges[index], self._edges[index + 1]
+        estimate = float(low * (high / low) ** min(max(fraction, 0.0), 1.0))
+        return min(max(estimate, summary['min']), summary['max'])
+
+
+class LogAnalyzer(object):
+    """
+    Compute the percentiles of the sampled series and the time-windowed aggregates of O3DE logs in a single pass
+    """
+
+    def __init__(self, window_seconds: float = DEFAULT_ANALYSIS_WINDOW_SECONDS,
+                 buffer_size: int = ANALYSIS_BUFFER_SIZE):
+        """
+        :param window_seconds: Length of the aggregation windows
+        :param buffer_size: Number of samples of a series buffered before they are folded into its histogram
+        """
+        super().__init__()
+        self._window_seconds = window_seconds
+        self._buffer_size = buffer_size
+        self._series = {}
+        self._event_counts = {kind: 0 for kind in LOG_EVENT_KINDS}
+        self._windows = []
+        self._window_start = None
+        self._window_series = {}
+        self._window_events = {}
+        self._first_timestamp = None
+        self._last_timestamp = None
+
+    def add_log(self, path: str) -> None:
+        """
+        Analyze a log. Logs are expected to be added in time order
+        :param path: Path of a log file, gzip-compressed log file or folder of synced gzip chunks
+        """
+        self.add_records(parse_log(read_log_lines(path)))
+
+    def add_records(self, records: Iterable[LogRecord]) -> None:
+        for record in records:
+            if self._first_timestamp is None:
+                self._first_timestamp = record.timestamp
+            self._last_timestamp = record.timestamp
+
+            window_start = math.floor(record.timestamp / self._window_seconds) * self._window_seconds
+            if self._window_start is None or window_start > self._window_start:
+                self._close_window()
+                self._window_start = window_start
+
+            if record.kind in self._event_counts:
+                self._event_counts[record.kind] += 1
+                self._window_events[record.kind] = self._window_events.get(record.kind, 0) + 1
+            else:
+                if record.kind not in self._series:
+                    self._series[record.kind] = SeriesStatistics(self._buffer_size)
+                self._series[record.kind].add(record.value)
+                if record.kind not in self._window_series:
+                    self._window_series[record.kind] = SeriesStatistics(self._buffer_size)
+                self._window_series[record.kind].add(record.value)
+
+    def get_report(self) -> Dict:
+        """
+        Get the analysis report
+        :return: Time range, event counts, summary of every series and the aggregates of every window
+        """
+        self._close_window()
+        return {
+            'start_time': self._first_timestamp,
+            'end_time': self._last_timestamp,
+            'window_seconds': self._window_seconds,
+            'events': dict(self._event_counts),
+            'series': {kind: series.get_summary() for kind, series in sorted(self._series.items())},
+            'windows': list(self._windows)
+        }
+
+    def _close_window(self) -> None:
+        if self._window_start is None or (not self._window_series and not self._window_events):
+            return
+        self._windows.append({
+            'start_time': self._window_start,
+            'events': self._window_events,
+            'series': {kind: series.get_summary() for kind, series in sorted(self._window_series.items())}
+        })
+        self._window_series = {}
+        self._window_events = {}
+
+
+def format_analysis(report: Dict, max_windows: Optional[int] = None) -> str:
+    """
+    Format an analysis report as text tables
+    :param report: Analysis report
+    :param max_windows: Maximum number of windows to include. The latest windows are kept. All if not specified
+    :return: Text report
+    """
+    percentile_keys = [f'p{percentile:g}' for percentile in ANALYSIS_PERCENTILES]
+    lines = [', '.join(f'{kind} {count}' for kind, count in report['events'].items())]
+    lines.append(f'{"series":<16} {"count":>10} {"mean":>10} {"min":>10} ' +
+                 ' '.join(f'{key:>10}' for key in percentile_keys) + f' {"max":>10}')
+    for kind, summary in report['series'].items():
+        if not summary['count']:
+            continue
+        lines.append(f'{kind:<16} {summary["count"]:>10} {summary["mean"]:>10.2f} {summary["min"]:>10.2f} ' +
+                     ' '.join(f'{summary[key]:>10.2f}' for key in percentile_keys) + f' {summary["max"]:>10.2f}')
+
+    windows = report['windows'][-max_windows:] if max_windows else report['windows']
+    if windows:
+        lines.append(f'{"window":<12} {"series":<16} {"count":>8} {"mean":>10} ' +
+                     ' '.join(f'{key:>10}' for key in percentile_keys) + f' {"events":>24}')
+        for window in windows:
+            offset = window['start_time'] - report['start_time']
+            events = ' '.join(f'{kind}={count}' for kind, count in window['events'].items())
+            for kind, summary in window['series'].items() or [('-', None)]:
+                if summary is None:
+                    lines.append(f'{offset:<12.0f} {kind:<16} {"":>8} {"":>10} ' +
+                                 ' '.join(f'{"":>10}' for _ in percentile_keys) + f' {events:>24}')
+                    continue
+                lines.append(f'{offset:<12.0f} {kind:<16} {summary["count"]:>8} {summary["mean"]:>10.2f} ' +
+                             ' '.join(f'{summary[key]:>10.2f}' for key in percentile_keys) + f' {events:>24}')
+                events = ''
+    return '\n'.join(lines)
@@ -2,11 +2,35 @@
 # SPDX-License-Identifier: MIT-0
 
 import argparse
+import datetime
+import json
+import os
+import sys
+import time
 
+from artifact_bundle import ArtifactBundle, get_bundle_manifest_key
 from config import AutoScalerConfig
 from constants import *
 from package_builder import PackageBuilder
+from regression_detector import RunComparison, format_regression_markdown, get_regression_metrics, \
+    parse_metric_sources, parse_phases
 from cdk_manager import CdkManager
+from capacity_search import CapacitySearch, ClientScaler, ServerLogTail, ServerMetricsCollector, evaluate_slos, \
+    format_capacity_curve, get_slo_percentiles, parse_slo
+from client_readiness import ClientReadinessMonitor, format_histogram, get_readiness_report
+from flow_log_analyzer import BandwidthAccounting, FlowLogAnalyzer, FlowLogEndpoints, format_bandwidth_report, \
+    read_flow_log_lines
+from image_build_timings import ImageBuildTimings, format_timings
+from local_simulation import LocalSimulation, SimulationPipeline, create_stub_project, format_simulation_report
+from log_analyzer import LogAnalyzer, format_analysis
+from metrics_store import MetricsStore
+from network_probe import NetworkProbe, format_probe_report
+from run_catalog import RunCatalog, RunCatalogStore, get_run_key_prefix
+from run_pipeline import RunPipeline, format_run_report
+from server_updater import ServerUpdater
+from size_recommender import SizeRecommender
+from soak_analyzer import SoakAnalyzer, format_soak_report
+from stack_outputs import StackOutputs
 
 
 def _create_auto_scaler_config(args):
@@ -60,6 +84,543 @@ def clear(config: AutoScalerConfig, args: argparse.Namespace) -> None:
         cdk_manager.destroy_aws_resources(METRICS_PIPELINE_TARGET, args.platform)
 
 
+def run(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Build, deploy, hold, clear and collect a test run end to end, resuming from the last completed stage
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    pipeline = RunPipeline(config, args.platform, args.state_file, args.hold_minutes, args.bucket, args.output_path,
+                           args.readiness_timeout)
+    try:
+        pipeline.run(args.restart)
+    finally:
+        # The timings are reported even if a stage fails, before the error
+        report = pipeline.get_report()
+        print(format_run_report(report))
+        if args.report_file:
+            with open(args.report_file, 'w') as report_file:
+                json.dump(report, report_file, indent=1)
+            print(f'Run report is saved to {args.report_file}')
+
+
+def recommend(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Recommend the cheapest client and server sizes that keep utilization headroom
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    recommender = SizeRecommender(args.history_file, args.headroom, args.percentile)
+    if args.collect:
+        recommender.collect(config, args.hours)
+        recommender.save()
+
+    recommendations = {}
+    for recommendation in [recommender.recommend_client(), recommender.recommend_server()]:
+        if recommendation:
+            recommendations.update(recommendation)
+    if not recommendations:
+        print(f'[Warn] No utilization is recorded in {args.history_file}. '
+              f'Run the command with --collect while the stacks are deployed')
+        return
+
+    print(f'Recommended sizes with {args.headroom}% headroom at p{args.percentile} utilization:')
+    for key, value in recommendations.items():
+        print(f'    {key}: {value}')
+
+    if args.apply:
+        for key in [SCALER_CONFIG_CLIENT_TASK_CPU_UNITS_KEY, SCALER_CONFIG_CLIENT_TASK_MEMORY_MIB_KEY,
+                    SCALER_CONFIG_SERVER_INSTANCE_TYPE_KEY]:
+            if key in recommendations:
+                config.set(key, recommendations[key])
+        config.save(args.config_file)
+        print(f'Recommended sizes are saved to {args.config_file}')
+
+
+def wait_clients(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Wait until the requested number of clients are connected and report their time-to-connected
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    region = config.get_str(SCALER_CONFIG_AWS_REGION_KEY, os.environ.get('CDK_DEFAULT_REGION'))
+    deployment_name = config.get_deployment_name()
+    expected_count = int(config.get_str(SCALER_CONFIG_CLIENT_COUNT_KEY, SCALER_CONFIG_DEFAULT_CLIENT_COUNT))
+    count = args.count if args.count else expected_count
+
+    log_group_name = StackOutputs(deployment_name, region).get(CLIENT_STACK_SUFFIX, CLIENT_LOG_GROUP_NAME_OUTPUT_KEY)
+    monitor = ClientReadinessMonitor(log_group_name, region, time.time() - args.lookback * 60)
+    all_connected = monitor.wait_for_clients(count, expected_count, args.timeout, args.poll_interval)
+
+    print('Time-to-connected histogram:')
+    print(format_histogram(monitor.get_times_to_connected(), args.bin_seconds))
+    if args.report_file:
+        with open(args.report_file, 'w') as report_file:
+            json.dump(get_readiness_report(monitor), report_file, indent=1)
+        print(f'Readiness report is saved to {args.report_file}')
+
+    if not all_connected:
+        print(f'[Error] Only {monitor.connected_count} of {count} clients connected within {args.timeout} seconds')
+        sys.exit(1)
+
+
+def find_capacity(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Search the maximum number of clients the deployed server sustains within the service level objectives
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    region = config.get_str(SCALER_CONFIG_AWS_REGION_KEY, os.environ.get('CDK_DEFAULT_REGION'))
+    deployment_name = config.get_deployment_name()
+    objectives = [parse_slo(slo) for slo in (args.slo if args.slo else DEFAULT_CAPACITY_SLOS)]
+    run = _get_run_catalog(config).get_active(deployment_name)
+    if not run:
+        raise RuntimeError('No active run is found in the run catalog. Deploy the server and clients first')
+
+    stack_outputs = StackOutputs(deployment_name, region)
+    instance_id = stack_outputs.get(SERVER_STACK_SUFFIX, SERVER_INSTANCE_ID_OUTPUT_KEY)
+    log_tail = ServerLogTail(
+        stack_outputs.get(COMMON_STACK_SUFFIX, ARTIFACT_BUCKET_NAME_OUTPUT_KEY),
+        f'{get_run_key_prefix(run["run_id"])}/server/{instance_id}/{SERVER_LOG_FOLDER_NAME}/', region)
+    collector = ServerMetricsCollector(log_tail, instance_id, region)
+    scaler = ClientScaler(stack_outputs.get(CLIENT_STACK_SUFFIX, CLIENT_CLUSTER_NAME_OUTPUT_KEY),
+                          stack_outputs.get(CLIENT_STACK_SUFFIX, CLIENT_SERVICE_NAME_OUTPUT_KEY),
+                          stack_outputs.get(CLIENT_STACK_SUFFIX, CLIENT_LOG_GROUP_NAME_OUTPUT_KEY), region)
+    percentiles = get_slo_percentiles(objectives)
+
+    def run_step(count: int) -> dict:
+        if not scaler.scale(count, args.scale_timeout):
+            return {'passed': False, 'results': [],
+                    'reason': f'{count} clients did not connect within {args.scale_timeout} seconds'}
+        time.sleep(args.settle_seconds)
+        collector.start()
+        time.sleep(args.measure_seconds)
+        summaries = collector.collect(percentiles)
+        passed, results = evaluate_slos(objectives, summaries)
+        return {'passed': passed, 'results': results, 'summaries': summaries}
+
+    initial_count = scaler.get_desired_count()
+    print(f'Searching the client capacity of run {run["run_id"]} with objectives '
+          f'{", ".join(str(objective) for objective in objectives)}')
+    try:
+        result = CapacitySearch(run_step, args.min_clients, args.max_clients, args.resolution).search()
+    finally:
+        # The next deploy also resets the service to the configured client count
+        scaler.set_desired_count(initial_count)
+
+    print(format_capacity_curve(result))
+    if args.report_file:
+        with open(args.report_file, 'w') as report_file:
+            json.dump({'run_id': run['run_id'], 'objectives': [str(objective) for objective in objectives],
+                       **result}, report_file, indent=1)
+        print(f'Capacity curve is saved to {args.report_file}')
+
+
+def probe_network(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Measure the packet rate and bandwidth capacity of the network path from the clients to the server port
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    region = config.get_str(SCALER_CONFIG_AWS_REGION_KEY, os.environ.get('CDK_DEFAULT_REGION'))
+    project_name = config.get_str(SCALER_CONFIG_PROJECT_NAME_KEY, SCALER_CONFIG_DEFAULT_PROJECT_NAME)
+    deployment_name = config.get_deployment_name()
+    if str(config.get(SCALER_CONFIG_NETWORK_PROBE_KEY, SCALER_CONFIG_DEFAULT_NETWORK_PROBE)).lower() != 'true':
+        raise RuntimeError(f'Set {SCALER_CONFIG_NETWORK_PROBE_KEY} to true in the config file and deploy the clients '
+                           f'to create the probe task definition first')
+    run = _get_run_catalog(config).get_active(deployment_name)
+    if not run:
+        raise RuntimeError('No active run is found in the run catalog. Deploy the server and clients first')
+
+    stack_outputs = StackOutputs(deployment_name, region)
+    probe = NetworkProbe(
+        stack_outputs.get(COMMON_STACK_SUFFIX, ARTIFACT_BUCKET_NAME_OUTPUT_KEY), run['run_id'],
+        stack_outputs.get(SERVER_STACK_SUFFIX, SERVER_INSTANCE_ID_OUTPUT_KEY),
+        stack_outputs.get(CLIENT_STACK_SUFFIX, CLIENT_CLUSTER_NAME_OUTPUT_KEY),
+        stack_outputs.get(CLIENT_STACK_SUFFIX, CLIENT_SERVICE_NAME_OUTPUT_KEY),
+        stack_outputs.get(CLIENT_STACK_SUFFIX, NETWORK_PROBE_TASK_DEFINITION_OUTPUT_KEY), project_name, region)
+    print('[Warn] The server is stopped while the probe runs and started again once it ends')
+    report = probe.run(
+        config.get_str(SCALER_CONFIG_SERVER_PRIVATE_IP_KEY, SCALER_CONFIG_DEFAULT_SERVER_PRIVATE_IP),
+        int(config.get_str(SCALER_CONFIG_SERVER_PORT_KEY, SCALER_CONFIG_DEFAULT_SERVER_PORT)),
+        args.rate if args.rate else DEFAULT_NETWORK_PROBE_RATES, args.senders, args.step_seconds, args.packet_bytes,
+        args.start_delay, args.loss_threshold)
+
+    print(format_probe_report(report))
+    print(f'Network probe report is saved with the artifacts of run {run["run_id"]} '
+          f'under {NETWORK_PROBE_FOLDER_NAME}/{report["probe_id"]}/')
+    if args.report_file:
+        with open(args.report_file, 'w') as report_file:
+            json.dump(report, report_file, indent=1)
+        print(f'Network probe report is saved to {args.report_file}')
+    if report['errors']:
+        print(f'[Error] The network probe reported {len(report["errors"])} error(s): {report["errors"][0]}')
+        sys.exit(1)
+
+
+def bandwidth_report(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Report the bytes and packets every client exchanged with the server per client and per minute from the VPC Flow
+    Logs delivered to the artifacts bucket
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    region = config.get_str(SCALER_CONFIG_AWS_REGION_KEY, os.environ.get('CDK_DEFAULT_REGION'))
+    deployment_name = config.get_deployment_name()
+    run_catalog = _get_run_catalog(config)
+    run = run_catalog.get(args.run_id) if args.run_id else run_catalog.get_active(deployment_name)
+    if not run:
+        raise RuntimeError('No run is found in the run catalog. Deploy the server and clients first or specify the '
+                           'run ID with --run-id')
+
+    stack_outputs = StackOutputs(deployment_name, region)
+    accounting = BandwidthAccounting(
+        stack_outputs.get(COMMON_STACK_SUFFIX, ARTIFACT_BUCKET_NAME_OUTPUT_KEY), run['run_id'], region)
+    # Clients connect to the relay instead of the server if it is deployed
+    relay_deployed = bool(config.get(SCALER_CONFIG_RELAY_PROFILES_KEY, SCALER_CONFIG_DEFAULT_RELAY_PROFILES))
+    server_addresses = [config.get_str(SCALER_CONFIG_SERVER_PRIVATE_IP_KEY, SCALER_CONFIG_DEFAULT_SERVER_PRIVATE_IP)]
+    if relay_deployed:
+        server_addresses.append(config.get_str(SCALER_CONFIG_RELAY_PRIVATE_IP_KEY,
+                                               SCALER_CONFIG_DEFAULT_RELAY_PRIVATE_IP))
+    endpoints = FlowLogEndpoints(server_addresses)
+    saved_endpoints = None
+    if not run['end_time']:
+        # The network interfaces of the server and the client tasks are only described while they are deployed
+        try:
+            saved_endpoints = accounting.update_endpoints(stack_outputs, server_addresses, relay_deployed)
+        except Exception as error:
+            print(f'[Warn] Failed to collect the endpoints of the deployed server and clients: {error}')
+    if not saved_endpoints:
+        saved_endpoints = accounting.load_endpoints()
+    if saved_endpoints:
+        endpoints.merge(saved_endpoints)
+    if not endpoints.clients:
+        raise RuntimeError(f'No client endpoints are found for run {run["run_id"]}. They are saved with the run when '
+                           f'the clients are deployed and destroyed with {SCALER_CONFIG_VPC_FLOW_LOGS_KEY} set to true, '
+                           f'or when bandwidth-report runs while the clients are deployed')
+
+    start_time = datetime.datetime.fromisoformat(run['start_time']).timestamp()
+    end_time = datetime.datetime.fromisoformat(run['end_time']).timestamp() if run['end_time'] else time.time()
+    analyzer = FlowLogAnalyzer(endpoints, start_time, end_time)
+    analysis_start_time = time.time()
+    if args.flow_log_path:
+        for flow_log_path in args.flow_log_path:
+            if not os.path.exists(flow_log_path):
+                raise RuntimeError(f'Flow log {flow_log_path} does not exist')
+            analyzer.add_lines(read_flow_log_lines(flow_log_path))
+    else:
+        account_id = config.get_str(SCALER_CONFIG_AWS_ACCOUNT_ID_KEY, os.environ.get('CDK_DEFAULT_ACCOUNT'))
+        keys = accounting.list_flow_log_keys(account_id, start_time, end_time)
+        if not keys:
+            print(f'[Warn] No flow logs are found for run {run["run_id"]}. Set {SCALER_CONFIG_VPC_FLOW_LOGS_KEY} to '
+                  f'true in the config file and deploy again to deliver the VPC Flow Logs')
+            return
+        for key in keys:
+            analyzer.add_lines(accounting.read_flow_log(key))
+
+    report = dict(run_id=run['run_id'], **analyzer.get_report())
+    print(format_bandwidth_report(report))
+    print(f'Analyzed {report["record_count"]} flow log records in {time.time() - analysis_start_time:.1f} seconds')
+    print(f'Bandwidth report is saved with the artifacts of run {run["run_id"]} as {accounting.save_report(report)}')
+    if args.report_file:
+        with open(args.report_file, 'w') as report_file:
+            json.dump(report, report_file, indent=1)
+        print(f'Bandwidth report is saved to {args.report_file}')
+
+
+def update_server(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Update the project package on the deployed server and restart the server without baking a new AMI
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    region = config.get_str(SCALER_CONFIG_AWS_REGION_KEY, os.environ.get('CDK_DEFAULT_REGION'))
+    project_name = config.get_str(SCALER_CONFIG_PROJECT_NAME_KEY, SCALER_CONFIG_DEFAULT_PROJECT_NAME)
+    package_path = os.path.join(
+        config.get_path(SCALER_CONFIG_OUTPUT_PATH_KEY, SCALER_CONFIG_DEFAULT_OUTPUT_PATH), args.platform,
+        OUTPUT_PACKAGE_FOLDER_NAME)
+
+    stack_outputs = StackOutputs(config.get_deployment_name(), region)
+    updater = ServerUpdater(
+        stack_outputs.get(COMMON_STACK_SUFFIX, ARTIFACT_BUCKET_NAME_OUTPUT_KEY),
+        stack_outputs.get(SERVER_STACK_SUFFIX, SERVER_INSTANCE_ID_OUTPUT_KEY),
+        project_name, region, args.upload_workers)
+
+    start_time = time.time()
+    update = updater.upload(package_path, args.full)
+    upload_seconds = time.time() - start_time
+    updated = updater.apply(update, args.timeout)
+    print(f'Uploaded {len(update["changed"])} files ({update["uploaded_bytes"]} bytes) in {upload_seconds:.1f} seconds, '
+          f'server update took {time.time() - start_time:.1f} seconds in total')
+    if not updated:
+        sys.exit(1)
+
+
+def image_timings(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Report the per-component timings of the EC2 Image Builder runs
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    region = config.get_str(SCALER_CONFIG_AWS_REGION_KEY, os.environ.get('CDK_DEFAULT_REGION'))
+    deployment_name = config.get_deployment_name()
+    stack_suffix = BASE_IMAGE_STACK_SUFFIX if args.target == BASE_IMAGE_TARGET else SERVER_STACK_SUFFIX
+
+    log_bucket_name = StackOutputs(deployment_name, region).get(stack_suffix, IMAGE_BUILDER_LOG_BUCKET_NAME_OUTPUT_KEY)
+    runs = ImageBuildTimings(log_bucket_name, region).collect(args.prefix, args.latest)
+    if not runs:
+        print(f'[Warn] No EC2 Image Builder logs are found in {log_bucket_name}')
+        return
+
+    for run in runs:
+        total = '-' if run['seconds'] is None else f'{run["seconds"]:.1f}s'
+        print(f'{run["key"]} started at {run["start_time"]}, {run["status"]} in {total}')
+        print(format_timings(run['timings']))
+    if args.report_file:
+        with open(args.report_file, 'w') as report_file:
+            json.dump(runs, report_file, indent=1)
+        print(f'Image build timings are saved to {args.report_file}')
+
+
+def fetch_artifacts(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    List or download files of a run artifact bundle with range GETs
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    region = config.get_str(SCALER_CONFIG_AWS_REGION_KEY, os.environ.get('CDK_DEFAULT_REGION'))
+    run_id = args.run_id
+    if not run_id:
+        deployment_name = config.get_deployment_name()
+        runs = _get_run_catalog(config).list_runs(deployment_name)
+        if not runs:
+            raise RuntimeError('No run is found in the run catalog. Specify the run ID with --run-id')
+        run_id = runs[-1]['run_id']
+        print(f'Fetching the artifacts of the latest run {run_id}')
+
+    bundle = ArtifactBundle(args.bucket, get_bundle_manifest_key(run_id), region, args.workers)
+    if args.list:
+        for entry in bundle.files:
+            print(f'{entry["name"]:<80} {entry["size"]:>12}')
+        print(f'{bundle.manifest["file_count"]} files, {bundle.manifest["size"]} bytes '
+              f'({bundle.manifest["compressed_size"]} bytes compressed)')
+        return
+
+    start_time = time.time()
+    file_paths = bundle.extract(args.output_path, args.file)
+    print(f'Fetched {len(file_paths)} files to {args.output_path} in {time.time() - start_time:.1f} seconds')
+
+
+def runs(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    List the test runs or show a single run from the run catalog
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    run_catalog = _get_run_catalog(config)
+    if not args.run_id:
+        deployment_name = config.get_deployment_name()
+        for run in run_catalog.list_runs('' if args.all_projects else deployment_name):
+            print(f'{run["run_id"]:<28} {run["project_name"]:<24} {run["start_time"]:<26} '
+                  f'{run["end_time"] or "active":<26} {run["client_count"]:>6} clients')
+        return
+
+    run = run_catalog.get(args.run_id)
+    if not run and args.bucket:
+        # Runs started on other machines are read from their catalog object in the export bucket
+        region = config.get_str(SCALER_CONFIG_AWS_REGION_KEY, os.environ.get('CDK_DEFAULT_REGION'))
+        run = RunCatalogStore(args.bucket, region, EXPORT_KEY_PREFIX).get(args.run_id)
+        if run:
+            run_catalog.save(run)
+    if not run:
+        raise RuntimeError(f'Run {args.run_id} is not found in the run catalog')
+    print(json.dumps(run, indent=1))
+
+
+def analyze(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Report the frame and tick time percentiles, connection events and warnings of O3DE logs
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    analyzer = LogAnalyzer(args.window_seconds)
+    start_time = time.time()
+    for log_path in args.log_path:
+        if not os.path.exists(log_path):
+            raise RuntimeError(f'Log {log_path} does not exist')
+        analyzer.add_log(log_path)
+    report = analyzer.get_report()
+    if report['start_time'] is None:
+        print(f'[Warn] No samples or events are found in {", ".join(args.log_path)}')
+        return
+
+    print(format_analysis(report, args.windows))
+    print(f'Analyzed {len(args.log_path)} logs in {time.time() - start_time:.1f} seconds')
+    if args.report_file:
+        with open(args.report_file, 'w') as report_file:
+            json.dump(report, report_file, indent=1)
+        print(f'Log analysis is saved to {args.report_file}')
+
+
+def soak_report(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Report the leaks and degradations of a soak test run from the server process samples and server logs
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    analyzer = SoakAnalyzer(args.window_seconds)
+    for path in args.samples + args.log:
+        if not os.path.exists(path):
+            raise RuntimeError(f'{path} does not exist')
+    for samples_path in args.samples:
+        analyzer.add_process_samples(samples_path)
+    for log_path in args.log:
+        analyzer.add_server_log(log_path)
+
+    report = analyzer.get_report(args.confidence, args.min_drift_percent)
+    if not report['series']:
+        print(f'[Warn] Less than {SOAK_MIN_TREND_WINDOWS} windows of samples are found. '
+              f'Run the soak test longer or use shorter windows')
+        return
+
+    print(format_soak_report(report))
+    if args.report_file:
+        with open(args.report_file, 'w') as report_file:
+            json.dump(report, report_file, indent=1)
+        print(f'Soak report is saved to {args.report_file}')
+    if report['flagged']:
+        print(f'[Error] Upward trends are detected in {", ".join(report["flagged"])}')
+        sys.exit(1)
+
+
+def ingest_metrics(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Ingest the O3DE metrics files of run artifacts into the columnar metrics store
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    metrics_store = _get_metrics_store(config)
+    start_time = time.time()
+    event_count = 0
+    for artifacts_path in args.artifacts_path:
+        if not os.path.exists(artifacts_path):
+            raise RuntimeError(f'Artifacts {artifacts_path} do not exist')
+        event_count += metrics_store.ingest_artifacts(artifacts_path, args.run_id, args.shard)
+    print(f'Ingested {event_count} metrics events in {time.time() - start_time:.1f} seconds')
+
+
+def query_metrics(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Summarize a metrics column across runs from the columnar metrics store
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    metrics_store = _get_metrics_store(config)
+    if not args.column:
+        for column in metrics_store.list_columns(args.run_id):
+            print(column)
+        return
+
+    summaries = metrics_store.aggregate(args.column, args.run_id, args.shard, args.name, args.by_shard)
+    if not summaries:
+        print(f'[Warn] No metrics events are found for {args.column}')
+        return
+
+    percentile_keys = [f'p{percentile:g}' for percentile in ANALYSIS_PERCENTILES]
+    print(f'{"group":<56} {"count":>10} {"mean":>12} ' + ' '.join(f'{key:>12}' for key in percentile_keys) +
+          f' {"max":>12}')
+    for group, summary in summaries.items():
+        if not summary['count']:
+            print(f'{group:<56} {0:>10}')
+            continue
+        print(f'{group:<56} {summary["count"]:>10} {summary["mean"]:>12.3f} ' +
+              ' '.join(f'{summary[key]:>12.3f}' for key in percentile_keys) + f' {summary["max"]:>12.3f}')
+    if args.report_file:
+        with open(args.report_file, 'w') as report_file:
+            json.dump(summaries, report_file, indent=1)
+        print(f'Metrics summaries are saved to {args.report_file}')
+
+
+def compare_runs(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Compare the metrics of test runs to a baseline run and fail on regressions
+    :param config: Auto scaler config
+    :param args: CLI input arguments
+    """
+    if len(args.run_ids) < 2:
+        raise RuntimeError('Specify the baseline run ID followed by at least one run ID to compare')
+    regression_metrics = get_regression_metrics(
+        config.get(SCALER_CONFIG_REGRESSION_METRICS_KEY, SCALER_CONFIG_DEFAULT_REGRESSION_METRICS),
+        parse_metric_sources(args.metric_source))
+    unknown_metrics = [metric for metric in args.metric if metric not in regression_metrics]
+    if unknown_metrics:
+        raise RuntimeError(f'Unknown metrics {", ".join(unknown_metrics)}. '
+                           f'Expected one of {", ".join(regression_metrics)}')
+
+    metrics_store = _get_metrics_store(config)
+    missing_run_ids = [run_id for run_id in args.run_ids if not metrics_store.list_partitions([run_id])]
+    if missing_run_ids:
+        raise RuntimeError(f'No metrics are ingested for runs {", ".join(missing_run_ids)}. Run ingest-metrics first')
+
+    metrics = {metric: regression_metrics[metric] for metric in args.metric} if args.metric else regression_metrics
+    comparison = RunComparison(metrics_store, parse_phases(args.phase if args.phase else DEFAULT_REGRESSION_PHASES),
+                               metrics, args.percentile, args.resamples, args.confidence)
+    report = comparison.compare(args.run_ids[0], args.run_ids[1:], args.threshold_percent)
+    run_catalog = _get_run_catalog(config)
+    report['runs'] = {run_id: run_catalog.get(run_id) for run_id in args.run_ids}
+    markdown = format_regression_markdown(report, report['runs'])
+    print(markdown)
+    if args.report_file:
+        with open(args.report_file, 'w') as report_file:
+            json.dump(report, report_file, indent=1)
+        print(f'Comparison report is saved to {args.report_file}')
+    if args.markdown_file:
+        with open(args.markdown_file, 'w') as markdown_file:
+            markdown_file.write(markdown + '\n')
+        print(f'Comparison summary is saved to {args.markdown_file}')
+    if report['verdict'] == 'fail':
+        print(f'[Error] {report["regression_count"]} regression(s) are detected against {args.run_ids[0]}')
+        sys.exit(1)
+    if report['verdict'] == 'inconclusive':
+        print(f'[Error] No metric has enough samples in both runs to be compared. Check the metric sources '
+              f'({SCALER_CONFIG_REGRESSION_METRICS_KEY} config key or metric-source option) match the metrics of '
+              f'your project')
+        sys.exit(1)
+
+
+def simulate(config: AutoScalerConfig, args: argparse.Namespace) -> None:
+    """
+    Run and time a test run end to end against a local simulation of AWS and of the server and clients
+    :param config: Auto scaler config. The simulation uses its own config and stub project
+    :param args: CLI input arguments
+    """
+    if os.path.exists(args.work_path) and os.listdir(args.work_path):
+        raise RuntimeError(f'Simulation work path {args.work_path} is not empty')
+
+    client_counts = args.client_count if args.client_count else DEFAULT_SIMULATION_CLIENT_COUNTS
+    with LocalSimulation(args.work_path, args.sync_seconds) as simulation:
+        simulation_config = create_stub_project(args.work_path)
+        report = SimulationPipeline(simulation, simulation_config, args.work_path, args.platform).run(
+            client_counts, args.measure_seconds, args.scale_timeout)
+
+    print(format_simulation_report(report))
+    if args.report_file:
+        with open(args.report_file, 'w') as report_file:
+            json.dump(report, report_file, indent=1)
+        print(f'Simulation report is saved to {args.report_file}')
+    if report['errors']:
+        print(f'[Error] The simulation reported {len(report["errors"])} error(s): {report["errors"][0]}')
+        sys.exit(1)
+
+
+def _get_metrics_store(config: AutoScalerConfig) -> MetricsStore:
+    return MetricsStore(config.get_path(SCALER_CONFIG_METRICS_STORE_PATH_KEY, SCALER_CONFIG_DEFAULT_METRICS_STORE_PATH))
+
+
+def _get_run_catalog(config: AutoScalerConfig) -> RunCatalog:
+    return RunCatalog(config.get_path(SCALER_CONFIG_RUN_CATALOG_PATH_KEY, SCALER_CONFIG_DEFAULT_RUN_CATALOG_PATH))
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
         prog='main.py',
@@ -85,20 +646,456 @@ if __name__ == '__main__':
     parser_deploy = subparsers.add_parser('deploy', parents=[parser], help='Deploy multiplayer project AWS resources')
     parser_deploy.set_defaults(func=deploy)
     parser_deploy.add_argument(
-        '-t', '--target', choices=[SERVER_TARGET, CLIENT_TARGET, ALL_TARGET, METRICS_PIPELINE_TARGET],
+        '-t', '--target', choices=[SERVER_TARGET, CLIENT_TARGET, ALL_TARGET, METRICS_PIPELINE_TARGET, BASE_IMAGE_TARGET],
         action='store', default=ALL_TARGET,
         help='Target(s) to deploy. The server and client targets will be deployed if no target is specified. '
-             'Note that the AWSMetrics target is required to be deployed before the build'
+             'Note that the AWSMetrics target is required to be deployed before the build. '
+             'The base-image target bakes the server runtime dependencies into a reusable base AMI'
     )
 
     parser_clear = subparsers.add_parser('clear', parents=[parser], help='Clear deployed AWS resources')
     parser_clear.set_defaults(func=clear)
     parser_clear.add_argument(
-        '-t', '--target', choices=[SERVER_TARGET, CLIENT_TARGET, ALL_TARGET, METRICS_PIPELINE_TARGET],
+        '-t', '--target', choices=[SERVER_TARGET, CLIENT_TARGET, ALL_TARGET, METRICS_PIPELINE_TARGET, BASE_IMAGE_TARGET],
         action='store', default=ALL_TARGET,
         help='Target(s) to clear. All the AWS resources will be cleared if no target is specified'
     )
 
+    parser_run = subparsers.add_parser(
+        'run', parents=[parser],
+        help='Build, deploy, hold, clear and collect a test run end to end. A rerun resumes from the failed stage')
+    parser_run.set_defaults(func=run)
+    parser_run.add_argument(
+        '--state-file', action='store', default='',
+        help=f'Path of the file which records the completed stages. Defaults to {DEFAULT_RUN_STATE_PATH}, suffixed '
+             f'with the namespace if any, e.g. run_state.[namespace].json'
+    )
+    parser_run.add_argument(
+        '--restart', action='store_true',
+        help='Ignore the recorded stages and start over with a new run'
+    )
+    parser_run.add_argument(
+        '--hold-minutes', action='store', type=float, default=DEFAULT_RUN_HOLD_MINUTES,
+        help='Minutes to keep the clients running once they are connected, before clearing the deployment'
+    )
+    parser_run.add_argument(
+        '--readiness-timeout', action='store', type=float, default=DEFAULT_READINESS_TIMEOUT_SECONDS,
+        help='Maximum seconds to wait for the clients to connect'
+    )
+    parser_run.add_argument(
+        '--bucket', action='store', default='',
+        help='Name of the export bucket to collect the run artifacts from. The artifacts are not collected if not '
+             'specified'
+    )
+    parser_run.add_argument(
+        '--output-path', action='store', default='',
+        help=f'Folder to collect the run artifacts in. Defaults to {DEFAULT_RUN_ARTIFACTS_PATH}, suffixed with the '
+             f'namespace if any'
+    )
+    parser_run.add_argument(
+        '--report-file', action='store', default='',
+        help='Path to save the stage timings in JSON'
+    )
+
+    parser_recommend = subparsers.add_parser(
+        'recommend', parents=[parser], help='Recommend client and server sizes from utilization of past runs')
+    parser_recommend.set_defaults(func=recommend)
+    parser_recommend.add_argument(
+        '--history-file', action='store', default=UTILIZATION_HISTORY_FILENAME,
+        help='Path to the utilization history file of past runs'
+    )
+    parser_recommend.add_argument(
+        '--collect', action='store_true',
+        help='Collect utilization of the deployed stacks from Amazon CloudWatch into the history file first'
+    )
+    parser_recommend.add_argument(
+        '--hours', action='store', type=float, default=DEFAULT_UTILIZATION_COLLECTION_HOURS,
+        help='Hours of utilization datapoints to collect, counting back from now'
+    )
+    parser_recommend.add_argument(
+        '--headroom', action='store', type=float, default=DEFAULT_RECOMMENDATION_HEADROOM_PERCENT,
+        help='Percentage of capacity to keep free at the selected utilization percentile'
+    )
+    parser_recommend.add_argument(
+        '--percentile', action='store', type=float, default=DEFAULT_RECOMMENDATION_PERCENTILE,
+        help='Utilization percentile to size for'
+    )
+    parser_recommend.add_argument(
+        '--apply', action='store_true',
+        help='Save the recommended sizes to the config file'
+    )
+
+    parser_wait_clients = subparsers.add_parser(
+        'wait-clients', parents=[parser], help='Wait until the deployed clients are connected to the server')
+    parser_wait_clients.set_defaults(func=wait_clients)
+    parser_wait_clients.add_argument(
+        '-n', '--count', action='store', type=int, default=0,
+        help='Number of connected clients to wait for. Defaults to the client count in the config file'
+    )
+    parser_wait_clients.add_argument(
+        '--timeout', action='store', type=float, default=DEFAULT_READINESS_TIMEOUT_SECONDS,
+        help='Maximum seconds to wait for the clients'
+    )
+    parser_wait_clients.add_argument(
+        '--poll-interval', action='store', type=float, default=DEFAULT_READINESS_POLL_SECONDS,
+        help='Seconds between two checks of the client readiness events'
+    )
+    parser_wait_clients.add_argument(
+        '--lookback', action='store', type=float, default=DEFAULT_READINESS_LOOKBACK_MINUTES,
+        help='Minutes of readiness events to include, counting back from now'
+    )
+    parser_wait_clients.add_argument(
+        '--bin-seconds', action='store', type=float, default=DEFAULT_READINESS_HISTOGRAM_BIN_SECONDS,
+        help='Bin width of the time-to-connected histogram'
+    )
+    parser_wait_clients.add_argument(
+        '--report-file', action='store', default='',
+        help='Path to save the per-client readiness report in JSON'
+    )
+
+    parser_find_capacity = subparsers.add_parser(
+        'find-capacity', parents=[parser],
+        help='Search the maximum number of clients the server sustains within the service level objectives')
+    parser_find_capacity.set_defaults(func=find_capacity)
+    parser_find_capacity.add_argument(
+        '--slo', action='append', default=[],
+        help='Service level objective, <series>:<statistic><operator><threshold>, e.g. tick_time_ms:p95<=33.3. '
+             f'Can be repeated. Defaults to {" ".join(DEFAULT_CAPACITY_SLOS)}'
+    )
+    parser_find_capacity.add_argument(
+        '--min-clients', action='store', type=int, default=DEFAULT_CAPACITY_MIN_CLIENTS,
+        help='Client count of the first step'
+    )
+    parser_find_capacity.add_argument(
+        '--max-clients', action='store', type=int, default=DEFAULT_CAPACITY_MAX_CLIENTS,
+        help='Maximum client count to try'
+    )
+    parser_find_capacity.add_argument(
+        '--resolution', action='store', type=int, default=DEFAULT_CAPACITY_RESOLUTION,
+        help='Stop the search when the passing and failing client counts are this close'
+    )
+    parser_find_capacity.add_argument(
+        '--settle-seconds', action='store', type=float, default=DEFAULT_CAPACITY_SETTLE_SECONDS,
+        help='Seconds to wait after the clients are connected before measuring'
+    )
+    parser_find_capacity.add_argument(
+        '--measure-seconds', action='store', type=float, default=DEFAULT_CAPACITY_MEASURE_SECONDS,
+        help='Seconds to measure the server at each step. Should span at least one server artifact sync'
+    )
+    parser_find_capacity.add_argument(
+        '--scale-timeout', action='store', type=float, default=DEFAULT_CAPACITY_SCALE_TIMEOUT_SECONDS,
+        help='Maximum seconds to wait for the clients of a step to connect'
+    )
+    parser_find_capacity.add_argument(
+        '--report-file', action='store', default='',
+        help='Path to save the capacity curve in JSON'
+    )
+
+    parser_probe_network = subparsers.add_parser(
+        'probe-network', parents=[parser],
+        help='Measure the packet rate and bandwidth capacity of the network path from the clients to the server')
+    parser_probe_network.set_defaults(func=probe_network)
+    parser_probe_network.add_argument(
+        '--rate', action='append', type=int, default=[],
+        help='Packets per second of a step of each sender. Repeat it for every step, in increasing order. '
+             f'Defaults to {" ".join(str(rate) for rate in DEFAULT_NETWORK_PROBE_RATES)}'
+    )
+    parser_probe_network.add_argument(
+        '--senders', action='store', type=int, default=DEFAULT_NETWORK_PROBE_SENDERS,
+        help='Number of probe sender tasks. The rates of the senders add up'
+    )
+    parser_probe_network.add_argument(
+        '--step-seconds', action='store', type=float, default=DEFAULT_NETWORK_PROBE_STEP_SECONDS,
+        help='Seconds to send at every rate'
+    )
+    parser_probe_network.add_argument(
+        '--packet-bytes', action='store', type=int, default=DEFAULT_NETWORK_PROBE_PACKET_BYTES,
+        help='Size of the probe packets'
+    )
+    parser_probe_network.add_argument(
+        '--start-delay', action='store', type=float, default=DEFAULT_NETWORK_PROBE_START_DELAY_SECONDS,
+        help='Seconds for the sender tasks to start before the first step'
+    )
+    parser_probe_network.add_argument(
+        '--loss-threshold', action='store', type=float, default=DEFAULT_NETWORK_PROBE_LOSS_THRESHOLD_PERCENT,
+        help='Highest loss, in percent, of a step within the capacity'
+    )
+    parser_probe_network.add_argument(
+        '--report-file', action='store', default='',
+        help='Path to save the network probe report in JSON'
+    )
+
+    parser_bandwidth_report = subparsers.add_parser(
+        'bandwidth-report', parents=[parser],
+        help='Report the bytes and packets every client exchanged with the server from the VPC Flow Logs')
+    parser_bandwidth_report.set_defaults(func=bandwidth_report)
+    parser_bandwidth_report.add_argument(
+        '--run-id', action='store', default='',
+        help='ID of the run to report. Defaults to the active run'
+    )
+    parser_bandwidth_report.add_argument(
+        '--flow-log-path', action='append', default=[],
+        help='Flow log file or folder of flow log files to read instead of the artifacts bucket. Can be repeated'
+    )
+    parser_bandwidth_report.add_argument(
+        '--report-file', action='store', default='',
+        help='Path to save the bandwidth report in JSON'
+    )
+
+    parser_update_server = subparsers.add_parser(
+        'update-server', parents=[parser],
+        help='Sync the project package to the deployed server and restart it without baking a new AMI')
+    parser_update_server.set_defaults(func=update_server)
+    parser_update_server.add_argument(
+        '--full', action='store_true',
+        help='Upload the full project package instead of only the files changed since the last update'
+    )
+    parser_update_server.add_argument(
+        '--timeout', action='store', type=float, default=DEFAULT_SERVER_UPDATE_TIMEOUT_SECONDS,
+        help='Maximum seconds to wait for the server to be updated'
+    )
+    parser_update_server.add_argument(
+        '--upload-workers', action='store', type=int, default=DEFAULT_SERVER_UPDATE_UPLOAD_WORKERS,
+        help='Maximum number of files uploaded concurrently'
+    )
+
+    parser_image_timings = subparsers.add_parser(
+        'image-timings', parents=[parser], help='Report per-component timings of the EC2 Image Builder runs')
+    parser_image_timings.set_defaults(func=image_timings)
+    parser_image_timings.add_argument(
+        '-t', '--target', choices=[SERVER_TARGET, BASE_IMAGE_TARGET], action='store', default=SERVER_TARGET,
+        help='Target whose EC2 Image Builder logs to read'
+    )
+    parser_image_timings.add_argument(
+        '--prefix', action='store', default='',
+        help='Key prefix of the EC2 Image Builder logs to include'
+    )
+    parser_image_timings.add_argument(
+        '--latest', action='store', type=int, default=0,
+        help='Only report the latest number of component manager runs. All runs are reported if it is 0'
+    )
+    parser_image_timings.add_argument(
+        '--report-file', action='store', default='',
+        help='Path to save the timings in JSON'
+    )
+
+    parser_fetch_artifacts = subparsers.add_parser(
+        'fetch-artifacts', parents=[parser], help='List or download files of a run artifact bundle')
+    parser_fetch_artifacts.set_defaults(func=fetch_artifacts)
+    parser_fetch_artifacts.add_argument(
+        '--bucket', action='store', required=True,
+        help='Name of the bucket where the test artifacts are uploaded when the server stack is destroyed'
+    )
+    parser_fetch_artifacts.add_argument(
+        '--run-id', action='store', default='',
+        help='ID of the run to fetch the artifacts of. The latest run in the run catalog is used if not specified'
+    )
+    parser_fetch_artifacts.add_argument(
+        '--list', action='store_true',
+        help='List the files of the bundle instead of downloading them'
+    )
+    parser_fetch_artifacts.add_argument(
+        '--file', action='append', default=[],
+        help='Path of a file in the bundle to download. Can be repeated. All files are downloaded if not specified'
+    )
+    parser_fetch_artifacts.add_argument(
+        '--output-path', action='store', default='artifacts',
+        help='Folder to save the downloaded files to'
+    )
+    parser_fetch_artifacts.add_argument(
+        '--workers', action='store', type=int, default=DEFAULT_ARTIFACT_FETCH_WORKERS,
+        help='Maximum number of files downloaded concurrently'
+    )
+
+    parser_runs = subparsers.add_parser('runs', parents=[parser], help='List or show the test runs')
+    parser_runs.set_defaults(func=runs)
+    parser_runs.add_argument(
+        '--run-id', action='store', default='',
+        help='ID of the run to show. All the runs of the project are listed if not specified'
+    )
+    parser_runs.add_argument(
+        '--bucket', action='store', default='',
+        help='Name of the export bucket to read the run from if it is not in the local run catalog'
+    )
+    parser_runs.add_argument(
+        '--all-projects', action='store_true',
+        help='List the runs of all the projects'
+    )
+
+    parser_analyze = subparsers.add_parser(
+        'analyze', parents=[parser], help='Report frame and tick time percentiles and events of O3DE logs')
+    parser_analyze.set_defaults(func=analyze)
+    parser_analyze.add_argument(
+        'log_path', nargs='+',
+        help='Path of a log file, a gzip-compressed log file or a folder of synced log chunks. Logs are analyzed '
+             'in the given order'
+    )
+    parser_analyze.add_argument(
+        '--window-seconds', action='store', type=float, default=DEFAULT_ANALYSIS_WINDOW_SECONDS,
+        help='Length of the time windows to aggregate the samples and events in'
+    )
+    parser_analyze.add_argument(
+        '--windows', action='store', type=int, default=0,
+        help='Only print the latest number of windows. All windows are printed if it is 0'
+    )
+    parser_analyze.add_argument(
+        '--report-file', action='store', default='',
+        help='Path to save the analysis in JSON'
+    )
+
+    parser_compare_runs = subparsers.add_parser(
+        'compare-runs', parents=[parser], help='Compare the metrics of test runs to a baseline run')
+    parser_compare_runs.set_defaults(func=compare_runs)
+    parser_compare_runs.add_argument(
+        'run_ids', nargs='+',
+        help='ID of the baseline run followed by the IDs of the runs to compare to it'
+    )
+    parser_compare_runs.add_argument(
+        '--metric', action='append', default=[],
+        help=f'Metric to compare, e.g. one of {", ".join(REGRESSION_METRICS)}. Can be repeated. '
+             f'All metrics are compared by default'
+    )
+    parser_compare_runs.add_argument(
+        '--metric-source', action='append', default=[],
+        help='Source of a metric as <metric>=[<role>:]<column>[@<event name>], e.g. '
+             'tick_time_ms=server:args.TickTimeMs@Tick. Overrides or adds to the metrics of REGRESSION_METRICS and '
+             f'the {SCALER_CONFIG_REGRESSION_METRICS_KEY} config key. Can be repeated'
+    )
+    parser_compare_runs.add_argument(
+        '--phase', action='append', default=[],
+        help=f'Test phase as <name>:<start seconds>, counted from the first metrics event of each run. '
+             f'Can be repeated. Defaults to {" ".join(DEFAULT_REGRESSION_PHASES)}'
+    )
+    parser_compare_runs.add_argument(
+        '--percentile', action='append', type=float, default=[],
+        help=f'Percentile to compare. Can be repeated. '
+             f'Defaults to {", ".join(str(percentile) for percentile in DEFAULT_REGRESSION_PERCENTILES)}'
+    )
+    parser_compare_runs.add_argument(
+        '--threshold-percent', action='store', type=float, default=DEFAULT_REGRESSION_THRESHOLD_PERCENT,
+        help='Change of a percentile, in percent of the baseline, which is tolerated'
+    )
+    parser_compare_runs.add_argument(
+        '--confidence', action='store', type=float, default=DEFAULT_REGRESSION_CONFIDENCE,
+        help='Confidence level of the intervals of the changes, between 0 and 1'
+    )
+    parser_compare_runs.add_argument(
+        '--resamples', action='store', type=int, default=DEFAULT_REGRESSION_RESAMPLES,
+        help='Number of bootstrap resamples'
+    )
+    parser_compare_runs.add_argument(
+        '--report-file', action='store', default='',
+        help='Path to save the comparison report in JSON'
+    )
+    parser_compare_runs.add_argument(
+        '--markdown-file', action='store', default='',
+        help='Path to save the comparison summary in Markdown'
+    )
+
+    parser_soak_report = subparsers.add_parser(
+        'soak-report', parents=[parser], help='Detect leaks and degradations in a soak test run')
+    parser_soak_report.set_defaults(func=soak_report)
+    parser_soak_report.add_argument(
+        '--samples', action='append', default=[],
+        help='Path of the server process samples file, a gzip-compressed samples file or a folder of synced chunks. '
+             'Can be repeated'
+    )
+    parser_soak_report.add_argument(
+        '--log', action='append', default=[],
+        help='Path of a server log to read the tick times from, a gzip-compressed log or a folder of synced chunks. '
+             'Can be repeated'
+    )
+    parser_soak_report.add_argument(
+        '--window-seconds', action='store', type=float, default=DEFAULT_SOAK_WINDOW_SECONDS,
+        help='Length of the windows the samples are reduced to their median in'
+    )
+    parser_soak_report.add_argument(
+        '--confidence', action='store', type=float, default=DEFAULT_SOAK_CONFIDENCE,
+        help='Minimum confidence that a series trends upward to flag it, between 0 and 1'
+    )
+    parser_soak_report.add_argument(
+        '--min-drift-percent', action='store', type=float, default=DEFAULT_SOAK_MIN_DRIFT_PERCENT,
+        help='Minimum drift of a series over the run, relative to its start value, to flag it'
+    )
+    parser_soak_report.add_argument(
+        '--report-file', action='store', default='',
+        help='Path to save the soak report in JSON'
+    )
+
+    parser_ingest_metrics = subparsers.add_parser(
+        'ingest-metrics', parents=[parser], help='Ingest O3DE metrics files into the columnar metrics store')
+    parser_ingest_metrics.set_defaults(func=ingest_metrics)
+    parser_ingest_metrics.add_argument(
+        'artifacts_path', nargs='+',
+        help='Folder of run artifacts, e.g. the output of fetch-artifacts, or a single metrics file'
+    )
+    parser_ingest_metrics.add_argument(
+        '--run-id', action='store', default='',
+        help='ID of the run of the metrics. Read from the runs/{run_id}/ folders of the artifacts if not specified'
+    )
+    parser_ingest_metrics.add_argument(
+        '--shard', action='store', default='',
+        help='Shard of the metrics, e.g. server-{instance_id}. Read from the artifact folders if not specified'
+    )
+
+    parser_query_metrics = subparsers.add_parser(
+        'query-metrics', parents=[parser], help='Summarize a metrics column across runs')
+    parser_query_metrics.set_defaults(func=query_metrics)
+    parser_query_metrics.add_argument(
+        '--column', action='store', default='',
+        help='Column to summarize, e.g. args.{argument_name}. The stored columns are listed if not specified'
+    )
+    parser_query_metrics.add_argument(
+        '--name', action='store', default='',
+        help='Only include the metrics events with this name'
+    )
+    parser_query_metrics.add_argument(
+        '--run-id', action='append', default=[],
+        help='ID of a run to include. Can be repeated. All runs are included if not specified'
+    )
+    parser_query_metrics.add_argument(
+        '--shard', action='append', default=[],
+        help='Shard to include. Can be repeated. All shards are included if not specified'
+    )
+    parser_query_metrics.add_argument(
+        '--by-shard', action='store_true',
+        help='Summarize every shard of a run separately'
+    )
+    parser_query_metrics.add_argument(
+        '--report-file', action='store', default='',
+        help='Path to save the summaries in JSON'
+    )
+
+    parser_simulate = subparsers.add_parser(
+        'simulate', parents=[parser],
+        help='Run a test run end to end against a local simulation of AWS, the server and the clients')
+    parser_simulate.set_defaults(func=simulate)
+    parser_simulate.add_argument(
+        '--client-count', action='append', type=int, default=[],
+        help=f'Client count to scale to. Can be repeated to scale in steps. '
+             f'Defaults to {" ".join(str(count) for count in DEFAULT_SIMULATION_CLIENT_COUNTS)}'
+    )
+    parser_simulate.add_argument(
+        '--measure-seconds', action='store', type=float, default=DEFAULT_SIMULATION_MEASURE_SECONDS,
+        help='Seconds to keep every client count running'
+    )
+    parser_simulate.add_argument(
+        '--sync-seconds', action='store', type=float, default=DEFAULT_SIMULATION_SYNC_SECONDS,
+        help='Seconds between two artifact syncs of the simulated server and clients'
+    )
+    parser_simulate.add_argument(
+        '--scale-timeout', action='store', type=float, default=DEFAULT_SIMULATION_SCALE_TIMEOUT_SECONDS,
+        help='Maximum seconds to wait for the simulated clients of a count to connect'
+    )
+    parser_simulate.add_argument(
+        '--work-path', action='store', default='simulation_run',
+        help='Empty folder for the stub project, the simulation state and the collected artifacts'
+    )
+    parser_simulate.add_argument(
+        '--report-file', action='store', default='',
+        help='Path to save the stage timings and the analysis in JSON'
+    )
+
     args = parser.parse_args()
     config = _create_auto_scaler_config(args)
     if hasattr(args, 'func'):
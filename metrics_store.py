@@ -0,0 +1,359 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import codecs
+import gzip
+import json
+import math
+import os
+import re
+import shutil
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+
+from constants import *
+from log_analyzer import SeriesStatistics
+
+# Columns of every event. The name, category and phase are dictionary encoded, numeric event arguments are stored as
+# args.<argument name> columns
+FLOAT_COLUMNS = ['ts', 'dur']
+INTEGER_COLUMNS = ['pid', 'tid']
+DICTIONARY_COLUMNS = ['name', 'cat', 'ph']
+ARGUMENT_COLUMN_PREFIX = 'args.'
+
+# Separators between the events of a trace event file, including the start and the end of the traceEvents array
+SEPARATOR_PATTERN = re.compile(r'(?:\s|[,:\[\]}]|\{\s*"traceEvents"\s*:)*')
+
+
+class MetricsSource(NamedTuple):
+    """
+    Metrics file, or a generation of a metrics file synced in chunks
+    """
+    path: str
+    # Generation of the synced file if the path is a folder of chunks
+    generation: str
+    # Path of the file relative to the host artifacts, used to resume the ingestion
+    key: str
+
+
+def read_source(source: MetricsSource, offset: int = 0) -> Iterator[bytes]:
+    """
+    Read the bytes of a metrics source lazily
+    :param source: Metrics source
+    :param offset: Byte offset to start reading from
+    :return: Blocks of bytes
+    """
+    if not source.generation:
+        with open(source.path, 'rb') as source_file:
+            source_file.seek(offset)
+            yield from iter(lambda: source_file.read(METRICS_READ_BLOCK_BYTES), b'')
+        return
+
+    chunks = _list_chunks(source.path).get(source.generation, [])
+    for index, (chunk_offset, chunk_path) in enumerate(chunks):
+        # The next chunk starts where this one ends, so chunks before the offset are skipped without reading them
+        if index + 1 < len(chunks) and chunks[index + 1][0] <= offset:
+            continue
+        with gzip.open(chunk_path, 'rb') as chunk_file:
+            skip = max(offset - chunk_offset, 0)
+            while skip > 0:
+                skip -= len(chunk_file.read(min(skip, METRICS_READ_BLOCK_BYTES)))
+            yield from iter(lambda: chunk_file.read(METRICS_READ_BLOCK_BYTES), b'')
+
+
+def parse_metrics_events(blocks: Iterable[bytes], offset: int = 0) -> Iterator[Tuple[Dict, int]]:
+    """
+    Parse the events of O3DE metrics files. The Metrics gem writes events in the trace event format, either as a
+    traceEvents array or one event per line. Files being written, and so missing the end of the array, are supported
+    :param blocks: Blocks of bytes of the metrics file
+    :param offset: Byte offset of the first block in the file
+    :return: Events with the byte offset of the end of each event in the file
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    text = ''
+    for block in blocks:
+        text += text_decoder.decode(block)
+        position = 0
+        consumed = 0
+        while True:
+            position = SEPARATOR_PATTERN.match(text, position).end()
+            if position >= len(text):
+                break
+            try:
+                event, position = decoder.raw_decode(text, position)
+            except json.JSONDecodeError:
+                # The rest of the event is in the next block
+                break
+            offset += len(text[consumed:position].encode('utf-8'))
+            consumed = position
+            if isinstance(event, dict):
+                yield event, offset
+        offset += len(text[consumed:position].encode('utf-8'))
+        text = text[position:]
+        if len(text) > METRICS_MAX_EVENT_BYTES:
+            raise RuntimeError(f'Invalid metrics event at byte {offset}: {text[:80]}')
+
+
+class MetricsStore(object):
+    """
+    Columnar store of O3DE metrics events, partitioned by run and shard (the server instance or client task which
+    emitted them). Each ingestion appends segments of NumPy column files to the partitions, so the columns of many
+    runs are memory-mapped and aggregated without parsing JSON again:
+        <store path>/run=<run ID>/shard=<shard>/<segment>/<column>.npy
+    """
+
+    def __init__(self, store_path: str):
+        """
+        :param store_path: Folder of the store. Created if it doesn't exist
+        """
+        super().__init__()
+        self._store_path = store_path
+        os.makedirs(store_path, exist_ok=True)
+
+    def ingest_artifacts(self, artifacts_path: str, run_id: str = '', shard: str = '') -> int:
+        """
+        Ingest the metrics files found under synced or fetched run artifacts. Files already ingested are resumed from
+        where the previous ingestion stopped, so only newly synced events are added
+        :param artifacts_path: Folder of the artifacts, e.g. the output of fetch-artifacts, or a single metrics file
+        :param run_id: ID of the run. Read from the runs/<run ID>/<server|client>/<host> folders if not specified
+        :param shard: Shard of the events. Read from the runs/<run ID>/<server|client>/<host> folders if not specified
+        :return: Number of ingested events
+        """
+        event_count = 0
+        for source in find_metrics_sources(artifacts_path):
+            host_match = re.search(ARTIFACT_HOST_PATH_PATTERN, source.path.replace('\\', '/'))
+            source_run_id = run_id if run_id else (host_match.group(1) if host_match else '')
+            source_shard = shard if shard else (f'{host_match.group(2)}-{host_match.group(3)}' if host_match else '')
+            if not source_run_id or not source_shard:
+                print(f'[Warn] Skipping {source.path}, the run ID or shard is unknown. Specify them explicitly')
+                continue
+            event_count += self.ingest(source, source_run_id, source_shard)
+        return event_count
+
+    def ingest(self, source: MetricsSource, run_id: str, shard: str) -> int:
+        """
+        Ingest the events of a metrics source which aren't ingested yet
+        :param source: Metrics source
+        :param run_id: ID of the run
+        :param shard: Shard of the events
+        :return: Number of ingested events
+        """
+        partition_path = self._get_partition_path(run_id, shard)
+        source_id = f'{source.key}#{source.generation}' if source.generation else source.key
+        offset = max([segment['end_offset'] for segment in self._read_segments(partition_path)
+                      if segment['source'] == source_id], default=0)
+        if not source.generation and os.path.getsize(source.path) < offset:
+            print(f'[Warn] {source.path} is smaller than when it was ingested, it is ingested again')
+            offset = 0
+
+        event_count = 0
+        events = []
+        start_offset = offset
+        for event, end_offset in parse_metrics_events(read_source(source, offset), offset):
+            events.append(event)
+            if len(events) == METRICS_SEGMENT_ROWS:
+                self._write_segment(partition_path, source_id, start_offset, end_offset, events)
+                event_count += len(events)
+                events = []
+                start_offset = end_offset
+            offset = end_offset
+        if events:
+            self._write_segment(partition_path, source_id, start_offset, offset, events)
+            event_count += len(events)
+        return event_count
+
+    def list_partitions(self, run_ids: List[str] = None, shards: List[str] = None) -> List[Tuple[str, str]]:
+        """
+        List the partitions of the store
+        :param run_ids: Only list the partitions of these runs if specified
+        :param shards: Only list the partitions of these shards if specified
+        :return: Run ID and shard of every partition
+        """
+        partitions = []
+        for run_folder in sorted(os.listdir(self._store_path)):
+            run_id = run_folder[len('run='):]
+            if not run_folder.startswith('run=') or (run_ids and run_id not in run_ids):
+                continue
+            for shard_folder in sorted(os.listdir(os.path.join(self._store_path, run_folder))):
+                shard = shard_folder[len('shard='):]
+                if shard_folder.startswith('shard=') and (not shards or shard in shards):
+                    partitions.append((run_id, shard))
+        return partitions
+
+    def list_columns(self, run_ids: List[str] = None) -> List[str]:
+        """
+        List the columns stored for the runs
+        :param run_ids: Only list the columns of these runs if specified
+        :return: Column names
+        """
+        columns = set()
+        for run_id, shard in self.list_partitions(run_ids):
+            for segment in self._read_segments(self._get_partition_path(run_id, shard)):
+                columns.update(segment['columns'])
+        return sorted(columns)
+
+    def scan(self, columns: List[str], run_ids: List[str] = None, shards: List[str] = None,
+             name: str = '') -> Iterator[Tuple[str, str, Dict[str, np.ndarray]]]:
+        """
+        Read columns segment by segment. Columns are memory-mapped, so only the pages which are aggregated are read
+        :param columns: Names of the columns to read. Columns missing from a segment are filled with NaN
+        :param run_ids: Only read the partitions of these runs if specified
+        :param shards: Only read the partitions of these shards if specified
+        :param name: Only read the events with this name if specified
+        :return: Run ID, shard and the columns of every segment
+        """
+        for run_id, shard in self.list_partitions(run_ids, shards):
+            partition_path = self._get_partition_path(run_id, shard)
+            for segment in self._read_segments(partition_path):
+                segment_path = os.path.join(partition_path, segment['segment'])
+                mask = None
+                if name:
+                    if name not in segment['dictionaries']['name']:
+                        continue
+                    name_codes = np.load(os.path.join(segment_path, segment['columns']['name']), mmap_mode='r')
+                    mask = name_codes == segment['dictionaries']['name'].index(name)
+
+                values = {}
+                for column in columns:
+                    if column in segment['columns']:
+                        values[column] = np.load(os.path.join(segment_path, segment['columns'][column]), mmap_mode='r')
+                    else:
+                        values[column] = np.full(segment['rows'], math.nan)
+                    if mask is not None:
+                        values[column] = values[column][mask]
+                yield run_id, shard, values
+
+    def aggregate(self, column: str, run_ids: List[str] = None, shards: List[str] = None, name: str = '',
+                  by_shard: bool = False) -> Dict[str, Dict]:
+        """
+        Summarize a numeric column per run, or per run and shard
+        :param column: Name of the column, e.g. args.<argument name>
+        :param run_ids: Only include these runs if specified
+        :param shards: Only include these shards if specified
+        :param name: Only include the events with this name if specified
+        :param by_shard: Summarize every shard of a run separately
+        :return: Summaries keyed by run ID, or by <run ID>/<shard>. See SeriesStatistics.get_summary
+        """
+        statistics = {}
+        for run_id, shard, values in self.scan([column], run_ids, shards, name):
+            group = f'{run_id}/{shard}' if by_shard else run_id
+            if group not in statistics:
+                statistics[group] = SeriesStatistics()
+            column_values = values[column]
+            statistics[group].extend(column_values[~np.isnan(column_values)])
+        return {group: series.get_summary() for group, series in statistics.items()}
+
+    def _get_partition_path(self, run_id: str, shard: str) -> str:
+        return os.path.join(self._store_path, f'run={run_id}', f'shard={shard}')
+
+    def _read_segments(self, partition_path: str) -> List[Dict]:
+        segments = []
+        # Temporary folders of interrupted ingestions are never renamed to a segment name
+        for segment_name in self._list_segment_names(partition_path):
+            with open(os.path.join(partition_path, segment_name, METRICS_SEGMENT_FILE_NAME)) as segment_file:
+                segments.append({**json.load(segment_file), 'segment': segment_name})
+        return segments
+
+    @staticmethod
+    def _list_segment_names(partition_path: str) -> List[str]:
+        if not os.path.isdir(partition_path):
+            return []
+        return sorted(name for name in os.listdir(partition_path) if name.isdigit())
+
+    def _write_segment(self, partition_path: str, source_id: str, start_offset: int, end_offset: int,
+                       events: List[Dict]) -> None:
+        columns = {column: np.array([_to_float(event.get(column)) for event in events], dtype=np.float64)
+                   for column in FLOAT_COLUMNS}
+        columns.update({column: np.array([_to_integer(event.get(column)) for event in events], dtype=np.int64)
+                        for column in INTEGER_COLUMNS})
+        dictionaries = {}
+        for column in DICTIONARY_COLUMNS:
+            values = [str(event.get(column, '')) for event in events]
+            dictionaries[column], codes = np.unique(values, return_inverse=True)
+            columns[column] = codes.astype(np.int32)
+        argument_names = sorted({argument for event in events for argument, value in _get_arguments(event).items()
+                                 if not math.isnan(_to_float(value))})
+        for argument in argument_names:
+            columns[f'{ARGUMENT_COLUMN_PREFIX}{argument}'] = np.array(
+                [_to_float(_get_arguments(event).get(argument)) for event in events], dtype=np.float64)
+
+        # Segments are written to a temporary folder then renamed, so readers and resumed ingestions never see
+        # partial segments. The rename commits the segment, so the column files and then the segment file are flushed
+        # to disk before it
+        segment_name = f'{int(max(self._list_segment_names(partition_path), default=-1)) + 1:08d}'
+        temporary_path = os.path.join(partition_path, f'.{segment_name}')
+        shutil.rmtree(temporary_path, ignore_errors=True)
+        os.makedirs(temporary_path)
+        file_names = {}
+        for index, (column, values) in enumerate(columns.items()):
+            file_names[column] = f'{index:04d}-{re.sub(r"[^A-Za-z0-9_.-]", "_", column)}.npy'
+            with open(os.path.join(temporary_path, file_names[column]), 'wb') as column_file:
+                np.save(column_file, values)
+                _flush_to_disk(column_file)
+        with open(os.path.join(temporary_path, METRICS_SEGMENT_FILE_NAME), 'w') as segment_file:
+            json.dump({
+                'source': source_id,
+                'start_offset': start_offset,
+                'end_offset': end_offset,
+                'rows': len(events),
+                'columns': file_names,
+                'dictionaries': {column: values.tolist() for column, values in dictionaries.items()}
+            }, segment_file, indent=1)
+            _flush_to_disk(segment_file)
+        os.rename(temporary_path, os.path.join(partition_path, segment_name))
+
+
+def find_metrics_sources(artifacts_path: str) -> List[MetricsSource]:
+    """
+    Find the metrics files under a folder of artifacts. Files are found under Metrics folders, either as JSON files
+    or as the folders of chunks uploaded by the artifact syncs
+    :param artifacts_path: Folder of the artifacts, or a single metrics file
+    :return: Metrics sources
+    """
+    if os.path.isfile(artifacts_path):
+        return [MetricsSource(artifacts_path, '', os.path.basename(artifacts_path))]
+
+    sources = []
+    for folder_path, folder_names, file_names in os.walk(artifacts_path):
+        folder_names.sort()
+        relative_parts = os.path.relpath(folder_path, artifacts_path).replace('\\', '/').split('/')
+        if METRICS_FOLDER_NAME not in relative_parts:
+            continue
+        key = '/'.join(relative_parts[relative_parts.index(METRICS_FOLDER_NAME):])
+        for generation in _list_chunks(folder_path):
+            sources.append(MetricsSource(folder_path, generation, key))
+        for file_name in sorted(file_names):
+            if file_name.endswith('.json'):
+                sources.append(MetricsSource(os.path.join(folder_path, file_name), '', f'{key}/{file_name}'))
+    return sources
+
+
+def _list_chunks(folder_path: str) -> Dict[str, List[Tuple[int, str]]]:
+    chunks = {}
+    for file_name in sorted(os.listdir(folder_path)):
+        match = re.match(ARTIFACT_CHUNK_NAME_PATTERN, file_name)
+        if match:
+            chunks.setdefault(match.group(1), []).append((int(match.group(2)), os.path.join(folder_path, file_name)))
+    return chunks
+
+
+def _flush_to_disk(file: IO) -> None:
+    file.flush()
+    os.fsync(file.fileno())
+
+
+def _get_arguments(event: Dict) -> Dict:
+    arguments = event.get('args')
+    return arguments if isinstance(arguments, dict) else {}
+
+
+def _to_float(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return math.nan
+
+
+def _to_integer(value) -> int:
+    return value if isinstance(value, int) and not isinstance(value, bool) else 0
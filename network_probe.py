@@ -0,0 +1,393 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+import time
+from typing import Dict, List
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from constants import *
+from udp_probe import merge_rtt_histograms, summarize_step
+
+# Runs on the server instance via the AWS-RunPowerShellScript document. The server has no Python, so the echo loop is
+# compiled from C# with Add-Type: a PowerShell loop can't echo the packet rates of the probe steps. It's compiled before
+# the server is stopped, so a failure leaves the server running. The server process holds the server port, so it is
+# stopped during the probe and started again with its launch arguments through WMI, like the server update, so that it
+# is not part of the Run Command job
+NETWORK_PROBE_ECHO_SCRIPT = '''
+$ErrorActionPreference = 'Stop'
+$port = {port}
+$durationSeconds = {duration_seconds}
+$installDir = '{install_dir}'
+$launcher = '{project_name}.ServerLauncher.exe'
+$ruleName = 'MPSCALER_network_probe'
+
+Add-Type -TypeDefinition @'
+using System.Diagnostics;
+using System.Net;
+using System.Net.Sockets;
+
+public static class MpScalerUdpEcho
+{{
+    public static long[] Run(Socket socket, double durationSeconds)
+    {{
+        byte[] buffer = new byte[65536];
+        EndPoint remote = new IPEndPoint(IPAddress.Any, 0);
+        long packets = 0;
+        long bytes = 0;
+        Stopwatch watch = Stopwatch.StartNew();
+        while (watch.Elapsed.TotalSeconds < durationSeconds)
+        {{
+            int length;
+            try
+            {{
+                length = socket.ReceiveFrom(buffer, ref remote);
+            }}
+            catch (SocketException)
+            {{
+                continue;
+            }}
+            socket.SendTo(buffer, length, SocketFlags.None, remote);
+            packets++;
+            bytes += length;
+        }}
+        return new long[] {{ packets, bytes }};
+    }}
+}}
+'@
+
+$arguments = $null
+$server = Get-CimInstance Win32_Process -Filter "Name = '$launcher'" | Select-Object -First 1
+if ($server) {{
+    if ($server.CommandLine -match '^\\s*("[^"]*"|\\S+)\\s*(.*)$') {{
+        $arguments = $Matches[2]
+    }}
+    Stop-Process -Id $server.ProcessId -Force
+}}
+$socket = $null
+try {{
+    if ($server) {{
+        Wait-Process -Id $server.ProcessId -Timeout 60 -ErrorAction SilentlyContinue
+    }}
+    netsh advfirewall firewall add rule name=$ruleName dir=in protocol=UDP localport=$port action=allow | Out-Null
+    $socket = New-Object System.Net.Sockets.Socket([System.Net.Sockets.AddressFamily]::InterNetwork, [System.Net.Sockets.SocketType]::Dgram, [System.Net.Sockets.ProtocolType]::Udp)
+    $socket.ReceiveBufferSize = 4MB
+    $socket.SendBufferSize = 4MB
+    $socket.ReceiveTimeout = 1000
+    $socket.Bind((New-Object System.Net.IPEndPoint([System.Net.IPAddress]::Any, $port)))
+    $counters = [MpScalerUdpEcho]::Run($socket, $durationSeconds)
+}} finally {{
+    if ($null -ne $socket) {{
+        $socket.Close()
+    }}
+    netsh advfirewall firewall delete rule name=$ruleName | Out-Null
+    if ($null -ne $arguments) {{
+        [void](Invoke-CimMethod -ClassName Win32_Process -MethodName Create -Arguments @{{
+            CommandLine = "`"$installDir\\$launcher`" $arguments"
+            CurrentDirectory = $installDir
+        }})
+    }}
+}}
+Write-Output (@{{echoed_packets = $counters[0]; echoed_bytes = $counters[1]; server_restarted = ($null -ne $arguments)}} | ConvertTo-Json -Compress)
+'''
+
+
+def aggregate_probe_results(results: List[Dict], loss_threshold_percent: float) -> Dict:
+    """
+    Sum the steps of every probe sender and find the capacity of the network path: the highest step whose loss is
+    within the threshold, up to the first step beyond it
+    :param results: Results of every sender, see udp_probe.py
+    :param loss_threshold_percent: Highest loss of a step within the capacity
+    :return: Summaries of the summed steps and the capacity
+    """
+    steps = {}
+    for result in results:
+        for step in result['steps']:
+            total = steps.setdefault(step['step'], {
+                'step': step['step'], 'rate_pps': 0, 'seconds': 0, 'sent': 0, 'received': 0, 'not_sent': 0,
+                'bytes_sent': 0, 'rtt_histograms': [], 'senders': 0})
+            for key in ['rate_pps', 'sent', 'received', 'not_sent', 'bytes_sent']:
+                total[key] += step[key]
+            # Senders run the steps at the same time, so their rates add up over the longest of their durations
+            total['seconds'] = max(total['seconds'], step['seconds'])
+            total['rtt_histograms'].append(step['rtt_histogram'])
+            total['senders'] += 1
+
+    summaries = []
+    capacity = None
+    limited_by = 'none'
+    for index in sorted(steps):
+        total = steps[index]
+        total['rtt_histogram'] = merge_rtt_histograms(total.pop('rtt_histograms'))
+        summary = dict(summarize_step(total), senders=total['senders'])
+        summary['sender_limited'] = summary['sent_pps'] < NETWORK_PROBE_SENDER_LIMIT_RATIO * summary['offered_pps']
+        summary['passed'] = summary['loss_percent'] <= loss_threshold_percent
+        summaries.append(summary)
+        if limited_by != 'none':
+            continue
+        if not summary['passed']:
+            limited_by = 'loss'
+            continue
+        capacity = summary
+    if limited_by == 'none' and capacity and capacity['sender_limited']:
+        # The senders couldn't offer more, so the network wasn't pushed to its limit
+        limited_by = 'sender'
+
+    return {
+        'steps': summaries,
+        'capacity_pps': capacity['received_pps'] if capacity else 0.0,
+        'capacity_mbps': capacity['throughput_mbps'] if capacity else 0.0,
+        'limited_by': limited_by
+    }
+
+
+def format_probe_report(report: Dict) -> str:
+    """
+    Format a network probe report as a text table
+    :param report: Network probe report
+    :return: Text table
+    """
+    lines = [f'{"step":>4} {"offered pps":>12} {"sent pps":>10} {"echoed pps":>11} {"Mbps":>8} {"loss %":>7} '
+             f'{"p50 ms":>8} {"p99 ms":>8} {"max ms":>8} result']
+    for step in report['steps']:
+        rtts = ' '.join('       -' if step[key] is None else f'{step[key]:>8.2f}'
+                        for key in ['rtt_p50_ms', 'rtt_p99_ms', 'rtt_max_ms'])
+        result = 'pass' if step['passed'] else 'fail'
+        if step['sender_limited']:
+            result += ' (sender limited)'
+        lines.append(f'{step["step"]:>4} {step["offered_pps"]:>12} {step["sent_pps"]:>10.0f} '
+                     f'{step["received_pps"]:>11.0f} {step["throughput_mbps"]:>8.2f} {step["loss_percent"]:>7.2f} '
+                     f'{rtts} {result}')
+    lines.append(f'Capacity: {report["capacity_pps"]:.0f} packets per second, {report["capacity_mbps"]:.2f} Mbps '
+                 f'(limited by {report["limited_by"]})')
+    echo = report.get('echo', {})
+    if 'echoed_packets' in echo:
+        lines.append(f'Server echo: {echo["echoed_packets"]} packets echoed of {report["sent_packets"]} sent, '
+                     f'{report["received_packets"]} received back')
+    return '\n'.join(lines)
+
+
+class NetworkProbe(object):
+    """
+    Measure the packet rate and bandwidth capacity of the network path from the clients to the server. A UDP echo
+    replaces the game server on the server port while probe sender tasks run in the client subnets, and the results
+    are saved with the run artifacts
+    """
+
+    def __init__(self, bucket_name: str, run_id: str, instance_id: str, cluster_name: str, service_name: str,
+                 task_definition_arn: str, project_name: str, region: str):
+        """
+        :param bucket_name: Name of the artifacts bucket
+        :param run_id: ID of the active test run
+        :param instance_id: ID of the server instance
+        :param cluster_name: Name of the client cluster
+        :param service_name: Name of the client service, whose network configuration the probe tasks use
+        :param task_definition_arn: ARN of the probe task definition
+        :param project_name: Name of the O3DE project
+        :param region: AWS region of the deployed stacks
+        """
+        super().__init__()
+        self._bucket_name = bucket_name
+        # Every probe of a run is kept under its own prefix
+        self.probe_id = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+        self._key_prefix = f'{RUN_KEY_PREFIX}/{run_id}/{NETWORK_PROBE_FOLDER_NAME}/{self.probe_id}'
+        self._instance_id = instance_id
+        self._cluster_name = cluster_name
+        self._service_name = service_name
+        self._task_definition_arn = task_definition_arn
+        self._project_name = project_name
+        self._s3_client = boto3.client('s3', config=Config(region_name=region))
+        self._ssm_client = boto3.client('ssm', config=Config(region_name=region))
+        self._ecs_client = boto3.client('ecs', config=Config(region_name=region))
+
+    def run(self, server_ip: str, port: int, rates: List[int], sender_count: int = DEFAULT_NETWORK_PROBE_SENDERS,
+            step_seconds: float = DEFAULT_NETWORK_PROBE_STEP_SECONDS,
+            packet_bytes: int = DEFAULT_NETWORK_PROBE_PACKET_BYTES,
+            start_delay_seconds: float = DEFAULT_NETWORK_PROBE_START_DELAY_SECONDS,
+            loss_threshold_percent: float = DEFAULT_NETWORK_PROBE_LOSS_THRESHOLD_PERCENT) -> Dict:
+        """
+        Start the server echo and the probe senders, wait for them to finish and save the report
+        :param server_ip: Private IP address of the server
+        :param port: Server port
+        :param rates: Packets per second of every step of each sender
+        :param sender_count: Number of probe sender tasks
+        :param step_seconds: Duration of every step
+        :param packet_bytes: Size of the probe packets
+        :param start_delay_seconds: Time for the senders to start before the first step
+        :param loss_threshold_percent: Highest loss of a step within the capacity
+        :return: Network probe report
+        """
+        start_at = time.time() + start_delay_seconds
+        probe_seconds = start_delay_seconds + len(rates) * step_seconds + NETWORK_PROBE_DRAIN_SECONDS
+        command_id = self.start_echo(port, probe_seconds + NETWORK_PROBE_MARGIN_SECONDS)
+        task_arns = self.start_senders(sender_count, [
+            'send', '--host', server_ip, '--port', str(port), *[arg for rate in rates for arg in ['--rate', str(rate)]],
+            '--step-seconds', str(step_seconds), '--packet-bytes', str(packet_bytes), '--start-at', f'{start_at:.3f}'])
+        errors = self.wait_for_senders(task_arns, probe_seconds + NETWORK_PROBE_MARGIN_SECONDS)
+        echo = self.wait_for_echo(command_id, 2 * NETWORK_PROBE_MARGIN_SECONDS)
+
+        results = self.get_sender_results()
+        if len(results) < sender_count:
+            errors.append(f'{sender_count - len(results)} of {sender_count} senders uploaded no result')
+        report = aggregate_probe_results(results, loss_threshold_percent)
+        report.update({
+            'probe_id': self.probe_id,
+            'server_ip': server_ip,
+            'port': port,
+            'sender_count': sender_count,
+            'packet_bytes': packet_bytes,
+            'loss_threshold_percent': loss_threshold_percent,
+            'sent_packets': sum(step['sent'] for result in results for step in result['steps']),
+            'received_packets': sum(step['received'] for result in results for step in result['steps']),
+            'echo': echo,
+            'errors': errors
+        })
+        self._s3_client.put_object(Bucket=self._bucket_name, Key=f'{self._key_prefix}/report.json',
+                                   Body=json.dumps(report, indent=1).encode('utf-8'))
+        return report
+
+    def start_echo(self, port: int, duration_seconds: float) -> str:
+        """
+        Start the UDP echo on the server port of the server instance
+        :param port: Server port
+        :param duration_seconds: Time to echo for
+        :return: ID of the Run Command command
+        """
+        script = NETWORK_PROBE_ECHO_SCRIPT.format(
+            port=port, duration_seconds=int(duration_seconds), install_dir=SERVER_INSTALL_DIR,
+            project_name=self._project_name)
+        response = self._ssm_client.send_command(
+            InstanceIds=[self._instance_id],
+            DocumentName='AWS-RunPowerShellScript',
+            Comment=f'UDP network probe echo on port {port}',
+            Parameters={'commands': script.strip().split('\n'),
+                        'executionTimeout': [str(int(duration_seconds + NETWORK_PROBE_MARGIN_SECONDS))]}
+        )
+        command_id = response['Command']['CommandId']
+        print(f'Started the UDP echo on server {self._instance_id} port {port} with command {command_id}')
+        return command_id
+
+    def start_senders(self, sender_count: int, command: List[str]) -> List[str]:
+        """
+        Upload the probe script and run the probe sender tasks with the network configuration of the client service
+        :param sender_count: Number of probe sender tasks
+        :param command: Arguments of the probe script
+        :return: ARNs of the started tasks
+        """
+        script_key = f'{self._key_prefix}/{NETWORK_PROBE_SCRIPT_NAME}'
+        self._s3_client.upload_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), NETWORK_PROBE_SCRIPT_NAME),
+                                    self._bucket_name, script_key)
+        script_url = self._get_presigned_url('get_object', script_key)
+        service = self._ecs_client.describe_services(
+            cluster=self._cluster_name, services=[self._service_name])['services'][0]
+
+        task_arns = []
+        for index in range(sender_count):
+            result_url = self._get_presigned_url('put_object', self._get_result_key(index))
+            response = self._ecs_client.run_task(
+                cluster=self._cluster_name,
+                taskDefinition=self._task_definition_arn,
+                launchType='FARGATE',
+                networkConfiguration=service['networkConfiguration'],
+                startedBy=NETWORK_PROBE_FOLDER_NAME,
+                overrides={'containerOverrides': [{
+                    'name': NETWORK_PROBE_CONTAINER_NAME,
+                    'command': [*command, '--sender-id', str(index), '--result-url', result_url],
+                    'environment': [{'name': NETWORK_PROBE_SCRIPT_URL_ENV, 'value': script_url}]
+                }]}
+            )
+            for failure in response.get('failures', []):
+                print(f'[Warn] Failed to start probe sender {index}: {failure.get("reason")}')
+            task_arns.extend(task['taskArn'] for task in response.get('tasks', []))
+        print(f'Started {len(task_arns)} probe sender tasks')
+        return task_arns
+
+    def wait_for_senders(self, task_arns: List[str], timeout_seconds: float,
+                         poll_seconds: float = NETWORK_PROBE_POLL_SECONDS) -> List[str]:
+        """
+        Wait until the probe sender tasks stop. Tasks still running at the timeout are stopped
+        :param task_arns: ARNs of the probe sender tasks
+        :param timeout_seconds: Maximum time to wait
+        :param poll_seconds: Time between two polls
+        :return: Errors of the tasks which didn't exit successfully
+        """
+        deadline = time.time() + timeout_seconds
+        pending = list(task_arns)
+        errors = []
+        while pending:
+            for index in range(0, len(pending), 100):
+                for task in self._ecs_client.describe_tasks(
+                        cluster=self._cluster_name, tasks=pending[index:index + 100])['tasks']:
+                    if task['lastStatus'] != 'STOPPED':
+                        continue
+                    pending.remove(task['taskArn'])
+                    exit_codes = [container.get('exitCode') for container in task.get('containers', [])]
+                    if any(exit_code != 0 for exit_code in exit_codes):
+                        errors.append(f'Probe sender {task["taskArn"].split("/")[-1]} exited with {exit_codes}: '
+                                      f'{task.get("stoppedReason", "")}')
+            if not pending:
+                break
+            if time.time() + poll_seconds > deadline:
+                for task_arn in pending:
+                    self._ecs_client.stop_task(cluster=self._cluster_name, task=task_arn,
+                                               reason='Network probe timed out')
+                errors.append(f'{len(pending)} probe senders didn\'t finish in time and were stopped')
+                break
+            print(f'Waiting for {len(pending)} probe senders ...')
+            time.sleep(poll_seconds)
+        return errors
+
+    def wait_for_echo(self, command_id: str, timeout_seconds: float,
+                      poll_seconds: float = NETWORK_PROBE_POLL_SECONDS) -> Dict:
+        """
+        Wait until the server echo ends and get its counters
+        :param command_id: ID of the Run Command command
+        :param timeout_seconds: Maximum time to wait
+        :param poll_seconds: Time between two polls
+        :return: Number of echoed packets and bytes, or the status of the command if it failed
+        """
+        deadline = time.time() + timeout_seconds
+        invocation = {}
+        while time.time() < deadline:
+            try:
+                invocation = self._ssm_client.get_command_invocation(
+                    CommandId=command_id, InstanceId=self._instance_id)
+            except ClientError as e:
+                # The invocation is not available right after the command is sent
+                if e.response['Error']['Code'] != 'InvocationDoesNotExist':
+                    raise
+            if invocation.get('Status') in SERVER_UPDATE_COMMAND_FINAL_STATUSES:
+                break
+            time.sleep(poll_seconds)
+
+        output_lines = invocation.get('StandardOutputContent', '').strip().splitlines()
+        if invocation.get('Status') == 'Success' and output_lines:
+            return json.loads(output_lines[-1])
+        print(f'[Warn] Server echo command {command_id} ended with status {invocation.get("Status", "TimedOut")}. '
+              f'{invocation.get("StandardErrorContent", "")}')
+        return {'status': invocation.get('Status', 'TimedOut')}
+
+    def get_sender_results(self) -> List[Dict]:
+        """
+        Get the results uploaded by the probe senders
+        :return: Result of every sender
+        """
+        results = []
+        paginator = self._s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self._bucket_name, Prefix=f'{self._key_prefix}/senders/'):
+            for obj in page.get('Contents', []):
+                response = self._s3_client.get_object(Bucket=self._bucket_name, Key=obj['Key'])
+                results.append(json.loads(response['Body'].read()))
+        return results
+
+    def _get_result_key(self, index: int) -> str:
+        return f'{self._key_prefix}/senders/{index}.json'
+
+    def _get_presigned_url(self, client_method: str, key: str) -> str:
+        return self._s3_client.generate_presigned_url(
+            client_method, Params={'Bucket': self._bucket_name, 'Key': key},
+            ExpiresIn=NETWORK_PROBE_PRESIGNED_URL_SECONDS)
@@ -37,6 +37,12 @@ class PackageBuilder(object):
             str(self._config.get(SCALER_CONFIG_OUTPUT_PATH_KEY, SCALER_CONFIG_DEFAULT_OUTPUT_PATH)), self._platform)
         self._server_private_ip = str(self._config.get(SCALER_CONFIG_SERVER_PRIVATE_IP_KEY,
                                                        SCALER_CONFIG_DEFAULT_SERVER_PRIVATE_IP))
+        # Clients connect to the UDP impairment relay instead of the server if it is deployed
+        if self._config.get(SCALER_CONFIG_RELAY_PROFILES_KEY, SCALER_CONFIG_DEFAULT_RELAY_PROFILES):
+            self._connect_ip = str(self._config.get(SCALER_CONFIG_RELAY_PRIVATE_IP_KEY,
+                                                    SCALER_CONFIG_DEFAULT_RELAY_PRIVATE_IP))
+        else:
+            self._connect_ip = self._server_private_ip
         installer_path = str(self._config.get(SCALER_CONFIG_DEFAULT_BUILD_INSTALLER_PATH,
                                               SCALER_CONFIG_DEFAULT_BUILD_INSTALLER_PATH))
         self._installer_build_path = os.path.join(self._project_path, installer_path, self._platform, self._build_type)
@@ -75,7 +81,7 @@ class PackageBuilder(object):
         client_file = os.path.join(self._project_path, CLIENT_CONFIG_FILENAME)
         client_config = ClientConfig()
         client_config.load(filename=client_file, backup=True)
-        client_config.set('connect', self._server_private_ip)
+        client_config.set('connect', self._connect_ip)
         client_config.display()
         client_config.save(client_file)
         print('...Done')
@@ -114,22 +120,36 @@ class PackageBuilder(object):
         if self._build_type != 'release':
             # This extra step is only required for non-release build since
             # assets will be copied to the installer directory automatically for release build.
-            print('Copying assets to the installer directory...')
-            source_cache_path = os.path.join(self._project_path, self._project_cache_path)
-            target_cache_path = os.path.join(self._installer_build_path, self._project_cache_path)
-            if os.path.exists(target_cache_path):
-                shutil.rmtree(target_cache_path)
-            shutil.copytree(source_cache_path, target_cache_path)
-            print('...Done')
-
-        # Copy the project package and config files to the output directory
+            self.stage_assets()
+
+        project_package_path = self.copy_package()
+        self.archive_package(project_package_path)
+
+    def stage_assets(self) -> None:
+        """
+        Copy the processed assets to the installer directory
+        """
+        print('Copying assets to the installer directory...')
+        source_cache_path = os.path.join(self._project_path, self._project_cache_path)
+        target_cache_path = os.path.join(self._installer_build_path, self._project_cache_path)
+        if os.path.exists(target_cache_path):
+            shutil.rmtree(target_cache_path)
+        shutil.copytree(source_cache_path, target_cache_path)
+        print('...Done')
+
+    def copy_package(self) -> str:
+        """
+        Copy the project package and config files to the output directory, without the test, editor and builder
+        binaries
+        :return: Path of the project package
+        """
         print(f'Copying the project package to the output directory {self._output_path} ...')
         project_package_path = os.path.join(self._output_path, OUTPUT_PACKAGE_FOLDER_NAME)
         if os.path.exists(project_package_path):
             shutil.rmtree(project_package_path)
 
         shutil.copytree(self._installer_build_path, project_package_path, ignore=shutil.ignore_patterns(
-            '*.Tests.*', '*.Editor.*', '*.Builders.*', '*.exe'))
+            *PACKAGE_IGNORE_PATTERNS))
         shutil.copy2(os.path.join(self._installer_build_path,
                                   f'{self._project_name}.GameLauncher.exe'), project_package_path)
         shutil.copy2(os.path.join(self._installer_build_path,
@@ -141,14 +161,21 @@ class PackageBuilder(object):
         # from the project source folder instead of cache
         shutil.copytree(os.path.join(self._project_path, 'Config'), os.path.join(project_package_path, 'Config'))
         print('...Done')
+        return project_package_path
 
-        # Compress the package for creating a custom Amazon Machine Image (AMI)
+    def archive_package(self, project_package_path: str) -> str:
+        """
+        Compress the package for creating a custom Amazon Machine Image (AMI)
+        :param project_package_path: Path of the project package
+        :return: Path of the archive
+        """
         zipped_package_path = f'{project_package_path}.zip'
         print(f'Archiving the project package to {zipped_package_path} ...')
         if os.path.exists(zipped_package_path):
             os.remove(zipped_package_path)
         shutil.make_archive(project_package_path, 'zip', project_package_path)
         print('...Done')
+        return zipped_package_path
 
     def _get_generator(self):
         """
@@ -1,7 +1,6 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
-import os
 import platform
 import subprocess
 import typing
@@ -36,10 +35,6 @@ class ProcessRunner:
         :param env: environment variables for running the process
         :return: exit code of the process being run
         """
-        original_cwd = os.getcwd()
-        if exec_dir:
-            os.chdir(exec_dir)
-
         print(f'{self._description}: {str(self._cmd_list)}')
 
         try:
@@ -47,6 +42,9 @@ class ProcessRunner:
             process = subprocess.Popen(cmd_args_to_run,
                                     stdout=subprocess.PIPE,
                                     stderr=subprocess.STDOUT,
+                                    # The working directory is set on the process rather than changed with
+                                    # os.chdir, so processes can be run from several threads
+                                    cwd=exec_dir if exec_dir else None,
                                     env=env)
             while self._stream(process):
                 # Check for live output every 0.1s
@@ -59,7 +57,6 @@ class ProcessRunner:
         if process.returncode != 0:
             raise subprocess.CalledProcessError(process.returncode, process.args)
 
-        os.chdir(original_cwd)
         return process.returncode
 
     @staticmethod
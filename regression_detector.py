@@ -0,0 +1,295 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import re
+from typing import Dict, List, NamedTuple
+
+import numpy as np
+
+from constants import *
+from metrics_store import MetricsStore
+
+
+class RunPhase(NamedTuple):
+    """
+    Test phase of a run, starting at a number of seconds after the first metrics event of the run
+    """
+    name: str
+    start_seconds: float
+
+
+def parse_phases(texts: List[str]) -> List[RunPhase]:
+    """
+    Parse test phases
+    :param texts: Phases in the <name>:<start seconds> format, e.g. steady:120
+    :return: Test phases ordered by start
+    """
+    phases = []
+    for text in texts:
+        match = re.match(REGRESSION_PHASE_PATTERN, text.strip())
+        if not match:
+            raise RuntimeError(f'Invalid test phase {text}. Expected <name>:<start seconds>, e.g. steady:120')
+        phases.append(RunPhase(match.group(1), float(match.group(2))))
+    phases.sort(key=lambda phase: phase.start_seconds)
+    if len({phase.name for phase in phases}) != len(phases):
+        raise RuntimeError(f'Test phase names must be unique: {", ".join(texts)}')
+    return phases
+
+
+def parse_metric_sources(texts: List[str]) -> Dict[str, Dict]:
+    """
+    Parse metric sources
+    :param texts: Sources in the <metric>=[<role>:]<column>[@<event name>] format, e.g. rtt_ms=client:args.RttMs@Network
+    :return: Partial metric definitions keyed by metric, see get_regression_metrics
+    """
+    sources = {}
+    for text in texts:
+        match = re.match(REGRESSION_METRIC_SOURCE_PATTERN, text.strip())
+        if not match:
+            raise RuntimeError(f'Invalid metric source {text}. Expected <metric>=[<role>:]<column>[@<event name>], '
+                               f'e.g. tick_time_ms=server:args.TickTimeMs@Tick')
+        source = {'column': match.group(3), 'name': match.group(4) if match.group(4) else ''}
+        if match.group(2):
+            source['role'] = match.group(2)
+        sources[match.group(1)] = source
+    return sources
+
+
+def get_regression_metrics(*overrides: Dict[str, Dict]) -> Dict[str, Dict]:
+    """
+    Merge metric definitions over REGRESSION_METRICS
+    :param overrides: Partial metric definitions keyed by metric, applied in order. A definition of an unknown metric
+    adds it, and needs at least its column and role
+    :return: Metric definitions keyed by metric
+    """
+    metrics = {metric: dict(definition) for metric, definition in REGRESSION_METRICS.items()}
+    for override in overrides:
+        if not isinstance(override, dict):
+            raise RuntimeError(f'Metric definitions must be keyed by metric, got {override}')
+        for metric, definition in override.items():
+            if not isinstance(definition, dict) or \
+                    not set(definition).issubset({'column', 'name', 'role', 'higher_is_worse'}):
+                raise RuntimeError(f'Invalid definition of metric {metric}: {definition}. Expected the column, name, '
+                                   f'role and higher_is_worse keys')
+            merged = {'name': '', 'higher_is_worse': True, **metrics.get(metric, {}), **definition}
+            if not merged.get('column') or merged.get('role') not in REGRESSION_METRIC_ROLES:
+                raise RuntimeError(f'Metric {metric} needs a column and a role, one of '
+                                   f'{", ".join(REGRESSION_METRIC_ROLES)}')
+            metrics[metric] = merged
+    return metrics
+
+
+def bootstrap_percentile_deltas(baseline: np.ndarray, candidate: np.ndarray, percentiles: List[float],
+                                resamples: int = DEFAULT_REGRESSION_RESAMPLES,
+                                confidence: float = DEFAULT_REGRESSION_CONFIDENCE,
+                                rng: np.random.Generator = None) -> List[Dict]:
+    """
+    Estimate the relative change of percentiles between two samples, with percentile bootstrap confidence intervals.
+    Both samples are resampled independently
+    :param baseline: Baseline samples
+    :param candidate: Candidate samples
+    :param percentiles: Percentiles to compare
+    :param resamples: Number of bootstrap resamples
+    :param confidence: Confidence level of the intervals
+    :param rng: Random generator. Seeded with 0 if not specified, so reports are reproducible
+    :return: Baseline and candidate percentiles, and the change in percent of the baseline with its interval, for
+    every percentile
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+    baseline_values = np.percentile(baseline, percentiles)
+    candidate_values = np.percentile(candidate, percentiles)
+
+    deltas = []
+    for start in range(0, resamples, REGRESSION_RESAMPLE_BATCH):
+        batch_size = min(REGRESSION_RESAMPLE_BATCH, resamples - start)
+        baseline_resamples = np.percentile(
+            baseline[rng.integers(0, len(baseline), (batch_size, len(baseline)))], percentiles, axis=1)
+        candidate_resamples = np.percentile(
+            candidate[rng.integers(0, len(candidate), (batch_size, len(candidate)))], percentiles, axis=1)
+        deltas.append(_get_delta_percent(baseline_resamples, candidate_resamples))
+    deltas = np.concatenate(deltas, axis=1)
+    lower = np.percentile(deltas, (1 - confidence) / 2 * 100, axis=1)
+    upper = np.percentile(deltas, (1 + confidence) / 2 * 100, axis=1)
+    point = _get_delta_percent(baseline_values, candidate_values)
+
+    return [{
+        'percentile': percentile,
+        'baseline': float(baseline_values[index]),
+        'candidate': float(candidate_values[index]),
+        'delta_percent': float(point[index]),
+        'interval': [float(lower[index]), float(upper[index])]
+    } for index, percentile in enumerate(percentiles)]
+
+
+class RunComparison(object):
+    """
+    Compare the metrics of test runs to a baseline run. Metrics are aligned by test phase, so runs of different
+    lengths or start times are compared like for like, and every percentile change is reported with a bootstrap
+    confidence interval. A change regresses when its whole interval is worse than the threshold
+    """
+
+    def __init__(self, metrics_store: MetricsStore, phases: List[RunPhase], metrics: Dict[str, Dict] = None,
+                 percentiles: List[float] = None, resamples: int = DEFAULT_REGRESSION_RESAMPLES,
+                 confidence: float = DEFAULT_REGRESSION_CONFIDENCE, seed: int = 0):
+        """
+        :param metrics_store: Metrics store the runs are ingested in
+        :param phases: Test phases ordered by start
+        :param metrics: Metrics to compare, see REGRESSION_METRICS
+        :param percentiles: Percentiles to compare
+        :param resamples: Number of bootstrap resamples
+        :param confidence: Confidence level of the intervals
+        :param seed: Seed of the subsampling and resampling
+        """
+        super().__init__()
+        self._metrics_store = metrics_store
+        self._phases = phases
+        self._metrics = metrics if metrics is not None else REGRESSION_METRICS
+        self._percentiles = percentiles if percentiles else DEFAULT_REGRESSION_PERCENTILES
+        self._resamples = resamples
+        self._confidence = confidence
+        self._seed = seed
+
+    def get_phase_samples(self, run_id: str) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Read the samples of every metric of a run, split by test phase
+        :param run_id: ID of the run
+        :return: Samples keyed by metric and phase name. Phases without samples are omitted
+        """
+        rng = np.random.default_rng(self._seed)
+        start_time = self._get_start_time(run_id)
+        phase_starts = np.array([phase.start_seconds for phase in self._phases])
+        samples = {}
+        for metric, definition in self._metrics.items():
+            phase_values = {phase.name: [] for phase in self._phases}
+            shards = [shard for _, shard in self._metrics_store.list_partitions([run_id])
+                      if shard.startswith(f'{definition["role"]}-')]
+            if start_time is None or not shards:
+                continue
+            for _, _, values in self._metrics_store.scan(['ts', definition['column']], [run_id], shards,
+                                                         definition['name']):
+                column_values = np.asarray(values[definition['column']])
+                elapsed = (np.asarray(values['ts']) - start_time) * METRICS_TIMESTAMP_SECONDS
+                valid = ~np.isnan(column_values) & ~np.isnan(elapsed)
+                phase_indices = np.searchsorted(phase_starts, elapsed[valid], side='right') - 1
+                for index, phase in enumerate(self._phases):
+                    phase_values[phase.name].append(column_values[valid][phase_indices == index])
+
+            samples[metric] = {}
+            for phase_name, arrays in phase_values.items():
+                values = np.concatenate(arrays) if arrays else np.empty(0)
+                if len(values) > REGRESSION_MAX_SAMPLES:
+                    values = rng.choice(values, REGRESSION_MAX_SAMPLES, replace=False)
+                if len(values):
+                    samples[metric][phase_name] = values
+        return samples
+
+    def compare(self, baseline_run_id: str, candidate_run_ids: List[str],
+                threshold_percent: float = DEFAULT_REGRESSION_THRESHOLD_PERCENT) -> Dict:
+        """
+        Compare runs to a baseline run
+        :param baseline_run_id: ID of the baseline run
+        :param candidate_run_ids: IDs of the runs to compare to the baseline
+        :param threshold_percent: Change of a percentile, in percent of the baseline, which is tolerated
+        :return: Comparison report. The verdict fails if any percentile of any run regresses, and is inconclusive
+        if no metric has enough samples in both runs to be compared
+        """
+        rng = np.random.default_rng(self._seed)
+        baseline_samples = self.get_phase_samples(baseline_run_id)
+        comparisons = []
+        for run_id in candidate_run_ids:
+            candidate_samples = self.get_phase_samples(run_id)
+            for metric, definition in self._metrics.items():
+                for phase in self._phases:
+                    baseline = baseline_samples.get(metric, {}).get(phase.name, np.empty(0))
+                    candidate = candidate_samples.get(metric, {}).get(phase.name, np.empty(0))
+                    comparison = {'run_id': run_id, 'metric': metric, 'phase': phase.name,
+                                  'baseline_samples': len(baseline), 'candidate_samples': len(candidate)}
+                    if min(len(baseline), len(candidate)) < REGRESSION_MIN_SAMPLES:
+                        if len(baseline) or len(candidate):
+                            comparisons.append({**comparison, 'status': 'insufficient'})
+                        continue
+                    for delta in bootstrap_percentile_deltas(baseline, candidate, self._percentiles, self._resamples,
+                                                             self._confidence, rng):
+                        comparisons.append({**comparison, **delta, 'status': _get_status(
+                            delta['interval'], threshold_percent, definition['higher_is_worse'])})
+
+        regressions = [comparison for comparison in comparisons if comparison['status'] == 'regression']
+        if regressions:
+            verdict = 'fail'
+        elif any(comparison['status'] != 'insufficient' for comparison in comparisons):
+            verdict = 'pass'
+        else:
+            verdict = 'inconclusive'
+        return {
+            'baseline_run_id': baseline_run_id,
+            'run_ids': candidate_run_ids,
+            'phases': [phase._asdict() for phase in self._phases],
+            'threshold_percent': threshold_percent,
+            'confidence': self._confidence,
+            'resamples': self._resamples,
+            'comparisons': comparisons,
+            'regression_count': len(regressions),
+            'verdict': verdict
+        }
+
+    def _get_start_time(self, run_id: str):
+        start_time = None
+        for _, _, values in self._metrics_store.scan(['ts'], [run_id]):
+            if len(values['ts']):
+                segment_start = float(np.nanmin(values['ts']))
+                start_time = segment_start if start_time is None else min(start_time, segment_start)
+        return start_time
+
+
+def format_regression_markdown(report: Dict, run_details: Dict[str, Dict] = None) -> str:
+    """
+    Format a comparison report in Markdown, e.g. for a build summary or a pull request comment
+    :param report: Comparison report
+    :param run_details: Catalog records of the runs, to show the package hash of every run
+    :return: Markdown text
+    """
+    run_details = run_details if run_details else {}
+
+    def describe_run(run_id: str) -> str:
+        package_hash = run_details.get(run_id, {}).get('package_hash', '')
+        return f'`{run_id}` (package `{package_hash[:12]}`)' if package_hash else f'`{run_id}`'
+
+    lines = [
+        f'## Run comparison: {report["verdict"].upper()}',
+        '',
+        f'Baseline {describe_run(report["baseline_run_id"])}. A percentile regresses when its '
+        f'{report["confidence"] * 100:g}% confidence interval is worse than the baseline by more than '
+        f'{report["threshold_percent"]:g}%. {report["regression_count"]} regression(s).'
+    ]
+    for run_id in report['run_ids']:
+        lines += ['', f'### {describe_run(run_id)}', '',
+                  '| Metric | Phase | Percentile | Baseline | Candidate | Change | Interval | Status |',
+                  '|---|---|---|---:|---:|---:|---:|---|']
+        for comparison in report['comparisons']:
+            if comparison['run_id'] != run_id:
+                continue
+            if comparison['status'] == 'insufficient':
+                lines.append(f'| {comparison["metric"]} | {comparison["phase"]} | | '
+                             f'{comparison["baseline_samples"]} samples | {comparison["candidate_samples"]} samples '
+                             f'| | | insufficient |')
+                continue
+            status = f'**{comparison["status"]}**' if comparison['status'] == 'regression' else comparison['status']
+            lines.append(f'| {comparison["metric"]} | {comparison["phase"]} | p{comparison["percentile"]:g} | '
+                         f'{comparison["baseline"]:.3f} | {comparison["candidate"]:.3f} | '
+                         f'{comparison["delta_percent"]:+.1f}% | '
+                         f'[{comparison["interval"][0]:+.1f}%, {comparison["interval"][1]:+.1f}%] | {status} |')
+    return '\n'.join(lines)
+
+
+def _get_delta_percent(baseline: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(baseline == candidate, 0.0, (candidate - baseline) / np.abs(baseline) * 100)
+
+
+def _get_status(interval: List[float], threshold_percent: float, higher_is_worse: bool) -> str:
+    lower, upper = interval if higher_is_worse else (-interval[1], -interval[0])
+    if lower > threshold_percent:
+        return 'regression'
+    if upper < -threshold_percent:
+        return 'improvement'
+    return 'pass'
@@ -0,0 +1,204 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import contextlib
+import datetime
+import json
+import sqlite3
+import uuid
+from typing import Dict, Iterator, List
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from constants import *
+
+RUN_CATALOG_COLUMNS = ['run_id', 'project_name', 'start_time', 'end_time', 'client_count', 'package_hash', 'config']
+
+
+def new_run_id() -> str:
+    """
+    Mint the ID of a new test run. IDs sort by their start time
+    :return: Run ID, e.g. 20230101T120000Z-1a2b3c4d
+    """
+    start_time = datetime.datetime.now(datetime.timezone.utc)
+    return f'{start_time.strftime("%Y%m%dT%H%M%SZ")}-{uuid.uuid4().hex[:8]}'
+
+
+def get_run_key_prefix(run_id: str) -> str:
+    """
+    Get the key prefix of the artifacts of a run in the artifacts bucket
+    :param run_id: ID of the run
+    :return: Key prefix with forward slashes
+    """
+    return f'{RUN_KEY_PREFIX}/{run_id}'
+
+
+def get_run_catalog_key(run_id: str) -> str:
+    """
+    Get the key of the catalog object of a run in the artifacts bucket.
+    The artifact upload lambda copies it to the export bucket under the MpScalerArtifacts prefix
+    :param run_id: ID of the run
+    :return: Key of the catalog object
+    """
+    return f'{get_run_key_prefix(run_id)}/{RUN_CATALOG_OBJECT_NAME}'
+
+
+class RunCatalog(object):
+    """
+    Local SQLite mirror of the test run catalog. Each run is also written as a catalog object next to its artifacts,
+    so a run is looked up with a single request in Amazon S3 or a single query locally
+    """
+
+    def __init__(self, db_path: str):
+        """
+        :param db_path: Path of the SQLite database file. Created if it doesn't exist
+        """
+        super().__init__()
+        self._db_path = db_path
+        with self._connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS runs ('
+                'run_id TEXT PRIMARY KEY, project_name TEXT, start_time TEXT, end_time TEXT, '
+                'client_count INTEGER, package_hash TEXT, config TEXT)')
+
+    def start_run(self, run_id: str, project_name: str, client_count: int, package_hash: str,
+                  config_snapshot: Dict) -> Dict:
+        """
+        Record the start of a run
+        :param run_id: ID of the run
+        :param project_name: Name of the project under test
+        :param client_count: Number of clients deployed for the run
+        :param package_hash: SHA-256 hash of the project package deployed for the run
+        :param config_snapshot: Content of the config file used for the run
+        :return: Run record
+        """
+        with self._connect() as connection:
+            connection.execute(
+                f'INSERT OR REPLACE INTO runs ({", ".join(RUN_CATALOG_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (run_id, project_name, _now(), '', int(client_count), package_hash, json.dumps(config_snapshot)))
+        return self.get(run_id)
+
+    def end_run(self, run_id: str) -> Dict:
+        """
+        Record the end of a run
+        :param run_id: ID of the run
+        :return: Run record
+        """
+        with self._connect() as connection:
+            connection.execute('UPDATE runs SET end_time = ? WHERE run_id = ?', (_now(), run_id))
+        return self.get(run_id)
+
+    def set_client_count(self, run_id: str, client_count: int) -> Dict:
+        """
+        Update the number of clients of a run
+        :param run_id: ID of the run
+        :param client_count: Number of clients deployed for the run
+        :return: Run record
+        """
+        with self._connect() as connection:
+            connection.execute('UPDATE runs SET client_count = ? WHERE run_id = ?', (int(client_count), run_id))
+        return self.get(run_id)
+
+    def save(self, record: Dict) -> None:
+        """
+        Save a run record, e.g. one downloaded from its catalog object
+        :param record: Run record
+        """
+        with self._connect() as connection:
+            connection.execute(
+                f'INSERT OR REPLACE INTO runs ({", ".join(RUN_CATALOG_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                tuple(json.dumps(record.get(column, {})) if column == 'config' else record.get(column, '')
+                      for column in RUN_CATALOG_COLUMNS))
+
+    def get(self, run_id: str) -> Dict:
+        """
+        Get a run record
+        :param run_id: ID of the run
+        :return: Run record, or an empty dictionary if the run is not found
+        """
+        runs = self._query('WHERE run_id = ?', (run_id,))
+        return runs[0] if runs else {}
+
+    def get_active(self, project_name: str) -> Dict:
+        """
+        Get the latest run of a project which didn't end
+        :param project_name: Name of the project under test
+        :return: Run record, or an empty dictionary if no run is active
+        """
+        runs = self._query("WHERE project_name = ? AND end_time = '' ORDER BY start_time DESC LIMIT 1",
+                           (project_name,))
+        return runs[0] if runs else {}
+
+    def list_runs(self, project_name: str = '') -> List[Dict]:
+        """
+        List the runs ordered by start time
+        :param project_name: Only list the runs of this project if specified
+        :return: Run records
+        """
+        if project_name:
+            return self._query('WHERE project_name = ? ORDER BY start_time', (project_name,))
+        return self._query('ORDER BY start_time')
+
+    def _query(self, condition: str, parameters: tuple = ()) -> List[Dict]:
+        with self._connect() as connection:
+            rows = connection.execute(f'SELECT {", ".join(RUN_CATALOG_COLUMNS)} FROM runs {condition}', parameters)
+            records = [dict(zip(RUN_CATALOG_COLUMNS, row)) for row in rows]
+        for record in records:
+            record['config'] = json.loads(record['config']) if record['config'] else {}
+        return records
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # The connection context only commits or rolls back the transaction, so the connection is closed here
+        with contextlib.closing(sqlite3.connect(self._db_path)) as connection:
+            with connection:
+                yield connection
+
+
+class RunCatalogStore(object):
+    """
+    Read and write run catalog objects in Amazon S3
+    """
+
+    def __init__(self, bucket_name: str, region: str, key_prefix: str = ''):
+        """
+        :param bucket_name: Name of the bucket with the catalog objects
+        :param region: AWS region of the bucket
+        :param key_prefix: Prefix of the run keys, e.g. MpScalerArtifacts/ in the export bucket
+        """
+        super().__init__()
+        self._bucket_name = bucket_name
+        self._key_prefix = key_prefix
+        self._s3_client = boto3.client('s3', config=Config(region_name=region))
+
+    def put(self, record: Dict) -> str:
+        """
+        Write the catalog object of a run
+        :param record: Run record
+        :return: Key of the catalog object
+        """
+        key = f'{self._key_prefix}{get_run_catalog_key(record["run_id"])}'
+        self._s3_client.put_object(Bucket=self._bucket_name, Key=key,
+                                   Body=json.dumps(record, indent=1).encode('utf-8'), ContentType='application/json')
+        return key
+
+    def get(self, run_id: str) -> Dict:
+        """
+        Read the catalog object of a run
+        :param run_id: ID of the run
+        :return: Run record, or an empty dictionary if the run is not found
+        """
+        try:
+            response = self._s3_client.get_object(
+                Bucket=self._bucket_name, Key=f'{self._key_prefix}{get_run_catalog_key(run_id)}')
+        except ClientError as error:
+            if error.response['Error']['Code'] in ['404', 'NoSuchKey']:
+                return {}
+            raise
+        return json.loads(response['Body'].read())
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
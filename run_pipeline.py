@@ -0,0 +1,336 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from botocore.exceptions import ClientError
+
+from artifact_bundle import ArtifactBundle, get_bundle_manifest_key
+from cdk_manager import CdkManager
+from client_readiness import ClientReadinessMonitor, format_histogram
+from config import AutoScalerConfig
+from constants import *
+from package_builder import PackageBuilder
+from run_catalog import RunCatalog
+from stack_outputs import StackOutputs
+
+RUN_STAGE_PENDING = 'pending'
+
+
+def get_namespaced_path(path: str, namespace: str) -> str:
+    """
+    Suffix a local path with the namespace, so deployments of different namespaces don't share it
+    :param path: Local file or folder path
+    :param namespace: Namespace of the deployment
+    :return: Path with the namespace before its extension, e.g. run_state.experiment1.json, or the path itself if
+    the namespace is empty
+    """
+    root, extension = os.path.splitext(path)
+    return f'{root}.{namespace}{extension}' if namespace else path
+
+
+class RunState(object):
+    """
+    State of the run pipeline, saved to a JSON file whenever it changes so a rerun can resume
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Path of the state file. The state is loaded from it if it exists
+        """
+        super().__init__()
+        self._path = path
+        self._lock = threading.Lock()
+        self._state = {'stages': {}}
+        if os.path.exists(path):
+            with open(path) as state_file:
+                self._state = json.load(state_file)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._state.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._state[key] = value
+            self._save()
+
+    def get_stage(self, name: str) -> Dict:
+        return self._state['stages'].get(name, {})
+
+    def end_stage(self, name: str, status: str, seconds: float) -> None:
+        """
+        Record the end of a stage attempt
+        :param name: Name of the stage
+        :param status: Completed or failed
+        :param seconds: Duration of the attempt
+        """
+        with self._lock:
+            stage = self._state['stages'].setdefault(name, {'attempts': 0, 'seconds': 0.0})
+            stage['status'] = status
+            stage['attempts'] += 1
+            stage['seconds'] += seconds
+            self._save()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = {'stages': {}}
+            self._save()
+
+    def _save(self) -> None:
+        # Replace the file at once, so an interrupted save never leaves a truncated state behind
+        temp_path = f'{self._path}.tmp'
+        with open(temp_path, 'w') as state_file:
+            json.dump(self._state, state_file, indent=1)
+        os.replace(temp_path, self._path)
+
+
+class RunPipeline(object):
+    """
+    Run the build, deploy, wait, hold, clear and collect stages of a test run on AWS. Every stage is recorded in a
+    state file, so a rerun resumes from the first stage which isn't completed. The client image is built and pushed
+    while the server AMI bakes
+    """
+
+    def __init__(self, config: AutoScalerConfig, platform: str, state_path: str = '',
+                 hold_minutes: float = DEFAULT_RUN_HOLD_MINUTES, export_bucket_name: str = '',
+                 artifacts_path: str = '', readiness_timeout: float = DEFAULT_READINESS_TIMEOUT_SECONDS,
+                 collect_timeout: float = DEFAULT_RUN_COLLECT_TIMEOUT_SECONDS):
+        """
+        :param config: Auto scaler config
+        :param platform: Platform of the project package
+        :param state_path: Path of the state file. Defaults to DEFAULT_RUN_STATE_PATH suffixed with the namespace
+        :param hold_minutes: Minutes to keep the connected clients running before clearing the deployment
+        :param export_bucket_name: Name of the export bucket to collect the run artifacts from. The artifacts aren't
+        collected if empty
+        :param artifacts_path: Folder to collect the run artifacts in. Defaults to DEFAULT_RUN_ARTIFACTS_PATH suffixed
+        with the namespace
+        :param readiness_timeout: Maximum seconds to wait for the clients to connect
+        :param collect_timeout: Maximum seconds to wait for the artifact bundle after the deployment is cleared
+        """
+        super().__init__()
+        self._config = config
+        self._platform = platform
+        self._hold_minutes = hold_minutes
+        self._export_bucket_name = export_bucket_name
+        self._artifacts_path = artifacts_path if artifacts_path else \
+            get_namespaced_path(DEFAULT_RUN_ARTIFACTS_PATH, config.get_namespace())
+        self._readiness_timeout = readiness_timeout
+        self._collect_timeout = collect_timeout
+        self._region = config.get_str(SCALER_CONFIG_AWS_REGION_KEY, os.environ.get('CDK_DEFAULT_REGION'))
+        self._deployment_name = config.get_deployment_name()
+        self._state = RunState(state_path if state_path else
+                               get_namespaced_path(DEFAULT_RUN_STATE_PATH, config.get_namespace()))
+        self._lock = threading.Lock()
+        self._cdk_manager = None
+        self._stages = {}
+        self._start_time = time.perf_counter()
+
+    def run(self, restart: bool = False) -> None:
+        """
+        Run the stages which aren't completed yet. The stages of a group run alongside each other, and the next group
+        only starts once all of them are completed
+        :param restart: Whether to ignore the saved state and start over with a new run
+        """
+        if restart:
+            self._state.reset()
+        if not self._state.get('deployment_name'):
+            self._state.set('deployment_name', self._deployment_name)
+            self._state.set('platform', self._platform)
+        elif (self._state.get('deployment_name'), self._state.get('platform')) != \
+                (self._deployment_name, self._platform):
+            raise RuntimeError(f'The run state belongs to the {self._state.get("platform")} package of deployment '
+                               f'{self._state.get("deployment_name")}. Run with --restart to start over')
+
+        self._start_time = time.perf_counter()
+        for group in self._get_stage_groups():
+            pending = []
+            for name, stage in group:
+                if self._state.get_stage(name).get('status') == RUN_STAGE_COMPLETED:
+                    print(f'Run stage {name} is already completed')
+                    self._stages[name] = {'status': RUN_STAGE_SKIPPED, 'seconds': 0.0}
+                else:
+                    pending.append((name, stage))
+            if len(pending) > 1:
+                self._run_stages(pending)
+            elif pending:
+                self._run_stage(*pending[0])
+
+        if all(stage['status'] == RUN_STAGE_SKIPPED for stage in self._stages.values()):
+            print(f'[Warn] All the stages of run {self._state.get("run_id", "")} are already completed. '
+                  f'Run with --restart to start a new run')
+
+    def get_report(self) -> Dict:
+        """
+        Get the stage timings of the current invocation
+        :return: Report of the stages in pipeline order, including the stages which weren't reached
+        """
+        stages = []
+        for group in self._get_stage_groups():
+            for name, _ in group:
+                stage = self._stages.get(name, {'status': RUN_STAGE_PENDING, 'seconds': 0.0})
+                stages.append({'name': name, **stage, 'attempts': self._state.get_stage(name).get('attempts', 0)})
+        return {
+            'run_id': self._state.get('run_id', ''),
+            'stages': stages,
+            'stage_seconds': sum(stage['seconds'] for stage in stages),
+            'wall_seconds': time.perf_counter() - self._start_time
+        }
+
+    def _get_stage_groups(self) -> List[List[Tuple[str, Callable]]]:
+        # The server and client image deployments both need the common stack, which can't be deployed by two
+        # deployments at once, so it's deployed ahead of them
+        return [
+            [('build', self._build)],
+            [('common', lambda: self._get_cdk_manager().deploy_aws_resources(COMMON_TARGET, self._platform))],
+            [('server', self._deploy_server), ('client-image', self._deploy_client_image)],
+            [('clients', self._deploy_clients)],
+            [('wait-clients', self._wait_clients)],
+            [('hold', self._hold)],
+            [('clear', self._clear)],
+            [('collect', self._collect)],
+            [('clear-common', self._clear_common)]
+        ]
+
+    def _run_stages(self, stages: List[Tuple[str, Callable]]) -> None:
+        # Every stage of the group runs to its end even if another one fails, so its state is recorded
+        with ThreadPoolExecutor(max_workers=len(stages)) as executor:
+            futures = [executor.submit(self._run_stage, name, stage) for name, stage in stages]
+        errors = [future.exception() for future in futures if future.exception()]
+        if errors:
+            raise errors[0]
+
+    def _run_stage(self, name: str, stage: Callable) -> None:
+        print(f'Run stage {name}...')
+        start_time = time.perf_counter()
+        status = RUN_STAGE_FAILED
+        try:
+            stage()
+            status = RUN_STAGE_COMPLETED
+        finally:
+            seconds = time.perf_counter() - start_time
+            self._state.end_stage(name, status, seconds)
+            self._stages[name] = {'status': status, 'seconds': seconds}
+            print(f'...{name} {status} in {seconds:.1f} seconds')
+
+    def _get_cdk_manager(self) -> CdkManager:
+        # The AWS CDK environment is bootstrapped once, by the first stage which needs it
+        with self._lock:
+            if not self._cdk_manager:
+                self._cdk_manager = CdkManager(self._config)
+            return self._cdk_manager
+
+    def _build(self) -> None:
+        cdk_manager = self._get_cdk_manager()
+        if cdk_manager.has_metrics_project():
+            # The AWSMetrics resources are configured in the project before the build. They are kept when the run is
+            # cleared, like the base AMI, since they don't belong to a single run
+            cdk_manager.deploy_aws_resources(METRICS_PIPELINE_TARGET, self._platform)
+
+        PackageBuilder(self._config, self._platform) \
+            .configure_project() \
+            .process_assets() \
+            .build_project('INSTALL') \
+            .process_output()
+
+    def _deploy_server(self) -> None:
+        # Only the server stack is deployed, so the common stack isn't updated alongside the client image deployment
+        self._get_cdk_manager().deploy_aws_resources(SERVER_TARGET, self._platform, exclusively=True)
+        run_catalog = RunCatalog(self._config.get_path(SCALER_CONFIG_RUN_CATALOG_PATH_KEY,
+                                                       SCALER_CONFIG_DEFAULT_RUN_CATALOG_PATH))
+        self._state.set('run_id', run_catalog.get_active(self._deployment_name).get('run_id', ''))
+
+    def _deploy_client_image(self) -> None:
+        # Client images of different namespaces can be deployed alongside each other too
+        namespace = self._config.get_namespace()
+        output_path = f'{RUN_CLIENT_IMAGE_CDK_OUTPUT_FOLDER}.{namespace}' if namespace \
+            else RUN_CLIENT_IMAGE_CDK_OUTPUT_FOLDER
+        self._get_cdk_manager().deploy_client_image(self._platform, output_path)
+
+    def _deploy_clients(self) -> None:
+        # Readiness events are looked up from the start of the client deployment, also when the wait is resumed
+        self._state.set('clients_start_time', time.time())
+        self._get_cdk_manager().deploy_aws_resources(CLIENT_TARGET, self._platform)
+
+    def _wait_clients(self) -> None:
+        client_count = int(self._config.get_str(SCALER_CONFIG_CLIENT_COUNT_KEY, SCALER_CONFIG_DEFAULT_CLIENT_COUNT))
+        log_group_name = StackOutputs(self._deployment_name, self._region).get(
+            CLIENT_STACK_SUFFIX, CLIENT_LOG_GROUP_NAME_OUTPUT_KEY)
+        monitor = ClientReadinessMonitor(log_group_name, self._region,
+                                         self._state.get('clients_start_time', time.time()))
+        all_connected = monitor.wait_for_clients(client_count, client_count, self._readiness_timeout)
+
+        print('Time-to-connected histogram:')
+        print(format_histogram(monitor.get_times_to_connected()))
+        if not all_connected:
+            raise RuntimeError(f'Only {monitor.connected_count} of {client_count} clients connected within '
+                               f'{self._readiness_timeout} seconds')
+
+    def _hold(self) -> None:
+        # The end of the hold is saved, so a resumed hold only waits for the rest of it
+        hold_end_time = self._state.get('hold_end_time')
+        if not hold_end_time:
+            hold_end_time = time.time() + self._hold_minutes * 60
+            self._state.set('hold_end_time', hold_end_time)
+        remaining_seconds = hold_end_time - time.time()
+        if remaining_seconds > 0:
+            print(f'Keeping the clients connected for {remaining_seconds / 60:.1f} minutes')
+            time.sleep(remaining_seconds)
+
+    def _clear(self) -> None:
+        # The common stack is kept until the artifacts are collected. It holds the artifacts bucket and the upload
+        # Lambda function, which is still bundling the run for a while after the server stack is deleted
+        cdk_manager = self._get_cdk_manager()
+        cdk_manager.destroy_aws_resources(CLIENT_TARGET, self._platform, exclusively=True)
+        cdk_manager.destroy_aws_resources(SERVER_TARGET, self._platform, exclusively=True)
+
+    def _clear_common(self) -> None:
+        run_id = self._state.get('run_id', '')
+        if not self._state.get('artifacts_collected'):
+            print(f'[Warn] The common stack is kept, since the artifacts of run {run_id} are not collected. Run clear '
+                  f'with the all target once they are uploaded')
+            return
+        self._get_cdk_manager().destroy_aws_resources(ALL_TARGET, self._platform)
+
+    def _collect(self) -> None:
+        run_id = self._state.get('run_id', '')
+        if not self._export_bucket_name:
+            print(f'[Warn] No export bucket is specified. Fetch the artifacts of run {run_id} with fetch-artifacts '
+                  f'once they are uploaded')
+            return
+
+        bundle = ArtifactBundle(self._export_bucket_name, get_bundle_manifest_key(run_id), self._region)
+        deadline = time.time() + self._collect_timeout
+        while True:
+            try:
+                print(f'Artifact bundle of run {run_id} has {len(bundle.files)} files')
+                break
+            except ClientError as error:
+                if error.response['Error']['Code'] not in ['NoSuchKey', '404'] or \
+                        time.time() + RUN_COLLECT_POLL_SECONDS > deadline:
+                    raise
+            print(f'Waiting for the artifact bundle of run {run_id} to be uploaded to {self._export_bucket_name}')
+            time.sleep(RUN_COLLECT_POLL_SECONDS)
+
+        file_paths = bundle.extract(self._artifacts_path)
+        print(f'Collected {len(file_paths)} files to {self._artifacts_path}')
+        self._state.set('artifacts_collected', True)
+
+
+def format_run_report(report: Dict) -> str:
+    """
+    Format the stage timings of a run report as a text table
+    :param report: Run report
+    :return: Text table
+    """
+    lines = [f'Run {report["run_id"]}', f'{"stage":<14} {"status":<10} {"seconds":>10} {"attempts":>9}']
+    lines += [f'{stage["name"]:<14} {stage["status"]:<10} {stage["seconds"]:>10.1f} {stage["attempts"]:>9}'
+              for stage in report['stages']]
+    # The wall clock time is shorter than the sum of the stages when stages overlap
+    lines.append(f'{"stages total":<25} {report["stage_seconds"]:>10.1f}')
+    lines.append(f'{"wall clock":<25} {report["wall_seconds"]:>10.1f}')
+    return '\n'.join(lines)
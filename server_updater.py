@@ -0,0 +1,238 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import concurrent.futures
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Dict, List
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from constants import *
+
+# Runs on the server instance via the AWS-RunPowerShellScript document.
+# The server process is restarted through WMI so that it is not part of the Run Command job,
+# whose child processes are terminated by the SSM agent once the command completes.
+SERVER_UPDATE_SCRIPT = '''
+$ErrorActionPreference = 'Stop'
+$bucket = '{bucket}'
+$updatePrefix = '{update_prefix}'
+$installDir = '{install_dir}'
+$launcher = '{project_name}.ServerLauncher.exe'
+$arguments = '{default_arguments}'
+
+$server = Get-CimInstance Win32_Process -Filter "Name = '$launcher'" | Select-Object -First 1
+if ($server) {{
+    # Keep the launch arguments of the running server, dropping the executable from its command line
+    if ($server.CommandLine -match '^\\s*("[^"]*"|\\S+)\\s*(.*)$') {{
+        $arguments = $Matches[2]
+    }}
+    Stop-Process -Id $server.ProcessId -Force
+    Wait-Process -Id $server.ProcessId -Timeout 60 -ErrorAction SilentlyContinue
+    Write-Output "Stopped $launcher (process ID $($server.ProcessId))"
+}} else {{
+    Write-Output "$launcher is not running. Starting it with the default launch arguments"
+}}
+
+$manifestFile = Join-Path $env:TEMP 'mpscaler_server_update.json'
+Read-S3Object -BucketName $bucket -Key "$updatePrefix/update.json" -File $manifestFile | Out-Null
+$update = Get-Content $manifestFile -Raw | ConvertFrom-Json
+if ($update.changed.Count -gt 0) {{
+    Read-S3Object -BucketName $bucket -KeyPrefix "$updatePrefix/files" -Folder $installDir | Out-Null
+}}
+foreach ($path in $update.deleted) {{
+    Remove-Item -Path (Join-Path $installDir $path) -Force -ErrorAction SilentlyContinue
+}}
+Write-Output "Synced $($update.changed.Count) changed and $($update.deleted.Count) deleted files into $installDir"
+
+$result = Invoke-CimMethod -ClassName Win32_Process -MethodName Create -Arguments @{{
+    CommandLine = "`"$installDir\\$launcher`" $arguments"
+    CurrentDirectory = $installDir
+}}
+if ($result.ReturnValue -ne 0) {{
+    throw "Failed to start $launcher with return value $($result.ReturnValue)"
+}}
+Write-Output "Started $launcher (process ID $($result.ProcessId)) $arguments"
+'''
+
+
+def get_package_manifest(package_path: str) -> Dict[str, Dict]:
+    """
+    Describe the content of a project package
+    :param package_path: Path to the project package folder
+    :return: Size and SHA-256 hash of every file, keyed by the file path relative to the package with forward slashes
+    """
+    manifest = {}
+    for root, _, file_names in os.walk(package_path):
+        for file_name in file_names:
+            file_path = os.path.join(root, file_name)
+            file_hash = hashlib.sha256()
+            with open(file_path, 'rb') as package_file:
+                for chunk in iter(lambda: package_file.read(1024 * 1024), b''):
+                    file_hash.update(chunk)
+            relative_path = os.path.relpath(file_path, package_path).replace(os.sep, '/')
+            manifest[relative_path] = {'size': os.path.getsize(file_path), 'sha256': file_hash.hexdigest()}
+    return manifest
+
+
+class ServerUpdater(object):
+    """
+    Update the project package on the running server instance without baking a new AMI.
+    Changed files are uploaded to the artifacts bucket and synced into the server install directory via
+    AWS Systems Manager Run Command, which also restarts the server with its current launch arguments.
+    The manifest of the package on the server instance is kept in the artifacts bucket to find the changed files
+    """
+
+    def __init__(self, bucket_name: str, instance_id: str, project_name: str, region: str,
+                 max_upload_workers: int = DEFAULT_SERVER_UPDATE_UPLOAD_WORKERS):
+        """
+        :param bucket_name: Name of the artifacts bucket
+        :param instance_id: ID of the server instance
+        :param project_name: Name of the O3DE project
+        :param region: AWS region of the deployed stacks
+        :param max_upload_workers: Maximum number of files uploaded concurrently
+        """
+        super().__init__()
+        self._bucket_name = bucket_name
+        self._instance_id = instance_id
+        self._project_name = project_name
+        self._max_upload_workers = max_upload_workers
+        self._s3_client = boto3.client('s3', config=Config(region_name=region))
+        self._ssm_client = boto3.client('ssm', config=Config(region_name=region))
+
+    def get_server_manifest(self) -> Dict[str, Dict]:
+        """
+        Get the manifest of the project package installed on the server instance by the last update
+        :return: Package manifest, or an empty manifest if the server instance was never updated
+        """
+        try:
+            response = self._s3_client.get_object(Bucket=self._bucket_name, Key=self._get_manifest_key())
+        except ClientError as e:
+            if e.response['Error']['Code'] in ['NoSuchKey', '404']:
+                return {}
+            raise
+        return json.loads(response['Body'].read())
+
+    def upload(self, package_path: str, full: bool = False) -> Dict:
+        """
+        Upload the files that changed since the last update
+        :param package_path: Path to the project package folder
+        :param full: Whether to upload the full package regardless of the last update
+        :return: Description of the uploaded update
+        """
+        if not os.path.isdir(package_path):
+            raise RuntimeError(f'Could not find the project package in {package_path}. '
+                               f'Please build and package your O3DE project first')
+
+        manifest = get_package_manifest(package_path)
+        server_manifest = {} if full else self.get_server_manifest()
+        if not server_manifest and not full:
+            print('[Warn] No previous server update is found. The full package will be uploaded')
+
+        changed = sorted(path for path, entry in manifest.items() if server_manifest.get(path) != entry)
+        deleted = sorted(path for path in server_manifest if path not in manifest)
+        update = {
+            'update_id': time.strftime('%Y%m%d%H%M%S') + '-' + uuid.uuid4().hex[:8],
+            'changed': changed,
+            'deleted': deleted,
+            'uploaded_bytes': sum(manifest[path]['size'] for path in changed),
+            'manifest': manifest
+        }
+        update_prefix = self._get_update_prefix(update['update_id'])
+
+        print(f'Uploading {len(changed)} changed files ({update["uploaded_bytes"]} bytes) to '
+              f's3://{self._bucket_name}/{update_prefix} ...')
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self._max_upload_workers) as executor:
+            futures = [executor.submit(self._s3_client.upload_file, os.path.join(package_path, *path.split('/')),
+                                       self._bucket_name, f'{update_prefix}/files/{path}') for path in changed]
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+
+        self._s3_client.put_object(
+            Bucket=self._bucket_name, Key=f'{update_prefix}/update.json',
+            Body=json.dumps({'changed': changed, 'deleted': deleted}).encode('utf-8'))
+        print('...Done')
+        return update
+
+    def apply(self, update: Dict, timeout_seconds: float = DEFAULT_SERVER_UPDATE_TIMEOUT_SECONDS,
+              poll_seconds: float = DEFAULT_SERVER_UPDATE_POLL_SECONDS) -> bool:
+        """
+        Sync an uploaded update into the server install directory and restart the server
+        :param update: Description of the uploaded update
+        :param timeout_seconds: Maximum time to wait for the command to complete
+        :param poll_seconds: Time between two checks of the command status
+        :return: Whether the server is updated and restarted
+        """
+        response = self._ssm_client.send_command(
+            InstanceIds=[self._instance_id],
+            DocumentName='AWS-RunPowerShellScript',
+            Comment=f'Update {self._project_name} server {update["update_id"]}',
+            TimeoutSeconds=int(timeout_seconds),
+            Parameters={'commands': self._get_update_commands(update['update_id'])}
+        )
+        command_id = response['Command']['CommandId']
+        print(f'Syncing update {update["update_id"]} to server {self._instance_id} with command {command_id} ...')
+
+        invocation = self._wait_for_command(command_id, timeout_seconds, poll_seconds)
+        if invocation.get('StandardOutputContent'):
+            print(invocation['StandardOutputContent'])
+        if invocation.get('Status') != 'Success':
+            print(f'[Error] Server update command {command_id} ended with status {invocation.get("Status")}. '
+                  f'{invocation.get("StandardErrorContent", "")}')
+            return False
+
+        # Only record the package as installed once the server is updated
+        self._s3_client.put_object(
+            Bucket=self._bucket_name, Key=self._get_manifest_key(),
+            Body=json.dumps(update['manifest']).encode('utf-8'))
+        print('...Done')
+        return True
+
+    def _wait_for_command(self, command_id: str, timeout_seconds: float, poll_seconds: float) -> Dict:
+        """
+        Wait until a Run Command invocation on the server completes
+        :param command_id: ID of the command
+        :param timeout_seconds: Maximum time to wait
+        :param poll_seconds: Time between two checks of the command status
+        :return: Latest command invocation
+        """
+        deadline = time.time() + timeout_seconds
+        invocation = {}
+        while time.time() < deadline:
+            try:
+                invocation = self._ssm_client.get_command_invocation(
+                    CommandId=command_id, InstanceId=self._instance_id)
+            except ClientError as e:
+                # The invocation is not available right after the command is sent
+                if e.response['Error']['Code'] != 'InvocationDoesNotExist':
+                    raise
+            if invocation.get('Status') in SERVER_UPDATE_COMMAND_FINAL_STATUSES:
+                return invocation
+            time.sleep(poll_seconds)
+        return dict(invocation, Status='TimedOut')
+
+    def _get_manifest_key(self) -> str:
+        return f'{SERVER_UPDATE_KEY_PREFIX}/{SERVER_UPDATE_MANIFEST_FOLDER}/{self._instance_id}.json'
+
+    def _get_update_prefix(self, update_id: str) -> str:
+        return f'{SERVER_UPDATE_KEY_PREFIX}/{update_id}'
+
+    def _get_update_commands(self, update_id: str) -> List[str]:
+        """
+        Get the PowerShell commands which apply an update on the server
+        :param update_id: ID of the uploaded update
+        :return: Commands for the AWS-RunPowerShellScript document
+        """
+        script = SERVER_UPDATE_SCRIPT.format(
+            bucket=self._bucket_name,
+            update_prefix=self._get_update_prefix(update_id),
+            install_dir=SERVER_INSTALL_DIR,
+            project_name=self._project_name,
+            default_arguments=SERVER_DEFAULT_LAUNCH_ARGUMENTS.replace("'", "''")
+        )
+        return script.strip().split('\n')
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Stand-in for the AWS CDK CLI used by the local simulation. Deploy creates the resources of the multiplayer test scaler
+stacks directly in the moto server the environment points boto3 at, and registers every stack in AWS CloudFormation
+with the outputs and tags of the real stacks, so CdkManager, StackOutputs and the CLI commands find them.
+Destroy stops the stub hosts, runs the artifact upload lambda like the server stack deletion event does, then deletes
+the resources. See local_simulation.py
+"""
+
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+import boto3
+import botocore.exceptions
+from botocore.config import Config
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_PATH = os.path.join(ROOT_PATH, 'cdk', 'lambda', 'upload_test_artifacts')
+sys.path.insert(0, ROOT_PATH)
+from constants import *  # noqa: E402
+
+SERVER_IMAGE_ID = 'ami-00000000000000000'
+SERVER_DOCUMENT_NAME = 'MultiplayerTestScaler-server-upload-command'
+CLIENT_CONTAINER_NAME = 'MultiplayerTestScalerClientContainer'
+CLIENT_LOG_STREAM_PREFIX = 'auto-scaler-client'
+ARTIFACT_BUCKET_EXPORT_NAME = 'MultiplayerTestScalerArtifactBucketName'
+
+
+class LambdaContext(object):
+    """
+    Context of the in-process artifact upload lambda invocation. The simulated invocation never runs out of time
+    """
+    invoked_function_arn = f'arn:aws:lambda:{SIMULATION_REGION}:{SIMULATION_ACCOUNT_ID}:function:UploadTestArtifacts'
+
+    @staticmethod
+    def get_remaining_time_in_millis() -> int:
+        return 15 * 60 * 1000
+
+
+class FakeCdk(object):
+    """
+    Deploy and destroy the simulated stacks of a project
+    """
+
+    def __init__(self, project_name: str, region: str, context: Dict[str, str]):
+        """
+        :param project_name: Name of the project, which prefixes the stack names after the namespace if any
+        :param region: AWS region of the stacks
+        :param context: Context variables passed with -c
+        """
+        super().__init__()
+        self._region = region
+        self._context = context
+        # Stacks and resources are named after the namespace like in the AWS CDK application
+        self._namespace = context.get('namespace', '')
+        self._deployment_name = self._get_namespaced_name(project_name)
+        self._simulation_path = os.environ.get(SIMULATION_PATH_ENV, '')
+        if not self._simulation_path:
+            raise RuntimeError(f'{SIMULATION_PATH_ENV} is not set. The fake AWS CDK CLI only runs in the local '
+                               f'simulation, see "main.py simulate"')
+        config = Config(region_name=region)
+        self._cloudformation_client = boto3.client('cloudformation', config=config)
+        self._ec2_client = boto3.client('ec2', config=config)
+        self._ecs_client = boto3.client('ecs', config=config)
+        self._logs_client = boto3.client('logs', config=config)
+        self._s3_client = boto3.client('s3', config=config)
+        self._ssm_client = boto3.client('ssm', config=config)
+
+    def get_stack_suffixes(self) -> List[str]:
+        """
+        Get the stacks of the application for the target context variable, like MultiplayerTestScalerConstruct
+        :return: Suffixes of the stack names in deployment order
+        """
+        target = self._context.get('target', '')
+        if target in [BASE_IMAGE_TARGET, COMMON_TARGET]:
+            # The base image is baked by EC2 Image Builder, which isn't simulated
+            return [COMMON_STACK_SUFFIX]
+        if target == SERVER_TARGET:
+            return [COMMON_STACK_SUFFIX, SERVER_STACK_SUFFIX]
+        if target == CLIENT_TARGET:
+            return [COMMON_STACK_SUFFIX, CLIENT_STACK_SUFFIX]
+        return [COMMON_STACK_SUFFIX, SERVER_STACK_SUFFIX, CLIENT_STACK_SUFFIX]
+
+    def deploy(self) -> None:
+        for stack_suffix in self.get_stack_suffixes():
+            outputs = self._get_outputs(stack_suffix)
+            if stack_suffix == COMMON_STACK_SUFFIX:
+                if not outputs:
+                    bucket_name = f'{self._deployment_name.lower()}-artifacts-{uuid.uuid4().hex[:12]}'
+                    self._s3_client.create_bucket(Bucket=bucket_name)
+                    outputs = {ARTIFACT_BUCKET_NAME_OUTPUT_KEY: bucket_name}
+            elif stack_suffix == SERVER_STACK_SUFFIX:
+                outputs = self._deploy_server(outputs)
+            else:
+                outputs = self._deploy_client(outputs)
+            self._put_stack(stack_suffix, outputs)
+            print(f'{self._get_stack_name(stack_suffix)}: deployed')
+
+    def destroy(self) -> None:
+        stack_suffixes = self.get_stack_suffixes()
+        deployed_stacks = self._list_stacks()
+        if COMMON_STACK_SUFFIX in stack_suffixes and any(
+                suffix not in stack_suffixes for suffix in deployed_stacks if suffix != COMMON_STACK_SUFFIX):
+            # The other run stacks import the artifacts bucket export of the common stack
+            print(f'[Warn] Keeping {self._get_stack_name(COMMON_STACK_SUFFIX)}, its exports are still imported')
+            stack_suffixes.remove(COMMON_STACK_SUFFIX)
+
+        for stack_suffix in reversed(stack_suffixes):
+            if stack_suffix not in deployed_stacks:
+                continue
+            stack_id, outputs = deployed_stacks[stack_suffix]
+            if stack_suffix == CLIENT_STACK_SUFFIX:
+                self._destroy_client(outputs)
+            elif stack_suffix == SERVER_STACK_SUFFIX:
+                self._destroy_server(stack_id, outputs)
+            else:
+                self._empty_bucket(outputs[ARTIFACT_BUCKET_NAME_OUTPUT_KEY])
+                self._s3_client.delete_bucket(Bucket=outputs[ARTIFACT_BUCKET_NAME_OUTPUT_KEY])
+            self._cloudformation_client.delete_stack(StackName=stack_id)
+            print(f'{self._get_stack_name(stack_suffix)}: destroyed')
+
+    def _deploy_server(self, outputs: Dict[str, str]) -> Dict[str, str]:
+        run_id = self._context.get('run_id', '')
+        instance_id = outputs.get(SERVER_INSTANCE_ID_OUTPUT_KEY)
+        if not instance_id:
+            instance = self._ec2_client.run_instances(
+                ImageId=SERVER_IMAGE_ID, MinCount=1, MaxCount=1,
+                InstanceType=self._context.get('server_instance_type') or SCALER_CONFIG_DEFAULT_SERVER_INSTANCE_TYPE,
+                PrivateIpAddress=self._context.get('server_private_ip') or SCALER_CONFIG_DEFAULT_SERVER_PRIVATE_IP
+            )['Instances'][0]
+            instance_id = instance['InstanceId']
+            self._ssm_client.create_document(
+                Name=self._get_namespaced_name(SERVER_DOCUMENT_NAME), DocumentType='Command', Content=json.dumps({
+                'schemaVersion': '2.2', 'description': 'Sync the server artifacts to the artifacts bucket',
+                'mainSteps': [{'action': 'aws:runPowerShellScript', 'name': 'SyncArtifacts',
+                               'inputs': {'runCommand': ['sync_server_artifacts.ps1']}}]}))
+        # The simulation restarts the stub server when the run ID tag changes
+        self._ec2_client.create_tags(Resources=[instance_id], Tags=[
+            {'Key': SIMULATION_ROLE_TAG_KEY, 'Value': 'server'}, {'Key': RUN_ID_TAG_KEY, 'Value': run_id}])
+        return {SERVER_INSTANCE_ID_OUTPUT_KEY: instance_id}
+
+    def _deploy_client(self, outputs: Dict[str, str]) -> Dict[str, str]:
+        run_id = self._context.get('run_id', '')
+        cluster_name = f'{self._deployment_name}-clients'
+        service_name = f'{self._deployment_name}-client-service'
+        log_group_name = outputs.get(CLIENT_LOG_GROUP_NAME_OUTPUT_KEY, f'/{self._deployment_name}/clients')
+        if not outputs:
+            self._ecs_client.create_cluster(clusterName=cluster_name)
+            self._logs_client.create_log_group(logGroupName=log_group_name)
+
+        artifact_bucket_name = self._get_outputs(COMMON_STACK_SUFFIX)[ARTIFACT_BUCKET_NAME_OUTPUT_KEY]
+        sync_seconds = int(float(self._context.get('artifact_sync_interval') or
+                                 SCALER_CONFIG_DEFAULT_SERVER_ARTIFACT_SYNC_INTERVAL) * 60)
+        # The container environment and log configuration are read by the simulation to launch the stub clients,
+        # the way the client stack configures the client container
+        task_definition_arn = self._ecs_client.register_task_definition(
+            family=f'{self._deployment_name}-client',
+            cpu=str(self._context.get('client_task_cpu') or SCALER_CONFIG_DEFAULT_CLIENT_TASK_CPU_UNITS),
+            memory=str(self._context.get('client_task_memory') or SCALER_CONFIG_DEFAULT_CLIENT_TASK_MEMORY_MIB),
+            containerDefinitions=[{
+                'name': CLIENT_CONTAINER_NAME, 'image': 'multiplayer-test-scaler-client',
+                'memory': int(self._context.get('client_task_memory') or SCALER_CONFIG_DEFAULT_CLIENT_TASK_MEMORY_MIB),
+                'environment': [{'name': 'MPSCALER_ARTIFACT_BUCKET', 'value': artifact_bucket_name},
+                                {'name': 'MPSCALER_RUN_ID', 'value': run_id},
+                                {'name': 'MPSCALER_ARTIFACT_SYNC_INTERVAL_SECONDS', 'value': str(sync_seconds)}],
+                'logConfiguration': {'logDriver': 'awslogs', 'options': {
+                    'awslogs-group': log_group_name,
+                    'awslogs-stream-prefix': f'{CLIENT_LOG_STREAM_PREFIX}-{run_id}' if run_id
+                    else CLIENT_LOG_STREAM_PREFIX}}
+            }])['taskDefinition']['taskDefinitionArn']
+        client_count = int(self._context.get('client_count') or SCALER_CONFIG_DEFAULT_CLIENT_COUNT)
+        if outputs:
+            self._ecs_client.update_service(cluster=cluster_name, service=service_name,
+                                            taskDefinition=task_definition_arn, desiredCount=client_count)
+        else:
+            self._ecs_client.create_service(cluster=cluster_name, serviceName=service_name,
+                                            taskDefinition=task_definition_arn, desiredCount=client_count)
+        return {CLIENT_CLUSTER_NAME_OUTPUT_KEY: cluster_name, CLIENT_SERVICE_NAME_OUTPUT_KEY: service_name,
+                CLIENT_LOG_GROUP_NAME_OUTPUT_KEY: log_group_name}
+
+    def _destroy_client(self, outputs: Dict[str, str]) -> None:
+        cluster_name = outputs[CLIENT_CLUSTER_NAME_OUTPUT_KEY]
+        service_name = outputs[CLIENT_SERVICE_NAME_OUTPUT_KEY]
+        self._ecs_client.update_service(cluster=cluster_name, service=service_name, desiredCount=0)
+        self._wait_for_hosts_stopped('client-')
+        for task_arn in self._ecs_client.list_tasks(cluster=cluster_name)['taskArns']:
+            self._ecs_client.stop_task(cluster=cluster_name, task=task_arn)
+        self._ecs_client.delete_service(cluster=cluster_name, service=service_name, force=True)
+        self._ecs_client.delete_cluster(cluster=cluster_name)
+        self._logs_client.delete_log_group(logGroupName=outputs[CLIENT_LOG_GROUP_NAME_OUTPUT_KEY])
+
+    def _destroy_server(self, stack_id: str, outputs: Dict[str, str]) -> None:
+        instance_id = outputs[SERVER_INSTANCE_ID_OUTPUT_KEY]
+        self._ec2_client.stop_instances(InstanceIds=[instance_id])
+        self._wait_for_hosts_stopped(f'server-{instance_id}')
+
+        # The deletion of the server stack triggers the artifact upload lambda, which runs while the stack is still
+        # described. The source and destination buckets are set in the lambda environment at deploy time
+        sys.path.insert(0, LAMBDA_PATH)
+        import upload_test_artifacts
+        os.environ['SOURCE_BUCKET_NAME'] = self._get_outputs(COMMON_STACK_SUFFIX)[ARTIFACT_BUCKET_NAME_OUTPUT_KEY]
+        os.environ['DESTINATION_BUCKET_NAME'] = os.environ.get(SIMULATION_EXPORT_BUCKET_ENV, '')
+        upload_test_artifacts.handler(
+            {'resources': [stack_id], 'detail': {'status-details': {'status': upload_test_artifacts.DELETE_STATUS}}},
+            LambdaContext())
+
+        self._ec2_client.terminate_instances(InstanceIds=[instance_id])
+        self._ssm_client.delete_document(Name=self._get_namespaced_name(SERVER_DOCUMENT_NAME))
+
+    def _wait_for_hosts_stopped(self, record_prefix: str) -> None:
+        """
+        Wait until the simulation stops the stub hosts, which sync their last artifacts before they exit
+        :param record_prefix: Prefix of the host records, <role>-<host ID>
+        """
+        host_path = os.path.join(self._simulation_path, SIMULATION_HOST_FOLDER_NAME)
+        deadline = time.time() + SIMULATION_HOST_STOP_TIMEOUT_SECONDS
+        while any(name.startswith(record_prefix) for name in os.listdir(host_path)):
+            if time.time() > deadline:
+                raise RuntimeError(f'Stub hosts {record_prefix}* did not stop within '
+                                   f'{SIMULATION_HOST_STOP_TIMEOUT_SECONDS} seconds')
+            time.sleep(SIMULATION_RECONCILE_SECONDS)
+
+    def _empty_bucket(self, bucket_name: str) -> None:
+        paginator = self._s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket_name):
+            objects = [{'Key': item['Key']} for item in page.get('Contents', [])]
+            if objects:
+                self._s3_client.delete_objects(Bucket=bucket_name, Delete={'Objects': objects})
+
+    def _put_stack(self, stack_suffix: str, outputs: Dict[str, str]) -> None:
+        """
+        Register the stack in AWS CloudFormation. Its only resource records the deployment context, the resources
+        themselves are created directly
+        :param stack_suffix: Suffix of the stack name
+        :param outputs: Output values keyed by the output keys of the real stack
+        """
+        stack_name = self._get_stack_name(stack_suffix)
+        template_outputs = {}
+        for key, value in outputs.items():
+            template_outputs[key] = {'Value': value}
+            if key == ARTIFACT_BUCKET_NAME_OUTPUT_KEY:
+                template_outputs[key]['Export'] = {'Name': self._get_namespaced_name(ARTIFACT_BUCKET_EXPORT_NAME)}
+        template = json.dumps({
+            'Resources': {'DeploymentContext': {'Type': 'AWS::SSM::Parameter', 'Properties': {
+                'Name': f'/{stack_name}/deployment-context', 'Type': 'String',
+                'Value': json.dumps(self._context, sort_keys=True)}}},
+            'Outputs': template_outputs
+        })
+        run_id = self._context.get('run_id', '')
+        tags = [{'Key': RUN_ID_TAG_KEY, 'Value': run_id}] if run_id and stack_suffix != COMMON_STACK_SUFFIX else []
+        if stack_suffix in self._list_stacks():
+            self._cloudformation_client.update_stack(StackName=stack_name, TemplateBody=template, Tags=tags)
+        else:
+            self._cloudformation_client.create_stack(StackName=stack_name, TemplateBody=template, Tags=tags)
+
+    def _get_namespaced_name(self, name: str) -> str:
+        return f'{self._namespace}-{name}' if self._namespace else name
+
+    def _get_stack_name(self, stack_suffix: str) -> str:
+        return f'{self._deployment_name}-{stack_suffix}'
+
+    def _get_outputs(self, stack_suffix: str) -> Dict[str, str]:
+        return self._list_stacks().get(stack_suffix, ('', {}))[1]
+
+    def _list_stacks(self) -> Dict[str, Tuple[str, Dict[str, str]]]:
+        """
+        List the deployed stacks of the project
+        :return: ID and outputs of every stack, keyed by the stack suffix
+        """
+        stacks = {}
+        for stack in self._cloudformation_client.describe_stacks()['Stacks']:
+            prefix = f'{self._deployment_name}-'
+            if stack['StackName'].startswith(prefix) and not stack['StackStatus'].startswith('DELETE'):
+                stacks[stack['StackName'][len(prefix):]] = (stack['StackId'], {
+                    output['OutputKey']: output['OutputValue'] for output in stack.get('Outputs', [])})
+        return stacks
+
+
+def parse_args(argv: List[str]) -> Tuple[str, Dict[str, str]]:
+    """
+    Parse the AWS CDK CLI arguments CdkManager passes
+    :param argv: Arguments without the program name
+    :return: CDK command and the context variables
+    """
+    if not argv:
+        raise RuntimeError('No AWS CDK command is specified')
+    context = {}
+    index = 1
+    while index < len(argv):
+        if argv[index] in ['-c', '--context'] and index + 1 < len(argv):
+            key, _, value = argv[index + 1].partition('=')
+            context[key] = value
+            index += 1
+        index += 1
+    return argv[0], context
+
+
+def main() -> None:
+    command, context = parse_args(sys.argv[1:])
+    if command == 'bootstrap':
+        print('Bootstrapping is not needed in the local simulation')
+        return
+
+    try:
+        fake_cdk = FakeCdk(os.environ.get('O3DE_AWS_PROJECT_NAME', SIMULATION_PROJECT_NAME),
+                           os.environ.get('O3DE_AWS_DEPLOY_REGION', SIMULATION_REGION), context)
+        if command == 'deploy':
+            fake_cdk.deploy()
+        elif command == 'destroy':
+            fake_cdk.destroy()
+        else:
+            raise RuntimeError(f'AWS CDK command {command} is not simulated')
+    except (RuntimeError, botocore.exceptions.ClientError) as error:
+        print(f'[Error] {error}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Stub multiplayer server or client run by the local simulation in place of the O3DE launchers. It writes O3DE-shaped
+logs and Metrics gem trace event files, syncs them incrementally to the artifacts bucket in the chunk layout of
+sync_server_artifacts.ps1 and client_artifacts.ps1, and clients report readiness events to the client log group
+like client_launcher.ps1. The server tick time grows with the number of running stub clients
+"""
+
+import argparse
+import datetime
+import glob
+import gzip
+import json
+import os
+import random
+import signal
+import sys
+import time
+from typing import Dict
+
+import boto3
+from botocore.config import Config
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from constants import *  # noqa: E402
+
+SERVER_ROLE = 'server'
+CLIENT_ROLE = 'client'
+SERVER_ADDRESS = '10.0.0.4:33450'
+
+
+class ArtifactSync(object):
+    """
+    Upload the bytes appended to the host files since the previous sync, one gzip chunk per file and sync
+    """
+
+    def __init__(self, bucket_name: str, key_prefix: str, source_path: str, region: str):
+        """
+        :param bucket_name: Name of the artifacts bucket
+        :param key_prefix: Key prefix of the host, runs/<run ID>/<server|client>/<host ID>
+        :param source_path: Folder of the host files
+        :param region: AWS region of the bucket
+        """
+        super().__init__()
+        self._bucket_name = bucket_name
+        self._key_prefix = key_prefix
+        self._source_path = source_path
+        self._s3_client = boto3.client('s3', config=Config(region_name=region))
+        self._generation = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%S%f')[:-3] + 'Z'
+        self._offsets = {}
+
+    def sync(self) -> int:
+        """
+        Upload the bytes appended to every file since the previous sync
+        :return: Number of uploaded chunks
+        """
+        chunk_count = 0
+        for file_path in sorted(glob.glob(os.path.join(self._source_path, '*', '*'))):
+            relative_path = os.path.relpath(file_path, self._source_path).replace('\\', '/')
+            offset = self._offsets.get(relative_path, 0)
+            with open(file_path, 'rb') as source_file:
+                source_file.seek(offset)
+                content = source_file.read()
+            if not content:
+                continue
+            key = f'{self._key_prefix}/{relative_path}/{self._generation}-{offset:016d}.gz'
+            self._s3_client.put_object(Bucket=self._bucket_name, Key=key, Body=gzip.compress(content))
+            self._offsets[relative_path] = offset + len(content)
+            chunk_count += 1
+        return chunk_count
+
+
+class StubHost(object):
+    """
+    Write the log and metrics samples of a stub server or client
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        super().__init__()
+        self._args = args
+        self._rng = random.Random(args.host_id)
+        self._start_time = time.time()
+        log_name = 'Server.log' if args.role == SERVER_ROLE else 'Game.log'
+        self._log_path = os.path.join(args.work_path, SERVER_LOG_FOLDER_NAME, log_name)
+        self._metrics_path = os.path.join(args.work_path, METRICS_FOLDER_NAME, f'{args.role}_metrics.json')
+        for path in [self._log_path, self._metrics_path]:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(self._metrics_path, 'w') as metrics_file:
+            metrics_file.write('{"traceEvents":[\n')
+        self._first_event = True
+        self._client_count = 0
+        self._connected = False
+        self._connect_time = self._start_time + self._rng.uniform(0.2, 1.5)
+        self._logs_client = boto3.client('logs', config=Config(region_name=args.region)) \
+            if args.log_group else None
+        if self._logs_client:
+            try:
+                self._logs_client.create_log_stream(logGroupName=args.log_group, logStreamName=args.log_stream)
+            except self._logs_client.exceptions.ResourceAlreadyExistsException:
+                pass
+
+    def sample(self) -> None:
+        """
+        Write the samples of the current tick or frame, and the connection events since the previous sample
+        """
+        now = time.time()
+        if self._args.role == SERVER_ROLE:
+            self._sample_server(now)
+        else:
+            self._sample_client(now)
+
+    def stop(self) -> None:
+        if self._args.role == CLIENT_ROLE and self._connected:
+            self._write_log(time.time(), f'(Client) - Disconnecting from remote address {SERVER_ADDRESS}')
+            self._report_readiness('disconnected', 'Client is stopped')
+        with open(self._metrics_path, 'a') as metrics_file:
+            metrics_file.write('\n]}\n')
+
+    def _sample_server(self, now: float) -> None:
+        client_count = len(glob.glob(os.path.join(
+            self._args.simulation_path, SIMULATION_HOST_FOLDER_NAME, f'{CLIENT_ROLE}-*.json')))
+        for _ in range(client_count, self._client_count):
+            self._write_log(now, '(Server) - Remote host disconnected')
+        for index in range(self._client_count, client_count):
+            self._write_log(now, f'(Server) - New incoming connection from remote address 10.0.1.{index + 10}:50000')
+        self._client_count = client_count
+
+        tick_time_ms = max(SIMULATION_BASE_TICK_TIME_MS + SIMULATION_TICK_TIME_PER_CLIENT_MS * client_count +
+                           self._rng.gauss(0, 1), 1)
+        cpu_percent = min(10 + 5 * client_count + self._rng.gauss(0, 2), 100)
+        self._write_log(now, f'(Server) - Tick time: {tick_time_ms:.2f} ms')
+        self._write_metrics_event(now, 'Tick', {'TickTimeMs': round(tick_time_ms, 3),
+                                                'CpuPercent': round(cpu_percent, 2)})
+
+    def _sample_client(self, now: float) -> None:
+        if not self._connected:
+            if now < self._connect_time:
+                return
+            self._connected = True
+            self._write_log(now, f'(Client) - New outgoing connection to remote address {SERVER_ADDRESS}')
+            self._report_readiness(CLIENT_STATUS_CONNECTED, f'Connected to {SERVER_ADDRESS}')
+
+        frame_time_ms = max(16.7 + self._rng.gauss(0, 1.5), 1)
+        self._write_log(now, f'(Client) - Frame time: {frame_time_ms:.2f} ms FPS: {1000 / frame_time_ms:.1f}')
+        self._write_metrics_event(now, 'Network', {'RttMs': round(max(30 + self._rng.gauss(0, 3), 0), 3),
+                                                   'BytesReceived': int(2000 + self._rng.gauss(0, 100))})
+
+    def _write_log(self, timestamp: float, message: str) -> None:
+        time_text = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')
+        with open(self._log_path, 'a') as log_file:
+            log_file.write(f'<{time_text[:-3]}Z> {message}\n')
+
+    def _write_metrics_event(self, timestamp: float, name: str, arguments: Dict) -> None:
+        event = {'name': name, 'cat': self._args.role, 'ph': 'C', 'ts': int(timestamp * 1e6), 'pid': os.getpid(),
+                 'tid': 1, 'args': arguments}
+        with open(self._metrics_path, 'a') as metrics_file:
+            metrics_file.write(('' if self._first_event else ',\n') + json.dumps(event))
+        self._first_event = False
+
+    def _report_readiness(self, status: str, detail: str) -> None:
+        if not self._logs_client:
+            return
+        now = time.time()
+        readiness_event = {'event': CLIENT_READINESS_EVENT_NAME, 'status': status, 'task_id': self._args.host_id,
+                           'timestamp': now, 'seconds_since_launch': round(now - self._start_time, 3),
+                           'detail': detail}
+        self._logs_client.put_log_events(
+            logGroupName=self._args.log_group, logStreamName=self._args.log_stream,
+            logEvents=[{'timestamp': int(now * 1000), 'message': json.dumps(readiness_event)}])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--role', choices=[SERVER_ROLE, CLIENT_ROLE], required=True)
+    parser.add_argument('--host-id', required=True, help='Instance ID of the server or task ID of the client')
+    parser.add_argument('--run-id', required=True)
+    parser.add_argument('--bucket', required=True, help='Name of the artifacts bucket')
+    parser.add_argument('--region', default=SIMULATION_REGION)
+    parser.add_argument('--work-path', required=True, help='Folder to write the host files to')
+    parser.add_argument('--simulation-path', required=True, help='Folder of the simulation state')
+    parser.add_argument('--log-group', default='', help='Client log group to report the readiness events to')
+    parser.add_argument('--log-stream', default='')
+    parser.add_argument('--sync-seconds', type=float, default=DEFAULT_SIMULATION_SYNC_SECONDS)
+    parser.add_argument('--sample-seconds', type=float, default=DEFAULT_SIMULATION_SAMPLE_SECONDS)
+    args = parser.parse_args()
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signal_number, frame: stopping.append(signal_number))
+    host = StubHost(args)
+    artifact_sync = ArtifactSync(args.bucket, f'{RUN_KEY_PREFIX}/{args.run_id}/{args.role}/{args.host_id}',
+                                 args.work_path, args.region)
+    next_sync = time.time() + args.sync_seconds
+    while not stopping:
+        host.sample()
+        if time.time() >= next_sync:
+            artifact_sync.sync()
+            next_sync = time.time() + args.sync_seconds
+        time.sleep(args.sample_seconds)
+
+    # The last samples are synced before the host exits, like the final sync of the O3DE hosts
+    host.stop()
+    artifact_sync.sync()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import boto3
+from botocore.config import Config
+
+from config import AutoScalerConfig
+from constants import *
+from stack_outputs import StackOutputs
+
+# Valid Windows Fargate CPU units and memory (MiB) combinations.
+# See https://docs.aws.amazon.com/AmazonECS/latest/developerguide/task-cpu-memory-error.html
+FARGATE_TASK_SIZES = {
+    1024: range(2048, 8192 + 1, 1024),
+    2048: range(4096, 16384 + 1, 1024),
+    4096: range(8192, 30720 + 1, 1024),
+    8192: range(16384, 61440 + 1, 4096),
+    16384: range(32768, 122880 + 1, 8192)
+}
+# Windows Fargate on-demand prices in us-east-1 (USD per hour). Only used to rank the candidates
+FARGATE_VCPU_HOUR_PRICE = 0.09148 + 0.046  # vCPU plus the Windows OS license fee
+FARGATE_GB_HOUR_PRICE = 0.01005
+
+# Candidate server instance types: (vCPUs, memory in GiB, Windows on-demand price per hour in us-east-1)
+SERVER_INSTANCE_TYPES = {
+    'c5.large': (2, 4, 0.177),
+    'c5.xlarge': (4, 8, 0.354),
+    'c5.2xlarge': (8, 16, 0.708),
+    'c5.4xlarge': (16, 32, 1.416),
+    'c5.9xlarge': (36, 72, 3.186),
+    'm5.large': (2, 8, 0.188),
+    'm5.xlarge': (4, 16, 0.376),
+    'm5.2xlarge': (8, 32, 0.752),
+    'm5.4xlarge': (16, 64, 1.504),
+    'r5.large': (2, 16, 0.218),
+    'r5.xlarge': (4, 32, 0.436),
+    'r5.2xlarge': (8, 64, 0.872)
+}
+
+CLIENT_ROLE = 'client'
+SERVER_ROLE = 'server'
+
+
+class SizeRecommender(object):
+    """
+    Recommend the cheapest client task and server instance sizes which keep utilization headroom.
+
+    Utilization collected from past runs is kept in a JSON history file. Each record describes the size a run
+    was deployed with and the utilization percentages observed for it, e.g.
+    {"role": "client", "collected_at": "...", "cpu_units": 1024, "memory_mib": 8192,
+     "cpu_utilization": [55.2, ...], "memory_utilization": [31.0, ...]}
+    {"role": "server", "collected_at": "...", "instance_type": "c5.2xlarge",
+     "cpu_utilization": [40.1, ...], "memory_utilization": []}
+    """
+
+    def __init__(self, history_file: str, headroom_percent: float = DEFAULT_RECOMMENDATION_HEADROOM_PERCENT,
+                 percentile: float = DEFAULT_RECOMMENDATION_PERCENTILE):
+        super().__init__()
+        if not 0 <= headroom_percent < 100:
+            raise RuntimeError(f'Headroom must be between 0 and 100 percent. Got {headroom_percent}')
+
+        self._history_file = history_file
+        self._headroom_percent = headroom_percent
+        self._percentile = percentile
+        self._records = []
+        if os.path.exists(history_file):
+            with open(history_file) as history:
+                self._records = json.load(history)
+
+    @property
+    def records(self) -> List[Dict]:
+        """
+        Get the utilization records loaded from the history file
+        :return: Utilization records
+        """
+        return self._records
+
+    def add_record(self, record: Dict) -> None:
+        """
+        Add a utilization record to the history
+        :param record: Utilization record
+        """
+        self._records.append(record)
+
+    def save(self) -> None:
+        """
+        Save the utilization history file
+        """
+        with open(self._history_file, 'w') as history:
+            json.dump(self._records, history, indent=1)
+
+    def collect(self, config: AutoScalerConfig, hours: float = DEFAULT_UTILIZATION_COLLECTION_HOURS) -> None:
+        """
+        Collect the client and server utilization of the currently deployed stacks from Amazon CloudWatch
+        :param config: Auto scaler config which describes the deployed sizes
+        :param hours: How many hours of datapoints to collect, counting back from now
+        """
+        region = config.get_str(SCALER_CONFIG_AWS_REGION_KEY, os.environ.get('CDK_DEFAULT_REGION'))
+        stack_outputs = StackOutputs(config.get_deployment_name(), region)
+        cloudwatch_client = boto3.client('cloudwatch', config=Config(region_name=region))
+
+        end_time = datetime.now(timezone.utc)
+        start_time = end_time - timedelta(hours=hours)
+        collected_at = end_time.isoformat()
+
+        # The service Maximum statistic is the utilization of the busiest task in each period
+        service_dimensions = [
+            {'Name': 'ClusterName', 'Value': stack_outputs.get(CLIENT_STACK_SUFFIX, CLIENT_CLUSTER_NAME_OUTPUT_KEY)},
+            {'Name': 'ServiceName', 'Value': stack_outputs.get(CLIENT_STACK_SUFFIX, CLIENT_SERVICE_NAME_OUTPUT_KEY)}
+        ]
+        self.add_record({
+            'role': CLIENT_ROLE,
+            'collected_at': collected_at,
+            'cpu_units': int(config.get_str(SCALER_CONFIG_CLIENT_TASK_CPU_UNITS_KEY,
+                                            SCALER_CONFIG_DEFAULT_CLIENT_TASK_CPU_UNITS)),
+            'memory_mib': int(config.get_str(SCALER_CONFIG_CLIENT_TASK_MEMORY_MIB_KEY,
+                                             SCALER_CONFIG_DEFAULT_CLIENT_TASK_MEMORY_MIB)),
+            'cpu_utilization': self._get_datapoints(
+                cloudwatch_client, 'AWS/ECS', 'CPUUtilization', service_dimensions, start_time, end_time),
+            'memory_utilization': self._get_datapoints(
+                cloudwatch_client, 'AWS/ECS', 'MemoryUtilization', service_dimensions, start_time, end_time)
+        })
+
+        # Memory utilization is only available for the server if the CloudWatch agent is installed
+        instance_dimensions = [
+            {'Name': 'InstanceId', 'Value': stack_outputs.get(SERVER_STACK_SUFFIX, SERVER_INSTANCE_ID_OUTPUT_KEY)}
+        ]
+        self.add_record({
+            'role': SERVER_ROLE,
+            'collected_at': collected_at,
+            'instance_type': config.get_str(SCALER_CONFIG_SERVER_INSTANCE_TYPE_KEY,
+                                            SCALER_CONFIG_DEFAULT_SERVER_INSTANCE_TYPE),
+            'cpu_utilization': self._get_datapoints(
+                cloudwatch_client, 'AWS/EC2', 'CPUUtilization', instance_dimensions, start_time, end_time),
+            'memory_utilization': self._get_datapoints(
+                cloudwatch_client, 'CWAgent', 'Memory % Committed Bytes In Use', instance_dimensions,
+                start_time, end_time)
+        })
+
+    @staticmethod
+    def _get_datapoints(cloudwatch_client: any, namespace: str, metric_name: str, dimensions: List[Dict],
+                        start_time: datetime, end_time: datetime) -> List[float]:
+        """
+        Get the per minute maximum datapoints of a CloudWatch metric
+        :return: Datapoint values in chronological order
+        """
+        response = cloudwatch_client.get_metric_statistics(
+            Namespace=namespace,
+            MetricName=metric_name,
+            Dimensions=dimensions,
+            StartTime=start_time,
+            EndTime=end_time,
+            Period=60,
+            Statistics=['Maximum']
+        )
+        datapoints = sorted(response.get('Datapoints', []), key=lambda datapoint: datapoint['Timestamp'])
+        return [datapoint['Maximum'] for datapoint in datapoints]
+
+    def recommend_client(self) -> Optional[Dict]:
+        """
+        Recommend the cheapest Fargate task size for clients which keeps the headroom
+        :return: Recommended CPU units and memory, or None if no client utilization is recorded
+        """
+        records = [record for record in self._records if record.get('role') == CLIENT_ROLE]
+        cpu_demand = self._get_demand(records, 'cpu_utilization', 'cpu_units')
+        memory_demand = self._get_demand(records, 'memory_utilization', 'memory_mib')
+        if cpu_demand is None and memory_demand is None:
+            return None
+
+        candidates = []
+        for cpu_units, memory_sizes in FARGATE_TASK_SIZES.items():
+            for memory_mib in memory_sizes:
+                if self._fits(cpu_demand, cpu_units) and self._fits(memory_demand, memory_mib):
+                    cost = cpu_units / 1024 * FARGATE_VCPU_HOUR_PRICE + memory_mib / 1024 * FARGATE_GB_HOUR_PRICE
+                    candidates.append((cost, cpu_units, memory_mib))
+        if not candidates:
+            raise RuntimeError('No Fargate task size can serve the recorded client utilization with the requested headroom')
+
+        cost, cpu_units, memory_mib = min(candidates)
+        return {
+            SCALER_CONFIG_CLIENT_TASK_CPU_UNITS_KEY: cpu_units,
+            SCALER_CONFIG_CLIENT_TASK_MEMORY_MIB_KEY: memory_mib,
+            'cpu_units_demand': cpu_demand,
+            'memory_mib_demand': memory_demand,
+            'hourly_cost_per_task': round(cost, 4)
+        }
+
+    def recommend_server(self) -> Optional[Dict]:
+        """
+        Recommend the cheapest server instance type which keeps the headroom
+        :return: Recommended instance type, or None if no server utilization is recorded
+        """
+        records = [
+            dict(record,
+                 vcpus=SERVER_INSTANCE_TYPES[record['instance_type']][0],
+                 memory_gib=SERVER_INSTANCE_TYPES[record['instance_type']][1])
+            for record in self._records
+            if record.get('role') == SERVER_ROLE and record.get('instance_type') in SERVER_INSTANCE_TYPES
+        ]
+
+        cpu_demand = self._get_demand(records, 'cpu_utilization', 'vcpus')
+        if cpu_demand is None:
+            return None
+        memory_demand = self._get_demand(records, 'memory_utilization', 'memory_gib')
+        if memory_demand is None:
+            # Without memory datapoints, never recommend less memory than the largest size that was run
+            memory_demand = max(record['memory_gib'] for record in records) * (1 - self._headroom_percent / 100)
+
+        candidates = [
+            (price, instance_type) for instance_type, (vcpus, memory_gib, price) in SERVER_INSTANCE_TYPES.items()
+            if self._fits(cpu_demand, vcpus) and self._fits(memory_demand, memory_gib)
+        ]
+        if not candidates:
+            raise RuntimeError('No server instance type can serve the recorded utilization with the requested headroom')
+
+        price, instance_type = min(candidates)
+        return {
+            SCALER_CONFIG_SERVER_INSTANCE_TYPE_KEY: instance_type,
+            'vcpus_demand': cpu_demand,
+            'memory_gib_demand': memory_demand,
+            'hourly_cost': price
+        }
+
+    def _get_demand(self, records: List[Dict], utilization_key: str, capacity_key: str) -> Optional[float]:
+        """
+        Convert the recorded utilization percentages to absolute demand and take its percentile
+        :param records: Utilization records of one role
+        :param utilization_key: Record key of the utilization percentages
+        :param capacity_key: Record key of the capacity the utilization is relative to
+        :return: Demand percentile in the capacity unit, or None if there are no datapoints
+        """
+        demand = sorted(
+            record[capacity_key] * utilization / 100
+            for record in records for utilization in record.get(utilization_key, []))
+        if not demand:
+            return None
+
+        # Nearest-rank percentile
+        rank = max(math.ceil(self._percentile / 100 * len(demand)) - 1, 0)
+        return demand[rank]
+
+    def _fits(self, demand: Optional[float], capacity: float) -> bool:
+        """
+        Check whether the demand fits into the capacity while keeping the headroom
+        """
+        return demand is None or demand <= capacity * (1 - self._headroom_percent / 100)
@@ -0,0 +1,188 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import math
+from statistics import NormalDist
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from constants import *
+from log_analyzer import parse_log, read_log_lines
+
+
+def read_process_samples(path: str) -> Iterator[Tuple[float, Dict[str, float]]]:
+    """
+    Read the server process samples written by the soak sampler
+    :param path: Path of the samples file, a gzip-compressed samples file or a folder of synced chunks
+    :return: Unix time and values of every sample. Missing values are NaN
+    """
+    for line in read_log_lines(path):
+        fields = line.strip().split(',')
+        # A header starts every generation of the file
+        if len(fields) != len(SOAK_SAMPLE_COLUMNS) or fields[0] == SOAK_SAMPLE_COLUMNS[0]:
+            continue
+        try:
+            values = [float(field) if field else math.nan for field in fields]
+        except ValueError:
+            print(f'[Warn] Ignoring malformed process sample: {line}')
+            continue
+        yield values[0], dict(zip(SOAK_SAMPLE_COLUMNS[1:], values[1:]))
+
+
+def fit_trend(x: np.ndarray, y: np.ndarray, confidence: float = DEFAULT_SOAK_CONFIDENCE) -> Dict:
+    """
+    Fit a Theil-Sen trend line, i.e. the median slope of all the pairs of points, which ignores outliers, and test
+    whether the series trends upward with the Mann-Kendall test
+    :param x: Times of the points, in increasing order
+    :param y: Values of the points
+    :param confidence: Confidence level of the slope interval
+    :return: Slope and intercept, slope interval at the confidence level, and the confidence that the series trends
+    upward
+    """
+    first, second = np.triu_indices(len(x), 1)
+    dx = x[second] - x[first]
+    dy = y[second] - y[first]
+    slopes = np.sort(dy[dx != 0] / dx[dx != 0])
+    slope = float(np.median(slopes))
+    intercept = float(np.median(y - slope * x))
+
+    # Mann-Kendall statistic and its variance without ties, with a continuity correction
+    count = len(x)
+    statistic = float(np.sign(dy).sum())
+    variance = count * (count - 1) * (2 * count + 5) / 18
+    z = (statistic - np.sign(statistic)) / math.sqrt(variance)
+
+    # Sen's slope interval: the ranks of the bounds are read from the distribution of the statistic
+    spread = NormalDist().inv_cdf(0.5 + confidence / 2) * math.sqrt(variance)
+    lower_rank = int(max(round((len(slopes) - spread) / 2) - 1, 0))
+    upper_rank = int(min(round((len(slopes) + spread) / 2), len(slopes) - 1))
+    return {
+        'slope': slope,
+        'intercept': intercept,
+        'slope_lower': float(slopes[lower_rank]),
+        'slope_upper': float(slopes[upper_rank]),
+        'increase_confidence': NormalDist().cdf(z)
+    }
+
+
+class WindowedMedians(object):
+    """
+    Reduce a series to the median of each time window. Only the samples of the current window are kept
+    """
+
+    def __init__(self, window_seconds: float):
+        super().__init__()
+        self._window_seconds = window_seconds
+        self._window_start = None
+        self._window_values = []
+        self._times = []
+        self._medians = []
+
+    def add(self, timestamp: float, value: float) -> None:
+        if math.isnan(value):
+            return
+        window_start = math.floor(timestamp / self._window_seconds) * self._window_seconds
+        if self._window_start is not None and window_start != self._window_start:
+            self._close_window()
+        self._window_start = window_start
+        self._window_values.append(value)
+
+    def get_points(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the windowed medians
+        :return: Center times and medians of the windows, ordered by time
+        """
+        self._close_window()
+        order = np.argsort(self._times, kind='stable')
+        return np.asarray(self._times)[order], np.asarray(self._medians)[order]
+
+    def _close_window(self) -> None:
+        if not self._window_values:
+            return
+        self._times.append(self._window_start + self._window_seconds / 2)
+        self._medians.append(float(np.median(self._window_values)))
+        self._window_values = []
+
+
+class SoakAnalyzer(object):
+    """
+    Detect leaks and degradations in soak test runs from the trend of the server process samples and the server
+    tick time. Each series is reduced to windowed medians, then a Theil-Sen trend line is fitted
+    """
+
+    def __init__(self, window_seconds: float = DEFAULT_SOAK_WINDOW_SECONDS):
+        """
+        :param window_seconds: Length of the windows the samples are reduced to their median in
+        """
+        super().__init__()
+        self._window_seconds = window_seconds
+        self._series = {name: WindowedMedians(window_seconds) for name in SOAK_LEAK_SERIES + SOAK_DEGRADATION_SERIES}
+
+    def add_process_samples(self, path: str) -> None:
+        """
+        Add the server process samples of the soak sampler
+        :param path: Path of the samples file, a gzip-compressed samples file or a folder of synced chunks
+        """
+        for timestamp, values in read_process_samples(path):
+            for name, value in values.items():
+                if name in self._series:
+                    self._series[name].add(timestamp, value)
+
+    def add_server_log(self, path: str) -> None:
+        """
+        Add the tick time samples of a server log. See LOG_SAMPLE_PATTERNS
+        :param path: Path of the log file, a gzip-compressed log file or a folder of synced chunks
+        """
+        for record in parse_log(read_log_lines(path)):
+            if record.kind == 'tick_time_ms':
+                self._series['tick_time_ms'].add(record.timestamp, record.value)
+
+    def get_report(self, confidence: float = DEFAULT_SOAK_CONFIDENCE,
+                   min_drift_percent: float = DEFAULT_SOAK_MIN_DRIFT_PERCENT) -> Dict:
+        """
+        Fit the trend of every series and flag the leaks and degradations
+        :param confidence: Minimum confidence that a series trends upward to flag it
+        :param min_drift_percent: Minimum drift of a series over the run, relative to its fitted start value, to
+        flag it. Keeps statistically significant but negligible drifts from being flagged
+        :return: Trend of every series with enough windows, and the names of the flagged series
+        """
+        report = {'window_seconds': self._window_seconds, 'series': {}, 'flagged': []}
+        for name, series in self._series.items():
+            times, medians = series.get_points()
+            if len(times) < SOAK_MIN_TREND_WINDOWS:
+                continue
+
+            trend = fit_trend(times - times[0], medians, confidence)
+            duration_seconds = float(times[-1] - times[0])
+            start_value = trend['intercept']
+            drift = trend['slope'] * duration_seconds
+            drift_percent = drift / abs(start_value) * 100 if start_value else math.inf if drift > 0 else 0.0
+            flagged = trend['increase_confidence'] >= confidence and drift_percent >= min_drift_percent
+            report['series'][name] = {
+                'windows': len(times),
+                'duration_seconds': duration_seconds,
+                'start_value': start_value,
+                'slope_per_hour': trend['slope'] * 3600,
+                'slope_per_hour_interval': [trend['slope_lower'] * 3600, trend['slope_upper'] * 3600],
+                'drift_percent': drift_percent,
+                'confidence': trend['increase_confidence'],
+                'verdict': ('leak' if name in SOAK_LEAK_SERIES else 'degradation') if flagged else 'stable'
+            }
+            if flagged:
+                report['flagged'].append(name)
+        return report
+
+
+def format_soak_report(report: Dict) -> str:
+    """
+    Format a soak report as a text table
+    :param report: Soak report
+    :return: Text table
+    """
+    lines = [f'{"series":<20} {"windows":>8} {"start":>16} {"slope/hour":>16} {"drift":>9} {"confidence":>11} verdict']
+    for name, trend in report['series'].items():
+        lines.append(f'{name:<20} {trend["windows"]:>8} {trend["start_value"]:>16.2f} '
+                     f'{trend["slope_per_hour"]:>16.2f} {trend["drift_percent"]:>8.1f}% '
+                     f'{trend["confidence"] * 100:>10.1f}% {trend["verdict"]}')
+    return '\n'.join(lines)
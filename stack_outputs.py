@@ -0,0 +1,53 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import boto3
+from botocore.config import Config
+
+from constants import *
+
+
+class StackOutputs(object):
+    """
+    Look up the outputs of the deployed multiplayer test scaler stacks
+    """
+
+    def __init__(self, project_name: str, region: str):
+        super().__init__()
+        self._project_name = project_name
+        self._region = region
+        self._outputs = {}
+        self._cloudformation_client = boto3.client(
+            'cloudformation',
+            config=Config(region_name=region))
+
+    def get_stack_name(self, stack_suffix: str) -> str:
+        """
+        Get the name of a deployed stack
+        :param stack_suffix: Suffix of the stack, e.g. ServerStack
+        :return: Full stack name
+        """
+        return f'{self._project_name}-{stack_suffix}'
+
+    def get(self, stack_suffix: str, output_key: str) -> str:
+        """
+        Get the value of a stack output. Outputs are cached per stack after the first lookup
+        :param stack_suffix: Suffix of the stack, e.g. ServerStack
+        :param output_key: Key of the stack output
+        :return: Value of the stack output
+        """
+        stack_name = self.get_stack_name(stack_suffix)
+        if stack_name not in self._outputs:
+            response = self._cloudformation_client.describe_stacks(StackName=stack_name)
+            stacks = response.get('Stacks', [])
+            if len(stacks) == 0:
+                raise RuntimeError(f'{stack_name} is invalid.')
+            self._outputs[stack_name] = {
+                output.get('OutputKey'): output.get('OutputValue') for output in stacks[0].get('Outputs', [])
+            }
+
+        value = self._outputs[stack_name].get(output_key)
+        if not value:
+            raise RuntimeError(f'Output {output_key} is not found in stack {stack_name}. '
+                               f'Please make sure the stack is deployed')
+        return value
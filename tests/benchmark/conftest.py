@@ -0,0 +1,143 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+import platform
+import statistics
+import time
+from typing import Callable, Dict
+
+import pytest
+
+from installer_tree import INSTALLER_TREE_SHAPES
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), '.benchmarks', 'package_builder.json')
+DEFAULT_ROUNDS = 5
+DEFAULT_THRESHOLD_PERCENT = 25
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('package benchmarks')
+    group.addoption('--package-benchmark-rounds', type=int, default=DEFAULT_ROUNDS,
+                    help='Timed rounds of every benchmark, after one untimed warm-up round')
+    group.addoption('--package-benchmark-shape', action='append', default=[],
+                    choices=list(INSTALLER_TREE_SHAPES),
+                    help='Shape of the synthetic installer tree to benchmark. Can be repeated. All shapes by default')
+    group.addoption('--package-benchmark-scale', type=float, default=1.0,
+                    help='Factor applied to the file counts of the installer tree shapes')
+    group.addoption('--package-benchmark-baseline', default=DEFAULT_BASELINE_PATH,
+                    help='Path of the baseline file')
+    group.addoption('--package-benchmark-save', action='store_true',
+                    help='Save the results as the baseline instead of comparing them to it')
+    group.addoption('--package-benchmark-threshold', type=float, default=DEFAULT_THRESHOLD_PERCENT,
+                    help='Slowdown of the median time, in percent of the baseline, which fails a benchmark')
+
+
+def pytest_generate_tests(metafunc):
+    if 'shape_name' in metafunc.fixturenames:
+        shapes = metafunc.config.getoption('--package-benchmark-shape') or list(INSTALLER_TREE_SHAPES)
+        metafunc.parametrize('shape_name', shapes)
+
+
+def get_machine_info() -> Dict:
+    """
+    Describe the machine. The baseline is only compared on machines with the same description
+    :return: Machine description
+    """
+    return {'system': platform.system(), 'machine': platform.machine(),
+            'python': platform.python_version(), 'cpu_count': os.cpu_count()}
+
+
+class BenchmarkSession(object):
+    """
+    Results of the benchmarks of a session, and the baseline they are compared to
+    """
+
+    def __init__(self, config: pytest.Config):
+        super().__init__()
+        self.rounds = config.getoption('--package-benchmark-rounds')
+        self.scale = config.getoption('--package-benchmark-scale')
+        self.baseline_path = config.getoption('--package-benchmark-baseline')
+        self.save = config.getoption('--package-benchmark-save')
+        self.threshold_percent = config.getoption('--package-benchmark-threshold')
+        self.results = {}
+        self.baseline = {}
+        if os.path.isfile(self.baseline_path):
+            with open(self.baseline_path) as baseline_file:
+                baseline = json.load(baseline_file)
+            if baseline.get('machine') == get_machine_info():
+                self.baseline = baseline['benchmarks']
+            else:
+                print(f'[Warn] The baseline {self.baseline_path} was saved on another machine, it is not compared')
+
+    def write_baseline(self) -> None:
+        benchmarks = {**self.baseline, **self.results}
+        os.makedirs(os.path.dirname(os.path.abspath(self.baseline_path)), exist_ok=True)
+        with open(self.baseline_path, 'w') as baseline_file:
+            json.dump({'machine': get_machine_info(), 'benchmarks': benchmarks}, baseline_file, indent=1,
+                      sort_keys=True)
+
+
+benchmark_session_key = pytest.StashKey[BenchmarkSession]()
+
+
+@pytest.fixture(scope='session')
+def benchmark_session(request) -> BenchmarkSession:
+    session = BenchmarkSession(request.config)
+    request.config.stash[benchmark_session_key] = session
+    yield session
+    if session.save and session.results:
+        session.write_baseline()
+
+
+@pytest.fixture
+def package_benchmark(benchmark_session: BenchmarkSession) -> Callable:
+    """
+    Time a function over the configured number of rounds, after an untimed warm-up round, and fail if its median
+    time is slower than the baseline by more than the threshold
+    """
+
+    def run(name: str, target: Callable, setup: Callable = None) -> Dict:
+        times = []
+        for round_index in range(benchmark_session.rounds + 1):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            target()
+            elapsed = time.perf_counter() - start
+            if round_index:
+                times.append(elapsed)
+
+        result = {'median': statistics.median(times), 'min': min(times), 'max': max(times),
+                  'rounds': len(times), 'scale': benchmark_session.scale}
+        benchmark_session.results[name] = result
+        baseline = benchmark_session.baseline.get(name)
+        if benchmark_session.save or not baseline or baseline.get('scale') != benchmark_session.scale:
+            return result
+
+        result['baseline_median'] = baseline['median']
+        result['change_percent'] = (result['median'] / baseline['median'] - 1) * 100
+        if result['change_percent'] > benchmark_session.threshold_percent:
+            pytest.fail(f'{name} regressed: median {result["median"]:.4f}s is {result["change_percent"]:.1f}% slower '
+                        f'than the baseline {baseline["median"]:.4f}s '
+                        f'(threshold {benchmark_session.threshold_percent:g}%)')
+        return result
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    session = config.stash.get(benchmark_session_key, None)
+    if not session or not session.results:
+        return
+    terminalreporter.section('package benchmarks')
+    terminalreporter.write_line(f'{"benchmark":<40} {"median":>10} {"min":>10} {"max":>10} {"baseline":>10} '
+                                f'{"change":>8}')
+    for name, result in sorted(session.results.items()):
+        baseline = f'{result["baseline_median"]:>10.4f}' if 'baseline_median' in result else f'{"-":>10}'
+        change = f'{result["change_percent"]:>+7.1f}%' if 'change_percent' in result else f'{"-":>8}'
+        terminalreporter.write_line(f'{name:<40} {result["median"]:>10.4f} {result["min"]:>10.4f} '
+                                    f'{result["max"]:>10.4f} {baseline} {change}')
+    if session.save:
+        terminalreporter.write_line(f'Baseline is saved to {session.baseline_path}')
@@ -0,0 +1,100 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+from config import AutoScalerConfig
+from constants import *
+
+TEST_PROJECT_NAME = 'MultiplayerSample'
+TEST_BUILD_TYPE = 'profile'
+# Pool the synthetic file contents are sliced from, so generating large trees doesn't draw random bytes per file
+RANDOM_POOL_BYTES = 16 * 1024 * 1024
+
+
+class InstallerTreeShape(NamedTuple):
+    """
+    Shape of a synthetic installer tree. File sizes follow a log-normal distribution
+    """
+    asset_count: int
+    binary_count: int
+    median_file_bytes: int
+    size_sigma: float
+    # Fraction of every file which is a repeated pattern rather than random bytes
+    compressibility: float
+    # Fraction of the binaries which are test, editor or builder binaries and tools left out of the package
+    excluded_fraction: float
+    files_per_folder: int
+
+    def scale(self, factor: float) -> 'InstallerTreeShape':
+        return self._replace(asset_count=max(int(self.asset_count * factor), 1),
+                             binary_count=max(int(self.binary_count * factor), 1))
+
+
+INSTALLER_TREE_SHAPES = {
+    'many_small_files': InstallerTreeShape(asset_count=4000, binary_count=200, median_file_bytes=4096, size_sigma=1.0,
+                                           compressibility=0.7, excluded_fraction=0.3, files_per_folder=64),
+    'mixed': InstallerTreeShape(asset_count=1000, binary_count=100, median_file_bytes=8192, size_sigma=1.5,
+                                compressibility=0.5, excluded_fraction=0.3, files_per_folder=32),
+    'large_files': InstallerTreeShape(asset_count=24, binary_count=16, median_file_bytes=1024 * 1024,
+                                      size_sigma=0.5, compressibility=0.2, excluded_fraction=0.3, files_per_folder=8),
+}
+
+
+def create_installer_tree(root_path: str, shape: InstallerTreeShape, seed: int = 0) -> AutoScalerConfig:
+    """
+    Create a synthetic project with processed assets and a Windows installer build, laid out the way PackageBuilder
+    expects it. The launchers are plain files named like the Windows executables, so packaging runs on any platform
+    :param root_path: Folder to create the project, engine and output folders in
+    :param shape: Shape of the tree
+    :param seed: Seed of the file sizes and contents
+    :return: Config pointing PackageBuilder at the synthetic project
+    """
+    rng = np.random.default_rng(seed)
+    random_pool = rng.integers(0, 256, RANDOM_POOL_BYTES, dtype=np.uint8).tobytes()
+    project_path = os.path.join(root_path, 'project')
+    engine_path = os.path.join(root_path, 'engine')
+    installer_path = os.path.join(project_path, SCALER_CONFIG_DEFAULT_BUILD_INSTALLER_PATH, PLATFORM_WINDOWS,
+                                  TEST_BUILD_TYPE, 'Default')
+    cache_path = os.path.join(project_path, SCALER_CONFIG_DEFAULT_PROJECT_CACHE_PATH, WINDOWS_CACHE_SUBFOLDER_NAME)
+
+    for index in range(shape.asset_count):
+        folder_path = os.path.join(cache_path, f'assets{index // shape.files_per_folder:04d}')
+        _write_file(os.path.join(folder_path, f'asset{index:06d}.azasset'), shape, rng, random_pool)
+
+    excluded_suffixes = ['.Tests.dll', '.Editor.dll', '.Builders.dll', '.exe']
+    for index in range(shape.binary_count):
+        excluded = rng.random() < shape.excluded_fraction
+        suffix = excluded_suffixes[index % len(excluded_suffixes)] if excluded else '.dll'
+        _write_file(os.path.join(installer_path, f'Gem.Module{index:04d}{suffix}'), shape, rng, random_pool)
+    for launcher in ['GameLauncher', 'ServerLauncher']:
+        _write_file(os.path.join(installer_path, f'{TEST_PROJECT_NAME}.{launcher}.exe'), shape, rng, random_pool)
+
+    os.makedirs(os.path.join(project_path, 'Config'))
+    with open(os.path.join(project_path, 'Config', 'default_aws_resource_mappings.json'), 'w') as mapping_file:
+        json.dump({'AWSResourceMappings': {}}, mapping_file)
+    os.makedirs(engine_path)
+    with open(os.path.join(engine_path, 'engine.json'), 'w') as engine_file:
+        json.dump({'engine_name': 'o3de'}, engine_file)
+
+    config = AutoScalerConfig()
+    config.set(SCALER_CONFIG_PROJECT_PATH_KEY, project_path)
+    config.set(SCALER_CONFIG_ENGINE_PATH_KEY, engine_path)
+    config.set(SCALER_CONFIG_PROJECT_NAME_KEY, TEST_PROJECT_NAME)
+    config.set(SCALER_CONFIG_BUILD_TYPE_KEY, TEST_BUILD_TYPE)
+    config.set(SCALER_CONFIG_OUTPUT_PATH_KEY, os.path.join(root_path, 'output'))
+    return config
+
+
+def _write_file(path: str, shape: InstallerTreeShape, rng: np.random.Generator, random_pool: bytes) -> None:
+    size = min(int(rng.lognormal(np.log(shape.median_file_bytes), shape.size_sigma)), RANDOM_POOL_BYTES)
+    random_size = int(size * (1 - shape.compressibility))
+    start = int(rng.integers(0, RANDOM_POOL_BYTES - random_size + 1))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as file:
+        file.write(random_pool[start:start + random_size])
+        file.write(b'\0' * (size - random_size))
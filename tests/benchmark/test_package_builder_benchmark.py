@@ -0,0 +1,55 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import shutil
+import zipfile
+
+import pytest
+
+from constants import *
+from installer_tree import INSTALLER_TREE_SHAPES, TEST_PROJECT_NAME, create_installer_tree
+from package_builder import PackageBuilder
+
+
+@pytest.fixture
+def package_builder(tmp_path_factory, benchmark_session, shape_name) -> PackageBuilder:
+    """
+    Package builder of a synthetic project. The generator and build steps are never run, only the packaging steps
+    """
+    root_path = str(tmp_path_factory.mktemp(shape_name))
+    shape = INSTALLER_TREE_SHAPES[shape_name].scale(benchmark_session.scale)
+    config = create_installer_tree(root_path, shape)
+    yield PackageBuilder(config, PLATFORM_WINDOWS)
+    shutil.rmtree(root_path, ignore_errors=True)
+
+
+def test_stage_assets(package_builder, package_benchmark, shape_name):
+    package_benchmark(f'stage_assets[{shape_name}]', package_builder.stage_assets)
+
+
+def test_copy_package(package_builder, package_benchmark, shape_name):
+    package_builder.stage_assets()
+    package_path = []
+
+    package_benchmark(f'copy_package[{shape_name}]', lambda: package_path.append(package_builder.copy_package()))
+
+    package_files = {name for _, _, names in os.walk(package_path[-1]) for name in names}
+    assert f'{TEST_PROJECT_NAME}.ServerLauncher.exe' in package_files
+    assert not [name for name in package_files if '.Tests.' in name or '.Editor.' in name or '.Builders.' in name]
+
+
+def test_archive_package(package_builder, package_benchmark, shape_name):
+    package_builder.stage_assets()
+    package_path = package_builder.copy_package()
+    archive_path = []
+
+    package_benchmark(f'archive_package[{shape_name}]',
+                      lambda: archive_path.append(package_builder.archive_package(package_path)))
+
+    with zipfile.ZipFile(archive_path[-1]) as archive:
+        assert 'engine.json' in archive.namelist()
+
+
+def test_process_output(package_builder, package_benchmark, shape_name):
+    package_benchmark(f'process_output[{shape_name}]', package_builder.process_output)
@@ -0,0 +1,97 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import boto3
+from moto import mock_aws
+
+from artifact_bundle import ArtifactBundle, get_bundle_manifest_key
+from constants import *
+
+TEST_REGION = 'us-east-1'
+TEST_BUCKET_NAME = 'test-upload-bucket'
+TEST_RUN_ID = '20230101T120000Z-1a2b3c4d'
+TEST_FILES = {
+    '01012023/server/i-1/log/Game.log': b'log line\n' * 100,
+    '01012023/server/i-1/Metrics/metrics.json': b'{}'
+}
+
+
+def _create_bundle(files: dict) -> (bytes, list):
+    # Same layout as the bundle written by the artifact upload lambda: one gzip member per tar entry
+    bundle = b''
+    index = []
+    for name, content in files.items():
+        entry_buffer = io.BytesIO()
+        with tarfile.open(fileobj=entry_buffer, mode='w', format=tarfile.PAX_FORMAT) as entry_tar:
+            tar_info = tarfile.TarInfo(name)
+            tar_info.size = len(content)
+            entry_tar.addfile(tar_info, io.BytesIO(content))
+        # drop the end of archive blocks written by close
+        member = gzip.compress(entry_buffer.getvalue()[:-tarfile.BLOCKSIZE * 2])
+        index.append({'name': name, 'size': len(content), 'sha256': hashlib.sha256(content).hexdigest(),
+                      'offset': len(bundle), 'length': len(member)})
+        bundle += member
+    return bundle + gzip.compress(b'\0' * tarfile.BLOCKSIZE * 2), index
+
+
+class TestArtifactBundle(unittest.TestCase):
+
+    def setUp(self):
+        environment = patch.dict(os.environ, {
+            'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing', 'AWS_DEFAULT_REGION': TEST_REGION})
+        environment.start()
+        self.addCleanup(environment.stop)
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+
+        self._s3_client = boto3.client('s3', region_name=TEST_REGION)
+        self._s3_client.create_bucket(Bucket=TEST_BUCKET_NAME)
+        bundle, index = _create_bundle(TEST_FILES)
+        bundle_key = get_bundle_manifest_key(TEST_RUN_ID).replace(ARTIFACT_BUNDLE_MANIFEST_NAME, 'artifacts.tar.gz')
+        self._s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=bundle_key, Body=bundle)
+        self._manifest = {'bundle_key': bundle_key, 'format': ARTIFACT_BUNDLE_FORMAT, 'files': index}
+        self._s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=get_bundle_manifest_key(TEST_RUN_ID),
+                                   Body=json.dumps(self._manifest).encode('utf-8'))
+
+        self._bundle = ArtifactBundle(TEST_BUCKET_NAME, get_bundle_manifest_key(TEST_RUN_ID), TEST_REGION)
+
+    def test_read_file_in_bundle_content_fetched_with_range_get(self):
+        with patch.object(self._bundle._s3_client, 'get_object',
+                          wraps=self._bundle._s3_client.get_object) as mock_get_object:
+            content = self._bundle.read('01012023/server/i-1/Metrics/metrics.json')
+
+        self.assertEqual(content, b'{}')
+        entry = self._manifest['files'][1]
+        self.assertEqual(mock_get_object.call_args.kwargs['Range'],
+                         f'bytes={entry["offset"]}-{entry["offset"] + entry["length"] - 1}')
+
+    def test_read_hash_mismatch_raise_runtime_error(self):
+        self._manifest['files'][0]['sha256'] = '0' * 64
+        self._s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=get_bundle_manifest_key(TEST_RUN_ID),
+                                   Body=json.dumps(self._manifest).encode('utf-8'))
+
+        with self.assertRaises(RuntimeError):
+            self._bundle.read('01012023/server/i-1/log/Game.log')
+
+    def test_extract_all_files_saved_with_bundle_paths(self):
+        with tempfile.TemporaryDirectory() as output_path:
+            file_paths = self._bundle.extract(output_path)
+
+            self.assertEqual(len(file_paths), 2)
+            with open(os.path.join(output_path, '01012023', 'server', 'i-1', 'log', 'Game.log'), 'rb') as log_file:
+                self.assertEqual(log_file.read(), TEST_FILES['01012023/server/i-1/log/Game.log'])
+
+    def test_read_file_not_in_bundle_raise_runtime_error(self):
+        with self.assertRaises(RuntimeError):
+            self._bundle.read('missing.log')
@@ -0,0 +1,156 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import gzip
+import os
+import time
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import boto3
+from moto import mock_aws
+
+from capacity_search import CapacitySearch, ServerLogTail, ServerMetricsCollector, evaluate_slos, \
+    get_slo_percentiles, parse_slo
+
+TEST_REGION = 'us-east-1'
+TEST_BUCKET_NAME = 'test-artifact-bucket'
+TEST_LOG_PREFIX = 'runs/20230101T120000Z-1a2b3c4d/server/i-1/log/'
+TEST_INSTANCE_ID = 'i-1'
+
+
+def _run_step_with_capacity(capacity: int):
+    return lambda count: {'passed': count <= capacity, 'results': []}
+
+
+class TestCapacitySearch(unittest.TestCase):
+
+    def test_parse_slo_valid_objective(self):
+        objective = parse_slo('tick_time_ms:p95<=33.3')
+
+        self.assertEqual((objective.series, objective.statistic, objective.operator, objective.threshold),
+                         ('tick_time_ms', 'p95', '<=', 33.3))
+        self.assertEqual(str(objective), 'tick_time_ms:p95<=33.3')
+
+    def test_parse_slo_invalid_objective_raise_runtime_error(self):
+        with self.assertRaises(RuntimeError):
+            parse_slo('tick_time_ms<=33.3')
+
+    def test_evaluate_slos_missing_series_fail_missing_events_pass(self):
+        objectives = [parse_slo('tick_rate:p5>=28'), parse_slo('error:count<=0'), parse_slo('fps:mean>30')]
+
+        passed, results = evaluate_slos(objectives, {'tick_rate': {'count': 10, 'p5': 29.5}})
+
+        self.assertFalse(passed)
+        self.assertEqual([result['passed'] for result in results], [True, True, False])
+        self.assertEqual(get_slo_percentiles(objectives), [5, 50, 95, 99])
+
+    def test_evaluate_slos_unknown_series_neither_pass_nor_fail(self):
+        objectives = [parse_slo('tick_time_ms:p95<=33.3'), parse_slo('cpu_utilization:p95<=90')]
+
+        passed, results = evaluate_slos(objectives, {'tick_time_ms': {'count': 10, 'p95': 20},
+                                                     'cpu_utilization': {'count': 0, 'unknown': True}})
+
+        self.assertTrue(passed)
+        self.assertEqual([result['passed'] for result in results], [True, None])
+
+    def test_search_capacity_between_steps_bisected(self):
+        search = CapacitySearch(_run_step_with_capacity(13), min_count=1, max_count=64)
+
+        result = search.search()
+
+        self.assertEqual(result['max_passing_count'], 13)
+        self.assertEqual(result['first_failing_count'], 14)
+        self.assertEqual([step['client_count'] for step in search.steps], [1, 2, 4, 8, 16, 12, 14, 13])
+        self.assertEqual([step['client_count'] for step in result['curve']], [1, 2, 4, 8, 12, 13, 14, 16])
+
+    def test_search_max_count_passes_stop_at_max(self):
+        result = CapacitySearch(_run_step_with_capacity(100), min_count=3, max_count=20).search()
+
+        self.assertEqual(result['max_passing_count'], 20)
+        self.assertIsNone(result['first_failing_count'])
+        self.assertEqual([step['client_count'] for step in result['curve']], [3, 6, 12, 20])
+
+    def test_search_min_count_fails_no_passing_count(self):
+        result = CapacitySearch(_run_step_with_capacity(0), min_count=4, max_count=20, resolution=2).search()
+
+        self.assertEqual(result['max_passing_count'], 0)
+        self.assertEqual(len(result['curve']), 1)
+
+    def test_search_resolution_stops_bisecting(self):
+        search = CapacitySearch(_run_step_with_capacity(40), min_count=10, max_count=80, resolution=5)
+
+        result = search.search()
+
+        self.assertLessEqual(result['first_failing_count'] - result['max_passing_count'], 5)
+        self.assertLessEqual(result['max_passing_count'], 40)
+
+
+class TestServerLogTail(unittest.TestCase):
+
+    def setUp(self):
+        environment = patch.dict(os.environ, {
+            'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing', 'AWS_DEFAULT_REGION': TEST_REGION})
+        environment.start()
+        self.addCleanup(environment.stop)
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+
+        self._s3_client = boto3.client('s3', region_name=TEST_REGION)
+        self._s3_client.create_bucket(Bucket=TEST_BUCKET_NAME)
+        self._tail = ServerLogTail(TEST_BUCKET_NAME, TEST_LOG_PREFIX, TEST_REGION)
+
+    def _put_chunk(self, offset: int, content: bytes) -> None:
+        self._s3_client.put_object(Bucket=TEST_BUCKET_NAME,
+                                   Key=f'{TEST_LOG_PREFIX}Game.log/20230101T120000000Z-{offset:016d}.gz',
+                                   Body=gzip.compress(content))
+
+    def test_read_lines_only_new_chunks_lines_joined_across_chunks(self):
+        self._put_chunk(0, b'<12:00:00.000> Tick time: 10 ms\n<12:00:01.000> Tick ti')
+
+        first_lines = list(self._tail.read_lines())
+        self._put_chunk(52, b'me: 12 ms\n')
+        second_lines = list(self._tail.read_lines())
+
+        self.assertEqual(first_lines, ['<12:00:00.000> Tick time: 10 ms'])
+        self.assertEqual(second_lines, ['<12:00:01.000> Tick time: 12 ms'])
+        self.assertEqual(list(self._tail.read_lines()), [])
+
+
+class TestServerMetricsCollector(unittest.TestCase):
+
+    def setUp(self):
+        environment = patch.dict(os.environ, {
+            'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing', 'AWS_DEFAULT_REGION': TEST_REGION})
+        environment.start()
+        self.addCleanup(environment.stop)
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+
+        self._log_tail = MagicMock()
+        self._log_tail.read_lines.return_value = iter([])
+        self._collector = ServerMetricsCollector(self._log_tail, TEST_INSTANCE_ID, TEST_REGION, cpu_delay_seconds=0)
+
+    def test_collect_cpu_utilization_published_summarized(self):
+        self._collector.start()
+        boto3.client('cloudwatch', region_name=TEST_REGION).put_metric_data(Namespace='AWS/EC2', MetricData=[{
+            'MetricName': 'CPUUtilization', 'Dimensions': [{'Name': 'InstanceId', 'Value': TEST_INSTANCE_ID}],
+            'Timestamp': datetime.fromtimestamp(time.time(), timezone.utc), 'Value': 75}])
+
+        summaries = self._collector.collect([95])
+
+        self.assertEqual(summaries['cpu_utilization']['count'], 1)
+        self.assertEqual(summaries['cpu_utilization']['max'], 75)
+
+    def test_collect_cpu_utilization_not_published_unknown(self):
+        self._collector.start()
+
+        summaries = self._collector.collect([95])
+        passed, results = evaluate_slos([parse_slo('cpu_utilization:p95<=90')], summaries)
+
+        self.assertTrue(summaries['cpu_utilization']['unknown'])
+        self.assertTrue(passed)
+        self.assertIsNone(results[0]['passed'])
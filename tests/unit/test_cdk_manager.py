@@ -1,8 +1,12 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
+import hashlib
+import json
+import os
+import tempfile
 import unittest
-from unittest.mock import Mock, patch
+from unittest.mock import DEFAULT, Mock, patch
 
 from cdk_manager import CdkManager
 from config import AutoScalerConfig
@@ -13,6 +17,7 @@ TEST_DEFAULT_CONFIG = {
     "project_name": "MultiplayerSample",
     "project_path": "C:/Users/testuser/o3de-multiplayersample",
     "client_count": 5,
+    "client_log_echo": False,
     "server_private_ip": "10.0.0.4",
     "server_port": SCALER_CONFIG_DEFAULT_SERVER_PORT,
     "aws_account_id": "123456789012",
@@ -20,8 +25,15 @@ TEST_DEFAULT_CONFIG = {
     "ec2_key_pair": "myKeyPair",
     "local_reference_machine_cidr": "10.0.0.1/32",
     "aws_metrics_cdk_path": "C:/Users/testuser/o3de-multiplayersample/Gem/AWS/MetricsCDK",
-    "aws_metrics_policy_export_name": "MULTIPLAYERSAMPLE-AWSMetrics:UserPolicy"
+    "aws_metrics_policy_export_name": "MULTIPLAYERSAMPLE-AWSMetrics:UserPolicy",
+    "client_task_cpu_units": 2048,
+    "client_task_memory_mib": 4096,
+    "server_instance_type": "c5.4xlarge",
+    "server_volume_size_gib": 80,
+    "server_artifact_sync_interval_minutes": 5,
+    "image_builder_instance_type": "c5.xlarge"
 }
+TEST_RUN_ID = '20230101T120000Z-1a2b3c4d'
 
 class TestCdkManager(unittest.TestCase):
 
@@ -29,6 +41,15 @@ class TestCdkManager(unittest.TestCase):
         self._test_config = self._get_test_config()
         self._test_platform = 'test_platform'
 
+        catalog_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(catalog_dir.cleanup)
+        self._test_config.set(SCALER_CONFIG_RUN_CATALOG_PATH_KEY, os.path.join(catalog_dir.name, 'run_catalog.db'))
+        for target, attributes in [('cdk_manager.new_run_id', {'return_value': TEST_RUN_ID}),
+                                   ('cdk_manager.StackOutputs', {}), ('cdk_manager.RunCatalogStore', {})]:
+            patcher = patch(target, **attributes)
+            setattr(self, f'_mock_{target.split(".")[-1]}', patcher.start())
+            self.addCleanup(patcher.stop)
+
     @patch('cdk_manager.ProcessRunner')
     def test_init(self, mock_runner):
         test_cdk_manager = CdkManager(self._test_config)
@@ -44,6 +65,11 @@ class TestCdkManager(unittest.TestCase):
         self.assertEqual(test_cdk_manager._project_name, self._test_config.get("project_name"))
         self.assertEqual(test_cdk_manager._metrics_cdk_dir, self._test_config.get_path("aws_metrics_cdk_path"))
         self.assertEqual(test_cdk_manager._metrics_policy_export_name, self._test_config.get("aws_metrics_policy_export_name"))
+        self.assertEqual(test_cdk_manager._client_task_cpu_units, str(self._test_config.get("client_task_cpu_units")))
+        self.assertEqual(test_cdk_manager._client_task_memory_mib, str(self._test_config.get("client_task_memory_mib")))
+        self.assertEqual(test_cdk_manager._server_instance_type, self._test_config.get("server_instance_type"))
+        self.assertEqual(test_cdk_manager._server_volume_size, str(self._test_config.get("server_volume_size_gib")))
+        self.assertEqual(test_cdk_manager._image_builder_instance_type, self._test_config.get("image_builder_instance_type"))
 
         mock_runner.assert_called_with('Bootstrap CDK',
                 ['cdk', 'bootstrap', f'aws://{self._test_config.get("aws_account_id")}/{self._test_config.get("aws_region")}'])
@@ -99,35 +125,74 @@ class TestCdkManager(unittest.TestCase):
     @patch('cdk_manager.ProcessRunner')
     def test_deploy_client(self, mock_runner):
         expected_args = ['cdk', 'deploy', '-c', f'client_count={str(self._test_config.get("client_count"))}',
+                        '-c', f'client_task_cpu={self._test_config.get("client_task_cpu_units")}',
+                        '-c', f'client_task_memory={self._test_config.get("client_task_memory_mib")}',
+                        '-c', 'client_log_echo=false',
+                        '-c', 'network_probe=false',
+                        '-c', 'vpc_flow_logs=false',
+                        '-c', f'artifact_sync_interval={self._test_config.get("server_artifact_sync_interval_minutes")}',
+                        '-c', 'namespace=',
                         '-c', f'target={CLIENT_TARGET}',
-                        '-c', f'platform={self._test_platform}', '--all', '--require-approval=never']
+                        '-c', f'platform={self._test_platform}', '-c', 'run_id=', '--all', '--require-approval=never']
 
         CdkManager(self._test_config).deploy_aws_resources(CLIENT_TARGET, self._test_platform)
 
         mock_runner.assert_called_with('Deploy CDK application', expected_args)
 
+    @patch('cdk_manager.boto3')
     @patch('cdk_manager.ProcessRunner')
-    def test_deploy_server(self, mock_runner):
+    def test_deploy_server(self, mock_runner, mock_boto3):
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
         expected_args = ['cdk', 'deploy', '-c', f'key_pair={self._test_config.get("ec2_key_pair")}', 
                 '-c', f'server_port={self._test_config.get("server_port")}',
                 '-c', f'server_private_ip={self._test_config.get("server_private_ip")}',
                 '-c', f'local_reference_machine_cidr={self._test_config.get("local_reference_machine_cidr")}',
                 '-c', f'metrics_policy_export_name={self._test_config.get("aws_metrics_policy_export_name")}',
-                '-c', f'target={SERVER_TARGET}', '-c', f'platform={self._test_platform}', '--all', '--require-approval=never']
+                '-c', f'server_instance_type={self._test_config.get("server_instance_type")}',
+                '-c', f'server_volume_size={self._test_config.get("server_volume_size_gib")}',
+                '-c', f'artifact_sync_interval={self._test_config.get("server_artifact_sync_interval_minutes")}',
+                '-c', f'soak_sample_seconds={SCALER_CONFIG_DEFAULT_SERVER_SOAK_SAMPLE_SECONDS}',
+                '-c', f'image_builder_instance_type={self._test_config.get("image_builder_instance_type")}',
+                '-c', 'vpc_flow_logs=false',
+                '-c', 'relay_profiles_file=',
+                '-c', f'relay_private_ip={SCALER_CONFIG_DEFAULT_RELAY_PRIVATE_IP}',
+                '-c', f'relay_instance_type={SCALER_CONFIG_DEFAULT_RELAY_INSTANCE_TYPE}',
+                '-c', 'base_image_id=',
+                '-c', 'namespace=',
+                '-c', f'target={SERVER_TARGET}', '-c', f'platform={self._test_platform}', '-c', f'run_id={TEST_RUN_ID}',
+                '--all', '--require-approval=never']
 
         CdkManager(self._test_config).deploy_aws_resources(SERVER_TARGET, self._test_platform)
 
         mock_runner.assert_called_with('Deploy CDK application', expected_args)
 
+    @patch('cdk_manager.boto3')
     @patch('cdk_manager.ProcessRunner')
-    def test_deploy_all(self, mock_runner):
+    def test_deploy_all(self, mock_runner, mock_boto3):
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
         expected_args = ['cdk', 'deploy', '-c', f'key_pair={self._test_config.get("ec2_key_pair")}',
                 '-c', f'server_port={self._test_config.get("server_port")}',
                 '-c', f'server_private_ip={self._test_config.get("server_private_ip")}',
                 '-c', f'client_count={str(self._test_config.get("client_count"))}',
                 '-c', f'local_reference_machine_cidr={self._test_config.get("local_reference_machine_cidr")}',
                 '-c', f'metrics_policy_export_name={self._test_config.get("aws_metrics_policy_export_name")}',
-                '-c', f'platform={self._test_platform}', '--all', '--require-approval=never']
+                '-c', f'client_task_cpu={self._test_config.get("client_task_cpu_units")}',
+                '-c', f'client_task_memory={self._test_config.get("client_task_memory_mib")}',
+                '-c', 'client_log_echo=false',
+                '-c', 'network_probe=false',
+                '-c', 'vpc_flow_logs=false',
+                '-c', f'server_instance_type={self._test_config.get("server_instance_type")}',
+                '-c', f'server_volume_size={self._test_config.get("server_volume_size_gib")}',
+                '-c', f'artifact_sync_interval={self._test_config.get("server_artifact_sync_interval_minutes")}',
+                '-c', f'soak_sample_seconds={SCALER_CONFIG_DEFAULT_SERVER_SOAK_SAMPLE_SECONDS}',
+                '-c', f'image_builder_instance_type={self._test_config.get("image_builder_instance_type")}',
+                '-c', 'relay_profiles_file=',
+                '-c', f'relay_private_ip={SCALER_CONFIG_DEFAULT_RELAY_PRIVATE_IP}',
+                '-c', f'relay_instance_type={SCALER_CONFIG_DEFAULT_RELAY_INSTANCE_TYPE}',
+                '-c', 'base_image_id=',
+                '-c', 'namespace=',
+                '-c', f'platform={self._test_platform}', '-c', f'run_id={TEST_RUN_ID}', '--all',
+                '--require-approval=never']
 
         CdkManager(self._test_config).deploy_aws_resources(None, self._test_platform)
 
@@ -145,8 +210,15 @@ class TestCdkManager(unittest.TestCase):
     @patch('cdk_manager.ProcessRunner')
     def test_destroy_client(self, mock_runner):
         expected_args = ['cdk', 'destroy', '-c', f'client_count={str(self._test_config.get("client_count"))}',
+                        '-c', f'client_task_cpu={self._test_config.get("client_task_cpu_units")}',
+                        '-c', f'client_task_memory={self._test_config.get("client_task_memory_mib")}',
+                        '-c', 'client_log_echo=false',
+                        '-c', 'network_probe=false',
+                        '-c', 'vpc_flow_logs=false',
+                        '-c', f'artifact_sync_interval={self._test_config.get("server_artifact_sync_interval_minutes")}',
+                        '-c', 'namespace=',
                         '-c', f'target={CLIENT_TARGET}',
-                        '-c', f'platform={self._test_platform}', '--all', '-f']
+                        '-c', f'platform={self._test_platform}', '-c', 'run_id=', '--all', '-f']
 
         CdkManager(self._test_config).destroy_aws_resources(CLIENT_TARGET, self._test_platform)
 
@@ -159,7 +231,17 @@ class TestCdkManager(unittest.TestCase):
                 '-c', f'server_private_ip={self._test_config.get("server_private_ip")}',
                 '-c', f'local_reference_machine_cidr={self._test_config.get("local_reference_machine_cidr")}',
                 '-c', f'metrics_policy_export_name={self._test_config.get("aws_metrics_policy_export_name")}',
-                '-c', f'target={SERVER_TARGET}', '-c', f'platform={self._test_platform}', '--all', '-f']
+                '-c', f'server_instance_type={self._test_config.get("server_instance_type")}',
+                '-c', f'server_volume_size={self._test_config.get("server_volume_size_gib")}',
+                '-c', f'artifact_sync_interval={self._test_config.get("server_artifact_sync_interval_minutes")}',
+                '-c', f'soak_sample_seconds={SCALER_CONFIG_DEFAULT_SERVER_SOAK_SAMPLE_SECONDS}',
+                '-c', f'image_builder_instance_type={self._test_config.get("image_builder_instance_type")}',
+                '-c', 'vpc_flow_logs=false',
+                '-c', 'relay_profiles_file=',
+                '-c', f'relay_private_ip={SCALER_CONFIG_DEFAULT_RELAY_PRIVATE_IP}',
+                '-c', f'relay_instance_type={SCALER_CONFIG_DEFAULT_RELAY_INSTANCE_TYPE}',
+                '-c', 'namespace=',
+                '-c', f'target={SERVER_TARGET}', '-c', f'platform={self._test_platform}', '-c', 'run_id=', '--all', '-f']
 
         CdkManager(self._test_config).destroy_aws_resources(SERVER_TARGET, self._test_platform)
 
@@ -173,12 +255,290 @@ class TestCdkManager(unittest.TestCase):
                 '-c', f'client_count={str(self._test_config.get("client_count"))}',
                 '-c', f'local_reference_machine_cidr={self._test_config.get("local_reference_machine_cidr")}',
                 '-c', f'metrics_policy_export_name={self._test_config.get("aws_metrics_policy_export_name")}',
-                '-c', f'platform={self._test_platform}', '--all', '-f']
+                '-c', f'client_task_cpu={self._test_config.get("client_task_cpu_units")}',
+                '-c', f'client_task_memory={self._test_config.get("client_task_memory_mib")}',
+                '-c', 'client_log_echo=false',
+                '-c', 'network_probe=false',
+                '-c', 'vpc_flow_logs=false',
+                '-c', f'server_instance_type={self._test_config.get("server_instance_type")}',
+                '-c', f'server_volume_size={self._test_config.get("server_volume_size_gib")}',
+                '-c', f'artifact_sync_interval={self._test_config.get("server_artifact_sync_interval_minutes")}',
+                '-c', f'soak_sample_seconds={SCALER_CONFIG_DEFAULT_SERVER_SOAK_SAMPLE_SECONDS}',
+                '-c', f'image_builder_instance_type={self._test_config.get("image_builder_instance_type")}',
+                '-c', 'relay_profiles_file=',
+                '-c', f'relay_private_ip={SCALER_CONFIG_DEFAULT_RELAY_PRIVATE_IP}',
+                '-c', f'relay_instance_type={SCALER_CONFIG_DEFAULT_RELAY_INSTANCE_TYPE}',
+                '-c', 'namespace=',
+                '-c', f'platform={self._test_platform}', '-c', 'run_id=', '--all', '-f']
 
         CdkManager(self._test_config).destroy_aws_resources(None, self._test_platform)
 
         mock_runner.assert_called_with('Destroy CDK application', expected_args)
 
+    @patch('cdk_manager.boto3')
+    @patch('cdk_manager.ProcessRunner')
+    def test_deploy_server_image_with_same_package_reused(self, mock_runner, mock_boto3):
+        mock_boto3.client.return_value.describe_images.side_effect = [
+            {'Images': [{'ImageId': 'ami-base', 'CreationDate': '2022-07-01T00:00:00.000Z'}]},
+            {'Images': [
+                {'ImageId': 'ami-old', 'CreationDate': '2022-08-01T00:00:00.000Z'},
+                {'ImageId': 'ami-new', 'CreationDate': '2022-08-02T00:00:00.000Z'}
+            ]}
+        ]
+
+        with tempfile.TemporaryDirectory() as asset_path:
+            package_hash = self._create_test_package(asset_path)
+            CdkManager(self._test_config).deploy_aws_resources(SERVER_TARGET, self._test_platform)
+
+        args = mock_runner.call_args.args[1]
+        self.assertIn(f'package_hash={package_hash}', args)
+        self.assertIn('server_image_id=ami-new', args)
+        self.assertIn('base_image_id=ami-base', args)
+        filters = mock_boto3.client.return_value.describe_images.call_args.kwargs['Filters']
+        self.assertIn({'Name': f'tag:{SERVER_IMAGE_PACKAGE_HASH_TAG_KEY}', 'Values': [package_hash]}, filters)
+        self.assertIn({'Name': f'tag:{SERVER_IMAGE_BASE_IMAGE_TAG_KEY}', 'Values': ['ami-base']}, filters)
+
+    @patch('cdk_manager.boto3')
+    @patch('cdk_manager.ProcessRunner')
+    def test_deploy_server_image_reuse_disabled_no_image_lookup(self, mock_runner, mock_boto3):
+        self._test_config.set(SCALER_CONFIG_REUSE_SERVER_IMAGE_KEY, False)
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
+
+        with tempfile.TemporaryDirectory() as asset_path:
+            package_hash = self._create_test_package(asset_path)
+            CdkManager(self._test_config).deploy_aws_resources(None, self._test_platform)
+
+        args = mock_runner.call_args.args[1]
+        self.assertIn(f'package_hash={package_hash}', args)
+        self.assertIn('server_image_id=', args)
+        # Only the base AMI is looked up
+        self.assertEqual(mock_boto3.client.return_value.describe_images.call_count, 1)
+
+    @patch('cdk_manager.ProcessRunner')
+    def test_deploy_base_image(self, mock_runner):
+        expected_args = ['cdk', 'deploy',
+                         '-c', f'image_builder_instance_type={self._test_config.get("image_builder_instance_type")}',
+                         '-c', 'vpc_flow_logs=false',
+                         '-c', 'namespace=',
+                         '-c', f'target={BASE_IMAGE_TARGET}', '-c', f'platform={self._test_platform}', '--all',
+                         '--require-approval=never']
+
+        CdkManager(self._test_config).deploy_aws_resources(BASE_IMAGE_TARGET, self._test_platform)
+
+        mock_runner.assert_called_with('Deploy CDK application', expected_args)
+
+    @patch('cdk_manager.ProcessRunner')
+    def test_deploy_common(self, mock_runner):
+        expected_args = ['cdk', 'deploy', '-c', 'vpc_flow_logs=false',
+                         '-c', 'namespace=',
+                         '-c', f'target={COMMON_TARGET}', '-c', f'platform={self._test_platform}', '--all',
+                         '--require-approval=never']
+
+        cdk_manager = CdkManager(self._test_config)
+        cdk_manager.deploy_aws_resources(COMMON_TARGET, self._test_platform)
+
+        mock_runner.assert_called_with('Deploy CDK application', expected_args)
+        self.assertEqual(cdk_manager._run_catalog.list_runs(), [])
+
+    @patch('cdk_manager.boto3')
+    @patch('cdk_manager.ProcessRunner')
+    def test_deploy_server_image_reuse_disabled_as_string_no_image_lookup(self, mock_runner, mock_boto3):
+        self._test_config.set(SCALER_CONFIG_REUSE_SERVER_IMAGE_KEY, 'false')
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
+
+        with tempfile.TemporaryDirectory() as asset_path:
+            self._create_test_package(asset_path)
+            CdkManager(self._test_config).deploy_aws_resources(None, self._test_platform)
+
+        self.assertIn('server_image_id=', mock_runner.call_args.args[1])
+        # Only the base AMI is looked up
+        self.assertEqual(mock_boto3.client.return_value.describe_images.call_count, 1)
+
+    @patch('cdk_manager.boto3')
+    @patch('cdk_manager.ProcessRunner')
+    def test_deploy_client_image_no_clients_and_own_output(self, mock_runner, mock_boto3):
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
+        cdk_manager = CdkManager(self._test_config)
+        cdk_manager.deploy_aws_resources(SERVER_TARGET, self._test_platform)
+
+        cdk_manager.deploy_client_image(self._test_platform, 'cdk.out.test')
+
+        args = mock_runner.call_args.args[1]
+        self.assertEqual(mock_runner.call_args.args[0], 'Deploy client image')
+        self.assertIn('client_count=0', args)
+        self.assertIn(f'target={CLIENT_TARGET}', args)
+        # The client image deployment doesn't join the run of the server deployment
+        self.assertIn('run_id=', args)
+        self.assertEqual(args[-2:], ['--output', 'cdk.out.test'])
+        # Only the client stack is deployed, so the common stack isn't updated alongside the server deployment
+        self.assertEqual(args[-4:-2], ['MultiplayerSample-ClientStack', '--exclusively'])
+        self.assertNotIn('--all', args)
+        # The dependencies are installed once
+        install_calls = [call for call in mock_runner.call_args_list if call.args[0] == 'Install required dependencies']
+        self.assertEqual(len(install_calls), 1)
+
+    @patch('cdk_manager.boto3')
+    @patch('cdk_manager.ProcessRunner')
+    def test_deploy_server_run_started_and_published(self, mock_runner, mock_boto3):
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
+        self._mock_StackOutputs.return_value.get.return_value = 'test-artifacts-bucket'
+
+        with tempfile.TemporaryDirectory() as asset_path:
+            package_hash = self._create_test_package(asset_path)
+            cdk_manager = CdkManager(self._test_config)
+            cdk_manager.deploy_aws_resources(SERVER_TARGET, self._test_platform)
+
+        run = cdk_manager._run_catalog.get(TEST_RUN_ID)
+        self.assertEqual(run['project_name'], self._test_config.get('project_name'))
+        self.assertEqual(run['package_hash'], package_hash)
+        self.assertEqual(run['client_count'], self._test_config.get('client_count'))
+        self.assertEqual(run['config']['server_instance_type'], self._test_config.get('server_instance_type'))
+        self.assertEqual(run['end_time'], '')
+        self._mock_StackOutputs.return_value.get.assert_called_with(COMMON_STACK_SUFFIX, ARTIFACT_BUCKET_NAME_OUTPUT_KEY)
+        self._mock_RunCatalogStore.assert_called_with('test-artifacts-bucket', self._test_config.get('aws_region'))
+        self._mock_RunCatalogStore.return_value.put.assert_called_with(run)
+
+    @patch('cdk_manager.boto3')
+    @patch('cdk_manager.ProcessRunner')
+    def test_deploy_client_after_server_client_joins_active_run(self, mock_runner, mock_boto3):
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
+        cdk_manager = CdkManager(self._test_config)
+        cdk_manager.deploy_aws_resources(SERVER_TARGET, self._test_platform)
+        cdk_manager._client_count = '10'
+
+        cdk_manager.deploy_aws_resources(CLIENT_TARGET, self._test_platform)
+
+        self.assertIn(f'run_id={TEST_RUN_ID}', mock_runner.call_args.args[1])
+        self.assertEqual(cdk_manager._run_catalog.get(TEST_RUN_ID)['client_count'], 10)
+
+    @patch('cdk_manager.BandwidthAccounting')
+    @patch('cdk_manager.boto3')
+    @patch('cdk_manager.ProcessRunner')
+    def test_deploy_and_destroy_clients_flow_logs_enabled_endpoints_saved(self, mock_runner, mock_boto3,
+                                                                          mock_accounting):
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
+        self._test_config.set(SCALER_CONFIG_VPC_FLOW_LOGS_KEY, True)
+        cdk_manager = CdkManager(self._test_config)
+        cdk_manager.deploy_aws_resources(SERVER_TARGET, self._test_platform)
+        mock_accounting.assert_not_called()
+
+        cdk_manager.deploy_aws_resources(CLIENT_TARGET, self._test_platform)
+
+        def run_destroy(name, args):
+            # The endpoints are saved again before the clients are destroyed, while the tasks are still described
+            if name == 'Destroy CDK application':
+                self.assertEqual(mock_accounting.return_value.update_endpoints.call_count, 2)
+            return DEFAULT
+
+        mock_runner.side_effect = run_destroy
+        cdk_manager.destroy_aws_resources(ALL_TARGET, self._test_platform)
+
+        mock_accounting.assert_called_with(self._mock_StackOutputs.return_value.get.return_value, TEST_RUN_ID,
+                                           self._test_config.get('aws_region'))
+        mock_accounting.return_value.update_endpoints.assert_called_with(
+            self._mock_StackOutputs.return_value, [self._test_config.get('server_private_ip')], False)
+        self.assertEqual(mock_runner.call_args.args[0], 'Destroy CDK application')
+
+    @patch('cdk_manager.BandwidthAccounting')
+    @patch('cdk_manager.boto3')
+    @patch('cdk_manager.ProcessRunner')
+    def test_deploy_clients_flow_logs_disabled_no_endpoints_saved(self, mock_runner, mock_boto3, mock_accounting):
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
+        cdk_manager = CdkManager(self._test_config)
+
+        cdk_manager.deploy_aws_resources(None, self._test_platform)
+        cdk_manager.destroy_aws_resources(ALL_TARGET, self._test_platform)
+
+        mock_accounting.assert_not_called()
+
+    @patch('cdk_manager.boto3')
+    @patch('cdk_manager.ProcessRunner')
+    def test_destroy_server_exclusively_common_stack_kept(self, mock_runner, mock_boto3):
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
+
+        CdkManager(self._test_config).destroy_aws_resources(SERVER_TARGET, self._test_platform, exclusively=True)
+
+        args = mock_runner.call_args.args[1]
+        self.assertEqual(mock_runner.call_args.args[0], 'Destroy CDK application')
+        self.assertNotIn('--all', args)
+        self.assertEqual(args[-2:], ['MultiplayerSample-ServerStack', '--exclusively'])
+
+    @patch('cdk_manager.boto3')
+    @patch('cdk_manager.ProcessRunner')
+    def test_destroy_server_active_run_ended_before_destroy(self, mock_runner, mock_boto3):
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
+        cdk_manager = CdkManager(self._test_config)
+        cdk_manager.deploy_aws_resources(SERVER_TARGET, self._test_platform)
+
+        cdk_manager.destroy_aws_resources(SERVER_TARGET, self._test_platform)
+
+        self.assertIn(f'run_id={TEST_RUN_ID}', mock_runner.call_args.args[1])
+        run = cdk_manager._run_catalog.get(TEST_RUN_ID)
+        self.assertNotEqual(run['end_time'], '')
+        self._mock_RunCatalogStore.return_value.put.assert_called_with(run)
+        self.assertEqual(cdk_manager._run_catalog.get_active(self._test_config.get('project_name')), {})
+
+    @patch('cdk_manager.boto3')
+    @patch('cdk_manager.ProcessRunner')
+    def test_deploy_server_relay_profiles_written_and_passed(self, mock_runner, mock_boto3):
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
+        profiles = [{'name': 'broadband', 'latency_ms': 20}, {'name': 'mobile', 'latency_ms': 60, 'loss_percent': 1}]
+        self._test_config.set(SCALER_CONFIG_RELAY_PROFILES_KEY, profiles)
+
+        with tempfile.TemporaryDirectory() as asset_path:
+            self._create_test_package(asset_path)
+            CdkManager(self._test_config).deploy_aws_resources(SERVER_TARGET, self._test_platform)
+            profiles_file = os.path.join(asset_path, RELAY_PROFILES_FILENAME)
+            with open(profiles_file) as written_file:
+                written_profiles = json.load(written_file)
+
+        self.assertEqual(written_profiles, profiles)
+        self.assertIn(f'relay_profiles_file={profiles_file}', mock_runner.call_args.args[1])
+
+    @patch('cdk_manager.boto3')
+    @patch('cdk_manager.ProcessRunner')
+    def test_deploy_server_namespace_passed_and_run_kept_apart(self, mock_runner, mock_boto3):
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
+        default_cdk_manager = CdkManager(self._test_config)
+        default_cdk_manager.deploy_aws_resources(SERVER_TARGET, self._test_platform)
+        self._test_config.set(SCALER_CONFIG_NAMESPACE_KEY, 'exp1')
+        self._mock_new_run_id.return_value = '20230101T130000Z-5e6f7a8b'
+
+        cdk_manager = CdkManager(self._test_config)
+        cdk_manager.deploy_aws_resources(SERVER_TARGET, self._test_platform)
+
+        self.assertIn('namespace=exp1', mock_runner.call_args.args[1])
+        self.assertEqual(mock_runner.call_args.args[1][-2:], ['--output', f'{CDK_OUTPUT_FOLDER}.exp1'])
+        self.assertEqual(cdk_manager._env['O3DE_AWS_PROJECT_NAME'], self._test_config.get('project_name'))
+        self._mock_StackOutputs.assert_called_with(f'exp1-{self._test_config.get("project_name")}',
+                                                   self._test_config.get('aws_region'))
+        # Each namespace has its own active run
+        self.assertEqual(cdk_manager._run_catalog.get_active(f'exp1-{self._test_config.get("project_name")}')['run_id'],
+                         '20230101T130000Z-5e6f7a8b')
+        self.assertEqual(cdk_manager._run_catalog.get_active(self._test_config.get('project_name'))['run_id'],
+                         TEST_RUN_ID)
+
+    @patch('cdk_manager.ProcessRunner')
+    def test_init_invalid_namespace_raises_error(self, mock_runner):
+        self._test_config.set(SCALER_CONFIG_NAMESPACE_KEY, 'exp_1')
+
+        with self.assertRaises(RuntimeError):
+            CdkManager(self._test_config)
+
+    @patch('cdk_manager.ProcessRunner')
+    def test_init_relay_profile_without_name_raises_error(self, mock_runner):
+        self._test_config.set(SCALER_CONFIG_RELAY_PROFILES_KEY, [{'latency_ms': 20}])
+
+        with self.assertRaises(RuntimeError):
+            CdkManager(self._test_config)
+
+    def _create_test_package(self, asset_path: str) -> str:
+        self._test_config.set(SCALER_CONFIG_OUTPUT_PATH_KEY, asset_path)
+        os.makedirs(os.path.join(asset_path, self._test_platform))
+        with open(os.path.join(asset_path, self._test_platform, f'{OUTPUT_PACKAGE_FOLDER_NAME}.zip'), 'wb') as package:
+            package.write(b'test package')
+        return hashlib.sha256(b'test package').hexdigest()
+
     def _get_test_config(self) -> AutoScalerConfig:
         test_config = AutoScalerConfig()
         for k, v in TEST_DEFAULT_CONFIG.items():
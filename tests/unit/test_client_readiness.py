@@ -0,0 +1,111 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+from client_readiness import ClientReadinessMonitor, format_histogram, get_readiness_report
+
+
+def _readiness_event(event_id, stream, status, timestamp, seconds_since_launch):
+    return {
+        'eventId': event_id,
+        'logStreamName': f'auto-scaler-client/container/{stream}',
+        'timestamp': int(timestamp * 1000),
+        'message': json.dumps({
+            'event': 'client_readiness', 'status': status, 'task_id': stream,
+            'timestamp': timestamp, 'seconds_since_launch': seconds_since_launch, 'detail': ''
+        })
+    }
+
+
+class TestClientReadinessMonitor(unittest.TestCase):
+
+    def setUp(self):
+        self._logs_client = Mock()
+        self._paginator = Mock()
+        self._logs_client.get_paginator.return_value = self._paginator
+        patcher = patch('client_readiness.boto3')
+        mock_boto3 = patcher.start()
+        mock_boto3.client.return_value = self._logs_client
+        self.addCleanup(patcher.stop)
+
+    def test_poll_connected_and_disconnected_clients_counted(self):
+        self._paginator.paginate.return_value = [{'events': [
+            _readiness_event('1', 'task1', 'launched', 100.0, 0.0),
+            _readiness_event('2', 'task1', 'connected', 112.0, 12.0),
+            _readiness_event('3', 'task2', 'launched', 101.0, 0.0),
+            _readiness_event('4', 'task2', 'connected', 121.0, 20.0),
+            _readiness_event('5', 'task2', 'disconnected', 130.0, 29.0),
+            _readiness_event('6', 'task3', 'failed', 140.0, 39.0)
+        ]}]
+
+        monitor = ClientReadinessMonitor('test-log-group', 'us-east-1', start_time=0)
+
+        self.assertEqual(monitor.poll(), 1)
+        self.assertEqual(len(monitor.clients), 3)
+        self.assertEqual(monitor.get_times_to_connected(), [12.0, 20.0])
+
+    def test_poll_repeated_events_counted_once(self):
+        events = [_readiness_event('1', 'task1', 'connected', 100.0, 10.0)]
+        self._paginator.paginate.return_value = [{'events': events}]
+
+        monitor = ClientReadinessMonitor('test-log-group', 'us-east-1', start_time=0)
+        monitor.poll()
+        self._paginator.paginate.return_value = [{'events': events + [
+            _readiness_event('2', 'task1', 'connected', 150.0, 60.0)
+        ]}]
+        monitor.poll()
+
+        self.assertEqual(monitor.get_times_to_connected(), [10.0])
+        self.assertEqual(self._paginator.paginate.call_args.kwargs['startTime'], 100000)
+
+    @patch('client_readiness.time.sleep')
+    def test_wait_for_clients_count_reached_return_true(self, mock_sleep):
+        self._paginator.paginate.side_effect = [
+            [{'events': [_readiness_event('1', 'task1', 'connected', 100.0, 10.0)]}],
+            [{'events': [_readiness_event('2', 'task2', 'connected', 110.0, 15.0)]}]
+        ]
+
+        monitor = ClientReadinessMonitor('test-log-group', 'us-east-1', start_time=0)
+
+        self.assertTrue(monitor.wait_for_clients(2, 2, timeout_seconds=60, poll_seconds=1))
+        self.assertEqual(mock_sleep.call_count, 1)
+
+    @patch('client_readiness.time.sleep')
+    def test_wait_for_clients_timeout_return_false(self, mock_sleep):
+        self._paginator.paginate.return_value = [{'events': []}]
+
+        monitor = ClientReadinessMonitor('test-log-group', 'us-east-1', start_time=0)
+
+        self.assertFalse(monitor.wait_for_clients(1, 1, timeout_seconds=0, poll_seconds=1))
+
+    def test_get_readiness_report_summary(self):
+        self._paginator.paginate.return_value = [{'events': [
+            _readiness_event('1', 'task1', 'connected', 100.0, 5.0),
+            _readiness_event('2', 'task2', 'connected', 100.0, 9.0),
+            _readiness_event('3', 'task3', 'connected', 100.0, 30.0)
+        ]}]
+        monitor = ClientReadinessMonitor('test-log-group', 'us-east-1', start_time=0)
+        monitor.poll()
+
+        report = get_readiness_report(monitor)
+
+        self.assertEqual(report['connected_count'], 3)
+        self.assertEqual(report['seconds_to_connected'], {'min': 5.0, 'median': 9.0, 'max': 30.0})
+
+
+class TestFormatHistogram(unittest.TestCase):
+
+    def test_format_histogram_empty_bins_included(self):
+        histogram = format_histogram([1.0, 2.0, 11.0], bin_seconds=5, width=10)
+
+        lines = histogram.split('\n')
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].endswith('2 ##########'))
+        self.assertTrue(lines[1].endswith('0 '))
+        self.assertTrue(lines[2].endswith('1 #####'))
+
+    def test_format_histogram_no_values(self):
+        self.assertEqual(format_histogram([]), 'No values')
@@ -0,0 +1,198 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import calendar
+import gzip
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+import boto3
+from moto import mock_aws
+
+from constants import *
+from flow_log_analyzer import BandwidthAccounting, FlowLogAnalyzer, FlowLogEndpoints, format_bandwidth_report, \
+    parse_flow_log, read_flow_log_lines
+
+TEST_REGION = 'us-east-1'
+TEST_ACCOUNT_ID = '123456789012'
+TEST_BUCKET_NAME = 'test-artifacts-bucket'
+TEST_RUN_ID = '20240101T000000Z-abcd1234'
+TEST_SERVER_IP = '10.0.0.4'
+TEST_SERVER_ENI = 'eni-server'
+TEST_HEADER = 'version account-id interface-id srcaddr dstaddr srcport dstport protocol packets bytes start end ' \
+              'action log-status'
+TEST_START = calendar.timegm((2024, 1, 1, 12, 0, 0))
+
+
+def _get_line(interface_id: str, srcaddr: str, dstaddr: str, packets: int, bytes_: int, start: int,
+              action: str = 'ACCEPT', log_status: str = 'OK') -> str:
+    return f'2 {TEST_ACCOUNT_ID} {interface_id} {srcaddr} {dstaddr} 50000 33450 17 {packets} {bytes_} {start} ' \
+           f'{start + 60} {action} {log_status}'
+
+
+def _get_endpoints() -> FlowLogEndpoints:
+    endpoints = FlowLogEndpoints([TEST_SERVER_IP], [TEST_SERVER_ENI])
+    endpoints.add_client('task-a', '10.0.1.10', 'eni-a')
+    endpoints.add_client('task-b', '10.0.1.11', 'eni-b')
+    return endpoints
+
+
+class TestFlowLogAnalyzer(unittest.TestCase):
+
+    def test_parse_flow_log_rejected_and_no_data_records_skipped(self):
+        lines = [TEST_HEADER,
+                 _get_line('eni-a', '10.0.1.10', TEST_SERVER_IP, 10, 1000, TEST_START),
+                 _get_line('eni-a', '10.0.1.10', TEST_SERVER_IP, 10, 1000, TEST_START, action='REJECT'),
+                 f'2 {TEST_ACCOUNT_ID} eni-a - - - - - - - {TEST_START} {TEST_START + 60} - NODATA',
+                 # Files delivered later start with their own header
+                 TEST_HEADER,
+                 _get_line('eni-b', TEST_SERVER_IP, '10.0.1.11', 5, 500, TEST_START)]
+
+        records = list(parse_flow_log(lines))
+
+        self.assertEqual([(record.interface_id, record.packets, record.bytes) for record in records],
+                         [('eni-a', 10, 1000), ('eni-b', 5, 500)])
+
+    def test_parse_flow_log_custom_field_order_fields_read_from_header(self):
+        lines = ['interface-id start srcaddr dstaddr bytes packets action log-status',
+                 f'eni-a {TEST_START} 10.0.1.10 {TEST_SERVER_IP} 1000 10 ACCEPT OK']
+
+        record = next(parse_flow_log(lines))
+
+        self.assertEqual((record.interface_id, record.srcaddr, record.bytes, record.packets, record.start),
+                         ('eni-a', '10.0.1.10', 1000, 10, TEST_START))
+
+    def test_parse_flow_log_required_field_missing_raises_error(self):
+        with self.assertRaises(RuntimeError):
+            list(parse_flow_log(['version interface-id srcaddr dstaddr start action log-status']))
+
+    def test_get_report_flow_seen_on_both_interfaces_counted_once(self):
+        analyzer = FlowLogAnalyzer(_get_endpoints())
+        analyzer.add_lines([
+            TEST_HEADER,
+            _get_line('eni-a', '10.0.1.10', TEST_SERVER_IP, 10, 1000, TEST_START),
+            _get_line(TEST_SERVER_ENI, '10.0.1.10', TEST_SERVER_IP, 10, 1000, TEST_START),
+            _get_line('eni-a', TEST_SERVER_IP, '10.0.1.10', 20, 4000, TEST_START + 5),
+            _get_line('eni-b', '10.0.1.11', TEST_SERVER_IP, 30, 3000, TEST_START + 65),
+            # Traffic with other addresses, e.g. the NAT gateway, isn't counted
+            _get_line('eni-b', '10.0.1.11', '10.0.0.99', 7, 700, TEST_START + 65)])
+
+        report = analyzer.get_report()
+
+        self.assertEqual(report['clients'], {
+            'task-a': {'bytes_to_server': 1000, 'packets_to_server': 10, 'bytes_from_server': 4000,
+                       'packets_from_server': 20},
+            'task-b': {'bytes_to_server': 3000, 'packets_to_server': 30, 'bytes_from_server': 0,
+                       'packets_from_server': 0}})
+        self.assertEqual(report['totals']['bytes_to_server'], 4000)
+        self.assertEqual(report['counted_record_count'], 3)
+        self.assertEqual([(minute['minute'], minute['client_count'], minute['bytes_from_server'])
+                          for minute in report['minutes']],
+                         [('2024-01-01T12:00:00+00:00', 1, 4000), ('2024-01-01T12:01:00+00:00', 1, 0)])
+        self.assertAlmostEqual(report['minutes'][0]['client_bytes_per_second_from_server'], 4000 / 60)
+        self.assertIn('2 clients', format_bandwidth_report(report))
+
+    def test_get_report_client_without_interface_counted_on_server_interface(self):
+        endpoints = FlowLogEndpoints([TEST_SERVER_IP], [TEST_SERVER_ENI])
+        endpoints.add_client('task-a', '10.0.1.10')
+        analyzer = FlowLogAnalyzer(endpoints)
+        analyzer.add_lines([
+            TEST_HEADER,
+            _get_line('eni-unknown', '10.0.1.10', TEST_SERVER_IP, 10, 1000, TEST_START),
+            _get_line(TEST_SERVER_ENI, '10.0.1.10', TEST_SERVER_IP, 10, 1000, TEST_START)])
+
+        report = analyzer.get_report()
+
+        self.assertEqual(report['clients']['task-a']['bytes_to_server'], 1000)
+
+    def test_get_report_records_outside_run_skipped(self):
+        analyzer = FlowLogAnalyzer(_get_endpoints(), TEST_START, TEST_START + 120)
+        analyzer.add_lines([
+            TEST_HEADER,
+            _get_line('eni-a', '10.0.1.10', TEST_SERVER_IP, 1, 100, TEST_START - 60),
+            _get_line('eni-a', '10.0.1.10', TEST_SERVER_IP, 2, 200, TEST_START + 60),
+            _get_line('eni-a', '10.0.1.10', TEST_SERVER_IP, 4, 400, TEST_START + 180)])
+
+        self.assertEqual(analyzer.get_report()['totals']['bytes_to_server'], 200)
+
+    def test_read_flow_log_lines_folder_gzip_files_read(self):
+        with tempfile.TemporaryDirectory() as folder:
+            day_folder = os.path.join(folder, '2024', '01', '01')
+            os.makedirs(day_folder)
+            for index, interface_id in enumerate(['eni-a', 'eni-b']):
+                with gzip.open(os.path.join(day_folder, f'flow_{index}.log.gz'), 'wt') as flow_log_file:
+                    flow_log_file.write(f'{TEST_HEADER}\n'
+                                        f'{_get_line(interface_id, TEST_SERVER_IP, "10.0.1.1", 1, 100, TEST_START)}\n')
+
+            records = list(parse_flow_log(read_flow_log_lines(folder)))
+
+        self.assertEqual([record.interface_id for record in records], ['eni-a', 'eni-b'])
+
+
+class TestBandwidthAccounting(unittest.TestCase):
+
+    def setUp(self):
+        environment = patch.dict(os.environ, {
+            'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing', 'AWS_DEFAULT_REGION': TEST_REGION})
+        environment.start()
+        self.addCleanup(environment.stop)
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+
+        self._s3_client = boto3.client('s3', region_name=TEST_REGION)
+        self._s3_client.create_bucket(Bucket=TEST_BUCKET_NAME)
+        self._accounting = BandwidthAccounting(TEST_BUCKET_NAME, TEST_RUN_ID, TEST_REGION)
+
+    def test_list_flow_log_keys_days_of_run_listed(self):
+        for day in ['2023/12/31', '2024/01/01', '2024/01/02', '2024/01/03']:
+            self._s3_client.put_object(
+                Bucket=TEST_BUCKET_NAME, Body=b'',
+                Key=f'{VPC_FLOW_LOG_KEY_PREFIX}/AWSLogs/{TEST_ACCOUNT_ID}/vpcflowlogs/{TEST_REGION}/{day}/f.log.gz')
+
+        keys = self._accounting.list_flow_log_keys(TEST_ACCOUNT_ID, TEST_START, TEST_START + 86400)
+
+        self.assertEqual([key.split('vpcflowlogs/')[1] for key in keys],
+                         [f'{TEST_REGION}/2024/01/01/f.log.gz', f'{TEST_REGION}/2024/01/02/f.log.gz'])
+
+    def test_read_flow_log_gzip_object_streamed(self):
+        lines = [TEST_HEADER] + [_get_line('eni-a', '10.0.1.10', TEST_SERVER_IP, 1, 100, TEST_START + second)
+                                 for second in range(1000)]
+        self._s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key='flow.log.gz',
+                                   Body=gzip.compress('\n'.join(lines).encode('utf-8')))
+        analyzer = FlowLogAnalyzer(_get_endpoints())
+
+        analyzer.add_lines(self._accounting.read_flow_log('flow.log.gz'))
+
+        self.assertEqual(analyzer.get_report()['clients']['task-a']['bytes_to_server'], 100000)
+
+    def test_save_endpoints_loaded_and_merged(self):
+        self.assertIsNone(self._accounting.load_endpoints())
+        self._accounting.save_endpoints(_get_endpoints())
+        endpoints = FlowLogEndpoints([TEST_SERVER_IP])
+        endpoints.add_client('task-c', '10.0.1.12', 'eni-c')
+
+        endpoints.merge(self._accounting.load_endpoints())
+
+        self.assertEqual(sorted(endpoints.clients), ['task-a', 'task-b', 'task-c'])
+        self.assertEqual(endpoints.server_interface_ids, {TEST_SERVER_ENI})
+
+    def test_update_endpoints_collected_endpoints_saved_with_previous_ones(self):
+        previous_endpoints = FlowLogEndpoints([TEST_SERVER_IP])
+        previous_endpoints.add_client('task-c', '10.0.1.12', 'eni-c')
+        self._accounting.save_endpoints(previous_endpoints)
+        stack_outputs = Mock()
+        stack_outputs.get.side_effect = lambda stack_suffix, output_key: f'{stack_suffix}/{output_key}'
+
+        with patch.object(self._accounting, 'collect_endpoints', return_value=_get_endpoints()) as mock_collect:
+            endpoints = self._accounting.update_endpoints(stack_outputs, [TEST_SERVER_IP], relay_deployed=True)
+
+        mock_collect.assert_called_once_with(
+            [TEST_SERVER_IP], [f'{SERVER_STACK_SUFFIX}/{SERVER_INSTANCE_ID_OUTPUT_KEY}',
+                               f'{SERVER_STACK_SUFFIX}/{RELAY_INSTANCE_ID_OUTPUT_KEY}'],
+            f'{CLIENT_STACK_SUFFIX}/{CLIENT_CLUSTER_NAME_OUTPUT_KEY}',
+            f'{CLIENT_STACK_SUFFIX}/{CLIENT_SERVICE_NAME_OUTPUT_KEY}')
+        self.assertEqual(sorted(endpoints.clients), ['task-a', 'task-b', 'task-c'])
+        self.assertEqual(sorted(self._accounting.load_endpoints().clients), ['task-a', 'task-b', 'task-c'])
@@ -0,0 +1,90 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+import boto3
+from moto import mock_aws
+
+from constants import *
+from image_build_timings import ImageBuildTimings, format_timings, parse_detailed_output
+
+TEST_REGION = 'us-east-1'
+TEST_LOG_BUCKET_NAME = 'test-image-builder-logs'
+
+TEST_DETAILED_OUTPUT = {
+    'executionId': 'test-execution',
+    'status': 'success',
+    'startTime': '2022-08-03T20:00:00.0000000Z',
+    'endTime': '2022-08-03T20:05:30.5000000Z',
+    'documents': [{
+        'name': 'MultiplayerTestScalerDownloadComponent',
+        'status': 'success',
+        'startTime': '2022-08-03T20:00:00.000Z',
+        'endTime': '2022-08-03T20:05:00.000Z',
+        'phases': [{
+            'name': 'build',
+            'status': 'success',
+            'startTime': '2022-08-03T20:00:00.000Z',
+            'endTime': '2022-08-03T20:05:00.000Z',
+            'steps': [
+                {'name': 'DownloadO3DELauncher', 'status': 'success',
+                 'startTime': '2022-08-03T20:00:00.000Z', 'endTime': '2022-08-03T20:01:00.250Z'},
+                {'name': 'UnzipO3DELauncher', 'status': 'failed',
+                 'startTime': '2022-08-03T20:01:00.250Z', 'endTime': ''}
+            ]
+        }]
+    }]
+}
+
+
+class TestParseDetailedOutput(unittest.TestCase):
+
+    def test_parse_detailed_output_component_phase_and_step_timings(self):
+        timings = parse_detailed_output(TEST_DETAILED_OUTPUT)
+
+        self.assertEqual(len(timings), 4)
+        self.assertEqual(timings[0]['seconds'], 300.0)
+        self.assertEqual((timings[1]['phase'], timings[1]['step']), ('build', ''))
+        self.assertEqual((timings[2]['step'], timings[2]['seconds']), ('DownloadO3DELauncher', 60.25))
+        self.assertIsNone(timings[3]['seconds'])
+
+    def test_format_timings_steps_indented(self):
+        lines = format_timings(parse_detailed_output(TEST_DETAILED_OUTPUT)).split('\n')
+
+        self.assertTrue(lines[0].startswith('MultiplayerTestScalerDownloadComponent'))
+        self.assertTrue(lines[2].startswith('        DownloadO3DELauncher'))
+        self.assertIn('60.2s', lines[2])
+        self.assertIn(' - failed', lines[3])
+
+
+class TestImageBuildTimings(unittest.TestCase):
+
+    def setUp(self):
+        environment = patch.dict(os.environ, {
+            'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing', 'AWS_DEFAULT_REGION': TEST_REGION})
+        environment.start()
+        self.addCleanup(environment.stop)
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+
+        self._s3_client = boto3.client('s3', region_name=TEST_REGION)
+        self._s3_client.create_bucket(Bucket=TEST_LOG_BUCKET_NAME)
+
+    def test_collect_detailed_outputs_parsed(self):
+        for run in ['TOE_2022-08-03_20-00-00_1', 'TOE_2022-08-03_21-00-00_2']:
+            self._s3_client.put_object(Bucket=TEST_LOG_BUCKET_NAME,
+                                       Key=f'image/1.0.0/1/{run}/{IMAGE_BUILDER_DETAILED_OUTPUT_FILENAME}',
+                                       Body=json.dumps(TEST_DETAILED_OUTPUT).encode('utf-8'))
+            self._s3_client.put_object(Bucket=TEST_LOG_BUCKET_NAME, Key=f'image/1.0.0/1/{run}/application.log',
+                                       Body=b'log')
+
+        runs = ImageBuildTimings(TEST_LOG_BUCKET_NAME, TEST_REGION).collect(latest=1)
+
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(runs[0]['seconds'], 330.5)
+        self.assertEqual(len(runs[0]['timings']), 4)
@@ -0,0 +1,58 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+
+from constants import *
+from local_simulation import SIMULATION_SCRIPTS_PATH, LocalSimulation, SimulationPipeline, create_stub_project
+from package_builder import PackageBuilder
+
+sys.path.insert(0, SIMULATION_SCRIPTS_PATH)
+import fake_cdk  # noqa: E402
+
+
+class TestLocalSimulation(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+
+    def test_create_stub_project_packaged_by_package_builder(self):
+        config = create_stub_project(self._temp_dir.name)
+
+        PackageBuilder(config, PLATFORM_WINDOWS).process_output()
+
+        package_path = os.path.join(self._temp_dir.name, 'output', PLATFORM_WINDOWS, OUTPUT_PACKAGE_FOLDER_NAME)
+        with zipfile.ZipFile(f'{package_path}.zip') as archive:
+            names = [name.replace('\\', '/') for name in archive.namelist()]
+        self.assertIn(f'{SIMULATION_PROJECT_NAME}.ServerLauncher.exe', names)
+        self.assertNotIn('Gem.Multiplayer.Editor.dll', names)
+
+    def test_parse_args_context_variables_parsed(self):
+        command, context = fake_cdk.parse_args(
+            ['deploy', '-c', 'client_count=4', '--context', 'run_id=run-1', '--require-approval', 'never'])
+
+        self.assertEqual(command, 'deploy')
+        self.assertEqual(context, {'client_count': '4', 'run_id': 'run-1'})
+
+    def test_parse_args_no_command_raises_error(self):
+        with self.assertRaises(RuntimeError):
+            fake_cdk.parse_args([])
+
+    @unittest.skipIf(sys.platform == 'win32', 'The local simulation runs on Linux and macOS only')
+    def test_run_stages_timed_and_artifacts_analyzed(self):
+        work_path = self._temp_dir.name
+        with LocalSimulation(work_path, sync_seconds=0.5) as simulation:
+            config = create_stub_project(work_path)
+            report = SimulationPipeline(simulation, config, work_path).run([1], measure_seconds=0)
+
+        self.assertEqual(report['errors'], [])
+        self.assertEqual([stage['name'] for stage in report['stages']],
+                         ['build', 'deploy', 'scale', 'clear', 'collect', 'analyze'])
+        self.assertTrue(report['run_id'])
+        self.assertGreater(report['artifact_count'], 0)
+        self.assertTrue(report['analysis'])
@@ -0,0 +1,114 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import gzip
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from constants import *
+from log_analyzer import LogAnalyzer, SeriesStatistics, format_analysis, parse_log, read_log_lines
+
+TEST_LOG_LINES = [
+    '<2023-01-01T12:00:00.000Z> (Network) - New incoming connection from remote address: 10.0.0.1:33450',
+    '<2023-01-01T12:00:01.000Z> (Game) - Frame time: 16.5 ms, FPS: 60.6',
+    '<2023-01-01T12:00:02.000Z> (Game) - [Warning] Entity 42 has no transform',
+    'continuation line without timestamp, frame time: 20.0 ms',
+    '<2023-01-01T12:01:05.000Z> (Game) - Tick time: 30.0 ms',
+    '<2023-01-01T12:01:06.000Z> (Network) - Disconnecting connection to 10.0.0.1:33450',
+    '<2023-01-01T12:01:07.000Z> (Game) - Error: failed to spawn player',
+]
+
+
+def _create_log(log_path: str, line_count: int, start_second: int = 0) -> np.ndarray:
+    frame_times = np.random.default_rng(seed=start_second).lognormal(mean=3, sigma=0.5, size=line_count)
+    with open(log_path, 'w') as log_file:
+        for index, frame_time in enumerate(frame_times):
+            seconds = start_second + index
+            log_file.write(f'<{seconds // 3600 % 24:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}.000> '
+                           f'(Game) - Frame time: {frame_time:.6f} ms\n')
+    return np.round(frame_times, 6)
+
+
+class TestLogAnalyzer(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+
+    def test_parse_log_events_and_samples_parsed_with_previous_timestamp(self):
+        records = list(parse_log(TEST_LOG_LINES))
+
+        self.assertEqual([record.kind for record in records], [
+            'connect', 'frame_time_ms', 'fps', 'warning', 'frame_time_ms', 'tick_time_ms', 'disconnect', 'error'])
+        self.assertEqual(records[4].value, 20.0)
+        self.assertEqual(records[4].timestamp, records[3].timestamp)
+
+    def test_parse_log_time_of_day_rolls_over_at_midnight(self):
+        records = list(parse_log(['<23:59:59.000> Frame time: 1 ms', '<00:00:01.000> Frame time: 2 ms']))
+
+        self.assertEqual(records[1].timestamp - records[0].timestamp, 2)
+
+    def test_get_summary_series_fits_buffer_exact_percentiles(self):
+        values = np.random.default_rng(seed=1).lognormal(mean=3, sigma=0.5, size=1000)
+        series = SeriesStatistics(buffer_size=1000)
+        for value in values:
+            series.add(value)
+
+        summary = series.get_summary()
+
+        self.assertEqual(summary['count'], 1000)
+        for percentile in ANALYSIS_PERCENTILES:
+            self.assertAlmostEqual(summary[f'p{percentile}'], np.percentile(values, percentile))
+
+    def test_get_summary_series_exceeds_buffer_percentiles_within_bin_width(self):
+        values = np.random.default_rng(seed=2).lognormal(mean=3, sigma=0.5, size=10000)
+        series = SeriesStatistics(buffer_size=128)
+        for value in values:
+            series.add(value)
+
+        summary = series.get_summary()
+
+        self.assertEqual(summary['count'], 10000)
+        self.assertAlmostEqual(summary['mean'], values.mean())
+        self.assertEqual(summary['max'], values.max())
+        bin_ratio = (ANALYSIS_HISTOGRAM_RANGE[1] / ANALYSIS_HISTOGRAM_RANGE[0]) ** (1 / ANALYSIS_HISTOGRAM_BINS)
+        for percentile in ANALYSIS_PERCENTILES:
+            self.assertLess(abs(summary[f'p{percentile}'] / np.percentile(values, percentile) - 1), bin_ratio - 1)
+
+    def test_get_report_events_counted_in_windows(self):
+        analyzer = LogAnalyzer(window_seconds=60)
+        analyzer.add_records(parse_log(TEST_LOG_LINES))
+
+        report = analyzer.get_report()
+
+        self.assertEqual(report['events'], {'connect': 1, 'disconnect': 1, 'warning': 1, 'error': 1})
+        self.assertEqual(len(report['windows']), 2)
+        self.assertEqual(report['windows'][0]['events'], {'connect': 1, 'warning': 1})
+        self.assertEqual(report['windows'][0]['series']['frame_time_ms']['count'], 2)
+        self.assertEqual(report['windows'][1]['series']['tick_time_ms']['p50'], 30.0)
+        self.assertIn('frame_time_ms', format_analysis(report))
+
+    def test_add_log_gzip_chunks_read_in_order(self):
+        log_path = os.path.join(self._temp_dir.name, 'Game.log')
+        frame_times = _create_log(log_path, 300)
+        with open(log_path, 'rb') as log_file:
+            content = log_file.read()
+        chunk_path = os.path.join(self._temp_dir.name, 'log', 'Game.log')
+        os.makedirs(chunk_path)
+        # Chunks split lines, as the artifact sync uploads byte ranges
+        for offset in range(0, len(content), 1000):
+            with gzip.open(os.path.join(chunk_path, f'20230101T120000000Z-{offset:016d}.gz'), 'wb') as chunk_file:
+                chunk_file.write(content[offset:offset + 1000])
+
+        lines = list(read_log_lines(chunk_path))
+        analyzer = LogAnalyzer(window_seconds=60)
+        analyzer.add_log(chunk_path)
+        report = analyzer.get_report()
+
+        self.assertEqual(len(lines), 300)
+        self.assertEqual(report['series']['frame_time_ms']['count'], 300)
+        self.assertAlmostEqual(report['series']['frame_time_ms']['p99'], np.percentile(frame_times, 99))
+        self.assertEqual(len(report['windows']), 5)
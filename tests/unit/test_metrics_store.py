@@ -0,0 +1,130 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from constants import *
+from metrics_store import MetricsStore, find_metrics_sources, parse_metrics_events
+
+TEST_RUN_ID = '20230101T120000Z-1a2b3c4d'
+TEST_GENERATION = '20230101T120000000Z'
+
+
+def _create_events(count: int, start: int = 0) -> list:
+    return [{'name': 'MultiplayerStats' if index % 2 == 0 else 'FrameTime', 'cat': 'Multiplayer', 'ph': 'C',
+             'ts': index * 1000, 'pid': 1, 'tid': 2,
+             'args': {'BytesSent': index} if index % 2 == 0 else {'FrameTimeMs': 16.0 + index % 4}}
+            for index in range(start, start + count)]
+
+
+def _format_trace(events: list) -> bytes:
+    # Same layout as the Metrics gem output while the server is running, the end of the array isn't written yet
+    return ('{"traceEvents":[\n' + ''.join(f'{json.dumps(event)},\n' for event in events)).encode('utf-8')
+
+
+class TestMetricsStore(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._artifacts_path = os.path.join(self._temp_dir.name, 'artifacts')
+        self._chunk_path = os.path.join(
+            self._artifacts_path, 'runs', TEST_RUN_ID, 'server', 'i-1', 'Metrics', 'Multiplayer', 'metrics.json')
+        os.makedirs(self._chunk_path)
+        self._store = MetricsStore(os.path.join(self._temp_dir.name, 'store'))
+
+    def _write_chunk(self, offset: int, content: bytes) -> None:
+        with gzip.open(os.path.join(self._chunk_path, f'{TEST_GENERATION}-{offset:016d}.gz'), 'wb') as chunk_file:
+            chunk_file.write(content)
+
+    def test_parse_metrics_events_split_blocks_events_with_end_offsets(self):
+        content = _format_trace(_create_events(3)) + b']}'
+        blocks = [content[index:index + 7] for index in range(0, len(content), 7)]
+
+        events = list(parse_metrics_events(blocks))
+
+        self.assertEqual([event['ts'] for event, _ in events], [0, 1000, 2000])
+        self.assertEqual(content[events[0][1] - 1:events[0][1]], b'}')
+        self.assertEqual(events[2][1], content.rindex(b'}', 0, -2) + 1)
+
+    def test_find_metrics_sources_chunk_folder_one_source_per_generation(self):
+        self._write_chunk(0, b'')
+        with gzip.open(os.path.join(self._chunk_path, f'20230101T130000000Z-{0:016d}.gz'), 'wb'):
+            pass
+
+        sources = find_metrics_sources(self._artifacts_path)
+
+        self.assertEqual([source.generation for source in sources], [TEST_GENERATION, '20230101T130000000Z'])
+        self.assertEqual(sources[0].key, 'Metrics/Multiplayer/metrics.json')
+
+    def test_ingest_artifacts_partitioned_by_run_and_shard(self):
+        self._write_chunk(0, _format_trace(_create_events(10)))
+
+        event_count = self._store.ingest_artifacts(self._artifacts_path)
+
+        self.assertEqual(event_count, 10)
+        self.assertEqual(self._store.list_partitions(), [(TEST_RUN_ID, 'server-i-1')])
+        self.assertIn('args.FrameTimeMs', self._store.list_columns())
+
+    def test_ingest_artifacts_new_chunks_only_new_events_ingested(self):
+        content = _format_trace(_create_events(20))
+        # The first sync ends in the middle of an event
+        self._write_chunk(0, content[:1000])
+        first_count = self._store.ingest_artifacts(self._artifacts_path)
+        self._write_chunk(1000, content[1000:])
+
+        second_count = self._store.ingest_artifacts(self._artifacts_path)
+        third_count = self._store.ingest_artifacts(self._artifacts_path)
+
+        self.assertEqual(first_count + second_count, 20)
+        self.assertEqual(third_count, 0)
+        timestamps = np.concatenate([values['ts'] for _, _, values in self._store.scan(['ts'])])
+        np.testing.assert_array_equal(timestamps, np.arange(20) * 1000)
+
+    def test_ingest_artifacts_interrupted_segment_ignored_and_replaced(self):
+        content = _format_trace(_create_events(20))
+        self._write_chunk(0, content[:1000])
+        first_count = self._store.ingest_artifacts(self._artifacts_path)
+        # An ingestion interrupted before the rename leaves a complete temporary segment behind
+        partition_path = os.path.join(self._temp_dir.name, 'store', f'run={TEST_RUN_ID}', 'shard=server-i-1')
+        shutil.copytree(os.path.join(partition_path, '00000000'), os.path.join(partition_path, '.00000001'))
+        self._write_chunk(1000, content[1000:])
+
+        second_count = self._store.ingest_artifacts(self._artifacts_path)
+
+        self.assertEqual(first_count + second_count, 20)
+        self.assertEqual(sorted(os.listdir(partition_path)), ['00000000', '00000001'])
+        timestamps = np.concatenate([values['ts'] for _, _, values in self._store.scan(['ts'])])
+        np.testing.assert_array_equal(timestamps, np.arange(20) * 1000)
+
+    def test_scan_columns_memory_mapped(self):
+        self._write_chunk(0, _format_trace(_create_events(10)))
+        self._store.ingest_artifacts(self._artifacts_path)
+
+        run_id, shard, values = next(self._store.scan(['ts', 'args.BytesSent']))
+
+        self.assertIsInstance(values['ts'], np.memmap)
+        self.assertEqual(len(values['args.BytesSent']), 10)
+
+    def test_aggregate_name_filter_summary_per_run(self):
+        self._write_chunk(0, _format_trace(_create_events(100)))
+        self._store.ingest_artifacts(self._artifacts_path)
+        other_run_file = os.path.join(self._temp_dir.name, 'metrics.json')
+        with open(other_run_file, 'wb') as metrics_file:
+            metrics_file.write(_format_trace(_create_events(10)) + b']}')
+        self._store.ingest_artifacts(other_run_file, 'other-run', 'client-task-1')
+
+        summaries = self._store.aggregate('args.FrameTimeMs', name='FrameTime')
+        shard_summaries = self._store.aggregate('args.BytesSent', run_ids=[TEST_RUN_ID], by_shard=True)
+
+        self.assertEqual(summaries[TEST_RUN_ID]['count'], 50)
+        self.assertEqual(summaries[TEST_RUN_ID]['max'], 19.0)
+        self.assertEqual(summaries['other-run']['count'], 5)
+        self.assertEqual(shard_summaries[f'{TEST_RUN_ID}/server-i-1']['mean'], np.arange(0, 100, 2).mean())
@@ -0,0 +1,120 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+import boto3
+from moto import mock_aws
+
+from constants import *
+from network_probe import NETWORK_PROBE_ECHO_SCRIPT, NetworkProbe, aggregate_probe_results, format_probe_report
+from udp_probe import get_rtt_bin
+
+TEST_REGION = 'us-east-1'
+TEST_BUCKET_NAME = 'test-artifacts-bucket'
+TEST_RUN_ID = '20240101T000000-abcd1234'
+TEST_INSTANCE_ID = 'i-0123456789abcdef0'
+TEST_CLUSTER_NAME = 'test-cluster'
+
+
+def _get_sender_result(steps):
+    return {'sender_id': '0', 'packet_bytes': 200, 'errors': 0, 'steps': [
+        {'step': index, 'rate_pps': rate, 'seconds': 10, 'sent': sent, 'received': received, 'not_sent': 0,
+         'bytes_sent': sent * 200, 'rtt_histogram': {str(get_rtt_bin(1000)): received}}
+        for index, (rate, sent, received) in enumerate(steps)]}
+
+
+class TestNetworkProbe(unittest.TestCase):
+
+    def setUp(self):
+        environment = patch.dict(os.environ, {
+            'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing', 'AWS_DEFAULT_REGION': TEST_REGION})
+        environment.start()
+        self.addCleanup(environment.stop)
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+
+        self._s3_client = boto3.client('s3', region_name=TEST_REGION)
+        self._s3_client.create_bucket(Bucket=TEST_BUCKET_NAME)
+        self._ecs_client = boto3.client('ecs', region_name=TEST_REGION)
+        self._ecs_client.create_cluster(clusterName=TEST_CLUSTER_NAME)
+        task_definition = self._ecs_client.register_task_definition(
+            family='probe',
+            containerDefinitions=[{'name': NETWORK_PROBE_CONTAINER_NAME, 'image': 'python', 'memory': 2048}])
+        self._probe = NetworkProbe(
+            TEST_BUCKET_NAME, TEST_RUN_ID, TEST_INSTANCE_ID, TEST_CLUSTER_NAME, 'test-service',
+            task_definition['taskDefinition']['taskDefinitionArn'], 'MultiplayerSample', TEST_REGION)
+
+    def test_aggregate_probe_results_senders_summed_and_capacity_before_loss(self):
+        results = [_get_sender_result([(1000, 10000, 10000), (5000, 50000, 49900), (10000, 100000, 80000)])] * 2
+
+        report = aggregate_probe_results(results, loss_threshold_percent=1)
+
+        self.assertEqual([step['offered_pps'] for step in report['steps']], [2000, 10000, 20000])
+        self.assertEqual([step['passed'] for step in report['steps']], [True, True, False])
+        self.assertEqual(report['steps'][0]['senders'], 2)
+        self.assertAlmostEqual(report['capacity_pps'], 9980)
+        self.assertEqual(report['limited_by'], 'loss')
+
+    def test_aggregate_probe_results_sender_below_offered_rate_limited_by_sender(self):
+        results = [_get_sender_result([(1000, 10000, 10000), (5000, 30000, 30000)])]
+
+        report = aggregate_probe_results(results, loss_threshold_percent=1)
+
+        self.assertTrue(report['steps'][1]['sender_limited'])
+        self.assertEqual(report['limited_by'], 'sender')
+        self.assertIn('limited by sender', format_probe_report(report))
+
+    def test_aggregate_probe_results_no_result_no_capacity(self):
+        report = aggregate_probe_results([], loss_threshold_percent=1)
+
+        self.assertEqual(report['steps'], [])
+        self.assertEqual(report['capacity_pps'], 0.0)
+
+    def test_echo_script_formatted_without_placeholders(self):
+        script = NETWORK_PROBE_ECHO_SCRIPT.format(port=33450, duration_seconds=300, install_dir=SERVER_INSTALL_DIR,
+                                                  project_name='MultiplayerSample')
+
+        self.assertIn('$port = 33450', script)
+        self.assertIn("$launcher = 'MultiplayerSample.ServerLauncher.exe'", script)
+        self.assertNotIn('{port}', script)
+
+    def test_echo_script_server_restarted_after_any_failure_once_stopped(self):
+        script = NETWORK_PROBE_ECHO_SCRIPT.format(port=33450, duration_seconds=300, install_dir=SERVER_INSTALL_DIR,
+                                                  project_name='MultiplayerSample')
+
+        # The echo loop is compiled before the server is stopped, and everything after the stop is covered by the
+        # finally block which starts the server again
+        self.assertLess(script.index('Add-Type'), script.index('Stop-Process'))
+        stop_index = script.index('\n', script.index('Stop-Process'))
+        try_index = script.index('try {', stop_index)
+        self.assertEqual(script[stop_index:try_index].split(), ['}', '$socket', '=', '$null'])
+        for statement in ['netsh advfirewall firewall add rule', '$socket.Bind(', '[MpScalerUdpEcho]::Run(']:
+            self.assertGreater(script.index(statement), try_index)
+        self.assertLess(script.index('[MpScalerUdpEcho]::Run('), script.index('} finally {'))
+
+    def test_get_sender_results_only_results_of_the_probe_read(self):
+        self._s3_client.put_object(Bucket=TEST_BUCKET_NAME, Key=self._probe._get_result_key(0),
+                                   Body=json.dumps(_get_sender_result([(1000, 10, 10)])))
+        self._s3_client.put_object(
+            Bucket=TEST_BUCKET_NAME, Key=f'{RUN_KEY_PREFIX}/{TEST_RUN_ID}/{NETWORK_PROBE_FOLDER_NAME}/previous/senders/0.json',
+            Body=json.dumps(_get_sender_result([(1000, 10, 10)])))
+
+        results = self._probe.get_sender_results()
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['steps'][0]['sent'], 10)
+
+    def test_wait_for_senders_timed_out_tasks_stopped(self):
+        task_arns = [task['taskArn'] for task in self._ecs_client.run_task(
+            cluster=TEST_CLUSTER_NAME, taskDefinition='probe', launchType='FARGATE')['tasks']]
+
+        errors = self._probe.wait_for_senders(task_arns, timeout_seconds=0, poll_seconds=0)
+
+        self.assertEqual(len(errors), 1)
+        tasks = self._ecs_client.describe_tasks(cluster=TEST_CLUSTER_NAME, tasks=task_arns)['tasks']
+        self.assertEqual([task['desiredStatus'] for task in tasks], ['STOPPED'])
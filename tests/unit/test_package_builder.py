@@ -0,0 +1,71 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import tempfile
+import unittest
+import zipfile
+
+from config import AutoScalerConfig
+from constants import *
+from package_builder import PackageBuilder
+
+TEST_PROJECT_NAME = 'MultiplayerSample'
+TEST_INSTALLER_FILES = ['Gem.Module.dll', 'Gem.Module.Tests.dll', 'Gem.Module.Editor.dll', 'Gem.Module.Builders.dll',
+                        'AssetProcessor.exe', f'{TEST_PROJECT_NAME}.GameLauncher.exe',
+                        f'{TEST_PROJECT_NAME}.ServerLauncher.exe']
+
+
+class TestPackageBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        root_path = self._temp_dir.name
+        project_path = os.path.join(root_path, 'project')
+        self._installer_path = os.path.join(project_path, SCALER_CONFIG_DEFAULT_BUILD_INSTALLER_PATH,
+                                            PLATFORM_WINDOWS, 'profile', 'Default')
+        for path in [os.path.join(self._installer_path, name) for name in TEST_INSTALLER_FILES] + [
+                os.path.join(project_path, 'Cache', WINDOWS_CACHE_SUBFOLDER_NAME, 'levels', 'level.spawnable'),
+                os.path.join(project_path, 'Config', 'default_aws_resource_mappings.json'),
+                os.path.join(root_path, 'engine', 'engine.json')]:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as file:
+                file.write(os.path.basename(path))
+
+        self._config = AutoScalerConfig()
+        self._config.set(SCALER_CONFIG_PROJECT_PATH_KEY, project_path)
+        self._config.set(SCALER_CONFIG_ENGINE_PATH_KEY, os.path.join(root_path, 'engine'))
+        self._config.set(SCALER_CONFIG_PROJECT_NAME_KEY, TEST_PROJECT_NAME)
+        self._config.set(SCALER_CONFIG_BUILD_TYPE_KEY, 'profile')
+        self._config.set(SCALER_CONFIG_OUTPUT_PATH_KEY, os.path.join(root_path, 'output'))
+        self._package_path = os.path.join(root_path, 'output', PLATFORM_WINDOWS, OUTPUT_PACKAGE_FOLDER_NAME)
+
+    def test_process_output_excluded_binaries_left_out_of_archive(self):
+        PackageBuilder(self._config, PLATFORM_WINDOWS).process_output()
+
+        with zipfile.ZipFile(f'{self._package_path}.zip') as archive:
+            names = sorted(name.replace('\\', '/') for name in archive.namelist() if not name.endswith('/'))
+        self.assertEqual(names, [
+            'Cache/pc/levels/level.spawnable', 'Config/default_aws_resource_mappings.json', 'Gem.Module.dll',
+            f'{TEST_PROJECT_NAME}.GameLauncher.exe', f'{TEST_PROJECT_NAME}.ServerLauncher.exe', 'engine.json'])
+
+    def test_process_output_previous_output_replaced(self):
+        builder = PackageBuilder(self._config, PLATFORM_WINDOWS)
+        builder.process_output()
+        os.remove(os.path.join(self._installer_path, 'Gem.Module.dll'))
+
+        builder.process_output()
+
+        self.assertFalse(os.path.exists(os.path.join(self._package_path, 'Gem.Module.dll')))
+        with zipfile.ZipFile(f'{self._package_path}.zip') as archive:
+            self.assertNotIn('Gem.Module.dll', archive.namelist())
+
+    def test_create_project_config_files_relay_profiles_set_clients_connect_to_relay(self):
+        self._config.set(SCALER_CONFIG_RELAY_PROFILES_KEY, [{'name': 'mobile', 'latency_ms': 60}])
+        self._config.set(SCALER_CONFIG_RELAY_PRIVATE_IP_KEY, '10.0.0.7')
+
+        PackageBuilder(self._config, PLATFORM_WINDOWS)._create_project_config_files()
+
+        with open(os.path.join(self._config.get(SCALER_CONFIG_PROJECT_PATH_KEY), CLIENT_CONFIG_FILENAME)) as cfg:
+            self.assertIn('connect 10.0.0.7', cfg.read())
@@ -0,0 +1,150 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from metrics_store import MetricsStore
+from regression_detector import RunComparison, RunPhase, bootstrap_percentile_deltas, \
+    format_regression_markdown, get_regression_metrics, parse_metric_sources, parse_phases
+
+TEST_BASELINE_RUN_ID = '20230101T120000Z-1a2b3c4d'
+TEST_CANDIDATE_RUN_ID = '20230102T120000Z-5e6f7a8b'
+TEST_METRICS = {
+    'tick_time_ms': {'column': 'args.TickTimeMs', 'name': 'Tick', 'role': 'server', 'higher_is_worse': True},
+    'rtt_ms': {'column': 'args.RttMs', 'name': '', 'role': 'client', 'higher_is_worse': True},
+}
+TEST_PHASES = [RunPhase('warmup', 0), RunPhase('steady', 60)]
+
+
+class TestRegressionDetector(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._store = MetricsStore(os.path.join(self._temp_dir.name, 'store'))
+
+    def _ingest_run(self, run_id: str, start_ts: float, steady_tick_time_ms: float, seed: int) -> None:
+        rng = np.random.default_rng(seed)
+        artifacts_path = os.path.join(self._temp_dir.name, run_id)
+        server_events = []
+        for index in range(600):
+            tick_time = (40 if index < 60 else steady_tick_time_ms) + rng.normal(0, 1)
+            server_events.append({'name': 'Tick', 'ph': 'C', 'ts': start_ts + index * 1e6,
+                                  'args': {'TickTimeMs': tick_time}})
+        client_events = [{'name': 'Network', 'ph': 'C', 'ts': start_ts + index * 1e6,
+                          'args': {'RttMs': 50 + rng.normal(0, 5)}} for index in range(600)]
+        for role, host, events in [('server', 'i-1', server_events), ('client', 'task-1', client_events)]:
+            metrics_path = os.path.join(artifacts_path, 'runs', run_id, role, host, 'Metrics', 'metrics.json')
+            os.makedirs(os.path.dirname(metrics_path))
+            with open(metrics_path, 'w') as metrics_file:
+                json.dump({'traceEvents': events}, metrics_file)
+        self._store.ingest_artifacts(artifacts_path)
+
+    def _get_result(self, report: dict, metric: str, phase: str, percentile: float) -> dict:
+        return next(comparison for comparison in report['comparisons']
+                    if comparison['metric'] == metric and comparison['phase'] == phase and
+                    comparison.get('percentile') == percentile)
+
+    def test_parse_phases_sorted_by_start(self):
+        phases = parse_phases(['steady:120', 'warmup:0'])
+
+        self.assertEqual(phases, [RunPhase('warmup', 0), RunPhase('steady', 120)])
+        with self.assertRaises(RuntimeError):
+            parse_phases(['steady'])
+        with self.assertRaises(RuntimeError):
+            parse_phases(['steady:0', 'steady:60'])
+
+    def test_parse_metric_sources_role_and_event_optional(self):
+        sources = parse_metric_sources(['tick_time_ms=server:ServerTickMs@Tick', 'rtt_ms=args.Rtt'])
+
+        self.assertEqual(sources, {'tick_time_ms': {'column': 'ServerTickMs', 'name': 'Tick', 'role': 'server'},
+                                   'rtt_ms': {'column': 'args.Rtt', 'name': ''}})
+        with self.assertRaises(RuntimeError):
+            parse_metric_sources(['tick_time_ms'])
+        with self.assertRaises(RuntimeError):
+            parse_metric_sources(['tick_time_ms=relay:args.TickTimeMs'])
+
+    def test_get_regression_metrics_overrides_merged_in_order(self):
+        metrics = get_regression_metrics(
+            {'frame_time_ms': {'column': 'args.FrameTimeMs', 'role': 'client', 'higher_is_worse': False},
+             'rtt_ms': {'column': 'args.PingMs'}},
+            {'rtt_ms': {'column': 'args.Rtt', 'name': 'Network'}})
+
+        self.assertEqual(metrics['frame_time_ms'], {'column': 'args.FrameTimeMs', 'name': '', 'role': 'client',
+                                                    'higher_is_worse': False})
+        self.assertEqual(metrics['rtt_ms'], {'column': 'args.Rtt', 'name': 'Network', 'role': 'client',
+                                             'higher_is_worse': True})
+        self.assertEqual(metrics['tick_time_ms']['column'], 'args.TickTimeMs')
+        with self.assertRaises(RuntimeError):
+            get_regression_metrics({'frame_time_ms': {'column': 'args.FrameTimeMs'}})
+        with self.assertRaises(RuntimeError):
+            get_regression_metrics({'rtt_ms': {'columns': 'args.Rtt'}})
+
+    def test_bootstrap_percentile_deltas_shifted_samples_interval_covers_shift(self):
+        rng = np.random.default_rng(1)
+        baseline = rng.normal(100, 5, 2000)
+        candidate = rng.normal(110, 5, 2000)
+
+        deltas = bootstrap_percentile_deltas(baseline, candidate, [50, 95], resamples=200)
+
+        for delta in deltas:
+            self.assertLess(delta['interval'][0], delta['delta_percent'])
+            self.assertGreater(delta['interval'][1], delta['delta_percent'])
+            self.assertGreater(delta['interval'][0], 5)
+            self.assertLess(delta['interval'][1], 15)
+
+    def test_compare_steady_tick_time_regression_fail(self):
+        self._ingest_run(TEST_BASELINE_RUN_ID, 1e12, 20, seed=1)
+        self._ingest_run(TEST_CANDIDATE_RUN_ID, 5e12, 24, seed=2)
+        comparison = RunComparison(self._store, TEST_PHASES, TEST_METRICS, percentiles=[50, 95], resamples=200)
+
+        report = comparison.compare(TEST_BASELINE_RUN_ID, [TEST_CANDIDATE_RUN_ID], threshold_percent=5)
+
+        self.assertEqual(report['verdict'], 'fail')
+        steady = self._get_result(report, 'tick_time_ms', 'steady', 50)
+        self.assertEqual(steady['status'], 'regression')
+        self.assertEqual(steady['baseline_samples'], 540)
+        self.assertAlmostEqual(steady['delta_percent'], 20, delta=2)
+        self.assertEqual(self._get_result(report, 'tick_time_ms', 'warmup', 50)['status'], 'pass')
+        self.assertEqual(self._get_result(report, 'rtt_ms', 'steady', 95)['status'], 'pass')
+        self.assertIn('| tick_time_ms | steady | p50 |', format_regression_markdown(report))
+
+    def test_compare_same_behaviour_pass(self):
+        self._ingest_run(TEST_BASELINE_RUN_ID, 1e12, 20, seed=1)
+        self._ingest_run(TEST_CANDIDATE_RUN_ID, 5e12, 20, seed=2)
+        comparison = RunComparison(self._store, TEST_PHASES, TEST_METRICS, resamples=200)
+
+        report = comparison.compare(TEST_BASELINE_RUN_ID, [TEST_CANDIDATE_RUN_ID])
+
+        self.assertEqual(report['verdict'], 'pass')
+        self.assertEqual(report['regression_count'], 0)
+        self.assertTrue(report['comparisons'])
+
+    def test_compare_missing_metric_insufficient_not_failed(self):
+        self._ingest_run(TEST_BASELINE_RUN_ID, 1e12, 20, seed=1)
+        self._ingest_run(TEST_CANDIDATE_RUN_ID, 5e12, 20, seed=2)
+        metrics = {**TEST_METRICS, 'cpu_percent': {'column': 'args.CpuPercent', 'name': '', 'role': 'server',
+                                                   'higher_is_worse': True}}
+        comparison = RunComparison(self._store, [RunPhase('steady', 0)], metrics, resamples=100)
+
+        report = comparison.compare(TEST_BASELINE_RUN_ID, [TEST_CANDIDATE_RUN_ID])
+
+        self.assertEqual(report['verdict'], 'pass')
+        self.assertFalse([item for item in report['comparisons'] if item['metric'] == 'cpu_percent'])
+
+    def test_compare_no_metric_compared_inconclusive(self):
+        self._ingest_run(TEST_BASELINE_RUN_ID, 1e12, 20, seed=1)
+        self._ingest_run(TEST_CANDIDATE_RUN_ID, 5e12, 20, seed=2)
+        metrics = {'cpu_percent': {'column': 'args.CpuPercent', 'name': '', 'role': 'server', 'higher_is_worse': True}}
+        comparison = RunComparison(self._store, TEST_PHASES, metrics, resamples=100)
+
+        report = comparison.compare(TEST_BASELINE_RUN_ID, [TEST_CANDIDATE_RUN_ID])
+
+        self.assertEqual(report['verdict'], 'inconclusive')
+        self.assertEqual(report['regression_count'], 0)
+        self.assertIn('## Run comparison: INCONCLUSIVE', format_regression_markdown(report))
@@ -0,0 +1,104 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import boto3
+from moto import mock_aws
+
+from constants import *
+from run_catalog import RunCatalog, RunCatalogStore, get_run_catalog_key, new_run_id
+
+TEST_REGION = 'us-east-1'
+TEST_BUCKET_NAME = 'test-artifacts-bucket'
+TEST_PROJECT_NAME = 'MultiplayerSample'
+TEST_CONFIG = {'client_count': 5, 'server_instance_type': 'c5.2xlarge'}
+
+
+class TestRunCatalog(unittest.TestCase):
+
+    def setUp(self):
+        catalog_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(catalog_dir.cleanup)
+        self._catalog = RunCatalog(os.path.join(catalog_dir.name, 'run_catalog.db'))
+
+    def test_new_run_id_ids_sort_by_start_time(self):
+        run_id = new_run_id()
+
+        self.assertRegex(run_id, r'^\d{8}T\d{6}Z-[0-9a-f]{8}$')
+        self.assertNotEqual(run_id, new_run_id())
+
+    def test_start_run_run_recorded_as_active(self):
+        run = self._catalog.start_run('20230101T120000Z-00000001', TEST_PROJECT_NAME, 5, 'hash', TEST_CONFIG)
+
+        self.assertEqual(run['client_count'], 5)
+        self.assertEqual(run['package_hash'], 'hash')
+        self.assertEqual(run['config'], TEST_CONFIG)
+        self.assertEqual(self._catalog.get_active(TEST_PROJECT_NAME), run)
+
+    def test_start_run_connections_closed(self):
+        connections = []
+        sqlite_connect = sqlite3.connect
+
+        def connect(*args):
+            connections.append(sqlite_connect(*args))
+            return connections[-1]
+
+        with patch('run_catalog.sqlite3.connect', side_effect=connect):
+            self._catalog.start_run('20230101T120000Z-00000001', TEST_PROJECT_NAME, 5, 'hash', TEST_CONFIG)
+            self._catalog.end_run('20230101T120000Z-00000001')
+
+        self.assertTrue(connections)
+        for connection in connections:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                connection.execute('SELECT 1')
+
+    def test_get_active_latest_run_not_ended_returned(self):
+        self._catalog.start_run('20230101T120000Z-00000001', TEST_PROJECT_NAME, 5, 'hash', TEST_CONFIG)
+        self._catalog.start_run('20230101T130000Z-00000002', TEST_PROJECT_NAME, 5, 'hash', TEST_CONFIG)
+        self._catalog.start_run('20230101T140000Z-00000003', 'OtherProject', 5, 'hash', TEST_CONFIG)
+        self._catalog.end_run('20230101T130000Z-00000002')
+
+        self.assertEqual(self._catalog.get_active(TEST_PROJECT_NAME)['run_id'], '20230101T120000Z-00000001')
+        self.assertEqual([run['run_id'] for run in self._catalog.list_runs(TEST_PROJECT_NAME)],
+                         ['20230101T120000Z-00000001', '20230101T130000Z-00000002'])
+
+    def test_get_unknown_run_empty_record_returned(self):
+        self.assertEqual(self._catalog.get('unknown'), {})
+
+
+class TestRunCatalogStore(unittest.TestCase):
+
+    def setUp(self):
+        environment = patch.dict(os.environ, {
+            'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing', 'AWS_DEFAULT_REGION': TEST_REGION})
+        environment.start()
+        self.addCleanup(environment.stop)
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        boto3.client('s3', region_name=TEST_REGION).create_bucket(Bucket=TEST_BUCKET_NAME)
+
+    def test_put_catalog_object_keyed_under_run_prefix(self):
+        record = {'run_id': '20230101T120000Z-00000001', 'project_name': TEST_PROJECT_NAME, 'config': TEST_CONFIG}
+
+        key = RunCatalogStore(TEST_BUCKET_NAME, TEST_REGION).put(record)
+
+        self.assertEqual(key, f'{RUN_KEY_PREFIX}/20230101T120000Z-00000001/{RUN_CATALOG_OBJECT_NAME}')
+        self.assertEqual(RunCatalogStore(TEST_BUCKET_NAME, TEST_REGION).get(record['run_id']), record)
+
+    def test_get_run_copied_to_export_bucket_read_with_key_prefix(self):
+        record = {'run_id': '20230101T120000Z-00000001', 'project_name': TEST_PROJECT_NAME}
+        RunCatalogStore(TEST_BUCKET_NAME, TEST_REGION, EXPORT_KEY_PREFIX).put(record)
+
+        store = RunCatalogStore(TEST_BUCKET_NAME, TEST_REGION, EXPORT_KEY_PREFIX)
+        with patch.object(store._s3_client, 'get_object', wraps=store._s3_client.get_object) as mock_get_object:
+            self.assertEqual(store.get(record['run_id']), record)
+
+        mock_get_object.assert_called_once_with(
+            Bucket=TEST_BUCKET_NAME, Key=f'{EXPORT_KEY_PREFIX}{get_run_catalog_key(record["run_id"])}')
+        self.assertEqual(store.get('unknown'), {})
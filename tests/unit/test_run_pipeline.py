@@ -0,0 +1,194 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import call, patch
+
+from cdk_manager import CdkManager
+from config import AutoScalerConfig
+from constants import *
+from run_pipeline import RunPipeline, format_run_report, get_namespaced_path
+
+TEST_RUN_ID = '20230101T120000Z-1a2b3c4d'
+# The run stacks are cleared, the common stack is kept until the artifacts are collected
+TEST_CLEAR_CALLS = [call(CLIENT_TARGET, PLATFORM_WINDOWS, exclusively=True),
+                    call(SERVER_TARGET, PLATFORM_WINDOWS, exclusively=True)]
+TEST_STAGES = ['build', 'common', 'server', 'client-image', 'clients', 'wait-clients', 'hold', 'clear', 'collect',
+               'clear-common']
+
+
+class TestRunPipeline(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self._state_path = os.path.join(temp_dir.name, 'run_state.json')
+        self._config = AutoScalerConfig()
+        for key, value in {SCALER_CONFIG_PROJECT_NAME_KEY: 'MultiplayerSample', SCALER_CONFIG_AWS_REGION_KEY: 'us-east-1',
+                           SCALER_CONFIG_CLIENT_COUNT_KEY: 4}.items():
+            self._config.set(key, value)
+
+        for target in ['CdkManager', 'PackageBuilder', 'StackOutputs', 'ClientReadinessMonitor', 'RunCatalog']:
+            patcher = patch(f'run_pipeline.{target}')
+            setattr(self, f'_mock_{target}', patcher.start())
+            self.addCleanup(patcher.stop)
+        self._cdk_manager = self._mock_CdkManager.return_value
+        self._cdk_manager.has_metrics_project.return_value = False
+        self._mock_ClientReadinessMonitor.return_value.wait_for_clients.return_value = True
+        self._mock_ClientReadinessMonitor.return_value.get_times_to_connected.return_value = [10.0, 12.0]
+        self._mock_RunCatalog.return_value.get_active.return_value = {'run_id': TEST_RUN_ID}
+
+    def test_run_stages_run_in_order_and_recorded(self):
+        pipeline = RunPipeline(self._config, PLATFORM_WINDOWS, self._state_path, hold_minutes=0)
+
+        pipeline.run()
+
+        report = pipeline.get_report()
+        self.assertEqual(report['run_id'], TEST_RUN_ID)
+        self.assertEqual([stage['name'] for stage in report['stages']], TEST_STAGES)
+        self.assertTrue(all(stage['status'] == RUN_STAGE_COMPLETED for stage in report['stages']))
+        self.assertEqual([call.args[0] for call in self._cdk_manager.deploy_aws_resources.call_args_list],
+                         [COMMON_TARGET, SERVER_TARGET, CLIENT_TARGET])
+        self._cdk_manager.deploy_aws_resources.assert_any_call(SERVER_TARGET, PLATFORM_WINDOWS, exclusively=True)
+        self._cdk_manager.deploy_client_image.assert_called_once_with(PLATFORM_WINDOWS,
+                                                                      RUN_CLIENT_IMAGE_CDK_OUTPUT_FOLDER)
+        self.assertEqual(self._cdk_manager.destroy_aws_resources.call_args_list, TEST_CLEAR_CALLS)
+        self._mock_ClientReadinessMonitor.return_value.wait_for_clients.assert_called_once_with(4, 4, 900)
+        # The bootstrap runs once
+        self._mock_CdkManager.assert_called_once_with(self._config)
+        with open(self._state_path) as state_file:
+            state = json.load(state_file)
+        self.assertEqual(state['run_id'], TEST_RUN_ID)
+        self.assertEqual((state['stages']['hold']['status'], state['stages']['hold']['attempts']),
+                         (RUN_STAGE_COMPLETED, 1))
+        self.assertIn('wall clock', format_run_report(report))
+
+    def test_run_client_image_deployed_while_server_deploys(self):
+        client_image_started = threading.Event()
+
+        def deploy(target, platform, exclusively=False):
+            if target == SERVER_TARGET:
+                # Fails unless the client image deployment starts before the server deployment ends
+                self.assertTrue(client_image_started.wait(5))
+
+        self._cdk_manager.deploy_aws_resources.side_effect = deploy
+        self._cdk_manager.deploy_client_image.side_effect = lambda platform, output_path: client_image_started.set()
+
+        RunPipeline(self._config, PLATFORM_WINDOWS, self._state_path, hold_minutes=0).run()
+
+        self.assertEqual(self._cdk_manager.destroy_aws_resources.call_args_list, TEST_CLEAR_CALLS)
+
+    @patch('run_pipeline.ArtifactBundle')
+    def test_run_common_stack_cleared_after_artifacts_collected(self, mock_bundle):
+        def destroy(target, platform, exclusively=False):
+            # The upload Lambda function and the artifacts bucket are kept until the bundle is extracted
+            self.assertEqual(mock_bundle.return_value.extract.called, target == ALL_TARGET)
+
+        self._cdk_manager.destroy_aws_resources.side_effect = destroy
+        pipeline = RunPipeline(self._config, PLATFORM_WINDOWS, self._state_path, hold_minutes=0,
+                               export_bucket_name='export-bucket')
+
+        pipeline.run()
+
+        self.assertEqual(self._cdk_manager.destroy_aws_resources.call_args_list,
+                         TEST_CLEAR_CALLS + [call(ALL_TARGET, PLATFORM_WINDOWS)])
+        self.assertTrue(all(stage['status'] == RUN_STAGE_COMPLETED for stage in pipeline.get_report()['stages']))
+
+    @patch('run_pipeline.ArtifactBundle')
+    def test_run_namespace_specified_state_and_artifacts_namespaced(self, mock_bundle):
+        self._config.set(SCALER_CONFIG_NAMESPACE_KEY, 'exp1')
+        work_path = os.path.dirname(self._state_path)
+        current_path = os.getcwd()
+        os.chdir(work_path)
+        self.addCleanup(os.chdir, current_path)
+
+        RunPipeline(self._config, PLATFORM_WINDOWS, hold_minutes=0, export_bucket_name='export-bucket').run()
+
+        self.assertTrue(os.path.isfile(os.path.join(work_path, 'run_state.exp1.json')))
+        self.assertFalse(os.path.exists(os.path.join(work_path, DEFAULT_RUN_STATE_PATH)))
+        mock_bundle.return_value.extract.assert_called_once_with('artifacts.exp1')
+        self.assertEqual(get_namespaced_path(DEFAULT_RUN_STATE_PATH, ''), DEFAULT_RUN_STATE_PATH)
+
+    @patch('cdk_manager.boto3')
+    @patch('cdk_manager.StackOutputs')
+    @patch('cdk_manager.RunCatalogStore')
+    @patch('cdk_manager.ProcessRunner')
+    def test_run_concurrent_stages_deploy_own_stacks(self, mock_runner, mock_store, mock_outputs, mock_boto3):
+        mock_boto3.client.return_value.describe_images.return_value = {'Images': []}
+        self._config.set(SCALER_CONFIG_AWS_ACCOUNT_ID_KEY, '123456789012')
+        self._config.set(SCALER_CONFIG_RUN_CATALOG_PATH_KEY, os.path.join(os.path.dirname(self._state_path),
+                                                                          'run_catalog.db'))
+        self._mock_CdkManager.side_effect = CdkManager
+
+        RunPipeline(self._config, PLATFORM_WINDOWS, self._state_path, hold_minutes=0).run()
+
+        server_args, = [call.args[1] for call in mock_runner.call_args_list
+                        if call.args[0] == 'Deploy CDK application' and f'target={SERVER_TARGET}' in call.args[1]]
+        client_image_args, = [call.args[1] for call in mock_runner.call_args_list
+                              if call.args[0] == 'Deploy client image']
+        # Neither deployment updates the common stack, which the other one imports from
+        self.assertNotIn('--all', server_args + client_image_args)
+        self.assertEqual(server_args[-2:], ['MultiplayerSample-ServerStack', '--exclusively'])
+        self.assertEqual(client_image_args[-4:], ['MultiplayerSample-ClientStack', '--exclusively',
+                                                  '--output', RUN_CLIENT_IMAGE_CDK_OUTPUT_FOLDER])
+        self.assertIn('client_count=0', client_image_args)
+        self.assertNotIn('--output', server_args)
+
+    def test_run_failed_stage_resumed_on_rerun(self):
+        self._mock_ClientReadinessMonitor.return_value.wait_for_clients.return_value = False
+        pipeline = RunPipeline(self._config, PLATFORM_WINDOWS, self._state_path, hold_minutes=0)
+
+        with self.assertRaises(RuntimeError):
+            pipeline.run()
+
+        statuses = {stage['name']: stage['status'] for stage in pipeline.get_report()['stages']}
+        self.assertEqual(statuses['clients'], RUN_STAGE_COMPLETED)
+        self.assertEqual(statuses['wait-clients'], RUN_STAGE_FAILED)
+        self.assertEqual(statuses['hold'], 'pending')
+        self._cdk_manager.destroy_aws_resources.assert_not_called()
+
+        self._mock_ClientReadinessMonitor.return_value.wait_for_clients.return_value = True
+        self._cdk_manager.reset_mock()
+        self._mock_PackageBuilder.reset_mock()
+        pipeline = RunPipeline(self._config, PLATFORM_WINDOWS, self._state_path, hold_minutes=0)
+        pipeline.run()
+
+        self._mock_PackageBuilder.assert_not_called()
+        self._cdk_manager.deploy_aws_resources.assert_not_called()
+        self.assertEqual(self._cdk_manager.destroy_aws_resources.call_args_list, TEST_CLEAR_CALLS)
+        stages = {stage['name']: stage for stage in pipeline.get_report()['stages']}
+        self.assertEqual(stages['server']['status'], RUN_STAGE_SKIPPED)
+        self.assertEqual(stages['wait-clients']['status'], RUN_STAGE_COMPLETED)
+        self.assertEqual(stages['wait-clients']['attempts'], 2)
+        self.assertEqual(pipeline.get_report()['run_id'], TEST_RUN_ID)
+
+    def test_run_failed_stage_of_group_other_stage_recorded(self):
+        self._cdk_manager.deploy_client_image.side_effect = RuntimeError('Docker build failed')
+        pipeline = RunPipeline(self._config, PLATFORM_WINDOWS, self._state_path, hold_minutes=0)
+
+        with self.assertRaises(RuntimeError):
+            pipeline.run()
+
+        statuses = {stage['name']: stage['status'] for stage in pipeline.get_report()['stages']}
+        self.assertEqual(statuses['server'], RUN_STAGE_COMPLETED)
+        self.assertEqual(statuses['client-image'], RUN_STAGE_FAILED)
+        self.assertEqual(statuses['clients'], 'pending')
+
+    def test_run_restart_all_stages_run_again(self):
+        RunPipeline(self._config, PLATFORM_WINDOWS, self._state_path, hold_minutes=0).run()
+
+        RunPipeline(self._config, PLATFORM_WINDOWS, self._state_path, hold_minutes=0).run(restart=True)
+
+        self.assertEqual(self._mock_PackageBuilder.call_count, 2)
+        self.assertEqual(self._cdk_manager.destroy_aws_resources.call_count, 2 * len(TEST_CLEAR_CALLS))
+
+    def test_run_state_of_other_project_raises_error(self):
+        RunPipeline(self._config, PLATFORM_WINDOWS, self._state_path, hold_minutes=0).run()
+        self._config.set(SCALER_CONFIG_PROJECT_NAME_KEY, 'OtherProject')
+
+        with self.assertRaises(RuntimeError):
+            RunPipeline(self._config, PLATFORM_WINDOWS, self._state_path, hold_minutes=0).run()
@@ -0,0 +1,118 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import boto3
+from moto import mock_aws
+
+from constants import *
+from server_updater import ServerUpdater, get_package_manifest
+
+TEST_REGION = 'us-east-1'
+TEST_BUCKET_NAME = 'test-artifacts-bucket'
+TEST_INSTANCE_ID = 'i-0123456789abcdef0'
+TEST_PROJECT_NAME = 'MultiplayerSample'
+
+
+class TestServerUpdater(unittest.TestCase):
+
+    def setUp(self):
+        environment = patch.dict(os.environ, {
+            'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing', 'AWS_DEFAULT_REGION': TEST_REGION})
+        environment.start()
+        self.addCleanup(environment.stop)
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+
+        self._s3_client = boto3.client('s3', region_name=TEST_REGION)
+        self._s3_client.create_bucket(Bucket=TEST_BUCKET_NAME)
+        package_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(package_dir.cleanup)
+        self._package_path = package_dir.name
+        self._write_package_file('MultiplayerSample.ServerLauncher.exe', b'server')
+        self._write_package_file('Cache/pc/level.spawnable', b'level')
+
+        self._updater = ServerUpdater(TEST_BUCKET_NAME, TEST_INSTANCE_ID, TEST_PROJECT_NAME, TEST_REGION)
+
+    def test_get_package_manifest_relative_paths_with_forward_slashes(self):
+        manifest = get_package_manifest(self._package_path)
+
+        self.assertEqual(sorted(manifest), ['Cache/pc/level.spawnable', 'MultiplayerSample.ServerLauncher.exe'])
+        self.assertEqual(manifest['Cache/pc/level.spawnable']['size'], 5)
+
+    def test_upload_no_previous_update_full_package_uploaded(self):
+        update = self._updater.upload(self._package_path)
+
+        self.assertEqual(update['changed'], ['Cache/pc/level.spawnable', 'MultiplayerSample.ServerLauncher.exe'])
+        self.assertEqual(update['deleted'], [])
+        self.assertEqual(update['uploaded_bytes'], 11)
+        self.assertEqual(len(self._list_keys(f'{SERVER_UPDATE_KEY_PREFIX}/{update["update_id"]}/files/')), 2)
+
+    @patch('server_updater.time.sleep')
+    def test_upload_after_applied_update_only_changes_uploaded(self, mock_sleep):
+        self.assertTrue(self._updater.apply(self._updater.upload(self._package_path), poll_seconds=0))
+        self._write_package_file('MultiplayerSample.ServerLauncher.exe', b'new server')
+        os.remove(os.path.join(self._package_path, 'Cache', 'pc', 'level.spawnable'))
+
+        update = self._updater.upload(self._package_path)
+
+        self.assertEqual(update['changed'], ['MultiplayerSample.ServerLauncher.exe'])
+        self.assertEqual(update['deleted'], ['Cache/pc/level.spawnable'])
+        self.assertEqual(self._list_keys(f'{SERVER_UPDATE_KEY_PREFIX}/{update["update_id"]}/files/'),
+                         [f'{SERVER_UPDATE_KEY_PREFIX}/{update["update_id"]}/files/MultiplayerSample.ServerLauncher.exe'])
+        update_object = self._s3_client.get_object(
+            Bucket=TEST_BUCKET_NAME, Key=f'{SERVER_UPDATE_KEY_PREFIX}/{update["update_id"]}/update.json')
+        self.assertEqual(json.loads(update_object['Body'].read())['deleted'], ['Cache/pc/level.spawnable'])
+
+    @patch('server_updater.time.sleep')
+    def test_upload_after_update_of_other_instance_full_package_uploaded(self, mock_sleep):
+        self.assertTrue(self._updater.apply(self._updater.upload(self._package_path), poll_seconds=0))
+        redeployed_updater = ServerUpdater(TEST_BUCKET_NAME, 'i-0fedcba9876543210', TEST_PROJECT_NAME, TEST_REGION)
+
+        update = redeployed_updater.upload(self._package_path)
+
+        self.assertEqual(redeployed_updater.get_server_manifest(), {})
+        self.assertEqual(update['changed'], ['Cache/pc/level.spawnable', 'MultiplayerSample.ServerLauncher.exe'])
+
+    @patch('server_updater.time.sleep')
+    def test_apply_command_succeeded_server_manifest_saved(self, mock_sleep):
+        update = self._updater.upload(self._package_path)
+
+        with patch.object(self._updater._ssm_client, 'send_command',
+                          wraps=self._updater._ssm_client.send_command) as mock_send_command:
+            self.assertTrue(self._updater.apply(update, poll_seconds=0))
+
+        self.assertEqual(self._updater.get_server_manifest(), update['manifest'])
+        commands = '\n'.join(mock_send_command.call_args.kwargs['Parameters']['commands'])
+        self.assertIn(f"$updatePrefix = '{SERVER_UPDATE_KEY_PREFIX}/{update['update_id']}'", commands)
+        self.assertIn(f"$launcher = '{TEST_PROJECT_NAME}.ServerLauncher.exe'", commands)
+
+    @patch('server_updater.time.sleep')
+    def test_apply_command_failed_server_manifest_not_saved(self, mock_sleep):
+        update = self._updater.upload(self._package_path)
+
+        with patch.object(self._updater._ssm_client, 'get_command_invocation',
+                          return_value={'Status': 'Failed', 'StandardErrorContent': 'Access denied'}):
+            self.assertFalse(self._updater.apply(update, poll_seconds=0))
+
+        self.assertEqual(self._updater.get_server_manifest(), {})
+
+    def test_upload_package_not_found_raise_runtime_error(self):
+        with self.assertRaises(RuntimeError):
+            self._updater.upload(os.path.join(self._package_path, 'missing'))
+
+    def _write_package_file(self, relative_path: str, content: bytes) -> None:
+        file_path = os.path.join(self._package_path, *relative_path.split('/'))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as package_file:
+            package_file.write(content)
+
+    def _list_keys(self, prefix: str) -> list:
+        response = self._s3_client.list_objects_v2(Bucket=TEST_BUCKET_NAME, Prefix=prefix)
+        return sorted(obj['Key'] for obj in response.get('Contents', []))
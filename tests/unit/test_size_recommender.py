@@ -0,0 +1,110 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+
+from config import AutoScalerConfig
+from constants import *
+from size_recommender import SizeRecommender
+
+
+class TestSizeRecommender(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._history_file = os.path.join(self._temp_dir.name, UTILIZATION_HISTORY_FILENAME)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_recommend_no_history_returns_none(self):
+        recommender = SizeRecommender(self._history_file)
+
+        self.assertIsNone(recommender.recommend_client())
+        self.assertIsNone(recommender.recommend_server())
+
+    def test_recommend_client_low_utilization_downsizes_memory(self):
+        # 1 vCPU at up to 50% and 8 GiB at up to 25% uses 512 CPU units and 2 GiB
+        self._write_history([{
+            'role': 'client', 'cpu_units': 1024, 'memory_mib': 8192,
+            'cpu_utilization': [30.0, 40.0, 50.0], 'memory_utilization': [20.0, 25.0, 25.0]
+        }])
+
+        recommendation = SizeRecommender(self._history_file, headroom_percent=30).recommend_client()
+
+        self.assertEqual(recommendation[SCALER_CONFIG_CLIENT_TASK_CPU_UNITS_KEY], 1024)
+        self.assertEqual(recommendation[SCALER_CONFIG_CLIENT_TASK_MEMORY_MIB_KEY], 3072)
+
+    def test_recommend_client_saturated_cpu_upsizes_cpu(self):
+        self._write_history([{
+            'role': 'client', 'cpu_units': 1024, 'memory_mib': 8192,
+            'cpu_utilization': [95.0, 100.0], 'memory_utilization': [40.0]
+        }])
+
+        recommendation = SizeRecommender(self._history_file, headroom_percent=30).recommend_client()
+
+        self.assertEqual(recommendation[SCALER_CONFIG_CLIENT_TASK_CPU_UNITS_KEY], 2048)
+        self.assertEqual(recommendation[SCALER_CONFIG_CLIENT_TASK_MEMORY_MIB_KEY], 5120)
+
+    def test_recommend_server_without_memory_keeps_memory(self):
+        self._write_history([{
+            'role': 'server', 'instance_type': 'c5.2xlarge',
+            'cpu_utilization': [10.0, 20.0, 20.0], 'memory_utilization': []
+        }])
+
+        recommendation = SizeRecommender(self._history_file, headroom_percent=30).recommend_server()
+
+        # 1.6 vCPUs are used, but 16 GiB of memory must be kept
+        self.assertEqual(recommendation[SCALER_CONFIG_SERVER_INSTANCE_TYPE_KEY], 'm5.xlarge')
+
+    def test_recommend_server_with_memory_picks_cheapest(self):
+        self._write_history([{
+            'role': 'server', 'instance_type': 'c5.2xlarge',
+            'cpu_utilization': [10.0, 15.0], 'memory_utilization': [10.0, 15.0]
+        }])
+
+        recommendation = SizeRecommender(self._history_file, headroom_percent=30).recommend_server()
+
+        self.assertEqual(recommendation[SCALER_CONFIG_SERVER_INSTANCE_TYPE_KEY], 'c5.large')
+
+    def test_recommend_unreachable_headroom_raise_runtime_error(self):
+        self._write_history([{
+            'role': 'server', 'instance_type': 'r5.2xlarge',
+            'cpu_utilization': [100.0], 'memory_utilization': [100.0]
+        }])
+
+        with self.assertRaises(RuntimeError):
+            SizeRecommender(self._history_file, headroom_percent=30).recommend_server()
+
+    @patch('size_recommender.boto3')
+    @patch('size_recommender.StackOutputs')
+    def test_collect_cloudwatch_utilization_saved_to_history(self, mock_stack_outputs, mock_boto3):
+        mock_stack_outputs.return_value.get.return_value = 'test-output'
+        mock_cloudwatch = Mock()
+        mock_cloudwatch.get_metric_statistics.return_value = {'Datapoints': [
+            {'Timestamp': datetime(2022, 1, 1, 0, 1, tzinfo=timezone.utc), 'Maximum': 60.0},
+            {'Timestamp': datetime(2022, 1, 1, 0, 0, tzinfo=timezone.utc), 'Maximum': 50.0}
+        ]}
+        mock_boto3.client.return_value = mock_cloudwatch
+        config = AutoScalerConfig()
+        config.set(SCALER_CONFIG_AWS_REGION_KEY, 'us-east-1')
+
+        recommender = SizeRecommender(self._history_file)
+        recommender.collect(config)
+        recommender.save()
+
+        with open(self._history_file) as history:
+            records = json.load(history)
+        self.assertEqual([record['role'] for record in records], ['client', 'server'])
+        self.assertEqual(records[0]['cpu_units'], SCALER_CONFIG_DEFAULT_CLIENT_TASK_CPU_UNITS)
+        self.assertEqual(records[0]['cpu_utilization'], [50.0, 60.0])
+        self.assertEqual(records[1]['instance_type'], SCALER_CONFIG_DEFAULT_SERVER_INSTANCE_TYPE)
+
+    def _write_history(self, records):
+        with open(self._history_file, 'w') as history:
+            json.dump(records, history)
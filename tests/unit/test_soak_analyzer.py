@@ -0,0 +1,105 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from constants import *
+from soak_analyzer import SoakAnalyzer, fit_trend, read_process_samples
+
+TEST_START_TIME = 1672574400.0
+
+
+def _write_samples(path: str, hours: float, working_set_growth_per_hour: float, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    with open(path, 'w') as samples_file:
+        samples_file.write(','.join(SOAK_SAMPLE_COLUMNS) + '\n')
+        for index in range(int(hours * 3600 / 10)):
+            seconds = index * 10
+            working_set = 2e9 + working_set_growth_per_hour * seconds / 3600 + rng.normal(0, 2e7)
+            # Occasional spikes, e.g. garbage collection, must not be mistaken for a trend
+            if index % 97 == 0:
+                working_set += 5e8
+            cpu_percent = '' if index == 0 else f'{40 + rng.normal(0, 3):.2f}'
+            samples_file.write(f'{TEST_START_TIME + seconds:.3f},1234,{working_set:.0f},{working_set * 1.1:.0f},'
+                               f'{5000 + int(rng.integers(-20, 20))},64,{cpu_percent}\n')
+
+
+class TestSoakAnalyzer(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._temp_dir.cleanup)
+        self._samples_path = os.path.join(self._temp_dir.name, 'server_process.csv')
+
+    def test_read_process_samples_header_skipped_missing_values_nan(self):
+        _write_samples(self._samples_path, 0.01, 0)
+
+        samples = list(read_process_samples(self._samples_path))
+
+        self.assertEqual(len(samples), 3)
+        self.assertEqual(samples[0][0], TEST_START_TIME)
+        self.assertTrue(np.isnan(samples[0][1]['cpu_percent']))
+
+    def test_fit_trend_outliers_ignored(self):
+        x = np.arange(20, dtype=np.float64)
+        y = 2 * x + 10
+        y[[3, 11]] = 1000
+
+        trend = fit_trend(x, y)
+
+        self.assertAlmostEqual(trend['slope'], 2)
+        self.assertAlmostEqual(trend['intercept'], 10)
+        self.assertLessEqual(trend['slope_lower'], 2)
+        self.assertGreaterEqual(trend['slope_upper'], 2)
+        self.assertGreater(trend['increase_confidence'], 0.99)
+
+    def test_get_report_growing_working_set_flagged_as_leak(self):
+        _write_samples(self._samples_path, 6, 1e8)
+        analyzer = SoakAnalyzer(window_seconds=600)
+        analyzer.add_process_samples(self._samples_path)
+
+        report = analyzer.get_report()
+
+        working_set = report['series']['working_set_bytes']
+        self.assertEqual(working_set['verdict'], 'leak')
+        self.assertAlmostEqual(working_set['slope_per_hour'], 1e8, delta=1e7)
+        self.assertGreater(working_set['confidence'], 0.99)
+        self.assertIn('private_bytes', report['flagged'])
+        self.assertEqual(report['series']['cpu_percent']['verdict'], 'stable')
+        self.assertEqual(report['series']['handle_count']['verdict'], 'stable')
+
+    def test_get_report_stable_run_nothing_flagged(self):
+        _write_samples(self._samples_path, 6, 0)
+        analyzer = SoakAnalyzer(window_seconds=600)
+        analyzer.add_process_samples(self._samples_path)
+
+        report = analyzer.get_report()
+
+        self.assertEqual(report['flagged'], [])
+        self.assertLess(abs(report['series']['working_set_bytes']['drift_percent']), DEFAULT_SOAK_MIN_DRIFT_PERCENT)
+
+    def test_get_report_tick_time_degradation_from_server_log(self):
+        log_path = os.path.join(self._temp_dir.name, 'Server.log')
+        with open(log_path, 'w') as log_file:
+            for minute in range(120):
+                log_file.write(f'<{minute // 60:02d}:{minute % 60:02d}:00.000> (Server) - '
+                               f'Tick time: {10 + minute * 0.1:.2f} ms\n')
+        analyzer = SoakAnalyzer(window_seconds=600)
+        analyzer.add_server_log(log_path)
+
+        report = analyzer.get_report()
+
+        self.assertEqual(list(report['series']), ['tick_time_ms'])
+        self.assertEqual(report['flagged'], ['tick_time_ms'])
+        self.assertEqual(report['series']['tick_time_ms']['verdict'], 'degradation')
+
+    def test_get_report_too_few_windows_series_skipped(self):
+        _write_samples(self._samples_path, 0.5, 1e8)
+        analyzer = SoakAnalyzer(window_seconds=600)
+        analyzer.add_process_samples(self._samples_path)
+
+        self.assertEqual(analyzer.get_report()['series'], {})
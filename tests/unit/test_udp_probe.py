@@ -0,0 +1,74 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import asyncio
+import socket
+import time
+import unittest
+
+from udp_probe import UdpProbeSender, get_rtt_bin, get_rtt_percentile_ms, merge_rtt_histograms, run_echo, \
+    summarize_step
+
+TEST_HOST = '127.0.0.1'
+
+
+def _get_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind((TEST_HOST, 0))
+        return sock.getsockname()[1]
+
+
+class TestUdpProbe(unittest.TestCase):
+
+    def test_run_local_echo_every_packet_echoed(self):
+        port = _get_free_port()
+
+        async def probe():
+            echo = asyncio.create_task(run_echo(port, 2, TEST_HOST))
+            await asyncio.sleep(0.1)
+            sender = UdpProbeSender(packet_bytes=64)
+            steps = await sender.run(TEST_HOST, port, [200, 400], step_seconds=0.5, drain_seconds=0.2)
+            return steps, await echo
+
+        steps, echo = asyncio.run(probe())
+
+        self.assertEqual([step['rate_pps'] for step in steps], [200, 400])
+        for step in steps:
+            self.assertGreater(step['sent'], 0)
+            self.assertEqual(step['received'], step['sent'])
+            self.assertEqual(step['bytes_sent'], step['sent'] * 64)
+            self.assertEqual(sum(step['rtt_histogram'].values()), step['received'])
+        self.assertEqual(echo['echoed_packets'], sum(step['sent'] for step in steps))
+
+    def test_run_steps_ended_before_start_skipped(self):
+        port = _get_free_port()
+
+        async def probe():
+            sender = UdpProbeSender()
+            return await sender.run(TEST_HOST, port, [100, 100, 100], step_seconds=1, start_at=time.time() - 1.5,
+                                    drain_seconds=0)
+
+        steps = asyncio.run(probe())
+
+        self.assertEqual([step['step'] for step in steps], [1, 2])
+        self.assertLess(steps[0]['seconds'], 1)
+
+    def test_init_packet_smaller_than_header_raise_runtime_error(self):
+        with self.assertRaises(RuntimeError):
+            UdpProbeSender(packet_bytes=8)
+
+    def test_get_rtt_percentile_ms_merged_histograms(self):
+        histogram = merge_rtt_histograms([{get_rtt_bin(1000): 98}, {str(get_rtt_bin(50000)): 2}])
+
+        self.assertAlmostEqual(get_rtt_percentile_ms(histogram, 50), 1.0, delta=0.06)
+        self.assertAlmostEqual(get_rtt_percentile_ms(histogram, 99), 50.0, delta=2.6)
+        self.assertIsNone(get_rtt_percentile_ms({}, 50))
+
+    def test_summarize_step_rates_and_loss(self):
+        summary = summarize_step({'step': 0, 'rate_pps': 1000, 'seconds': 2, 'sent': 2000, 'received': 1900,
+                                  'not_sent': 0, 'bytes_sent': 400000, 'rtt_histogram': {get_rtt_bin(500): 1900}})
+
+        self.assertEqual(summary['sent_pps'], 1000)
+        self.assertEqual(summary['received_pps'], 950)
+        self.assertAlmostEqual(summary['loss_percent'], 5)
+        self.assertAlmostEqual(summary['throughput_mbps'], 1.6)
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+UDP network capacity probe. A sender paces sequence-numbered, timestamped packets at increasing rates to an echo and
+measures the sent and echoed packet rates, throughput, loss and round trip time of every rate step. The echo sends every
+packet back to its source. Only uses the Python standard library, so it runs as is in the network probe tasks, which
+download it at start (see network_probe.py)
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import socket
+import struct
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+# Magic, step index, sequence number and send time in nanoseconds of the sender clock
+PROBE_HEADER = struct.Struct('!4sIIQ')
+PROBE_MAGIC = b'MPSP'
+DEFAULT_PACKET_BYTES = 200
+DEFAULT_STEP_SECONDS = 10
+DEFAULT_DRAIN_SECONDS = 2
+# Packets due since the previous batch are sent in a batch every interval, so high rates don't need a timer per packet
+SEND_INTERVAL_SECONDS = 0.001
+SOCKET_BUFFER_BYTES = 4 * 1024 * 1024
+# Packets are not sent while this many bytes are waiting in the transport. They are counted as not sent, which marks
+# the step as limited by the sender rather than by the network
+MAX_WRITE_BUFFER_BYTES = 1024 * 1024
+# Round trip times are counted in log-spaced bins, each 5% wider than the previous, so the results of every sender stay
+# small and can be merged
+RTT_BIN_GROWTH = 1.05
+RTT_PERCENTILES = [50, 95, 99]
+
+
+def get_rtt_bin(rtt_us: float) -> int:
+    return int(math.log(max(rtt_us, 1.0)) / math.log(RTT_BIN_GROWTH))
+
+
+def get_rtt_percentile_ms(histogram: Dict, percentile: float) -> Optional[float]:
+    """
+    Get a percentile of the round trip times counted in a histogram
+    :param histogram: Count of every round trip time bin, keyed by the bin as an integer or a string
+    :param percentile: Percentile between 0 and 100
+    :return: Upper edge of the bin of the percentile in milliseconds, or None if the histogram is empty
+    """
+    bins = sorted((int(rtt_bin), count) for rtt_bin, count in histogram.items())
+    total = sum(count for _, count in bins)
+    if not total:
+        return None
+    rank = max(math.ceil(total * percentile / 100), 1)
+    cumulative = 0
+    for rtt_bin, count in bins:
+        cumulative += count
+        if cumulative >= rank:
+            return RTT_BIN_GROWTH ** (rtt_bin + 1) / 1000
+    return RTT_BIN_GROWTH ** (bins[-1][0] + 1) / 1000
+
+
+def merge_rtt_histograms(histograms: List[Dict]) -> Dict[int, int]:
+    merged = {}
+    for histogram in histograms:
+        for rtt_bin, count in histogram.items():
+            merged[int(rtt_bin)] = merged.get(int(rtt_bin), 0) + count
+    return merged
+
+
+def summarize_step(step: Dict) -> Dict:
+    """
+    Get the rates, loss and round trip time percentiles of a step
+    :param step: Counters of the step, of one sender or summed over senders
+    :return: Summary of the step
+    """
+    seconds = step['seconds'] or 1
+    summary = {
+        'step': step['step'],
+        'offered_pps': step['rate_pps'],
+        'sent_pps': step['sent'] / seconds,
+        'received_pps': step['received'] / seconds,
+        'throughput_mbps': step['bytes_sent'] * 8 / seconds / 1e6,
+        'loss_percent': 100 * (step['sent'] - step['received']) / step['sent'] if step['sent'] else 0.0,
+        'not_sent': step['not_sent']
+    }
+    for percentile in RTT_PERCENTILES:
+        summary[f'rtt_p{percentile}_ms'] = get_rtt_percentile_ms(step['rtt_histogram'], percentile)
+    summary['rtt_max_ms'] = get_rtt_percentile_ms(step['rtt_histogram'], 100)
+    return summary
+
+
+class UdpEchoProtocol(asyncio.DatagramProtocol):
+    """
+    Send every received datagram back to its source
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._transport = None
+        self.packets = 0
+        self.bytes = 0
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self._transport = transport
+
+    def datagram_received(self, data: bytes, address: tuple) -> None:
+        self._transport.sendto(data, address)
+        self.packets += 1
+        self.bytes += len(data)
+
+
+async def run_echo(port: int, duration_seconds: float, host: str = '0.0.0.0') -> Dict:
+    """
+    Echo the datagrams received on a port for a while
+    :param port: UDP port to listen on
+    :param duration_seconds: Time to echo for
+    :param host: Address to listen on
+    :return: Number of echoed packets and bytes
+    """
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        UdpEchoProtocol, sock=_create_socket(lambda sock: sock.bind((host, port))))
+    try:
+        await asyncio.sleep(duration_seconds)
+    finally:
+        transport.close()
+    return {'echoed_packets': protocol.packets, 'echoed_bytes': protocol.bytes}
+
+
+class UdpProbeSender(asyncio.DatagramProtocol):
+    """
+    Send packets at a rate per step to an echo and count the echoed packets and their round trip times
+    """
+
+    def __init__(self, packet_bytes: int = DEFAULT_PACKET_BYTES):
+        """
+        :param packet_bytes: Size of the probe packets, including the probe header
+        """
+        super().__init__()
+        if packet_bytes < PROBE_HEADER.size:
+            raise RuntimeError(f'Probe packets need at least {PROBE_HEADER.size} bytes')
+        self._packet_bytes = packet_bytes
+        self._transport = None
+        self._steps = {}
+        self.errors = 0
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self._transport = transport
+
+    def datagram_received(self, data: bytes, address: tuple) -> None:
+        received_ns = time.perf_counter_ns()
+        if len(data) < PROBE_HEADER.size:
+            return
+        magic, step_index, _, sent_ns = PROBE_HEADER.unpack_from(data)
+        step = self._steps.get(step_index)
+        if magic != PROBE_MAGIC or step is None:
+            return
+        step['received'] += 1
+        rtt_bin = get_rtt_bin((received_ns - sent_ns) / 1000)
+        step['rtt_histogram'][rtt_bin] = step['rtt_histogram'].get(rtt_bin, 0) + 1
+
+    def error_received(self, exc: Exception) -> None:
+        # e.g. ICMP port unreachable while the echo isn't listening yet
+        self.errors += 1
+
+    async def run(self, host: str, port: int, rates: List[int], step_seconds: float = DEFAULT_STEP_SECONDS,
+                  start_at: float = 0, drain_seconds: float = DEFAULT_DRAIN_SECONDS) -> List[Dict]:
+        """
+        Send at every rate in turn. Steps are scheduled from the start time, so the steps of senders started with the
+        same start time are aligned. Steps which ended before the sender started are skipped
+        :param host: Address of the echo
+        :param port: UDP port of the echo
+        :param rates: Packets per second of every step
+        :param step_seconds: Duration of every step
+        :param start_at: Epoch time of the start of the first step. The sender starts right away if it is 0
+        :param drain_seconds: Time to wait for the echoes of the last step
+        :return: Counters of every step
+        """
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: self, sock=_create_socket(lambda sock: sock.connect((host, port))))
+        start_at = start_at or time.time()
+        try:
+            for index, rate in enumerate(rates):
+                step_end = start_at + (index + 1) * step_seconds
+                if time.time() >= step_end:
+                    continue
+                await asyncio.sleep(max(start_at + index * step_seconds - time.time(), 0))
+                await self._send_step(index, rate, step_end - time.time())
+            await asyncio.sleep(drain_seconds)
+        finally:
+            transport.close()
+        return [self._steps[index] for index in sorted(self._steps)]
+
+    async def _send_step(self, index: int, rate: int, seconds: float) -> None:
+        step = {'step': index, 'rate_pps': rate, 'seconds': seconds, 'sent': 0, 'received': 0, 'not_sent': 0,
+                'bytes_sent': 0, 'rtt_histogram': {}}
+        self._steps[index] = step
+        payload = bytearray(self._packet_bytes)
+        total = int(rate * seconds)
+        due_count = 0
+        start = time.perf_counter()
+        while due_count < total:
+            elapsed = time.perf_counter() - start
+            if elapsed >= seconds:
+                break
+            previous_due_count = due_count
+            due_count = min(int(rate * elapsed) + 1, total)
+            if self._transport.get_write_buffer_size() > MAX_WRITE_BUFFER_BYTES:
+                step['not_sent'] += due_count - previous_due_count
+            else:
+                for sequence in range(previous_due_count, due_count):
+                    PROBE_HEADER.pack_into(payload, 0, PROBE_MAGIC, index, sequence, time.perf_counter_ns())
+                    self._transport.sendto(bytes(payload))
+                step['sent'] += due_count - previous_due_count
+                step['bytes_sent'] += (due_count - previous_due_count) * self._packet_bytes
+            await asyncio.sleep(SEND_INTERVAL_SECONDS)
+        step['seconds'] = time.perf_counter() - start
+
+
+def _create_socket(set_up) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for option in [socket.SO_RCVBUF, socket.SO_SNDBUF]:
+        sock.setsockopt(socket.SOL_SOCKET, option, SOCKET_BUFFER_BYTES)
+    set_up(sock)
+    sock.setblocking(False)
+    return sock
+
+
+def _put_result(result: Dict, result_url: str) -> None:
+    """
+    Upload the result with a presigned URL, so the probe doesn't need the AWS SDK or credentials
+    """
+    request = urllib.request.Request(result_url, data=json.dumps(result).encode('utf-8'), method='PUT')
+    with urllib.request.urlopen(request) as response:
+        response.read()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    parser_echo = subparsers.add_parser('echo', help='Echo the probe packets')
+    parser_echo.add_argument('--port', type=int, required=True)
+    parser_echo.add_argument('--duration-seconds', type=float, required=True)
+    parser_send = subparsers.add_parser('send', help='Send the probe packets at increasing rates')
+    parser_send.add_argument('--host', required=True, help='Address of the echo')
+    parser_send.add_argument('--port', type=int, required=True)
+    parser_send.add_argument('--rate', type=int, action='append', required=True,
+                             help='Packets per second of a step. Repeat it for every step')
+    parser_send.add_argument('--step-seconds', type=float, default=DEFAULT_STEP_SECONDS)
+    parser_send.add_argument('--packet-bytes', type=int, default=DEFAULT_PACKET_BYTES)
+    parser_send.add_argument('--start-at', type=float, default=0, help='Epoch time of the start of the first step')
+    parser_send.add_argument('--sender-id', default='', help='ID of the sender recorded in the result')
+    parser_send.add_argument('--result-url', default='', help='Presigned URL to upload the result to')
+    args = parser.parse_args()
+
+    if args.command == 'echo':
+        print(json.dumps(asyncio.run(run_echo(args.port, args.duration_seconds))))
+        return
+
+    sender = UdpProbeSender(args.packet_bytes)
+    steps = asyncio.run(sender.run(args.host, args.port, args.rate, args.step_seconds, args.start_at))
+    result = {'sender_id': args.sender_id, 'packet_bytes': args.packet_bytes, 'errors': sender.errors,
+              'steps': steps}
+    for step in steps:
+        summary = summarize_step(step)
+        print(f'Step {summary["step"]}: {summary["sent_pps"]:.0f} pps sent, {summary["received_pps"]:.0f} pps '
+              f'echoed, {summary["loss_percent"]:.2f}% loss, p99 RTT {summary["rtt_p99_ms"]} ms')
+    if args.result_url:
+        _put_result(result, args.result_url)
+    if not steps:
+        print('[Error] Every step ended before the sender started')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()